@@ -0,0 +1,107 @@
+"""
+批量目标拆分
+将 -m 批量文件拆分为每个目标一个任务，交给任务队列并行执行
+"""
+
+from typing import Iterator, List, Tuple
+
+from .command_builder import CommandBuilder
+from .job_queue import JobStatus
+
+
+def iter_batch_targets(file_path: str) -> Iterator[str]:
+    """逐行读取批量目标文件（忽略空行和 # 开头的注释行，不去重）"""
+    with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+        for line in f:
+            target = line.strip()
+            if target and not target.startswith('#'):
+                yield target
+
+
+def read_batch_targets(file_path: str) -> List[str]:
+    """
+    读取批量目标文件
+    
+    每行一个目标，忽略空行和 # 开头的注释行，重复目标只保留第一次出现
+    """
+    targets = []
+    seen = set()
+    for target in iter_batch_targets(file_path):
+        if target not in seen:
+            seen.add(target)
+            targets.append(target)
+    return targets
+
+
+def fan_out_batch(scheduler, builder: CommandBuilder, max_concurrent: int = 4,
+                  priority: int = 0, scan_mode: str = "", targets: List[str] = None) -> Tuple[str, list]:
+    """
+    将批量扫描拆分为每个目标一个任务
+    
+    参数:
+        scheduler: JobScheduler
+        builder: 已配置批量文件（-m）的命令构建器，其余选项对每个目标保持一致
+        max_concurrent: 该批任务的最大并发数（同时受全局和单主机限制）
+        priority: 任务优先级
+        scan_mode: 扫描模式名称
+        targets: 目标列表（默认从构建器的批量文件读取）
+    
+    返回:
+        (group_id, 任务列表)
+    """
+    options = builder.snapshot()
+    if targets is None:
+        targets = read_batch_targets(options.get('_file', ''))
+    if not targets:
+        raise ValueError("批量文件中没有有效的目标")
+    
+    group_id = scheduler.create_group("batch", max_concurrent)
+    jobs = []
+    for target in targets:
+        target_builder = CommandBuilder.from_snapshot(options)
+        target_builder.set_file("")
+        target_builder.set_target(target)
+        jobs.append(scheduler.submit(target_builder, priority=priority,
+                                     scan_mode=scan_mode, group_id=group_id))
+    return group_id, jobs
+
+
+def summarize_jobs(jobs: list) -> dict:
+    """
+    汇总一组任务的执行情况
+    
+    返回:
+        {total, pending, running, finished, failed, vulnerable,
+         wall_time: 首个任务开始到最后结束的耗时, serial_time: 各任务耗时之和}
+    """
+    summary = {
+        'total': len(jobs),
+        'pending': 0,
+        'running': 0,
+        'finished': 0,
+        'failed': 0,
+        'vulnerable': 0,
+        'wall_time': 0.0,
+        'serial_time': 0.0,
+    }
+    starts = []
+    ends = []
+    for job in jobs:
+        if job.status == JobStatus.PENDING:
+            summary['pending'] += 1
+        elif job.status == JobStatus.RUNNING:
+            summary['running'] += 1
+        else:
+            summary['finished'] += 1
+            if job.status == JobStatus.FAILED:
+                summary['failed'] += 1
+        if job.store.get_summary().get('injection_found'):
+            summary['vulnerable'] += 1
+        if job.started_at:
+            starts.append(job.started_at)
+            ends.append(job.started_at + job.elapsed)
+            summary['serial_time'] += job.elapsed
+    
+    if starts:
+        summary['wall_time'] = max(ends) - min(starts)
+    return summary
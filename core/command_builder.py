@@ -4,12 +4,26 @@
 """
 
 import os
+import copy
+import shlex
 from typing import Optional, Dict, List
 
 
 class CommandBuilder:
     """智能命令构建器"""
     
+    # 执行动作类选项（信息查询、枚举、提取、搜索、操作系统、文件操作）
+    ACTION_OPTIONS = (
+        '_current_db', '_current_user', '_banner', '_hostname', '_is_dba',
+        '_users', '_privileges', '_roles',
+        '_dbs', '_tables', '_columns', '_schema', '_count', '_comments', '_exclude_sysdbs', '_exclude',
+        '_dump', '_dump_all', '_passwords', '_start', '_stop', '_first', '_last', '_where', '_sql_query',
+        '_search', '_search_columns', '_search_tables', '_search_dbs',
+        '_target_db', '_target_table', '_target_columns',
+        '_os_shell', '_os_pwn', '_os_cmd', '_priv_esc',
+        '_file_read', '_file_write', '_file_dest',
+    )
+    
     def __init__(self, sqlmap_path: str = "python sqlmap.py"):
         """
         初始化命令构建器
@@ -44,6 +58,7 @@ class CommandBuilder:
         self._code = None        # HTTP 状态码
         self._text_only = False
         self._titles = False
+        self._use_fingerprint = False  # 使用目标指纹缓存跳过重复检测（界面选项，不生成参数）
         
         # 性能
         self._threads = 1
@@ -51,6 +66,7 @@ class CommandBuilder:
         self._retries = 3
         self._delay = 0
         self._time_sec = 5
+        self._auto_tune = False  # 启动前按目标响应时间自动选择性能参数（界面选项，不生成参数）
         
         # 通用选项
         self._batch = True
@@ -67,6 +83,7 @@ class CommandBuilder:
         self._no_cast = False
         self._hpp = False
         self._chunked = False
+        self._project = ""  # 所属项目（界面选项，不生成参数，用于项目间公平调度）
         
         # 绕过
         self._tamper = ""
@@ -99,6 +116,7 @@ class CommandBuilder:
         self._count = False
         self._comments = False
         self._exclude_sysdbs = False
+        self._exclude = ""  # 排除的数据库标识符（正则）
         
         # 提取
         self._dump = False
@@ -108,6 +126,9 @@ class CommandBuilder:
         self._stop = None
         self._first = None
         self._last = None
+        self._dump_format = ""  # 导出格式 (CSV/HTML/SQLITE)
+        self._where = ""  # 提取数据的 WHERE 条件（--where，如增量提取新增的行）
+        self._sql_query = ""  # 执行的 SELECT 语句（--sql-query）
         
         # 搜索
         self._search = False
@@ -188,6 +209,16 @@ class CommandBuilder:
         self._risk = max(0, min(3, risk))
         return self
     
+    def set_use_fingerprint(self, enabled: bool = True) -> 'CommandBuilder':
+        """设置使用目标指纹缓存（提交时自动补充 -p/--dbms/--technique/--prefix/--suffix）"""
+        self._use_fingerprint = enabled
+        return self
+    
+    def set_project(self, project: str) -> 'CommandBuilder':
+        """设置所属项目（派生任务通过选项快照继承）"""
+        self._project = project.strip()
+        return self
+    
     def set_technique(self, technique: str) -> 'CommandBuilder':
         """设置注入技术 (B E U S T Q)"""
         self._technique = technique.upper()
@@ -250,6 +281,11 @@ class CommandBuilder:
         self._time_sec = max(1, seconds)
         return self
     
+    def set_auto_tune(self, enabled: bool = True) -> 'CommandBuilder':
+        """设置自动调优（任务启动前测量目标响应时间，自动选择 --time-sec/--timeout/--retries/--threads）"""
+        self._auto_tune = enabled
+        return self
+    
     # ==================== 通用选项 ====================
     
     def set_batch(self, enabled: bool = True) -> 'CommandBuilder':
@@ -450,6 +486,11 @@ class CommandBuilder:
         self._exclude_sysdbs = enabled
         return self
     
+    def set_exclude(self, pattern: str) -> 'CommandBuilder':
+        """排除匹配正则的数据库标识符（--exclude，如已提取完成的表）"""
+        self._exclude = pattern.strip()
+        return self
+    
     # ==================== 提取选项 ====================
     
     def dump_data(self, enabled: bool = True, db: str = "", table: str = "", columns: str = "") -> 'CommandBuilder':
@@ -479,6 +520,22 @@ class CommandBuilder:
         self._stop = stop
         return self
     
+    def set_where(self, condition: str) -> 'CommandBuilder':
+        """提取数据时的 WHERE 条件（--where）"""
+        self._where = condition.strip()
+        return self
+    
+    def sql_query(self, query: str) -> 'CommandBuilder':
+        """执行 SELECT 语句（--sql-query）"""
+        self._sql_query = query.strip()
+        return self
+    
+    def set_dump_format(self, fmt: str) -> 'CommandBuilder':
+        """设置导出格式 (CSV/HTML/SQLITE，空字符串表示默认)"""
+        fmt = (fmt or "").strip().upper()
+        self._dump_format = fmt if fmt in ("CSV", "HTML", "SQLITE") else ""
+        return self
+    
     # ==================== 搜索选项 ====================
     
     def search_columns(self, columns: str) -> 'CommandBuilder':
@@ -757,6 +814,8 @@ class CommandBuilder:
             parts.append('--comments')
         if self._exclude_sysdbs:
             parts.append('--exclude-sysdbs')
+        if self._exclude:
+            parts.append(f'--exclude={self.quote_arg(self._exclude)}')
         
         # 提取选项
         if self._dump:
@@ -769,6 +828,12 @@ class CommandBuilder:
             parts.append(f'--start={self._start}')
         if self._stop is not None:
             parts.append(f'--stop={self._stop}')
+        if self._dump_format:
+            parts.append(f'--dump-format={self._dump_format}')
+        if self._where:
+            parts.append(f'--where={self.quote_arg(self._where)}')
+        if self._sql_query:
+            parts.append(f'--sql-query={self.quote_arg(self._sql_query)}')
         
         # 搜索选项
         if self._search:
@@ -812,6 +877,42 @@ class CommandBuilder:
         
         return ' '.join(parts)
     
+    # ==================== 选项快照 ====================
+    
+    def snapshot(self) -> Dict:
+        """导出当前全部选项的快照（深拷贝，之后修改构建器不影响快照）"""
+        options = {key: copy.deepcopy(value) for key, value in self.__dict__.items()
+                   if key.startswith('_')}
+        options['sqlmap_path'] = self.sqlmap_path
+        return options
+    
+    @staticmethod
+    def quote_arg(value: str) -> str:
+        """把文本转义为单个 shell 参数（命令以 shell=True 执行，SQL 条件中的引号、$ 等不能交给 shell 解释）"""
+        if os.name == 'nt':
+            return '"' + value.replace('"', '\\"') + '"'
+        return shlex.quote(value)
+    
+    @classmethod
+    def from_snapshot(cls, options: Dict) -> 'CommandBuilder':
+        """从选项快照恢复构建器"""
+        builder = cls(options.get('sqlmap_path', "python sqlmap.py"))
+        for key, value in options.items():
+            if key.startswith('_') and hasattr(builder, key):
+                setattr(builder, key, copy.deepcopy(value))
+        return builder
+    
+    def clear_actions(self) -> 'CommandBuilder':
+        """清除所有执行动作类选项，保留目标、检测、性能和绕过设置（用于拆分任务）"""
+        defaults = CommandBuilder(self.sqlmap_path)
+        for key in self.ACTION_OPTIONS:
+            setattr(self, key, copy.deepcopy(getattr(defaults, key)))
+        return self
+    
+    def get_target_label(self) -> str:
+        """获取目标描述（URL、批量文件或请求包文件）"""
+        return self._request_file or self._file or self._target
+    
     def get_command_preview(self) -> str:
         """获取命令预览（用于显示）"""
         try:
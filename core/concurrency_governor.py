@@ -0,0 +1,286 @@
+"""
+自适应并发调节
+定时采样本机 CPU 负载、内存占用和界面事件循环延迟，在设定范围内调整同时运行的任务数；
+内存超过暂停阈值时暂停最近启动的任务，回落后再恢复
+"""
+
+import csv
+import os
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+
+
+def cpu_percent() -> Optional[float]:
+    """CPU 负载百分比（1 分钟平均负载 / CPU 核数），不支持的系统返回 None（Windows 见 system_cpu_times）"""
+    try:
+        load = os.getloadavg()[0]
+    except (AttributeError, OSError):
+        return None
+    return min(100.0, load / (os.cpu_count() or 1) * 100)
+
+
+def system_cpu_times() -> Optional[Tuple[int, int]]:
+    """
+    Windows 系统累计 CPU 时间 (空闲, 总计)，单位 100ns；非 Windows 或调用失败返回 None
+    
+    CPU 占用率由两次采样的差值计算：1 - Δ空闲 / Δ总计（内核时间已包含空闲时间）
+    """
+    if os.name != 'nt':
+        return None
+    try:
+        import ctypes
+        
+        class FILETIME(ctypes.Structure):
+            _fields_ = [("dwLowDateTime", ctypes.c_ulong), ("dwHighDateTime", ctypes.c_ulong)]
+        
+        idle, kernel, user = FILETIME(), FILETIME(), FILETIME()
+        if not ctypes.windll.kernel32.GetSystemTimes(ctypes.byref(idle), ctypes.byref(kernel), ctypes.byref(user)):
+            return None
+        ticks = [(t.dwHighDateTime << 32) | t.dwLowDateTime for t in (idle, kernel, user)]
+        return ticks[0], ticks[1] + ticks[2]
+    except Exception:
+        return None
+
+
+def cpu_sampling_supported() -> bool:
+    """当前系统能否采样 CPU 负载"""
+    return os.name == 'nt' or hasattr(os, 'getloadavg')
+
+
+def memory_percent() -> Optional[float]:
+    """内存占用百分比，不支持的系统返回 None"""
+    if os.name == 'nt':
+        try:
+            import ctypes
+            
+            class MEMORYSTATUSEX(ctypes.Structure):
+                _fields_ = [("dwLength", ctypes.c_ulong), ("dwMemoryLoad", ctypes.c_ulong),
+                            ("ullTotalPhys", ctypes.c_ulonglong), ("ullAvailPhys", ctypes.c_ulonglong),
+                            ("ullTotalPageFile", ctypes.c_ulonglong), ("ullAvailPageFile", ctypes.c_ulonglong),
+                            ("ullTotalVirtual", ctypes.c_ulonglong), ("ullAvailVirtual", ctypes.c_ulonglong),
+                            ("ullAvailExtendedVirtual", ctypes.c_ulonglong)]
+            
+            status = MEMORYSTATUSEX()
+            status.dwLength = ctypes.sizeof(MEMORYSTATUSEX)
+            ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status))
+            return float(status.dwMemoryLoad)
+        except Exception:
+            return None
+    
+    try:
+        info = {}
+        with open("/proc/meminfo") as f:
+            for line in f:
+                name, _sep, value = line.partition(':')
+                info[name] = int(value.split()[0])
+        return (1 - info['MemAvailable'] / info['MemTotal']) * 100
+    except (OSError, KeyError, ValueError, ZeroDivisionError):
+        return None
+
+
+@dataclass
+class GovernorSample:
+    """一次采样及调节结果"""
+    timestamp: float
+    cpu: Optional[float]        # CPU 负载 %
+    memory: Optional[float]     # 内存占用 %
+    lag_ms: float               # 事件循环延迟（毫秒）
+    limit: int                  # 调节后的并发上限
+    running: int                # 运行中任务数（含暂停）
+    paused: int                 # 暂停的任务数
+    pending: int                # 排队任务数
+    action: str = ""            # 本次调节动作描述
+
+
+class ConcurrencyGovernor(QObject):
+    """
+    自适应并发调节器
+    
+    每个采样周期最多调整一步：任一指标超过高水位时并发上限减 1；
+    全部低于低水位且有任务排队、并发已占满时加 1；内存超过暂停阈值时暂停最近启动的任务
+    """
+    
+    sampled = pyqtSignal(object)   # GovernorSample
+    decision = pyqtSignal(str)     # 调节动作日志
+    
+    # 保留的采样数（默认 2 秒一次，约 2 小时）
+    HISTORY_SIZE = 3600
+    
+    # 调节后等待的采样周期数，避免新任务尚未产生负载就继续调整
+    COOLDOWN = 3
+    
+    def __init__(self, scheduler, min_jobs: int = 1, max_jobs: int = 8,
+                 cpu_high: float = 85, memory_high: float = 80, memory_pause: float = 90,
+                 lag_high_ms: float = 250, interval_ms: int = 2000, parent=None):
+        """
+        初始化并发调节器
+        
+        参数:
+            scheduler: JobScheduler
+            min_jobs / max_jobs: 并发上限的调节范围
+            cpu_high: CPU 负载高水位 (%)，低水位为其 60%
+            memory_high: 内存占用高水位 (%)，超过后不再增加并发并逐步降低
+            memory_pause: 内存暂停阈值 (%)，超过后暂停最近启动的任务
+            lag_high_ms: 事件循环延迟高水位（毫秒）
+            interval_ms: 采样间隔（毫秒）
+        """
+        super().__init__(parent)
+        self.scheduler = scheduler
+        self.configure(min_jobs, max_jobs, cpu_high, memory_high, memory_pause, lag_high_ms)
+        self.interval_ms = interval_ms
+        self.history = deque(maxlen=self.HISTORY_SIZE)
+        self._paused_jobs: List[int] = []  # 调节器暂停的任务（后暂停的先恢复）
+        self._cooldown = 0
+        self._last_tick = None
+        self._cpu_times = None  # Windows 上一次采样的系统 CPU 时间 (空闲, 总计)
+        
+        self._timer = QTimer(self)
+        self._timer.timeout.connect(self._on_tick)
+    
+    def configure(self, min_jobs: int, max_jobs: int, cpu_high: float,
+                  memory_high: float, memory_pause: float, lag_high_ms: float):
+        """修改调节参数"""
+        self.min_jobs = max(1, min_jobs)
+        self.max_jobs = max(self.min_jobs, max_jobs)
+        self.cpu_high = cpu_high
+        self.memory_high = memory_high
+        self.memory_pause = max(memory_high, memory_pause)
+        self.lag_high_ms = lag_high_ms
+    
+    @property
+    def active(self) -> bool:
+        return self._timer.isActive()
+    
+    def start(self):
+        """开始调节（当前并发上限先收敛到调节范围内）"""
+        limit = min(max(self.scheduler.queue.max_concurrent, self.min_jobs), self.max_jobs)
+        if limit != self.scheduler.queue.max_concurrent:
+            self.scheduler.set_limits(max_concurrent=limit)
+        self._last_tick = None
+        self._cooldown = 0
+        self._cpu_times = system_cpu_times()
+        self._timer.start(self.interval_ms)
+    
+    def stop(self):
+        """停止调节并恢复调节器暂停的任务"""
+        self._timer.stop()
+        while self._paused_jobs:
+            self.scheduler.resume_job(self._paused_jobs.pop())
+    
+    def export_csv(self, path: str):
+        """导出采样记录"""
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(["时间", "CPU负载%", "内存占用%", "事件循环延迟ms",
+                             "并发上限", "运行", "暂停", "排队", "动作"])
+            for sample in self.history:
+                writer.writerow([
+                    time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(sample.timestamp)),
+                    "" if sample.cpu is None else f"{sample.cpu:.1f}",
+                    "" if sample.memory is None else f"{sample.memory:.1f}",
+                    f"{sample.lag_ms:.0f}", sample.limit, sample.running,
+                    sample.paused, sample.pending, sample.action
+                ])
+    
+    def _on_tick(self):
+        """采样并调节"""
+        now = time.monotonic()
+        # 定时器触发的延后量即事件循环被阻塞的时间
+        lag_ms = 0.0
+        if self._last_tick is not None:
+            lag_ms = max(0.0, (now - self._last_tick) * 1000 - self.interval_ms)
+        self._last_tick = now
+        
+        cpu = self._sample_cpu()
+        memory = memory_percent()
+        action = self._adjust(cpu, memory, lag_ms)
+        
+        queue = self.scheduler.queue
+        running = queue.running_jobs()
+        sample = GovernorSample(
+            timestamp=time.time(), cpu=cpu, memory=memory, lag_ms=lag_ms,
+            limit=queue.max_concurrent, running=len(running),
+            paused=sum(1 for job in running if job.paused),
+            pending=len(queue.pending_jobs()), action=action
+        )
+        self.history.append(sample)
+        self.sampled.emit(sample)
+        if action:
+            self.decision.emit(action)
+    
+    def _adjust(self, cpu: Optional[float], memory: Optional[float], lag_ms: float) -> str:
+        """根据采样调整并发上限，返回动作描述（无动作返回空字符串）"""
+        queue = self.scheduler.queue
+        limit = queue.max_concurrent
+        # 只调整本机任务，远程执行节点上的任务不占用本机资源
+        running = [job for job in queue.running_jobs() if not job.worker]
+        self._paused_jobs = [job_id for job_id in self._paused_jobs
+                             if queue.get(job_id) and queue.get(job_id).paused]
+        
+        # 内存超过暂停阈值：暂停最近启动的任务，不等冷却
+        if memory is not None and memory >= self.memory_pause:
+            candidates = [job for job in running if not job.paused]
+            if len(candidates) > 1:
+                job = max(candidates, key=lambda j: j.started_at or 0)
+                if self.scheduler.pause_job(job.job_id):
+                    self.scheduler.append_log(job.job_id, f"[信息] 本机内存占用 {memory:.0f}%，任务已暂停")
+                    self._paused_jobs.append(job.job_id)
+                    self._set_limit(max(self.min_jobs, min(limit, len(candidates) - 1)))
+                    self._cooldown = self.COOLDOWN
+                    return f"内存占用 {memory:.0f}% ≥ {self.memory_pause:.0f}%，暂停最近启动的任务 #{job.job_id}"
+        
+        # 内存回落到高水位以下：恢复最后暂停的任务
+        if self._paused_jobs and (memory is None or memory < self.memory_high):
+            job_id = self._paused_jobs.pop()
+            self.scheduler.resume_job(job_id)
+            self.scheduler.append_log(job_id, "[信息] 本机内存占用回落，任务已恢复")
+            self._cooldown = self.COOLDOWN
+            return f"内存占用回落到 {memory or 0:.0f}%，恢复任务 #{job_id}"
+        
+        if self._cooldown > 0:
+            self._cooldown -= 1
+            return ""
+        
+        reasons = []
+        if cpu is not None and cpu >= self.cpu_high:
+            reasons.append(f"CPU {cpu:.0f}%")
+        if memory is not None and memory >= self.memory_high:
+            reasons.append(f"内存 {memory:.0f}%")
+        if lag_ms >= self.lag_high_ms:
+            reasons.append(f"界面延迟 {lag_ms:.0f}ms")
+        if reasons and limit > self.min_jobs:
+            self._set_limit(limit - 1)
+            return f"{'、'.join(reasons)} 过高，并发上限 {limit} → {limit - 1}"
+        
+        # CPU 负载未知（如 Windows 的首次采样）时不视为空闲；系统不支持采样时忽略该指标
+        cpu_idle = cpu < self.cpu_high * 0.6 if cpu is not None else not cpu_sampling_supported()
+        idle = (cpu_idle
+                and (memory is None or memory < self.memory_high * 0.9)
+                and lag_ms < self.lag_high_ms / 2)
+        if (idle and limit < self.max_jobs and queue.pending_jobs()
+                and queue.local_running_count() >= limit):
+            self._set_limit(limit + 1)
+            return f"负载较低（CPU {cpu or 0:.0f}%，内存 {memory or 0:.0f}%），并发上限 {limit} → {limit + 1}"
+        return ""
+    
+    def _sample_cpu(self) -> Optional[float]:
+        """CPU 负载百分比：Windows 按两次采样之间的 CPU 占用率，其他系统按平均负载"""
+        if os.name != 'nt':
+            return cpu_percent()
+        times = system_cpu_times()
+        previous, self._cpu_times = self._cpu_times, times
+        if times is None or previous is None:
+            return None
+        total = times[1] - previous[1]
+        if total <= 0:
+            return None
+        return min(100.0, max(0.0, (1 - (times[0] - previous[0]) / total) * 100))
+    
+    def _set_limit(self, limit: int):
+        if limit != self.scheduler.queue.max_concurrent:
+            self.scheduler.set_limits(max_concurrent=limit)
+            self._cooldown = self.COOLDOWN
@@ -0,0 +1,381 @@
+"""
+整库提取规划
+将整库提取拆分为每张表一个任务，按预估行数从小到大排队，小表的数据先返回；
+根据 --count 行数、列宽、注入技术和响应时间估算每张表提取需要的请求数和耗时
+"""
+
+import math
+import re
+import statistics
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from .command_builder import CommandBuilder
+from .job_queue import JobStatus, extract_host
+
+
+# 未测量响应时间时假定的单次请求耗时（秒）
+DEFAULT_LATENCY = 0.5
+
+# 列类型未知时假定的平均值长度（字符）和列数
+DEFAULT_COLUMN_WIDTH = 12
+DEFAULT_COLUMN_COUNT = 5
+
+# 报错注入单次请求能带回的字符数（sqlmap 对超长值分段读取）
+ERROR_CHUNK_CHARS = 30
+
+# 盲注每个字符的请求数（二分法 7 次比较 + 长度和结束判断）
+BLIND_REQUESTS_PER_CHAR = 8
+
+# 单个分片的目标耗时（秒），用于建议分片数
+SHARD_TARGET_SECONDS = 600
+
+# 技术代码按 sqlmap 的选用优先级排列（越靠前越快）
+TECHNIQUE_ORDER = ("U", "E", "Q", "B", "S", "T")
+
+TECHNIQUE_LABELS = {
+    "U": "联合查询",
+    "E": "报错注入",
+    "Q": "内联查询",
+    "B": "布尔盲注",
+    "S": "堆叠查询",
+    "T": "时间盲注",
+}
+
+
+def estimate_rows(table: str, db: str, counts: Dict[str, int]) -> Optional[int]:
+    """从 --count 结果中查找表的预估行数（未知返回 None）"""
+    if f"{db}.{table}" in counts:
+        return counts[f"{db}.{table}"]
+    for key, value in counts.items():
+        if key.rsplit('.', 1)[-1].lower() == table.lower():
+            return value
+    return None
+
+
+def plan_table_order(db: str, tables: List[str], counts: Dict[str, int] = None) -> List[Tuple[str, Optional[int]]]:
+    """
+    规划表的提取顺序
+    
+    已知行数的表按行数从小到大排列，未知行数的表保持原顺序排在最后
+    
+    返回:
+        [(表名, 预估行数或 None)]
+    """
+    counts = counts or {}
+    seen = set()
+    known = []
+    unknown = []
+    for table in tables:
+        if not table or table in seen:
+            continue
+        seen.add(table)
+        rows = estimate_rows(table, db, counts)
+        if rows is None:
+            unknown.append((table, None))
+        else:
+            known.append((table, rows))
+    known.sort(key=lambda item: item[1])
+    return known + unknown
+
+
+def plan_database_dump(scheduler, builder: CommandBuilder, db: str, tables: List[str],
+                       max_concurrent: int = 4, counts: Dict[str, int] = None,
+                       priority: int = 0, scan_mode: str = "") -> Tuple[str, list]:
+    """
+    将整库提取拆分为每张表一个任务（-D db -T table --dump）
+    
+    参数:
+        scheduler: JobScheduler
+        builder: 目标任务的命令构建器（提供目标、检测和性能设置，执行动作会被清除）
+        db: 数据库名
+        tables: 表名列表
+        max_concurrent: 并行提取的表数
+        counts: 已知的表行数 {db.table: 行数}，用于排序
+        priority: 任务优先级
+        scan_mode: 扫描模式名称
+    
+    返回:
+        (group_id, 任务列表)，任务按提交顺序（即执行顺序）排列
+    """
+    plan = plan_table_order(db, tables, counts)
+    if not plan:
+        raise ValueError(f"数据库 '{db}' 没有可提取的表")
+    
+    # 所有表共享同一会话，整组只占用一个单主机并发名额
+    options = (CommandBuilder.from_snapshot(builder.snapshot())
+               .clear_actions()
+               .set_flush_session(False)
+               .snapshot())
+    group_id = scheduler.create_group("dump", max_concurrent, share_host_slot=True)
+    jobs = []
+    for table, _rows in plan:
+        table_builder = CommandBuilder.from_snapshot(options).dump_data(True, db=db, table=table)
+        jobs.append(scheduler.submit(table_builder, priority=priority,
+                                     scan_mode=scan_mode, group_id=group_id))
+    return group_id, jobs
+
+
+# ==================== 提取耗时估算 ====================
+
+@dataclass
+class DumpEstimate:
+    """单张表的提取估算"""
+    rows: int
+    row_chars: int        # 每行预估字符数
+    requests: int
+    seconds: float
+    technique: str        # 预计使用的注入技术代码
+    shards: int = 1       # 建议的分片数
+    
+    def describe(self) -> str:
+        """简短描述（显示在表列表中）"""
+        return f"{self.rows:,} 行 · ≈ {format_duration(self.seconds)}"
+    
+    def details(self) -> str:
+        """详细说明（提示信息）"""
+        lines = [
+            f"行数: {self.rows:,}（每行约 {self.row_chars} 字符）",
+            f"注入技术: {TECHNIQUE_LABELS.get(self.technique, self.technique)}",
+            f"预估请求数: {self.requests:,}",
+            f"预估耗时: {format_duration(self.seconds)}",
+        ]
+        if self.shards > 1:
+            lines.append(f"建议分片: {self.shards} 片（分片并行提取）")
+        return "\n".join(lines)
+
+
+def format_duration(seconds: float) -> str:
+    """格式化耗时（分钟、小时或天）"""
+    if seconds < 60:
+        return "不到 1 分钟"
+    if seconds < 3600:
+        return f"{math.ceil(seconds / 60)} 分钟"
+    if seconds < 86400:
+        return f"{seconds / 3600:.1f} 小时"
+    return f"{seconds / 86400:.1f} 天"
+
+
+def detect_technique(injection_types: List[str], allowed: str = "") -> str:
+    """
+    从注入类型描述（如 "boolean-based blind"）选择 sqlmap 提取数据时会使用的最快技术
+    
+    参数:
+        injection_types: 结果中的注入类型
+        allowed: --technique 限定的技术代码（为空表示不限）
+    
+    返回:
+        技术代码；未检测到注入时按布尔盲注估算
+    """
+    found = set()
+    for text in injection_types:
+        lower = text.lower()
+        if "union" in lower:
+            found.add("U")
+        elif "error-based" in lower:
+            found.add("E")
+        elif "inline" in lower:
+            found.add("Q")
+        elif "boolean" in lower:
+            found.add("B")
+        elif "stacked" in lower:
+            found.add("S")
+        elif "time-based" in lower:
+            found.add("T")
+    if allowed:
+        found = {code for code in found if code in allowed.upper()} or found
+    return next((code for code in TECHNIQUE_ORDER if code in found), "B")
+
+
+def estimate_column_width(col_type: str) -> int:
+    """按列类型估算平均值长度（字符）"""
+    lower = (col_type or "").lower()
+    if not lower:
+        return DEFAULT_COLUMN_WIDTH
+    if any(word in lower for word in ("bool", "bit", "tinyint")):
+        return 1
+    if any(word in lower for word in ("int", "serial", "number")):
+        return 6
+    if any(word in lower for word in ("float", "double", "decimal", "numeric", "real", "money")):
+        return 8
+    if any(word in lower for word in ("datetime", "timestamp")):
+        return 19
+    if "date" in lower:
+        return 10
+    if "time" in lower:
+        return 8
+    if any(word in lower for word in ("text", "clob", "blob", "binary")):
+        return 60
+    match = re.search(r"\((\d+)\)", lower)
+    if match:
+        # 变长字符串通常远短于声明长度
+        return max(1, min(int(match.group(1)) // 2, 64))
+    return DEFAULT_COLUMN_WIDTH
+
+
+def estimate_dump(rows: int, columns: List = None, technique: str = "B", latency: float = DEFAULT_LATENCY,
+                  time_sec: int = 5, threads: int = 1) -> DumpEstimate:
+    """
+    估算提取一张表需要的请求数和耗时
+    
+    - 联合查询：每行一个请求
+    - 报错/内联查询：每个单元格按 ERROR_CHUNK_CHARS 分段，每段一个请求
+    - 布尔盲注：每个字符 BLIND_REQUESTS_PER_CHAR 个请求，多线程并行
+    - 时间盲注/堆叠查询：请求数同布尔盲注，约一半的比较为真、每次额外等待 --time-sec，
+      sqlmap 对时间盲注强制单线程
+    
+    参数:
+        rows: 行数
+        columns: 列信息 [(列名, 类型)] 或列名列表（未知时按 DEFAULT_COLUMN_COUNT 列估算）
+        technique: 注入技术代码
+        latency: 单次请求耗时（秒）
+        time_sec: --time-sec
+        threads: --threads
+    """
+    widths = [estimate_column_width(col[1] if isinstance(col, (tuple, list)) and len(col) > 1 else "")
+              for col in columns] if columns else [DEFAULT_COLUMN_WIDTH] * DEFAULT_COLUMN_COUNT
+    row_chars = sum(widths) + len(widths)  # 每个单元格加上分隔
+    threads = max(1, threads)
+    
+    if technique == "U":
+        requests = rows
+        seconds = requests * latency / threads
+    elif technique in ("E", "Q"):
+        requests = rows * sum(math.ceil((width + 1) / ERROR_CHUNK_CHARS) for width in widths)
+        seconds = requests * latency / threads
+    elif technique in ("T", "S"):
+        chars = rows * row_chars
+        requests = chars * BLIND_REQUESTS_PER_CHAR
+        seconds = requests * latency + chars * (BLIND_REQUESTS_PER_CHAR / 2) * time_sec
+    else:
+        requests = rows * row_chars * BLIND_REQUESTS_PER_CHAR
+        seconds = requests * latency / threads
+    
+    # 每个分片单独统计和定位起始行，分片只对较慢的提取有意义
+    shards = max(1, min(16, math.ceil(seconds / SHARD_TARGET_SECONDS))) if rows > 1 else 1
+    return DumpEstimate(rows=rows, row_chars=row_chars, requests=int(requests) + 1,
+                        seconds=seconds, technique=technique, shards=min(shards, rows))
+
+
+def find_columns(columns: Dict, db: str, table: str) -> List:
+    """从结果中查找表的列信息（数据库名不区分大小写，未知时按表名兜底）"""
+    fallback = []
+    for (col_db, col_table), items in columns.items():
+        if col_table.lower() != table.lower():
+            continue
+        if col_db.lower() == db.lower():
+            return list(items)
+        fallback = fallback or list(items)
+    return fallback
+
+
+def estimate_tables(db: str, tables: List[str], summary: Dict, options: Dict,
+                    latency: Optional[float] = None) -> Dict[str, DumpEstimate]:
+    """
+    按结果摘要估算数据库中各表的提取耗时（没有行数的表跳过）
+    
+    参数:
+        summary: 结果摘要（counts、columns、injection_type）
+        options: 任务的选项快照（--technique、--time-sec、--threads）
+        latency: 单次请求耗时（秒），未知时使用 DEFAULT_LATENCY
+    """
+    technique = detect_technique(summary.get('injection_type', []), options.get('_technique', ''))
+    estimates = {}
+    for table in tables:
+        rows = estimate_rows(table, db, summary.get('counts', {}))
+        if rows is None:
+            continue
+        estimates[table] = estimate_dump(
+            rows, find_columns(summary.get('columns', {}), db, table), technique,
+            latency=latency or DEFAULT_LATENCY,
+            time_sec=options.get('_time_sec') or 5,
+            threads=options.get('_threads') or 1,
+        )
+    return estimates
+
+
+class DumpCostPlanner(QObject):
+    """
+    提取耗时估算协调器
+    
+    已有结果中缺少行数的表先执行一个 -D <库> --count 任务（复用会话），
+    再结合注入技术和调优器记录的响应时间估算各表耗时
+    """
+    
+    message = pyqtSignal(str)            # 进度消息
+    planned = pyqtSignal(str, dict)      # 估算完成 (数据库, {表: DumpEstimate})
+    
+    def __init__(self, scheduler, builder: CommandBuilder, db: str, tables: List[str],
+                 summary: Dict = None, priority: int = 0, parent=None):
+        """
+        初始化估算
+        
+        参数:
+            scheduler: JobScheduler（提供调优器记录的响应时间）
+            builder: 目标任务的命令构建器
+            db: 数据库名
+            tables: 表名列表
+            summary: 已有的结果摘要（当前查看任务的结果，可选）
+            priority: 计数任务优先级
+        """
+        super().__init__(parent)
+        self.scheduler = scheduler
+        self.db = db
+        self.tables = list(tables)
+        self.summary = summary or {}
+        self.priority = priority
+        self._options = (CommandBuilder.from_snapshot(builder.snapshot())
+                         .clear_actions()
+                         .set_flush_session(False)
+                         .snapshot())
+        self.count_job_id = None
+    
+    def start(self) -> Optional[int]:
+        """
+        开始估算：行数都已知时直接发出 planned，否则提交计数任务
+        
+        返回:
+            计数任务 ID（无需计数时返回 None）
+        """
+        counts = self.summary.get('counts', {})
+        if all(estimate_rows(table, self.db, counts) is not None for table in self.tables):
+            self._emit_plan(self.summary)
+            return None
+        
+        self.scheduler.job_finished.connect(self._on_job_finished)
+        builder = CommandBuilder.from_snapshot(self._options).enum_count(True).enum_tables(False, db=self.db)
+        job = self.scheduler.submit(builder, priority=self.priority, scan_mode="提取估算-计数")
+        self.count_job_id = job.job_id
+        self.message.emit(f"正在统计 {self.db} 各表行数 (任务 #{job.job_id})")
+        return job.job_id
+    
+    def latency(self) -> Optional[float]:
+        """调优器记录的目标响应时间中位数（秒）"""
+        profile = self.scheduler.tuner.profile(extract_host(self._options))
+        return statistics.median(profile.samples) if profile.samples else None
+    
+    # ==================== 内部方法 ====================
+    
+    def _on_job_finished(self, job_id: int, return_code: int):
+        if job_id != self.count_job_id:
+            return
+        self.scheduler.job_finished.disconnect(self._on_job_finished)
+        job = self.scheduler.get_job(job_id)
+        if job is None or job.status != JobStatus.COMPLETED:
+            self.message.emit(f"统计 {self.db} 行数失败，无法估算提取耗时")
+            self.planned.emit(self.db, {})
+            return
+        counted = job.store.get_summary()
+        summary = dict(self.summary)
+        summary['counts'] = {**self.summary.get('counts', {}), **counted.get('counts', {})}
+        summary['injection_type'] = self.summary.get('injection_type') or counted.get('injection_type', [])
+        summary['columns'] = {**counted.get('columns', {}), **self.summary.get('columns', {})}
+        self._emit_plan(summary)
+    
+    def _emit_plan(self, summary: Dict):
+        estimates = estimate_tables(self.db, self.tables, summary, self._options, self.latency())
+        total = sum(estimate.seconds for estimate in estimates.values())
+        self.message.emit(f"{self.db}: 已估算 {len(estimates)} 张表，全部提取约 {format_duration(total)}")
+        self.planned.emit(self.db, estimates)
@@ -0,0 +1,92 @@
+"""
+批量目标端点聚类
+爬虫导出的目标列表中大量 URL 只有参数值不同（/item.php?id=1、/item.php?id=2 ...），
+按 协议 + 主机 + 路径 + 参数名集合 聚类，每类只保留少量代表目标
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Tuple
+from urllib.parse import urlsplit, parse_qsl
+
+
+def endpoint_signature(target: str) -> Tuple[str, str, str, Tuple[str, ...]]:
+    """
+    端点签名：(协议, 主机[:端口], 路径, 排序后的参数名)
+    
+    协议和主机不区分大小写，路径区分；无法解析的目标以原文作为路径，自成一类
+    """
+    url = target if '://' in target else f"http://{target}"
+    try:
+        parts = urlsplit(url)
+        netloc = (parts.hostname or "").lower()
+        if parts.port:
+            netloc += f":{parts.port}"
+    except ValueError:
+        return ("", "", target, ())
+    params = sorted({name for name, _value in parse_qsl(parts.query, keep_blank_values=True)})
+    return (parts.scheme.lower(), netloc, parts.path or "/", tuple(params))
+
+
+@dataclass
+class EndpointCluster:
+    """一类端点"""
+    signature: Tuple[str, str, str, Tuple[str, ...]]
+    count: int = 0                                      # 该类的目标行数（不含与代表目标重复的行）
+    targets: List[str] = field(default_factory=list)   # 保留的代表目标
+    
+    @property
+    def label(self) -> str:
+        scheme, host, path, params = self.signature
+        query = "&".join(f"{name}=*" for name in params)
+        return f"{scheme}://{host}{path}" + (f"?{query}" if query else "")
+
+
+@dataclass
+class ClusterResult:
+    """聚类结果"""
+    total: int = 0                                                  # 输入目标行数（不含与代表目标重复的行）
+    duplicates: int = 0                                             # 与代表目标完全重复的行数
+    clusters: Dict[tuple, EndpointCluster] = field(default_factory=dict)
+    
+    @property
+    def targets(self) -> List[str]:
+        """保留的代表目标（按首次出现的顺序）"""
+        return [target for cluster in self.clusters.values() for target in cluster.targets]
+    
+    @property
+    def reduction(self) -> float:
+        """扫描量减少的比例 (0-1)"""
+        return 1 - len(self.targets) / self.total if self.total else 0.0
+    
+    def largest(self, limit: int = 20) -> List[EndpointCluster]:
+        """目标数最多的几类"""
+        return sorted(self.clusters.values(), key=lambda c: c.count, reverse=True)[:limit]
+    
+    def describe(self) -> str:
+        return (f"{self.total} 个目标聚类为 {len(self.clusters)} 个端点，保留 {len(self.targets)} 个代表目标"
+                f"（扫描量减少 {self.reduction * 100:.1f}%）")
+
+
+def cluster_targets(targets: Iterable[str], keep: int = 1) -> ClusterResult:
+    """
+    按端点签名聚类（逐行处理，只保存每类的代表目标，适合很大的目标文件）
+    
+    参数:
+        targets: 目标迭代器（如 iter_batch_targets() 的结果）
+        keep: 每类保留的代表目标数，取该类最先出现的目标
+    """
+    keep = max(1, keep)
+    result = ClusterResult()
+    for target in targets:
+        signature = endpoint_signature(target)
+        cluster = result.clusters.get(signature)
+        if cluster is None:
+            cluster = result.clusters[signature] = EndpointCluster(signature)
+        elif target in cluster.targets:
+            result.duplicates += 1
+            continue
+        cluster.count += 1
+        result.total += 1
+        if len(cluster.targets) < keep:
+            cluster.targets.append(target)
+    return result
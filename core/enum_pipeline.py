@@ -0,0 +1,278 @@
+"""
+自动枚举流水线
+数据库 → 表 → 列 → 数据 逐阶段自动执行：每个任务结束后按筛选条件为下一阶段提交任务，
+所有任务共享同一会话（不清空会话），注入检测只在第一个任务中进行一次
+"""
+
+import fnmatch
+from typing import Dict, List, Optional, Tuple
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from .command_builder import CommandBuilder
+from .job_queue import JobStatus
+
+
+# 流水线阶段（按执行顺序）
+PHASES = ("dbs", "tables", "columns", "dump")
+
+PHASE_LABELS = {
+    "dbs": "枚举数据库",
+    "tables": "枚举表",
+    "columns": "枚举列",
+    "dump": "提取数据",
+}
+
+# 常见 DBMS 的系统库
+SYSTEM_DATABASES = {
+    'information_schema', 'mysql', 'performance_schema', 'sys',
+    'master', 'model', 'msdb', 'tempdb',
+    'pg_catalog', 'pg_toast',
+    'system', 'sysaux', 'ctxsys', 'mdsys', 'outln', 'xdb',
+}
+
+
+def match_patterns(name: str, patterns: str) -> bool:
+    """
+    名称是否匹配逗号分隔的通配符模式（不区分大小写，如 "user*,admin*"）
+    
+    模式为空时匹配全部；以 ! 开头的模式表示排除
+    """
+    items = [item.strip() for item in (patterns or "").split(',') if item.strip()]
+    includes = [item for item in items if not item.startswith('!')]
+    excludes = [item[1:] for item in items if item.startswith('!')]
+    lower = name.lower()
+    if any(fnmatch.fnmatchcase(lower, pattern.lower()) for pattern in excludes):
+        return False
+    return not includes or any(fnmatch.fnmatchcase(lower, pattern.lower()) for pattern in includes)
+
+
+def _find_tables(tables: Dict[str, list], db: str) -> List[str]:
+    """从结果中查找数据库的表（数据库名不区分大小写）"""
+    for name, items in tables.items():
+        if name.lower() == db.lower():
+            return list(items)
+    return []
+
+
+def _find_columns(columns: Dict[Tuple[str, str], list], db: str, table: str) -> List[str]:
+    """从结果中查找表的列名（解析时数据库名可能未知，按表名兜底）"""
+    fallback = []
+    for (col_db, col_table), items in columns.items():
+        if col_table.lower() != table.lower():
+            continue
+        names = [col[0] if isinstance(col, tuple) else str(col) for col in items]
+        if col_db.lower() == db.lower():
+            return names
+        fallback = fallback or names
+    return fallback
+
+
+def merge_results(target, source, include_data: bool = True):
+    """
+    将 source 结果存储中的结构（和数据）合并到 target 中
+    
+    列表取并集，列和行数以 source 为准；标量字段只在 target 尚未获得时填入
+    """
+    summary = source.get_summary()
+    with target.write() as results:
+        if summary['injection_found']:
+            results['injection_found'] = True
+        for key in ('injection_type', 'injection_params', 'databases'):
+            results[key].extend(item for item in summary[key] if item not in results[key])
+        for key, value in summary['payloads'].items():
+            results['payloads'].setdefault(key, value)
+        for key in ('dbms', 'current_db', 'current_user', 'banner'):
+            results[key] = results[key] or summary[key]
+        if summary['is_dba'] is not None:
+            results['is_dba'] = summary['is_dba']
+        for db, tables in summary['tables'].items():
+            existing = results['tables'].setdefault(db, [])
+            existing.extend(table for table in tables if table not in existing)
+        for key, columns in summary['columns'].items():
+            if columns:
+                results['columns'][key] = list(columns)
+        results['counts'].update(summary['counts'])
+    
+    if not include_data:
+        return
+    for key in source.table_keys():
+        sqlite_path = source.get_sqlite_path(key)
+        if sqlite_path:
+            target.attach_sqlite_dump(key, sqlite_path)
+        else:
+            headers = source.get_headers(key)
+            rows = [" | ".join(row) for row in source.iter_rows(key)]
+            target.set_table_rows(key, ([" | ".join(headers)] if headers else []) + rows)
+
+
+class EnumerationPipeline(QObject):
+    """
+    自动枚举流水线协调器
+    
+    第一个任务枚举数据库（已指定 -D 时直接枚举该库的表）并完成注入检测，
+    之后每个库一个 --tables 任务、每张表一个 --columns 任务、每张表一个 --dump 任务；
+    未设置列筛选时跳过列阶段直接提取。各阶段的结构和数据汇总到第一个任务的结果中，
+    整组只占用一个单主机并发名额
+    """
+    
+    message = pyqtSignal(str)     # 进度消息
+    finished = pyqtSignal(str)    # 全部结束 (group_id)
+    
+    def __init__(self, scheduler, builder: CommandBuilder, final_phase: str = "dump",
+                 db_pattern: str = "", table_pattern: str = "", column_pattern: str = "",
+                 exclude_system: bool = True, max_concurrent: int = 2,
+                 priority: int = 0, scan_mode: str = "", parent=None):
+        """
+        初始化枚举流水线
+        
+        参数:
+            scheduler: JobScheduler
+            builder: 已配置好的命令构建器（提供目标、检测和性能设置，执行动作会被清除）
+            final_phase: 最后执行的阶段（tables / columns / dump）
+            db_pattern / table_pattern / column_pattern: 各阶段的筛选模式（见 match_patterns）
+            exclude_system: 是否跳过系统库
+            max_concurrent: 同时执行的任务数
+            priority: 任务优先级
+            scan_mode: 扫描模式名称
+        """
+        super().__init__(parent)
+        self.scheduler = scheduler
+        self.final_phase = final_phase if final_phase in PHASES[1:] else "dump"
+        self.db_pattern = db_pattern
+        self.table_pattern = table_pattern
+        self.column_pattern = column_pattern
+        self.exclude_system = exclude_system
+        self.max_concurrent = max(1, max_concurrent)
+        self.priority = priority
+        self.scan_mode = scan_mode
+        
+        options = builder.snapshot()
+        self._target_db = options.get('_target_db', '')
+        self._root_options = CommandBuilder.from_snapshot(options).clear_actions().snapshot()
+        # 后续阶段复用第一个任务的会话
+        self._base_options = (CommandBuilder.from_snapshot(self._root_options)
+                              .set_flush_session(False)
+                              .snapshot())
+        
+        self.group_id = ""
+        self.root_job_id = None
+        self.phase_jobs: Dict[int, Tuple[str, str, str]] = {}  # {job_id: (阶段, 数据库, 表)}
+        self._submitted = set()
+        self.stats = {phase: 0 for phase in PHASES}             # 各阶段完成的任务数
+    
+    def start(self) -> str:
+        """提交第一个任务，返回任务组 ID"""
+        self.group_id = self.scheduler.create_group("enum", self.max_concurrent, share_host_slot=True)
+        self.scheduler.job_finished.connect(self._on_job_finished)
+        
+        builder = CommandBuilder.from_snapshot(self._root_options)
+        if self._target_db:
+            self.root_job_id = self._submit(builder.enum_tables(True, db=self._target_db),
+                                            "tables", self._target_db)
+        else:
+            self.root_job_id = self._submit(builder.enum_dbs(True), "dbs")
+        self._log(f"自动枚举流水线已启动，执行到「{PHASE_LABELS[self.final_phase]}」阶段")
+        return self.group_id
+    
+    # ==================== 内部方法 ====================
+    
+    def _submit(self, builder: CommandBuilder, phase: str, db: str = "", table: str = "") -> Optional[int]:
+        """提交阶段任务（同一阶段同一对象只提交一次）"""
+        key = (phase, db.lower(), table.lower())
+        if key in self._submitted:
+            return None
+        self._submitted.add(key)
+        job = self.scheduler.submit(builder, priority=self.priority,
+                                    scan_mode=self.scan_mode or f"流水线-{PHASE_LABELS[phase]}",
+                                    group_id=self.group_id)
+        self.phase_jobs[job.job_id] = (phase, db, table)
+        return job.job_id
+    
+    def _new_builder(self) -> CommandBuilder:
+        return CommandBuilder.from_snapshot(self._base_options)
+    
+    def _log(self, text: str):
+        """记录到第一个任务的日志并发出消息"""
+        if self.root_job_id is not None:
+            self.scheduler.append_log(self.root_job_id, f"[流水线] {text}\n")
+        self.message.emit(text)
+    
+    def _on_job_finished(self, job_id: int, return_code: int):
+        """阶段任务结束：汇总结果并提交下一阶段的任务"""
+        if job_id not in self.phase_jobs:
+            return
+        phase, db, table = self.phase_jobs[job_id]
+        job = self.scheduler.get_job(job_id)
+        if job is None or job.status != JobStatus.COMPLETED:
+            status = job.status_label if job else "已移除"
+            self._log(f"{PHASE_LABELS[phase]} {'.'.join(filter(None, (db, table)))} (任务 #{job_id}) {status}，该分支停止")
+        else:
+            self.stats[phase] += 1
+            summary = job.store.get_summary()
+            if job_id != self.root_job_id:
+                self._merge(job)
+            if phase == "dbs":
+                self._next_from_dbs(summary)
+            elif phase == "tables":
+                self._next_from_tables(summary, db)
+            elif phase == "columns":
+                self._next_from_columns(summary, db, table)
+        
+        if all(self._is_final(jid) for jid in self.phase_jobs):
+            self._log(f"流水线完成：{self.stats['tables']} 个库已枚举表，{self.stats['columns']} 张表已枚举列，"
+                      f"{self.stats['dump']} 张表已提取")
+            self.finished.emit(self.group_id)
+    
+    def _is_final(self, job_id: int) -> bool:
+        job = self.scheduler.get_job(job_id)
+        return job is None or job.is_finished
+    
+    def _next_from_dbs(self, summary: dict):
+        """数据库 → 每个库一个 --tables 任务"""
+        dbs = [db for db in summary.get('databases', [])
+               if not (self.exclude_system and db.lower() in SYSTEM_DATABASES)
+               and match_patterns(db, self.db_pattern)]
+        skipped = len(summary.get('databases', [])) - len(dbs)
+        for db in dbs:
+            self._submit(self._new_builder().enum_tables(True, db=db), "tables", db)
+        self._log(f"发现 {len(summary.get('databases', []))} 个数据库，枚举其中 {len(dbs)} 个的表"
+                  + (f"（筛除 {skipped} 个）" if skipped else ""))
+    
+    def _next_from_tables(self, summary: dict, db: str):
+        """表 → 每张表一个 --columns 任务（未设置列筛选且需要提取时直接提取）"""
+        all_tables = _find_tables(summary.get('tables', {}), db)
+        tables = [table for table in all_tables if match_patterns(table, self.table_pattern)]
+        if self.final_phase == "tables":
+            self._log(f"{db}: 发现 {len(all_tables)} 张表，其中 {len(tables)} 张匹配筛选")
+            return
+        
+        direct_dump = self.final_phase == "dump" and not self.column_pattern.strip()
+        for table in tables:
+            if direct_dump:
+                self._submit(self._new_builder().dump_data(True, db=db, table=table), "dump", db, table)
+            else:
+                self._submit(self._new_builder().enum_columns(True, db=db, table=table), "columns", db, table)
+        action = "提取数据" if direct_dump else "枚举列"
+        self._log(f"{db}: 发现 {len(all_tables)} 张表，{len(tables)} 张匹配筛选，开始{action}")
+    
+    def _next_from_columns(self, summary: dict, db: str, table: str):
+        """列 → 按列筛选提交 --dump 任务（设置了列筛选但没有匹配的列时跳过该表）"""
+        if self.final_phase != "dump":
+            return
+        columns = [col for col in _find_columns(summary.get('columns', {}), db, table)
+                   if match_patterns(col, self.column_pattern)]
+        if self.column_pattern.strip() and not columns:
+            self._log(f"{db}.{table}: 没有匹配筛选的列，跳过提取")
+            return
+        builder = self._new_builder().dump_data(True, db=db, table=table,
+                                                columns=",".join(columns) if self.column_pattern.strip() else "")
+        self._submit(builder, "dump", db, table)
+    
+    def _merge(self, job):
+        """将阶段任务的结构和数据汇总到第一个任务的结果中"""
+        root = self.scheduler.get_job(self.root_job_id)
+        if root is None:
+            return
+        merge_results(root.store, job.store)
+        self.scheduler.notify_result(self.root_job_id)
@@ -0,0 +1,130 @@
+"""
+扫描失败分类与自动重试策略
+根据 sqlmap 输出末尾和返回码把结束的任务分为：临时故障、目标不可达、配置错误、未发现注入，
+只有临时故障（连接重置、超时、5xx/429 等）按指数退避加随机抖动自动重试，重试复用会话继续
+"""
+
+import random
+import re
+from dataclasses import dataclass
+from typing import Optional
+
+
+FAILURE_TRANSIENT = "transient"
+FAILURE_TARGET_DOWN = "target_down"
+FAILURE_CONFIG = "config"
+FAILURE_NO_INJECTION = "no_injection"
+FAILURE_UNKNOWN = "unknown"
+
+FAILURE_LABELS = {
+    FAILURE_TRANSIENT: "临时故障",
+    FAILURE_TARGET_DOWN: "目标不可达",
+    FAILURE_CONFIG: "配置错误",
+    FAILURE_NO_INJECTION: "未发现注入",
+    FAILURE_UNKNOWN: "未知错误",
+}
+
+# 分类时检查的输出末尾长度（字符数）
+TAIL_CHARS = 8000
+
+# (分类, 原因, 正则)，按顺序匹配，越具体的规则越靠前
+FAILURE_RULES = [
+    (FAILURE_CONFIG, "参数无效", re.compile(
+        r"sqlmap\.py: error:|usage: (?:python )?sqlmap|unrecognized arguments|invalid (?:option|target url)"
+        r"|no parameter\(s\) found for testing|option '.+' (?:is|are) .*(?:required|not supported)", re.I)),
+    (FAILURE_CONFIG, "文件不存在", re.compile(
+        r"can't open file|no such file or directory|specified file '.+' does not exist", re.I)),
+    (FAILURE_CONFIG, "被 WAF/IPS 拦截", re.compile(
+        r"(?:target|it) is (?:heavily )?protected by some kind of WAF/IPS|WAF/IPS identified as|"
+        r"WAF/IPS protection (?:has been )?detected", re.I)),
+    (FAILURE_TARGET_DOWN, "域名无法解析", re.compile(
+        r"host '.+' does not exist|name or service not known|nodename nor servname|getaddrinfo failed", re.I)),
+    (FAILURE_TARGET_DOWN, "连接被拒绝", re.compile(r"connection refused", re.I)),
+    (FAILURE_TARGET_DOWN, "SSL 连接失败", re.compile(r"can't establish SSL connection|SSL: (?:WRONG|UNKNOWN)", re.I)),
+    (FAILURE_TRANSIENT, "连接被重置", re.compile(r"connection reset|connection (?:was )?dropped|broken pipe", re.I)),
+    (FAILURE_TRANSIENT, "连接超时", re.compile(r"timed out|connection timeout|read timeout", re.I)),
+    (FAILURE_TRANSIENT, "请求过多 (429)", re.compile(r"\b429\b.*too many requests|too many requests", re.I)),
+    (FAILURE_TRANSIENT, "服务端错误 (5xx)", re.compile(
+        r"\b50[0234] \((?:internal server error|bad gateway|service unavailable|gateway time-?out)\)"
+        r"|unable to connect to the target url", re.I)),
+    (FAILURE_NO_INJECTION, "所有参数均不可注入", re.compile(
+        r"all tested parameters do not appear to be injectable|does not seem to be injectable", re.I)),
+]
+
+# 只在 [CRITICAL] 行中匹配的规则（早期的启发式 [WARNING] 不代表扫描因此结束）
+CRITICAL_ONLY = {"被 WAF/IPS 拦截"}
+
+
+@dataclass
+class FailureInfo:
+    """失败分类结果"""
+    category: str
+    reason: str
+    evidence: str = ""  # 匹配到的输出行
+    
+    @property
+    def retryable(self) -> bool:
+        """只有临时故障值得自动重试"""
+        return self.category == FAILURE_TRANSIENT
+    
+    @property
+    def label(self) -> str:
+        return FAILURE_LABELS.get(self.category, self.category)
+    
+    def describe(self) -> str:
+        return f"{self.label}：{self.reason}"
+
+
+def classify_failure(return_code: Optional[int], output_tail: str,
+                     injection_found: bool = False) -> Optional[FailureInfo]:
+    """
+    根据输出末尾和返回码分类任务结果
+    
+    参数:
+        return_code: 进程返回码
+        output_tail: sqlmap 输出末尾
+        injection_found: 已确认注入（此时不会归为“未发现注入”）
+    返回:
+        FailureInfo；正常结束且没有匹配到失败特征时返回 None
+    """
+    tail = (output_tail or "")[-TAIL_CHARS:]
+    # 从后往前逐行找：最后出现的错误最能说明结束原因，同一行匹配多条规则时取越具体的规则
+    for line in reversed(tail.splitlines()):
+        for category, reason, pattern in FAILURE_RULES:
+            if category == FAILURE_NO_INJECTION and injection_found:
+                continue
+            if return_code == 0 and category != FAILURE_NO_INJECTION:
+                # 正常结束时，过程中的网络错误和 WAF 警告已由 sqlmap 自行处理
+                continue
+            if reason in CRITICAL_ONLY and "[CRITICAL]" not in line:
+                continue
+            if pattern.search(line):
+                return FailureInfo(category, reason, line.strip()[:300])
+    if return_code in (0, None):
+        return None
+    if return_code < 0 or return_code in (137, 143):
+        # 进程被信号终止（内存不足被系统杀死等）
+        return FailureInfo(FAILURE_TRANSIENT, f"进程被终止（返回码 {return_code}）")
+    return FailureInfo(FAILURE_UNKNOWN, f"返回码 {return_code}")
+
+
+@dataclass
+class RetryPolicy:
+    """临时故障的自动重试策略"""
+    max_retries: int = 2         # 最多自动重试次数，0 表示不重试
+    base_delay: float = 15.0     # 第一次重试前的等待时间（秒）
+    max_delay: float = 600.0     # 等待时间上限（秒）
+    
+    def should_retry(self, failure: Optional[FailureInfo], retries: int) -> bool:
+        return bool(failure and failure.retryable and retries < self.max_retries)
+    
+    def delay(self, retry: int, rng: random.Random = None) -> float:
+        """
+        第 retry 次重试（从 1 开始）前的等待时间
+        
+        指数退避：base × 2^(retry-1)，不超过 max_delay；
+        再取其一半加上 [0, 一半] 的随机抖动，避免多个任务同时重试再次打满目标
+        """
+        rng = rng or random
+        delay = min(self.max_delay, self.base_delay * (2 ** max(0, retry - 1)))
+        return delay / 2 + rng.uniform(0, delay / 2)
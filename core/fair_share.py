@@ -0,0 +1,162 @@
+"""
+项目间加权公平调度
+任务按所属项目（客户、项目标签）分组，同优先级的排队任务按项目权重分配并发名额，
+避免一个项目的大批量任务让其他项目的任务长时间等待；同时统计每个项目的等待时间和吞吐量
+"""
+
+import time
+from typing import Dict, List
+
+
+DEFAULT_WEIGHT = 1.0
+
+
+def project_label(project: str) -> str:
+    """项目显示名称（未指定项目的任务归入“默认”）"""
+    return project or "默认"
+
+
+class FairShare:
+    """
+    加权公平排队
+    
+    同一优先级内，每次选取 (运行中任务数 + 1) / 权重 最小的项目的下一个任务，
+    项目内部保持先入先出；结果是各项目占用的并发名额与权重成正比。
+    优先级仍然优先于公平性：高优先级任务总是排在低优先级任务之前
+    """
+    
+    def __init__(self, weights: Dict[str, float] = None):
+        self.weights: Dict[str, float] = {}
+        for project, weight in (weights or {}).items():
+            self.set_weight(project, weight)
+        self._stats: Dict[str, Dict] = {}
+    
+    def set_weight(self, project: str, weight: float = None):
+        """设置项目权重（None 或非正数表示恢复默认权重）"""
+        if weight is None or weight <= 0:
+            self.weights.pop(project, None)
+        else:
+            self.weights[project] = weight
+    
+    def get_weight(self, project: str) -> float:
+        return self.weights.get(project, DEFAULT_WEIGHT)
+    
+    def order(self, pending: list, running: list) -> list:
+        """
+        排队任务的执行顺序
+        
+        参数:
+            pending: 排队中的任务（已按优先级从高到低、同优先级先入先出排序）
+            running: 运行中的任务
+        """
+        if len({job.project for job in pending}) <= 1:
+            return list(pending)
+        counts: Dict[str, int] = {}
+        for job in running:
+            counts[job.project] = counts.get(job.project, 0) + 1
+        
+        ordered = []
+        index = 0
+        while index < len(pending):
+            # 同一优先级的任务按项目分成先入先出的队列
+            level = pending[index].priority
+            queues: Dict[str, list] = {}
+            while index < len(pending) and pending[index].priority == level:
+                queues.setdefault(pending[index].project, []).append(pending[index])
+                index += 1
+            while queues:
+                project = min(queues, key=lambda p: ((counts.get(p, 0) + 1) / self.get_weight(p),
+                                                     queues[p][0].queued_at))
+                ordered.append(queues[project].pop(0))
+                counts[project] = counts.get(project, 0) + 1
+                if not queues[project]:
+                    del queues[project]
+        return ordered
+    
+    # ==================== 统计 ====================
+    
+    def _project_stats(self, project: str) -> Dict:
+        if project not in self._stats:
+            self._stats[project] = {
+                'submitted': 0, 'started': 0, 'completed': 0, 'failed': 0, 'preempted': 0, 'retried': 0,
+                'wait_seconds': 0.0, 'max_wait': 0.0, 'run_seconds': 0.0, 'since': time.time(),
+            }
+        return self._stats[project]
+    
+    def record_submitted(self, job):
+        self._project_stats(job.project)['submitted'] += 1
+    
+    def record_started(self, job):
+        """任务启动：累计排队等待时间"""
+        stats = self._project_stats(job.project)
+        wait = max(0.0, time.time() - job.queued_at)
+        stats['started'] += 1
+        stats['wait_seconds'] += wait
+        stats['max_wait'] = max(stats['max_wait'], wait)
+    
+    def record_start_reverted(self, job):
+        """任务未能启动（远程执行节点发送失败）、放回队列：撤销 record_started 的计数"""
+        stats = self._project_stats(job.project)
+        stats['started'] = max(0, stats['started'] - 1)
+        stats['wait_seconds'] = max(0.0, stats['wait_seconds'] - max(0.0, time.time() - job.queued_at))
+    
+    def record_finished(self, job):
+        """任务结束：累计完成、失败数和运行时间（取消的任务只计运行时间）"""
+        stats = self._project_stats(job.project)
+        if job.status.value in ('completed', 'failed'):
+            stats[job.status.value] += 1
+        stats['run_seconds'] += job.elapsed
+    
+    def record_preempted(self, job):
+        stats = self._project_stats(job.project)
+        stats['preempted'] += 1
+        stats['run_seconds'] += job.elapsed
+    
+    def record_retried(self, job):
+        """任务因临时故障重新排队等待自动重试"""
+        stats = self._project_stats(job.project)
+        stats['retried'] += 1
+        stats['run_seconds'] += job.elapsed
+    
+    def stats(self, running: list, pending: list) -> List[Dict]:
+        """
+        各项目的统计
+        
+        返回:
+            [{project, weight, running, pending, submitted, started, completed, failed, preempted, retried,
+              avg_wait, max_wait, run_seconds, throughput}]，throughput 为每小时完成的任务数
+        """
+        projects = set(self._stats) | {job.project for job in running} | {job.project for job in pending}
+        now = time.time()
+        result = []
+        for project in sorted(projects):
+            stats = dict(self._project_stats(project))
+            hours = max(now - stats.pop('since'), 60.0) / 3600
+            stats.update(
+                project=project,
+                weight=self.get_weight(project),
+                running=sum(1 for job in running if job.project == project),
+                pending=sum(1 for job in pending if job.project == project),
+                avg_wait=stats['wait_seconds'] / stats['started'] if stats['started'] else 0.0,
+                throughput=stats['completed'] / hours,
+            )
+            result.append(stats)
+        return result
+
+
+def parse_project_weights(text: str) -> Dict[str, float]:
+    """解析配置中的项目权重 "客户A=3;客户B=1" """
+    weights = {}
+    for part in (text or "").split(';'):
+        project, _sep, value = part.partition('=')
+        try:
+            if project.strip():
+                weights[project.strip()] = float(value)
+        except ValueError:
+            continue
+    return weights
+
+
+def format_project_weights(weights: Dict[str, float]) -> str:
+    """项目权重转换为配置字符串"""
+    return ";".join(f"{project}={weight:g}" for project, weight in sorted(weights.items()))
@@ -0,0 +1,165 @@
+"""
+目标指纹缓存
+注入确认后按 规范化目标 + 参数 记录数据库类型、注入技术和前缀/后缀，
+之后扫描同一目标时自动带上 --dbms、--technique、-p、--prefix/--suffix，跳过完整检测
+"""
+
+import re
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+from .command_builder import CommandBuilder
+
+
+# sqlmap 注入类型 -> --technique 代码
+TECHNIQUE_CODES = {
+    "boolean-based blind": "B",
+    "error-based": "E",
+    "union query": "U",
+    "stacked queries": "S",
+    "time-based blind": "T",
+    "inline query": "Q",
+}
+
+
+def _request_file_target(path: str) -> str:
+    """从请求包文件中读取 scheme://host/path"""
+    try:
+        with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+            lines = f.read().replace('\r\n', '\n').split('\n')
+    except OSError:
+        return ""
+    request_line = lines[0].split() if lines else []
+    if len(request_line) < 2:
+        return ""
+    if request_line[1].lower().startswith(('http://', 'https://')):
+        return request_line[1]
+    host = ""
+    for line in lines[1:]:
+        if not line:
+            break
+        if line.lower().startswith('host:'):
+            host = line.split(':', 1)[1].strip()
+    return f"http://{host}{request_line[1]}" if host else ""
+
+
+def normalize_target(options: Dict) -> str:
+    """
+    规范化目标：scheme://host[:port]/path（主机小写，去掉查询参数和末尾斜杠）
+    
+    批量文件模式等无法确定单一目标时返回空字符串
+    """
+    if options.get('_request_file'):
+        url = _request_file_target(options['_request_file'])
+    else:
+        url = options.get('_target', '')
+    if not url:
+        return ""
+    if '://' not in url:
+        url = f"http://{url}"
+    parsed = urlparse(url)
+    if not parsed.hostname:
+        return ""
+    netloc = parsed.hostname.lower()
+    if parsed.port:
+        netloc += f":{parsed.port}"
+    return f"{parsed.scheme.lower()}://{netloc}{parsed.path.rstrip('/')}"
+
+
+def fingerprint_key(target: str, param: str) -> str:
+    return f"{target}|{param}"
+
+
+def dbms_name(dbms: str) -> str:
+    """从 "MySQL >= 5.0.12" 等结果中提取可用于 --dbms 的名称"""
+    match = re.match(r"[A-Za-z][A-Za-z ]*[A-Za-z]", dbms or "")
+    return match.group(0) if match else ""
+
+
+def techniques_from_types(injection_types: List[str]) -> str:
+    """注入类型列表转换为 --technique 代码（按 BEUSTQ 顺序）"""
+    codes = set()
+    for injection_type in injection_types:
+        lower = injection_type.lower()
+        for name, code in TECHNIQUE_CODES.items():
+            if name in lower:
+                codes.add(code)
+    return "".join(code for code in "BEUSTQ" if code in codes)
+
+
+def boundaries_from_payload(param: str, payload: str) -> tuple:
+    """
+    从布尔盲注载荷中提取前缀和后缀
+    
+    例如 "id=1' AND 5431=5431 AND 'xYz'='xYz" -> ("'", "AND 'xYz'='xYz")，
+    无法识别或含双引号（命令行中无法安全引用）时返回 ("", "")
+    """
+    match = re.match(rf"{re.escape(param)}=(.*?)\s+(?:AND|OR)\s+\(?(\d+)=\2\)?\s*(.*)$", payload or "")
+    if not match:
+        return "", ""
+    prefix = re.search(r"[\'\")]*$", match.group(1)).group(0)
+    suffix = match.group(3).strip()
+    if '"' in prefix + suffix:
+        return "", ""
+    return prefix, suffix
+
+
+def extract_fingerprint(options: Dict, results: Dict) -> Optional[Dict]:
+    """
+    从扫描结果中提取指纹
+    
+    返回:
+        {key, target, param, dbms, technique, prefix, suffix}；未确认注入或无法确定目标时返回 None
+    """
+    target = normalize_target(options)
+    params = results.get('injection_params') or []
+    if not target or not results.get('injection_found') or not params:
+        return None
+    
+    param = params[0]
+    prefix, suffix = "", ""
+    for injection_type, payload in (results.get('payloads') or {}).items():
+        if "boolean-based" in injection_type.lower():
+            prefix, suffix = boundaries_from_payload(param, payload)
+            break
+    return {
+        'key': fingerprint_key(target, param),
+        'target': target,
+        'param': param,
+        'dbms': dbms_name(results.get('dbms', '')),
+        'technique': techniques_from_types(results.get('injection_type') or []),
+        'prefix': prefix,
+        'suffix': suffix,
+    }
+
+
+def apply_fingerprint(builder: CommandBuilder, fingerprint: Dict) -> List[str]:
+    """
+    将指纹写入构建器，只填充用户未指定的选项；技术只保留用户勾选范围内的
+    
+    返回:
+        实际添加的参数描述列表
+    """
+    applied = []
+    options = builder.snapshot()
+    if not options.get('_param') and fingerprint.get('param'):
+        builder.set_param(fingerprint['param'])
+        applied.append(f"-p {fingerprint['param']}")
+    if not options.get('_dbms') and fingerprint.get('dbms'):
+        builder.set_dbms(fingerprint['dbms'])
+        applied.append(f"--dbms={fingerprint['dbms']}")
+    
+    selected = options.get('_technique') or "BEUSTQ"
+    technique = "".join(code for code in fingerprint.get('technique') or "" if code in selected)
+    if technique and technique != options.get('_technique'):
+        builder.set_technique(technique)
+        applied.append(f"--technique={technique}")
+    
+    if not options.get('_prefix') and not options.get('_suffix'):
+        if fingerprint.get('prefix'):
+            builder.set_prefix(fingerprint['prefix'])
+            applied.append(f"--prefix={fingerprint['prefix']}")
+        if fingerprint.get('suffix'):
+            builder.set_suffix(fingerprint['suffix'])
+            applied.append(f"--suffix={fingerprint['suffix']}")
+    return applied
@@ -4,6 +4,7 @@
 """
 
 import os
+import json
 import sqlite3
 from datetime import datetime
 from typing import List, Optional, Dict, Any
@@ -48,10 +49,120 @@ class HistoryManager:
                 current_db TEXT,
                 result_summary TEXT,
                 log_file TEXT,
+                tuning TEXT,
                 created_at TEXT DEFAULT CURRENT_TIMESTAMP
             )
         ''')
         
+        # 旧版本数据库补充自动调优参数列
+        columns = [row[1] for row in cursor.execute("PRAGMA table_info(scan_history)")]
+        if 'tuning' not in columns:
+            cursor.execute("ALTER TABLE scan_history ADD COLUMN tuning TEXT")
+        
+        # 创建任务检查点表（用于恢复中断的任务）
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS job_checkpoints (
+                scan_id INTEGER PRIMARY KEY,
+                options TEXT NOT NULL,
+                scan_mode TEXT,
+                checkpoint TEXT,
+                updated_at TEXT
+            )
+        ''')
+        
+        # 创建工作流运行状态表（用于恢复中断的工作流）
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS workflow_runs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT,
+                target TEXT,
+                definition TEXT NOT NULL,
+                options TEXT NOT NULL,
+                state TEXT,
+                status TEXT DEFAULT 'running',
+                created_at TEXT,
+                updated_at TEXT
+            )
+        ''')
+        
+        # 创建目标指纹缓存表
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS fingerprints (
+                fp_key TEXT PRIMARY KEY,
+                target TEXT NOT NULL,
+                param TEXT,
+                dbms TEXT,
+                technique TEXT,
+                prefix TEXT,
+                suffix TEXT,
+                detection_seconds REAL DEFAULT 0,
+                hits INTEGER DEFAULT 0,
+                saved_seconds REAL DEFAULT 0,
+                updated_at TEXT
+            )
+        ''')
+        
+        # 创建注入技术检测结果表（每次完整检测一行：测试的技术、可用的技术和发现注入的耗时）
+        has_technique_outcomes = cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'technique_outcomes'"
+        ).fetchone() is not None
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS technique_outcomes (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                dbms TEXT,
+                tried TEXT NOT NULL,
+                found TEXT,
+                detection_seconds REAL DEFAULT 0,
+                created_at TEXT
+            )
+        ''')
+        if not has_technique_outcomes:
+            # 首次创建时用已有的目标指纹（历史上确认过的注入）作为初始记录
+            cursor.execute('''
+                INSERT INTO technique_outcomes (dbms, tried, found, detection_seconds, created_at)
+                SELECT COALESCE(dbms, ''), technique, technique, COALESCE(detection_seconds, 0), updated_at
+                FROM fingerprints WHERE technique != ''
+            ''')
+        
+        # 创建表快照（每个目标各表上次提取时的行数、变化标记和单调键最大值，用于增量提取）
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS table_snapshots (
+                target TEXT NOT NULL,
+                db TEXT NOT NULL,
+                table_name TEXT NOT NULL,
+                row_count INTEGER,
+                checksum TEXT,
+                key_column TEXT,
+                max_key TEXT,
+                updated_at TEXT,
+                PRIMARY KEY (target, db, table_name)
+            )
+        ''')
+        
+        # 创建扫描结果复用缓存表（按扫描规格哈希保存完成的结果）
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS result_cache (
+                spec_hash TEXT PRIMARY KEY,
+                target TEXT,
+                command TEXT,
+                scan_id INTEGER,
+                results TEXT NOT NULL,
+                log TEXT,
+                size_bytes INTEGER DEFAULT 0,
+                created_at TEXT
+            )
+        ''')
+        
+        # 结果缓存命中统计（单行）
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS result_cache_stats (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                lookups INTEGER DEFAULT 0,
+                hits INTEGER DEFAULT 0
+            )
+        ''')
+        cursor.execute('INSERT OR IGNORE INTO result_cache_stats (id) VALUES (1)')
+        
         # 创建目标收藏表
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS favorites (
@@ -139,9 +250,350 @@ class HistoryManager:
             WHERE id = ?
         ''', (end_time, duration, 'completed', has_vuln, vuln_count, 
               dbms, current_db, result_summary, record_id))
+        cursor.execute('DELETE FROM job_checkpoints WHERE scan_id = ?', (record_id,))
+        
+        conn.commit()
+        conn.close()
+    
+    # ==================== 任务检查点 ====================
+    
+    def save_checkpoint(self, record_id: int, checkpoint: Dict[str, Any],
+                        options: Dict[str, Any] = None, scan_mode: str = None):
+        """
+        保存任务检查点
+        
+        参数:
+            record_id: 扫描记录ID
+            checkpoint: 检查点（阶段、已完成的表、已提取行数、会话目录）
+            options: 命令选项快照（首次保存时提供）
+            scan_mode: 扫描模式（首次保存时提供）
+        """
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        
+        now = datetime.now().isoformat()
+        checkpoint_json = json.dumps(checkpoint, ensure_ascii=False)
+        if options is not None:
+            cursor.execute('''
+                INSERT OR REPLACE INTO job_checkpoints (scan_id, options, scan_mode, checkpoint, updated_at)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (record_id, json.dumps(options, ensure_ascii=False), scan_mode or "", checkpoint_json, now))
+        else:
+            cursor.execute('''
+                UPDATE job_checkpoints SET checkpoint = ?, updated_at = ? WHERE scan_id = ?
+            ''', (checkpoint_json, now, record_id))
+        
+        conn.commit()
+        conn.close()
+    
+    def delete_checkpoint(self, record_id: int):
+        """删除任务检查点"""
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        cursor.execute('DELETE FROM job_checkpoints WHERE scan_id = ?', (record_id,))
+        conn.commit()
+        conn.close()
+    
+    def get_interrupted_scans(self) -> List[Dict[str, Any]]:
+        """
+        获取中断的任务（仍为 running 状态且有检查点的记录）
+        
+        应在启动时、尚未开始新任务前调用；返回的记录包含
+        options（选项快照字典）和 checkpoint（检查点字典）
+        """
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT h.id, h.target, h.command, h.start_time, c.scan_mode,
+                   c.options, c.checkpoint, c.updated_at
+            FROM scan_history h JOIN job_checkpoints c ON c.scan_id = h.id
+            WHERE h.status = 'running'
+            ORDER BY h.start_time
+        ''')
+        rows = cursor.fetchall()
+        conn.close()
+        
+        scans = []
+        for row in rows:
+            record = dict(row)
+            try:
+                record['options'] = json.loads(record['options'])
+                record['checkpoint'] = json.loads(record['checkpoint'] or '{}')
+            except ValueError:
+                continue
+            scans.append(record)
+        return scans
+    
+    def mark_interrupted(self, record_id: int):
+        """将中断的任务标记为已中断（不再提示恢复）并删除检查点"""
+        self.update_scan(record_id, status='interrupted', end_time=datetime.now().isoformat())
+        self.delete_checkpoint(record_id)
+    
+    # ==================== 工作流运行状态 ====================
+    
+    def save_workflow_run(self, run_id: Optional[int], state: Dict[str, Any], name: str = "",
+                          target: str = "", definition: Dict[str, Any] = None,
+                          options: Dict[str, Any] = None, status: str = 'running') -> int:
+        """
+        保存工作流运行状态，返回运行记录ID
+        
+        参数:
+            run_id: 运行记录ID（首次保存时为 None，需要提供 name、target、definition 和 options）
+            state: 运行状态（各节点状态、已汇总的结果等）
+            status: running / completed / interrupted
+        """
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        
+        now = datetime.now().isoformat()
+        state_json = json.dumps(state, ensure_ascii=False)
+        if run_id is None:
+            cursor.execute('''
+                INSERT INTO workflow_runs (name, target, definition, options, state, status, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (name, target, json.dumps(definition or {}, ensure_ascii=False),
+                  json.dumps(options or {}, ensure_ascii=False), state_json, status, now, now))
+            run_id = cursor.lastrowid
+        else:
+            cursor.execute('''
+                UPDATE workflow_runs SET state = ?, status = ?, updated_at = ? WHERE id = ?
+            ''', (state_json, status, now, run_id))
         
         conn.commit()
         conn.close()
+        return run_id
+    
+    def get_interrupted_workflow_runs(self) -> List[Dict[str, Any]]:
+        """
+        获取中断的工作流（仍为 running 状态的记录）
+        
+        应在启动时、尚未开始新任务前调用；返回的记录中 definition、options 和 state 已解析为字典
+        """
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM workflow_runs WHERE status = 'running' ORDER BY created_at")
+        rows = cursor.fetchall()
+        conn.close()
+        
+        runs = []
+        for row in rows:
+            record = dict(row)
+            try:
+                for key in ('definition', 'options', 'state'):
+                    record[key] = json.loads(record[key] or '{}')
+            except ValueError:
+                continue
+            runs.append(record)
+        return runs
+    
+    def mark_workflow_run(self, run_id: int, status: str):
+        """更新工作流运行记录的状态"""
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        cursor.execute('UPDATE workflow_runs SET status = ?, updated_at = ? WHERE id = ?',
+                       (status, datetime.now().isoformat(), run_id))
+        conn.commit()
+        conn.close()
+    
+    # ==================== 目标指纹缓存 ====================
+    
+    def save_fingerprint(self, fingerprint: Dict[str, Any], detection_seconds: float = None):
+        """
+        保存目标指纹（extract_fingerprint() 的结果）
+        
+        detection_seconds 为完整检测的耗时，为 None 时保留已有记录的耗时；命中次数和节省时间保留
+        """
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        now = datetime.now().isoformat()
+        cursor.execute('''
+            INSERT OR IGNORE INTO fingerprints (fp_key, target, param, updated_at)
+            VALUES (?, ?, ?, ?)
+        ''', (fingerprint['key'], fingerprint['target'], fingerprint['param'], now))
+        cursor.execute('''
+            UPDATE fingerprints SET dbms = ?, technique = ?, prefix = ?, suffix = ?, updated_at = ?
+            WHERE fp_key = ?
+        ''', (fingerprint['dbms'], fingerprint['technique'], fingerprint['prefix'],
+              fingerprint['suffix'], now, fingerprint['key']))
+        if detection_seconds is not None:
+            cursor.execute('UPDATE fingerprints SET detection_seconds = ? WHERE fp_key = ?',
+                           (detection_seconds, fingerprint['key']))
+        conn.commit()
+        conn.close()
+    
+    def find_fingerprint(self, target: str, param: str = "") -> Optional[Dict[str, Any]]:
+        """查找目标指纹（未指定参数时返回该目标最近更新的指纹）"""
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        if param:
+            cursor.execute('SELECT * FROM fingerprints WHERE target = ? AND param = ?', (target, param))
+        else:
+            cursor.execute('SELECT * FROM fingerprints WHERE target = ? ORDER BY updated_at DESC LIMIT 1',
+                           (target,))
+        row = cursor.fetchone()
+        conn.close()
+        return dict(row) if row else None
+    
+    def record_fingerprint_hit(self, fp_key: str, saved_seconds: float):
+        """记录一次指纹命中及节省的检测时间"""
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        cursor.execute('''
+            UPDATE fingerprints SET hits = hits + 1, saved_seconds = saved_seconds + ?
+            WHERE fp_key = ?
+        ''', (max(0.0, saved_seconds), fp_key))
+        conn.commit()
+        conn.close()
+    
+    def delete_fingerprint(self, fp_key: str):
+        """删除失效的指纹"""
+        conn = self._get_connection()
+        conn.execute('DELETE FROM fingerprints WHERE fp_key = ?', (fp_key,))
+        conn.commit()
+        conn.close()
+    
+    def get_fingerprint_stats(self) -> Dict[str, Any]:
+        """指纹缓存统计 {entries, hits, saved_seconds}"""
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        cursor.execute('SELECT COUNT(*), COALESCE(SUM(hits), 0), COALESCE(SUM(saved_seconds), 0) FROM fingerprints')
+        entries, hits, saved = cursor.fetchone()
+        conn.close()
+        return {'entries': entries, 'hits': hits, 'saved_seconds': saved}
+    
+    # ==================== 注入技术统计 ====================
+    
+    def record_technique_outcome(self, dbms: str, tried: str, found: str, detection_seconds: float = 0.0):
+        """
+        记录一次完整检测的结果
+        
+        参数:
+            dbms: 数据库类型（未知时为空字符串）
+            tried: 本次测试的技术代码，如 "BEUST"
+            found: 确认可用的技术代码（未发现注入时为空）
+            detection_seconds: 发现注入的耗时
+        """
+        conn = self._get_connection()
+        conn.execute('''
+            INSERT INTO technique_outcomes (dbms, tried, found, detection_seconds, created_at)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (dbms, tried, found, max(0.0, detection_seconds), datetime.now().isoformat()))
+        conn.commit()
+        conn.close()
+    
+    def get_technique_outcomes(self, dbms: str = None, limit: int = 500) -> List[Dict[str, Any]]:
+        """
+        获取最近的检测结果记录
+        
+        dbms 为 None 时返回所有数据库类型；否则只返回该类型（不区分大小写）
+        """
+        conn = self._get_connection()
+        if dbms is None:
+            rows = conn.execute('SELECT * FROM technique_outcomes ORDER BY id DESC LIMIT ?', (limit,)).fetchall()
+        else:
+            rows = conn.execute('''
+                SELECT * FROM technique_outcomes WHERE LOWER(dbms) = LOWER(?) ORDER BY id DESC LIMIT ?
+            ''', (dbms, limit)).fetchall()
+        conn.close()
+        return [dict(row) for row in rows]
+    
+    # ==================== 表快照 ====================
+    
+    def save_table_snapshot(self, target: str, db: str, table: str, row_count: int,
+                            checksum: str = "", key_column: str = "", max_key: str = None):
+        """
+        保存表提取完成时的快照（同一目标的同一张表只保留最新一次）
+        
+        参数:
+            target: 规范化目标
+            row_count: 提取时 --count 的行数
+            checksum: 变化标记（校验和、更新时间等，数据库类型不支持时为空）
+            key_column: 单调递增的键列（追加型表增量提取使用）
+            max_key: 已提取的键最大值
+        """
+        conn = self._get_connection()
+        conn.execute('''
+            INSERT OR REPLACE INTO table_snapshots
+                (target, db, table_name, row_count, checksum, key_column, max_key, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (target, db, table, row_count, checksum or "", key_column or "",
+              None if max_key is None else str(max_key), datetime.now().isoformat()))
+        conn.commit()
+        conn.close()
+    
+    def get_table_snapshots(self, target: str, db: str) -> Dict[str, Dict[str, Any]]:
+        """获取目标数据库各表的快照 {表名: 快照}"""
+        conn = self._get_connection()
+        rows = conn.execute('SELECT * FROM table_snapshots WHERE target = ? AND db = ?', (target, db)).fetchall()
+        conn.close()
+        return {row['table_name']: dict(row) for row in rows}
+    
+    # ==================== 结果复用缓存 ====================
+    
+    def save_cached_result(self, spec_hash: str, target: str, command: str, results: str,
+                           log: str = "", scan_id: int = None):
+        """保存扫描结果（results 为 encode_results() 的结果，同一规格只保留最新一次）"""
+        conn = self._get_connection()
+        conn.execute('''
+            INSERT OR REPLACE INTO result_cache
+                (spec_hash, target, command, scan_id, results, log, size_bytes, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (spec_hash, target, command, scan_id, results, log,
+              len(results.encode('utf-8')) + len(log.encode('utf-8')), datetime.now().isoformat()))
+        conn.commit()
+        conn.close()
+    
+    def find_cached_result(self, spec_hash: str, max_age: float) -> Optional[Dict[str, Any]]:
+        """
+        查找有效期内的缓存结果，并计入查询和命中次数
+        
+        参数:
+            spec_hash: 扫描规格哈希
+            max_age: 有效期（秒）
+        """
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        cutoff = datetime.fromtimestamp(datetime.now().timestamp() - max_age).isoformat()
+        cursor.execute('SELECT * FROM result_cache WHERE spec_hash = ? AND created_at >= ?',
+                       (spec_hash, cutoff))
+        row = cursor.fetchone()
+        cursor.execute('UPDATE result_cache_stats SET lookups = lookups + 1, hits = hits + ? WHERE id = 1',
+                       (1 if row else 0,))
+        conn.commit()
+        conn.close()
+        return dict(row) if row else None
+    
+    def purge_cached_results(self, max_age: float) -> int:
+        """删除超过有效期的缓存结果，返回删除数量"""
+        conn = self._get_connection()
+        cutoff = datetime.fromtimestamp(datetime.now().timestamp() - max_age).isoformat()
+        count = conn.execute('DELETE FROM result_cache WHERE created_at < ?', (cutoff,)).rowcount
+        conn.commit()
+        conn.close()
+        return count
+    
+    def clear_result_cache(self) -> int:
+        """清空结果缓存和命中统计，返回删除数量"""
+        conn = self._get_connection()
+        count = conn.execute('DELETE FROM result_cache').rowcount
+        conn.execute('UPDATE result_cache_stats SET lookups = 0, hits = 0 WHERE id = 1')
+        conn.commit()
+        conn.execute('VACUUM')
+        conn.close()
+        return count
+    
+    def get_result_cache_stats(self) -> Dict[str, Any]:
+        """结果缓存统计 {entries, size_bytes, lookups, hits}"""
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        cursor.execute('SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM result_cache')
+        entries, size_bytes = cursor.fetchone()
+        cursor.execute('SELECT lookups, hits FROM result_cache_stats WHERE id = 1')
+        row = cursor.fetchone()
+        conn.close()
+        return {'entries': entries, 'size_bytes': size_bytes,
+                'lookups': row['lookups'] if row else 0, 'hits': row['hits'] if row else 0}
     
     def get_history(self, limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
         """获取扫描历史列表"""
@@ -0,0 +1,417 @@
+"""
+增量提取
+复测同一目标时先用 --count（以及数据库支持时的低成本变化标记查询）获取各表现状，
+与历史中上次提取时的快照比较：未变化的表跳过，变化的表重新提取；
+追加型表（有单调递增的键）只用 --where 提取键大于上次最大值的新增行
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from .command_builder import CommandBuilder
+from .dump_planner import estimate_rows, find_columns
+from .fingerprint_cache import dbms_name, normalize_target
+from .job_queue import JobStatus
+
+
+ACTION_SKIP = "skip"
+ACTION_APPEND = "append"
+ACTION_FULL = "full"
+
+ACTION_LABELS = {
+    ACTION_SKIP: "未变化，跳过",
+    ACTION_APPEND: "增量提取新增行",
+    ACTION_FULL: "完整提取",
+}
+
+
+def _sql_string(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+def change_marker_query(dbms: str, db: str, tables: List[str]) -> str:
+    """
+    一次取回所有表变化标记的 SELECT 语句（每行: 表名, 标记），数据库类型不支持时返回空字符串
+    
+    - MySQL: information_schema 中的 UPDATE_TIME（不读取表数据）
+    - PostgreSQL: pg_stat_user_tables 的累计插入、更新、删除行数
+    - SQL Server: CHECKSUM_AGG(BINARY_CHECKSUM(*))，服务端计算，只返回一个值
+    """
+    name = dbms_name(dbms).lower()
+    if not db or not tables:
+        return ""
+    if name == "mysql":
+        return (f"SELECT TABLE_NAME,UPDATE_TIME FROM information_schema.TABLES "
+                f"WHERE TABLE_SCHEMA={_sql_string(db)}")
+    if name == "postgresql":
+        return (f"SELECT relname,n_tup_ins+n_tup_upd+n_tup_del FROM pg_stat_user_tables "
+                f"WHERE schemaname={_sql_string(db)}")
+    if name in ("microsoft sql server", "mssql", "sql server"):
+        parts = []
+        for table in tables:
+            schema, _sep, name_only = table.rpartition('.')
+            parts.append(f"SELECT {_sql_string(table)},CHECKSUM_AGG(BINARY_CHECKSUM(*)) "
+                         f"FROM [{db}].[{schema or 'dbo'}].[{name_only}]")
+        return " UNION ALL ".join(parts)
+    return ""
+
+
+def parse_query_rows(output: str) -> List[List[str]]:
+    """
+    解析 --sql-query 多行结果
+    
+    sqlmap 输出格式:
+        SELECT ... [2]:
+        [*] users, 2024-05-01 10:00:00
+        [*] orders, 2024-05-02 11:30:00
+    """
+    rows = []
+    in_result = False
+    for line in output.splitlines():
+        line = line.rstrip()
+        if re.match(r"^SELECT .*\[\d+\]:$", line, re.I):
+            in_result = True
+            rows = []
+            continue
+        if in_result:
+            if line.startswith("[*] "):
+                rows.append([part.strip() for part in line[4:].split(",", 1)])
+            elif line:
+                in_result = False
+    return rows
+
+
+def find_monotonic_key(table: str, columns: Iterable) -> str:
+    """
+    查找可用于增量提取的单调递增键列（id 或 <表名>_id，且不是非整数类型），找不到返回空字符串
+    
+    参数:
+        columns: 列信息 [(列名, 类型)] 或列名列表
+    """
+    base = table.rsplit('.', 1)[-1].lower()
+    names = {"id", f"{base}_id", f"{base.rstrip('s')}_id"}
+    for column in columns or []:
+        if isinstance(column, (tuple, list)):
+            name, col_type = column[0], (column[1] if len(column) > 1 else "")
+        else:
+            name, col_type = column, ""
+        if name.lower() in names and (not col_type or "int" in col_type.lower() or "serial" in col_type.lower()):
+            return name
+    return ""
+
+
+@dataclass
+class TableDecision:
+    """单张表的增量提取决定"""
+    table: str
+    action: str
+    reason: str
+    old_count: Optional[int] = None
+    new_count: Optional[int] = None
+    checksum: str = ""          # 本次的变化标记
+    key_column: str = ""        # 追加型表的单调键
+    since_key: Optional[int] = None  # 只提取键大于该值的行
+    
+    @property
+    def label(self) -> str:
+        return ACTION_LABELS.get(self.action, self.action)
+    
+    @property
+    def expected_rows(self) -> Optional[int]:
+        """增量提取预期的新增行数"""
+        if self.action != ACTION_APPEND or self.old_count is None or self.new_count is None:
+            return None
+        return self.new_count - self.old_count
+
+
+def _parse_int(value) -> Optional[int]:
+    try:
+        return int(str(value).strip())
+    except (TypeError, ValueError):
+        return None
+
+
+def decide_tables(db: str, tables: List[str], counts: Dict[str, int], markers: Dict[str, str],
+                  snapshots: Dict[str, Dict], append_only: Dict[str, str] = None) -> List[TableDecision]:
+    """
+    比较当前行数、变化标记和历史快照，决定每张表的提取方式
+    
+    参数:
+        counts: --count 结果 {db.table: 行数}
+        markers: 变化标记 {表名: 标记}（不支持的数据库为空）
+        snapshots: HistoryManager.get_table_snapshots() 的结果
+        append_only: 追加型表及其单调键 {表名: 键列}
+    """
+    append_only = append_only or {}
+    decisions = []
+    for table in tables:
+        new_count = estimate_rows(table, db, counts)
+        marker = markers.get(table, "") or ""
+        if marker.upper() == "NULL":
+            marker = ""
+        snapshot = snapshots.get(table)
+        decision = TableDecision(table, ACTION_FULL, "", new_count=new_count, checksum=marker,
+                                 key_column=append_only.get(table, ""))
+        decisions.append(decision)
+        if snapshot is None:
+            decision.reason = "没有上次提取的记录"
+            continue
+        decision.old_count = snapshot.get('row_count')
+        if new_count is None:
+            decision.reason = "未能获取行数"
+            continue
+        marker_changed = bool(marker and snapshot.get('checksum') and marker != snapshot['checksum'])
+        if new_count == decision.old_count and not marker_changed:
+            decision.action = ACTION_SKIP
+            decision.reason = f"行数仍为 {new_count}" + ("，变化标记相同" if marker else "")
+            continue
+        since = _parse_int(snapshot.get('max_key'))
+        if (decision.key_column and decision.key_column == snapshot.get('key_column') and since is not None
+                and decision.old_count is not None and new_count > decision.old_count):
+            decision.action = ACTION_APPEND
+            decision.since_key = since
+            decision.reason = f"新增 {new_count - decision.old_count} 行，{decision.key_column} > {since}"
+            continue
+        if new_count != decision.old_count:
+            decision.reason = f"行数 {decision.old_count} → {new_count}"
+        else:
+            decision.reason = "行数相同但变化标记不同"
+    return decisions
+
+
+class IncrementalDump(QObject):
+    """
+    增量提取协调器
+    
+    先执行 -D <库> --count 和变化标记查询（复用会话，--fresh-queries 避免读到会话中缓存的旧值），
+    再只为变化的表提交提取任务；每张表提取完成后更新历史中的快照。
+    追加型表提取的行数与行数差不一致（有更新或删除）时，自动改为完整提取
+    """
+    
+    message = pyqtSignal(str)     # 进度消息
+    finished = pyqtSignal(str)    # 全部提取结束 (group_id)
+    
+    def __init__(self, scheduler, history, builder: CommandBuilder, db: str, tables: List[str],
+                 dbms: str = "", columns: Dict = None, append_only: Dict[str, str] = None,
+                 max_concurrent: int = 4, priority: int = 0, parent=None):
+        """
+        初始化增量提取
+        
+        参数:
+            scheduler: JobScheduler
+            history: HistoryManager（保存和读取表快照）
+            builder: 目标任务的命令构建器
+            db: 数据库名
+            tables: 表名列表
+            dbms: 数据库类型（用于选择变化标记查询）
+            columns: 已知的列信息 {(db, table): [列]}，用于识别追加型表的单调键
+            append_only: 追加型表及其单调键 {表名: 键列}，键列为空时按列信息自动识别
+            max_concurrent: 并行提取的表数
+            priority: 任务优先级
+        """
+        super().__init__(parent)
+        self.scheduler = scheduler
+        self.history = history
+        self.db = db
+        self.tables = list(dict.fromkeys(tables))
+        self.dbms = dbms
+        self.columns = columns or {}
+        self.append_only = dict(append_only or {})
+        self.max_concurrent = max(1, max_concurrent)
+        self.priority = priority
+        self._options = (CommandBuilder.from_snapshot(builder.snapshot())
+                         .clear_actions()
+                         .set_flush_session(False)
+                         .set_fresh_queries(True)
+                         .snapshot())
+        self.target = normalize_target(self._options)
+        
+        self.group_id = ""
+        self.count_job_id = None
+        self.marker_job_id = None
+        self.decisions: Dict[str, TableDecision] = {}
+        self.dump_jobs: Dict[int, str] = {}   # {job_id: 表名}
+        self._fallbacks = set()               # 追加提取不一致、已改为完整提取的表
+    
+    def start(self) -> str:
+        """提交计数任务和变化标记查询，返回任务组 ID"""
+        self.group_id = self.scheduler.create_group("incr", self.max_concurrent, share_host_slot=True)
+        self.scheduler.job_finished.connect(self._on_job_finished)
+        
+        builder = self._new_builder().enum_count(True).enum_tables(False, db=self.db)
+        job = self.scheduler.submit(builder, priority=self.priority,
+                                    scan_mode="增量提取-计数", group_id=self.group_id)
+        self.count_job_id = job.job_id
+        
+        query = change_marker_query(self.dbms, self.db, self.tables)
+        if query:
+            job = self.scheduler.submit(self._new_builder().sql_query(query), priority=self.priority,
+                                        scan_mode="增量提取-变化标记", group_id=self.group_id)
+            self.marker_job_id = job.job_id
+        marker = "及变化标记" if query else ""
+        self._log(f"增量提取 {self.db}: 正在统计 {len(self.tables)} 张表的行数{marker}")
+        return self.group_id
+    
+    # ==================== 内部方法 ====================
+    
+    def _new_builder(self) -> CommandBuilder:
+        return CommandBuilder.from_snapshot(self._options)
+    
+    def _log(self, text: str):
+        """记录到计数任务日志并发出消息"""
+        if self.count_job_id is not None:
+            self.scheduler.append_log(self.count_job_id, f"[增量提取] {text}")
+        self.message.emit(text)
+    
+    def _on_job_finished(self, job_id: int, return_code: int):
+        if job_id in (self.count_job_id, self.marker_job_id):
+            if all(self._is_final(jid) for jid in (self.count_job_id, self.marker_job_id) if jid is not None):
+                self._plan()
+        elif job_id in self.dump_jobs:
+            self._on_dump_finished(job_id)
+    
+    def _is_final(self, job_id: int) -> bool:
+        job = self.scheduler.get_job(job_id)
+        return job is None or job.is_finished
+    
+    def _plan(self):
+        """比较快照，为变化的表提交提取任务"""
+        count_job = self.scheduler.get_job(self.count_job_id)
+        if count_job is None or count_job.status != JobStatus.COMPLETED:
+            self._log(f"统计 {self.db} 行数失败，增量提取已终止")
+            self._finish()
+            return
+        counts = count_job.store.get_summary().get('counts', {})
+        markers = self._markers()
+        try:
+            snapshots = self.history.get_table_snapshots(self.target, self.db) if self.history else {}
+        except Exception:
+            snapshots = {}
+        
+        for table in self.tables:
+            if table not in self.append_only:
+                continue
+            requested = self.append_only[table]
+            key = self._resolve_key(table, requested, snapshots.get(table) or {})
+            if key:
+                self.append_only[table] = key
+            else:
+                del self.append_only[table]
+                if requested:
+                    self._log(f"{table}: 键列 '{requested}' 不是已知的列名，按普通表处理")
+                else:
+                    self._log(f"{table}: 没有找到单调递增的键列，按普通表处理")
+        
+        decisions = decide_tables(self.db, self.tables, counts, markers, snapshots, self.append_only)
+        self.decisions = {decision.table: decision for decision in decisions}
+        for decision in decisions:
+            self._log(f"{decision.table}: {decision.label}（{decision.reason}）")
+        
+        # 行数少的表先提取
+        pending = [decision for decision in decisions if decision.action != ACTION_SKIP]
+        pending.sort(key=lambda decision: (decision.new_count is None, decision.expected_rows or decision.new_count or 0))
+        for decision in pending:
+            self._submit_dump(decision)
+        skipped = len(decisions) - len(pending)
+        self._log(f"{self.db}: {skipped} 张表未变化跳过，"
+                  f"{sum(d.action == ACTION_APPEND for d in pending)} 张增量提取，"
+                  f"{sum(d.action == ACTION_FULL for d in pending)} 张完整提取")
+        if not pending:
+            self._finish()
+    
+    def _resolve_key(self, table: str, requested: str, snapshot: Dict) -> str:
+        """
+        确定追加型表的单调键（用于 --where 条件）
+        
+        指定的键列必须是合法的列名，且出现在已知的列信息或上次提取时识别出的键列中；
+        未指定时优先按列信息识别，其次沿用上次的键列。无法确定时返回空字符串
+        """
+        columns = find_columns(self.columns, self.db, table)
+        previous = snapshot.get('key_column', "")
+        if not requested:
+            return find_monotonic_key(table, columns) or previous
+        known = {column[0] if isinstance(column, (tuple, list)) else column for column in columns or []}
+        if previous:
+            known.add(previous)
+        if re.fullmatch(r"\w+", requested) and requested in known:
+            return requested
+        return ""
+    
+    def _markers(self) -> Dict[str, str]:
+        """解析变化标记查询的结果 {表名: 标记}"""
+        job = self.scheduler.get_job(self.marker_job_id) if self.marker_job_id is not None else None
+        if job is None or job.status != JobStatus.COMPLETED:
+            return {}
+        markers = {}
+        for row in parse_query_rows("".join(job.log)):
+            if len(row) == 2:
+                markers[row[0]] = row[1]
+        return markers
+    
+    def _submit_dump(self, decision: TableDecision):
+        builder = self._new_builder().dump_data(True, db=self.db, table=decision.table)
+        if decision.action == ACTION_APPEND:
+            builder.set_where(f"{decision.key_column}>{decision.since_key}")
+        job = self.scheduler.submit(builder, priority=self.priority,
+                                    scan_mode="增量提取" if decision.action == ACTION_APPEND else "增量提取-完整",
+                                    group_id=self.group_id)
+        self.dump_jobs[job.job_id] = decision.table
+    
+    def _on_dump_finished(self, job_id: int):
+        """表提取结束：校验追加提取的行数并更新快照"""
+        job = self.scheduler.get_job(job_id)
+        decision = self.decisions[self.dump_jobs[job_id]]
+        if job is not None and job.status == JobStatus.COMPLETED:
+            key = job.store.find_table(f"{self.db}.{decision.table}", self.db, decision.table)
+            fetched = job.store.row_count(key) if key else 0
+            expected = decision.expected_rows
+            if expected is not None and fetched != expected and decision.table not in self._fallbacks:
+                # 表中有更新或删除，不是纯追加：改为完整提取
+                self._log(f"{decision.table}: 新增行 {fetched} 与行数差 {expected} 不一致，改为完整提取")
+                self._fallbacks.add(decision.table)
+                decision.action = ACTION_FULL
+                decision.since_key = None
+                self._submit_dump(decision)
+                return
+            self._save_snapshot(job, decision, key, fetched)
+        
+        if all(self._is_final(jid) for jid in self.dump_jobs):
+            self._finish()
+    
+    def _save_snapshot(self, job, decision: TableDecision, table_key: Optional[str], fetched: int):
+        """提取完成：保存行数、变化标记和单调键最大值"""
+        if not self.history or not self.target:
+            return
+        key_column = decision.key_column
+        if not key_column and table_key:
+            key_column = find_monotonic_key(decision.table, job.store.get_headers(table_key))
+        max_key = decision.since_key
+        if key_column and table_key:
+            headers = job.store.get_headers(table_key)
+            if key_column in headers:
+                index = headers.index(key_column)
+                values = [_parse_int(row[index]) for row in job.store.iter_rows(table_key) if len(row) > index]
+                values = [value for value in values if value is not None]
+                if values:
+                    max_key = max(values + ([max_key] if max_key is not None else []))
+        row_count = decision.new_count if decision.new_count is not None else fetched
+        try:
+            self.history.save_table_snapshot(self.target, self.db, decision.table, row_count,
+                                             decision.checksum, key_column, max_key)
+        except Exception:
+            pass
+    
+    def _finish(self):
+        try:
+            self.scheduler.job_finished.disconnect(self._on_job_finished)
+        except TypeError:
+            pass
+        done = {table for job_id, table in self.dump_jobs.items()
+                if self.scheduler.get_job(job_id) is not None
+                and self.scheduler.get_job(job_id).status == JobStatus.COMPLETED}
+        if self.dump_jobs:
+            self._log(f"{self.db}: 增量提取结束，{len(done)}/{len(set(self.dump_jobs.values()))} 张表提取完成")
+        self.finished.emit(self.group_id)
@@ -0,0 +1,236 @@
+"""
+任务检查点
+从 sqlmap 输出跟踪任务进度（阶段、已完成的表、当前表已提取的行数、会话目录），
+持久化到历史数据库，程序重启后据此重建命令恢复中断的任务
+"""
+
+import os
+import re
+import time
+from dataclasses import dataclass, field, asdict
+from typing import Dict, List, Optional
+
+from .command_builder import CommandBuilder
+
+
+# 任务阶段
+PHASE_DETECTION = "detection"
+PHASE_ENUMERATION = "enumeration"
+PHASE_DUMP = "dump"
+
+PHASE_LABELS = {
+    PHASE_DETECTION: "注入检测",
+    PHASE_ENUMERATION: "枚举",
+    PHASE_DUMP: "数据提取",
+}
+
+
+def default_output_dir() -> str:
+    """sqlmap 默认的输出目录（会话文件保存在 <输出目录>/<主机>/session.sqlite）"""
+    return os.path.join(os.path.expanduser("~"), ".local", "share", "sqlmap", "output")
+
+
+def guess_session_dir(options: Dict, host: str) -> str:
+    """根据输出目录和目标主机推断会话目录"""
+    if not host:
+        return ""
+    return os.path.join(options.get('_output_dir') or default_output_dir(), host)
+
+
+@dataclass
+class JobCheckpoint:
+    """任务检查点"""
+    phase: str = PHASE_DETECTION
+    completed_tables: List[str] = field(default_factory=list)  # 已提取完成的表 (db.table)
+    current_table: str = ""                                    # 正在提取的表 (db.table)
+    last_row: int = 0                                          # 当前表已提取的行数（相对于 --start）
+    session_dir: str = ""
+    
+    def to_dict(self) -> Dict:
+        return asdict(self)
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'JobCheckpoint':
+        data = data or {}
+        return cls(
+            phase=data.get('phase') or PHASE_DETECTION,
+            completed_tables=list(data.get('completed_tables') or []),
+            current_table=data.get('current_table') or "",
+            last_row=int(data.get('last_row') or 0),
+            session_dir=data.get('session_dir') or "",
+        )
+
+
+class CheckpointTracker:
+    """
+    从 sqlmap 输出行跟踪检查点
+    
+    当前表的行数在盲注逐个输出单元格（"retrieved: xxx"）时按列数换算；
+    UNION/报错注入整表一次输出，只记录表是否完成
+    """
+    
+    # 行数进度的最短保存间隔（秒）
+    SAVE_INTERVAL = 5.0
+    
+    def __init__(self, options: Dict, host: str = "", previous: Optional[Dict] = None):
+        """
+        参数:
+            options: 任务的选项快照
+            host: 目标主机
+            previous: 恢复任务时原任务的检查点（沿用已完成的表和会话目录）
+        """
+        self.checkpoint = JobCheckpoint(session_dir=guess_session_dir(options, host))
+        if previous:
+            old = JobCheckpoint.from_dict(previous)
+            self.checkpoint.completed_tables = old.completed_tables
+            self.checkpoint.session_dir = old.session_dir or self.checkpoint.session_dir
+        self._column_count = len([c for c in options.get('_target_columns', '').split(',') if c.strip()])
+        self._cells = 0
+        self._expect_entry_count = False
+        self._grid = {}  # 最近的 "Database:" / "Table:" 表格标题
+        self._dirty = False
+        self._saved_at = 0.0
+    
+    def feed(self, line: str) -> bool:
+        """
+        处理一行输出，返回是否需要立即保存（阶段变化或表完成）
+        
+        行数进度只标记为待保存，由 should_save() 按间隔保存
+        """
+        line = line.strip()
+        if not line:
+            return False
+        lower = line.lower()
+        checkpoint = self.checkpoint
+        
+        # 表提取完成：sqlmap 在取回全部值后才输出 "Table: x" + "[N entries]" 表格，
+        # 并提示 "table 'db.x' dumped to CSV file ..."
+        match = re.search(r"table '([^']+)' dumped to", line, re.IGNORECASE)
+        if match:
+            return self.mark_table_done(match.group(1))
+        match = re.match(r"(Database|Table):\s*(\S+)", line)
+        if match:
+            self._grid[match.group(1)] = match.group(2).strip("'\"`")
+            return False
+        if re.match(r"\[\d+ entries\]", lower) and self._grid.get('Table'):
+            table = self._grid['Table']
+            if self._grid.get('Database') and '.' not in table:
+                table = f"{self._grid['Database']}.{table}"
+            return self.mark_table_done(table)
+        
+        match = re.search(r"logged to text files under '([^']+)'", line)
+        if match and match.group(1) != checkpoint.session_dir:
+            checkpoint.session_dir = match.group(1)
+            return True
+        
+        if "fetching entries" in lower or "dumping entries" in lower:
+            table = self._parse_table(line)
+            if table and table != checkpoint.current_table:
+                checkpoint.current_table = table
+                checkpoint.last_row = 0
+            checkpoint.phase = PHASE_DUMP
+            self._cells = 0
+            return True
+        
+        if "fetching number of entries" in lower:
+            self._expect_entry_count = True
+            return False
+        
+        if checkpoint.phase == PHASE_DETECTION and (
+                "fetching" in lower or "sqlmap identified" in lower or "resuming back-end dbms" in lower):
+            checkpoint.phase = PHASE_ENUMERATION
+            return True
+        
+        if checkpoint.phase == PHASE_DUMP and "retrieved:" in lower:
+            if self._expect_entry_count:
+                # 盲注先取回总行数，其后才是单元格
+                self._expect_entry_count = False
+                return False
+            self._cells += 1
+            if self._column_count:
+                rows = self._cells // self._column_count
+                if rows != checkpoint.last_row:
+                    checkpoint.last_row = rows
+                    self._dirty = True
+        return False
+    
+    def set_column_count(self, count: int):
+        """设置当前表的列数（来自结果存储的列信息）"""
+        if count > 0:
+            self._column_count = count
+    
+    def mark_table_done(self, table_key: str) -> bool:
+        """表数据已完整输出，返回是否有变化"""
+        checkpoint = self.checkpoint
+        if table_key in checkpoint.completed_tables:
+            return False
+        checkpoint.completed_tables.append(table_key)
+        if table_key == checkpoint.current_table:
+            checkpoint.current_table = ""
+            checkpoint.last_row = 0
+        return True
+    
+    def should_save(self) -> bool:
+        """行数进度是否到了保存时间"""
+        return self._dirty and time.time() - self._saved_at >= self.SAVE_INTERVAL
+    
+    def mark_saved(self):
+        self._dirty = False
+        self._saved_at = time.time()
+    
+    @staticmethod
+    def _parse_table(line: str) -> str:
+        """从 "fetching entries for table 'users' in database 'db'" 中解析 db.table"""
+        table = re.search(r"table\s+'([^']+)'", line, re.IGNORECASE)
+        if not table:
+            return ""
+        db = re.search(r"in database\s+'([^']+)'", line, re.IGNORECASE)
+        name = table.group(1).strip('`"')
+        if db and '.' not in name:
+            return f"{db.group(1)}.{name}"
+        return name
+
+
+def _table_name(table_key: str) -> str:
+    return table_key.rsplit('.', 1)[-1]
+
+
+def build_resume_builder(options: Dict, checkpoint: JobCheckpoint,
+                         sqlmap_path: Optional[str] = None, skip_rows: bool = True) -> CommandBuilder:
+    """
+    根据检查点重建恢复命令
+    
+    - 始终复用会话（不清空会话，必要时指定原会话所在的输出目录），注入检测和已取回的盲注值直接从会话恢复
+    - 提取单张表且中断在表内时，--start 从已提取行数之后继续（skip_rows=False 时从头提取）
+    - 提取多张表时，已完成的表通过 --exclude 排除（未完成的表由会话缓存续取）
+    """
+    builder = CommandBuilder.from_snapshot(options)
+    if sqlmap_path:
+        builder.sqlmap_path = sqlmap_path
+    builder.set_flush_session(False)
+    
+    if checkpoint.session_dir and not options.get('_output_dir'):
+        output_dir = os.path.dirname(checkpoint.session_dir.rstrip('/\\'))
+        if output_dir and os.path.normpath(output_dir) != os.path.normpath(default_output_dir()):
+            builder.set_output_dir(output_dir)
+    
+    if checkpoint.phase != PHASE_DUMP:
+        return builder
+    
+    tables = [t.strip() for t in (options.get('_target_table') or '').split(',') if t.strip()]
+    completed = {_table_name(key) for key in checkpoint.completed_tables}
+    
+    if len(tables) == 1:
+        if skip_rows and tables[0] not in completed and checkpoint.last_row > 0:
+            start = (options.get('_start') or 1) + checkpoint.last_row
+            builder.set_limit(start, options.get('_stop'))
+        return builder
+    
+    if tables:
+        remaining = [t for t in tables if t not in completed]
+        if remaining:
+            builder.dump_data(True, table=",".join(remaining))
+    elif completed:
+        names = "|".join(re.escape(name) for name in sorted(completed))
+        builder.set_exclude(f"^({names})$")
+    return builder
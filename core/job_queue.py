@@ -0,0 +1,395 @@
+"""
+扫描任务队列
+按优先级排队扫描任务，并限制全局并发数和单个目标主机的并发数
+"""
+
+import time
+from enum import Enum
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlparse
+
+from .failure_policy import FailureInfo
+from .fair_share import FairShare
+from .rate_budget import RateBudget
+from .result_store import ResultStore
+
+
+class JobStatus(Enum):
+    """任务状态"""
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+# 状态显示名称
+STATUS_LABELS = {
+    JobStatus.PENDING: "⏳ 排队中",
+    JobStatus.RUNNING: "🔄 运行中",
+    JobStatus.COMPLETED: "✅ 完成",
+    JobStatus.FAILED: "❌ 失败",
+    JobStatus.CANCELLED: "⛔ 已取消",
+}
+
+
+@dataclass
+class ScanJob:
+    """扫描任务（命令选项在入队时冻结）"""
+    job_id: int
+    command: str                      # 入队时构建好的完整命令
+    options: Dict                     # CommandBuilder.snapshot() 选项快照
+    target: str = ""
+    host: str = ""                    # 目标主机，用于单主机并发限制（空表示不限制）
+    priority: int = 0                 # 数值越大越先执行
+    scan_mode: str = ""
+    group_id: str = ""                # 任务组（批量拆分等），组内可单独限制并发
+    status: JobStatus = JobStatus.PENDING
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    return_code: Optional[int] = None
+    history_id: Optional[int] = None
+    attempts: int = 0                 # 已执行次数
+    cancel_requested: bool = False
+    store: ResultStore = field(default_factory=ResultStore)
+    log: List[str] = field(default_factory=list)
+    resume_checkpoint: Optional[Dict] = None  # 恢复中断任务时原任务的检查点
+    rate_limit: Optional[float] = None  # 启动时分配的请求速率（req/s），None 表示不限速
+    paused: bool = False  # 运行中被暂停（进程挂起，仍占用并发名额）
+    tuning: Optional[Dict] = None  # 自动调优选择的参数（TuningResult.to_dict()）
+    fingerprint: Optional[Dict] = None  # 提交时命中的目标指纹（含 applied：添加的参数）
+    detected_at: Optional[float] = None  # sqlmap 确认注入点的时间
+    spec_hash: str = ""  # 扫描规格哈希（结果复用缓存的键，按提交时用户设置的选项计算）
+    worker: str = ""  # 执行任务的远程节点名称（空表示在本机执行）
+    project: str = ""  # 所属项目（项目间加权公平调度）
+    queued_at: float = field(default_factory=time.time)  # 最近一次进入排队的时间（统计等待时间）
+    preempt_requested: bool = False  # 正在被抢占（停止后重新排队，而不是结束）
+    preemptions: int = 0  # 被更高优先级任务抢占的次数
+    failure: Optional[FailureInfo] = None  # 结束原因分类（临时故障、目标不可达等）
+    auto_retries: int = 0  # 临时故障后已自动重试的次数
+    retry_at: Optional[float] = None  # 等待自动重试：此时间之前不启动
+    log_offset: int = 0  # 本次执行的第一条日志在 log 中的位置（失败分类只看本次输出）
+    session_key: str = ""  # 会话对应的目标（规范化目标 + 测试参数）
+    session_source: int = 0  # 会话克隆自哪个任务（0 表示自行检测）
+    session_saved: float = 0.0  # 克隆会话省去的注入检测时间（秒）
+    session_clone: str = ""  # 会话克隆方式说明
+    
+    @property
+    def is_finished(self) -> bool:
+        """是否已结束（完成、失败或取消）"""
+        return self.status in (JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.CANCELLED)
+    
+    @property
+    def elapsed(self) -> float:
+        """运行耗时（秒），未开始为 0"""
+        if not self.started_at:
+            return 0.0
+        end = self.finished_at or time.time()
+        return max(0.0, end - self.started_at)
+    
+    @property
+    def status_label(self) -> str:
+        """状态显示名称"""
+        if self.paused and self.status == JobStatus.RUNNING:
+            return "⏸️ 已暂停"
+        if self.status == JobStatus.PENDING and self.retry_at and self.retry_at > time.time():
+            return "⏳ 等待重试"
+        return STATUS_LABELS.get(self.status, self.status.value)
+
+
+def extract_host(options: Dict) -> str:
+    """
+    从选项快照中提取目标主机
+    
+    URL 目标取主机名；请求包文件读取 Host 头；批量文件包含多个主机，返回空字符串
+    """
+    target = options.get('_target', '')
+    if target:
+        if '://' not in target:
+            target = 'http://' + target
+        try:
+            return (urlparse(target).hostname or '').lower()
+        except ValueError:
+            return ''
+    
+    request_file = options.get('_request_file', '')
+    if request_file:
+        try:
+            with open(request_file, 'r', encoding='utf-8', errors='ignore') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        break
+                    if line.lower().startswith('host:'):
+                        return line.split(':', 1)[1].strip().split(':')[0].lower()
+        except OSError:
+            pass
+    
+    return ''
+
+
+class JobQueue:
+    """
+    扫描任务队列
+    
+    只保存任务和排队顺序，不启动进程；由调度器在主线程中调用
+    """
+    
+    def __init__(self, max_concurrent: int = 2, per_host_limit: int = 1):
+        """
+        初始化任务队列
+        
+        参数:
+            max_concurrent: 全局最大并发任务数
+            per_host_limit: 单个目标主机的最大并发任务数
+        """
+        self.max_concurrent = max(1, max_concurrent)
+        self.per_host_limit = max(1, per_host_limit)
+        self._jobs: List[ScanJob] = []  # 列表顺序即同优先级任务的排队顺序
+        self._group_limits: Dict[str, int] = {}  # {group_id: 组内最大并发数}
+        self._shared_host_groups = set()  # 整组只占用一个单主机并发名额的任务组
+        self.rate_budget = RateBudget()  # 单主机请求速率预算
+        self.fair_share = FairShare()  # 项目间加权公平排队
+        self.remote_slots = 0  # 远程执行节点提供的额外并发名额
+        # 额外的启动条件（返回 False 的任务暂不启动，如等待同一目标的注入检测完成）
+        self.start_gate: Optional[Callable[[ScanJob], bool]] = None
+        self._next_id = 1
+    
+    def set_limits(self, max_concurrent: int = None, per_host_limit: int = None):
+        """设置并发限制"""
+        if max_concurrent is not None:
+            self.max_concurrent = max(1, max_concurrent)
+        if per_host_limit is not None:
+            self.per_host_limit = max(1, per_host_limit)
+    
+    @property
+    def capacity(self) -> int:
+        """全局并发上限（本机并发数加远程执行节点的名额）"""
+        return self.max_concurrent + self.remote_slots
+    
+    def local_running_count(self) -> int:
+        """在本机运行的任务数"""
+        return sum(1 for job in self.running_jobs() if not job.worker)
+    
+    def set_group_limit(self, group_id: str, limit: int, share_host_slot: bool = False):
+        """
+        设置任务组的最大并发数（不超过全局限制）
+        
+        参数:
+            share_host_slot: 整组视为同一次扫描，只占用一个单主机并发名额
+                             （用于同一张表的分片提取等共享会话的任务）
+        """
+        self._group_limits[group_id] = max(1, limit)
+        if share_host_slot:
+            self._shared_host_groups.add(group_id)
+    
+    def get_group_limit(self, group_id: str) -> Optional[int]:
+        """获取任务组的最大并发数（未设置返回 None）"""
+        return self._group_limits.get(group_id)
+    
+    def group_jobs(self, group_id: str) -> List[ScanJob]:
+        """获取任务组内的任务（按添加顺序）"""
+        return [job for job in self._jobs if job.group_id == group_id]
+    
+    def new_id(self) -> int:
+        """分配任务 ID"""
+        job_id = self._next_id
+        self._next_id += 1
+        return job_id
+    
+    def add(self, job: ScanJob) -> ScanJob:
+        """添加任务到队尾"""
+        self._next_id = max(self._next_id, job.job_id + 1)
+        self._jobs.append(job)
+        self.fair_share.record_submitted(job)
+        return job
+    
+    def get(self, job_id: int) -> Optional[ScanJob]:
+        """按 ID 获取任务"""
+        for job in self._jobs:
+            if job.job_id == job_id:
+                return job
+        return None
+    
+    def jobs(self) -> List[ScanJob]:
+        """获取全部任务（运行中、排队中按执行顺序，其后为已结束任务）"""
+        running = [job for job in self._jobs if job.status == JobStatus.RUNNING]
+        finished = [job for job in self._jobs if job.is_finished]
+        return running + self.pending_jobs() + finished
+    
+    def pending_jobs(self) -> List[ScanJob]:
+        """
+        获取排队中的任务（按执行顺序：优先级从高到低，同优先级先入先出；
+        有多个项目时同优先级的任务按项目权重交替，见 FairShare.order）
+        """
+        pending = [job for job in self._jobs if job.status == JobStatus.PENDING]
+        return self.fair_share.order(sorted(pending, key=lambda job: -job.priority), self.running_jobs())
+    
+    def running_jobs(self) -> List[ScanJob]:
+        """获取运行中的任务"""
+        return [job for job in self._jobs if job.status == JobStatus.RUNNING]
+    
+    def running_count(self, host: str = None, group_id: str = None) -> int:
+        """运行中的任务数（指定 host 或 group_id 时只统计该主机或任务组）"""
+        return sum(1 for job in self.running_jobs()
+                   if (host is None or job.host == host)
+                   and (group_id is None or job.group_id == group_id))
+    
+    def host_slots(self, host: str) -> int:
+        """目标主机已占用的并发名额（共享名额的任务组整组计一次）"""
+        slots = set()
+        for job in self.running_jobs():
+            if job.host != host:
+                continue
+            if job.group_id in self._shared_host_groups:
+                slots.add(('group', job.group_id))
+            else:
+                slots.add(('job', job.job_id))
+        return len(slots)
+    
+    def can_start(self, job: ScanJob) -> bool:
+        """任务当前是否可以启动（不超过全局和单主机并发限制，等待自动重试的任务未到时间）"""
+        if job.retry_at and job.retry_at > time.time():
+            return False
+        if self.start_gate and not self.start_gate(job):
+            return False
+        if self.running_count() >= self.capacity:
+            return False
+        if job.host:
+            group_holds_slot = (job.group_id in self._shared_host_groups
+                                and self.running_count(host=job.host, group_id=job.group_id) > 0)
+            if not group_holds_slot and self.host_slots(job.host) >= self.per_host_limit:
+                return False
+        group_limit = self._group_limits.get(job.group_id) if job.group_id else None
+        if group_limit and self.running_count(group_id=job.group_id) >= group_limit:
+            return False
+        if self.allocate_rate(job) == 0.0:
+            return False
+        return True
+    
+    def allocate_rate(self, job: ScanJob) -> Optional[float]:
+        """按主机剩余速率预算计算任务可分配的速率（见 RateBudget.allocate）"""
+        slots = self.per_host_limit
+        if job.group_id in self._shared_host_groups:
+            slots = self._group_limits.get(job.group_id) or self.max_concurrent
+        return self.rate_budget.allocate(job, self.running_jobs(), min(slots, self.max_concurrent))
+    
+    def host_rate_stats(self) -> List[Dict]:
+        """各主机的速率预算和已分配速率"""
+        return self.rate_budget.host_stats(self.running_jobs(), self.pending_jobs())
+    
+    def take_next(self) -> Optional[ScanJob]:
+        """
+        取出下一个可以启动的任务
+        
+        主机已满的任务会被跳过，让后面其他主机的任务先执行
+        """
+        if self.running_count() >= self.capacity:
+            return None
+        for job in self.pending_jobs():
+            if self.can_start(job):
+                job.rate_limit = self.allocate_rate(job)
+                self.fair_share.record_started(job)
+                return job
+        return None
+    
+    def move(self, job_id: int, offset: int) -> bool:
+        """
+        在排队顺序中移动任务
+        
+        移到相邻任务之前或之后；优先级不同时采用相邻任务的优先级，保证移动后的顺序生效
+        """
+        pending = self.pending_jobs()
+        job = self.get(job_id)
+        if job not in pending:
+            return False
+        index = pending.index(job)
+        target_index = index + offset
+        if target_index < 0 or target_index >= len(pending):
+            return False
+        
+        other = pending[target_index]
+        job.priority = other.priority
+        self._jobs.remove(job)
+        index = self._jobs.index(other)
+        self._jobs.insert(index + 1 if offset > 0 else index, job)
+        return True
+    
+    def set_priority(self, job_id: int, priority: int) -> bool:
+        """修改排队中任务的优先级"""
+        job = self.get(job_id)
+        if not job or job.status != JobStatus.PENDING:
+            return False
+        job.priority = priority
+        return True
+    
+    def cancel(self, job_id: int) -> bool:
+        """取消排队中的任务（运行中的任务由调度器停止进程）"""
+        job = self.get(job_id)
+        if not job or job.status != JobStatus.PENDING:
+            return False
+        job.status = JobStatus.CANCELLED
+        job.finished_at = time.time()
+        return True
+    
+    def retry(self, job_id: int) -> bool:
+        """将已结束的任务重新放回队尾"""
+        job = self.get(job_id)
+        if not job or not job.is_finished:
+            return False
+        job.status = JobStatus.PENDING
+        job.started_at = None
+        job.finished_at = None
+        job.return_code = None
+        job.history_id = None
+        job.cancel_requested = False
+        job.rate_limit = None
+        job.paused = False
+        job.tuning = None
+        job.detected_at = None
+        job.worker = ""
+        job.queued_at = time.time()
+        job.failure = None
+        job.auto_retries = 0
+        job.retry_at = None
+        job.store.clear()
+        job.log = []
+        self._jobs.remove(job)
+        self._jobs.append(job)
+        return True
+    
+    def requeue(self, job_id: int) -> bool:
+        """
+        将运行中的任务放回排队（执行节点断开或被抢占时），保持原来的排队位置
+        
+        日志保留，结果清空后重新执行
+        """
+        job = self.get(job_id)
+        if not job or job.status != JobStatus.RUNNING:
+            return False
+        job.status = JobStatus.PENDING
+        job.started_at = None
+        job.history_id = None
+        job.rate_limit = None
+        job.paused = False
+        job.tuning = None
+        job.detected_at = None
+        job.worker = ""
+        job.preempt_requested = False
+        job.queued_at = time.time()
+        job.store.clear()
+        return True
+    
+    def remove_finished(self) -> int:
+        """移除所有已结束的任务，返回移除数量"""
+        before = len(self._jobs)
+        self._jobs = [job for job in self._jobs if not job.is_finished]
+        groups = {job.group_id for job in self._jobs}
+        self._group_limits = {gid: limit for gid, limit in self._group_limits.items() if gid in groups}
+        self._shared_host_groups &= groups
+        return before - len(self._jobs)
+    
+    def __len__(self) -> int:
+        return len(self._jobs)
@@ -0,0 +1,884 @@
+"""
+扫描任务调度器
+从任务队列中取出任务交给 SqlmapEngine 执行，有空闲槽位时自动启动下一个任务；
+本机并发已满时把任务分配给已连接的远程执行节点
+"""
+
+import json
+import time
+from functools import partial
+
+from PyQt6.QtCore import QObject, Qt, QTimer, pyqtSignal
+
+from .command_builder import CommandBuilder
+from .failure_policy import RetryPolicy, classify_failure
+from .fingerprint_cache import apply_fingerprint, extract_fingerprint, normalize_target
+from .job_checkpoint import CheckpointTracker, JobCheckpoint, build_resume_builder
+from .job_queue import JobQueue, JobStatus, ScanJob, extract_host
+from .latency_tuner import LatencyTuner, TuningResult
+from .output_quota import OutputQuota
+from .rate_budget import RateBudget
+from .result_cache import encode_results, log_tail, spec_hash
+from .session_clone import SessionSource, clone_session, session_key
+from .sqlmap_engine import SqlmapEngine
+from .technique_optimizer import detection_outcome
+from .worker_protocol import pack_job
+from .worker_server import WorkerServer
+
+
+class JobScheduler(QObject):
+    """扫描任务调度器（运行在主线程，每个任务一个 SqlmapEngine 线程）"""
+    
+    # 信号定义（第一个参数均为任务 ID）
+    job_started = pyqtSignal(int)           # 任务开始
+    job_output = pyqtSignal(int, str)       # 任务输出
+    job_progress = pyqtSignal(int, int)     # 任务进度
+    job_result = pyqtSignal(int, int)       # 任务结果更新（结果存储版本号）
+    job_status = pyqtSignal(int, str)       # 任务状态文字
+    job_finished = pyqtSignal(int, int)     # 任务结束（返回码）
+    job_tuned = pyqtSignal(int)             # 自动调优完成（由引擎线程发出）
+    job_preempted = pyqtSignal(int, int)    # 任务被抢占后重新排队 (被抢占的任务, 抢占它的任务)
+    job_retrying = pyqtSignal(int, float)   # 任务因临时故障等待自动重试 (job_id, 等待秒数)
+    output_evicted = pyqtSignal(int, int)   # 超出磁盘配额，淘汰了旧的任务输出目录 (目录数, 释放字节数)
+    fingerprint_hit = pyqtSignal(int, float)  # 任务使用了指纹缓存 (job_id, 节省的检测秒数)
+    queue_changed = pyqtSignal()            # 队列内容或状态变化
+    
+    def __init__(self, sqlmap_path: str = None, history=None, parent=None,
+                 max_concurrent: int = 2, per_host_limit: int = 1):
+        """
+        初始化调度器
+        
+        参数:
+            sqlmap_path: sqlmap.py 的路径
+            history: HistoryManager，用于记录每个任务的扫描历史（可选）
+            parent: 父对象
+            max_concurrent: 全局最大并发任务数
+            per_host_limit: 单个目标主机的最大并发任务数
+        """
+        super().__init__(parent)
+        self.sqlmap_path = sqlmap_path
+        self.history = history
+        self.queue = JobQueue(max_concurrent, per_host_limit)
+        self._engines = {}  # {job_id: SqlmapEngine}
+        self._trackers = {}  # {job_id: CheckpointTracker}，运行中任务的检查点
+        self.tuner = LatencyTuner()  # 按主机记录响应时间，供自动调优使用
+        self.job_tuned.connect(self._on_job_tuned, Qt.ConnectionType.QueuedConnection)
+        self.result_ttl = 0  # 结果复用缓存有效期（秒），0 表示不缓存
+        self.preempt_enabled = False  # 并发已满时高优先级任务抢占低优先级的运行中任务
+        self._preempting = {}  # {被抢占的任务 ID: 抢占它的任务 ID}
+        self.retry_policy = RetryPolicy()  # 临时故障的自动重试策略
+        # 每个任务独立的输出目录（会话、提取的数据），总占用超过配额时淘汰最久未使用的目录
+        self.output = OutputQuota()
+        self.output.in_use = self._output_dirs_in_use
+        self._output_owners = {}  # {输出目录: 为其分配目录的任务 ID}
+        # 同一目标只检测一次：已检测出注入的会话，之后的任务克隆该会话直接进入提取
+        self._sessions = {}  # {会话目标: SessionSource}
+        self.queue.start_gate = self._detection_gate
+        self._group_seq = 0
+        # 远程执行节点：本机并发已满时任务发送到节点执行，节点的名额计入全局并发
+        self.workers = WorkerServer(self)
+        self.workers.job_output.connect(self._on_engine_output)
+        self.workers.job_result.connect(self._on_remote_result)
+        self.workers.job_finished.connect(self._on_engine_finished)
+        self.workers.job_rejected.connect(self._on_remote_rejected)
+        self.workers.jobs_lost.connect(self._on_remote_jobs_lost)
+        self.workers.workers_changed.connect(self._on_workers_changed)
+    
+    # ==================== 任务管理 ====================
+    
+    def submit(self, builder: CommandBuilder, priority: int = 0, scan_mode: str = "",
+               group_id: str = "", resume_checkpoint: dict = None) -> ScanJob:
+        """
+        提交扫描任务（冻结构建器当前选项）
+        
+        参数:
+            builder: 已配置好的命令构建器
+            priority: 优先级，数值越大越先执行
+            scan_mode: 扫描模式名称（记录到历史）
+            group_id: 任务组 ID（可选）
+            resume_checkpoint: 恢复中断任务时原任务的检查点（可选）
+        """
+        options = builder.snapshot()
+        job_spec = spec_hash(options)
+        fingerprint = self._lookup_fingerprint(options)
+        if fingerprint:
+            builder = CommandBuilder.from_snapshot(options)
+            fingerprint['applied'] = apply_fingerprint(builder, fingerprint)
+            if fingerprint['applied']:
+                options = builder.snapshot()
+            else:
+                fingerprint = None
+        job = ScanJob(
+            job_id=self.queue.new_id(),
+            command=builder.build(),
+            options=options,
+            target=builder.get_target_label(),
+            host=extract_host(options),
+            project=options.get('_project', ''),
+            priority=priority,
+            scan_mode=scan_mode,
+            group_id=group_id,
+            resume_checkpoint=resume_checkpoint,
+            fingerprint=fingerprint,
+            spec_hash=job_spec,
+            session_key=session_key(options),
+        )
+        self.queue.add(job)
+        self.queue_changed.emit()
+        self._dispatch()
+        return job
+    
+    def create_group(self, prefix: str, max_concurrent: int = None,
+                     share_host_slot: bool = False) -> str:
+        """创建任务组，返回组 ID（可限制组内并发数，见 JobQueue.set_group_limit）"""
+        self._group_seq += 1
+        group_id = f"{prefix}-{self._group_seq}"
+        if max_concurrent:
+            self.queue.set_group_limit(group_id, max_concurrent, share_host_slot)
+        return group_id
+    
+    def group_jobs(self, group_id: str) -> list:
+        """获取任务组内的任务"""
+        return self.queue.group_jobs(group_id)
+    
+    def get_job(self, job_id: int):
+        """按 ID 获取任务"""
+        return self.queue.get(job_id)
+    
+    def jobs(self) -> list:
+        """获取全部任务"""
+        return self.queue.jobs()
+    
+    def set_limits(self, max_concurrent: int = None, per_host_limit: int = None):
+        """修改并发限制（放宽后立即启动可执行的任务）"""
+        self.queue.set_limits(max_concurrent, per_host_limit)
+        self.queue_changed.emit()
+        self._dispatch()
+    
+    def set_rate_limits(self, default_rate: float = None, host_rates: dict = None):
+        """
+        修改单主机请求速率预算（只影响之后启动的任务，运行中的任务保持启动时的设置）
+        
+        参数:
+            default_rate: 默认速率上限（req/s，0 表示不限制）
+            host_rates: {host: req/s}，值为 None 表示恢复默认
+        """
+        budget = self.queue.rate_budget
+        if default_rate is not None:
+            budget.set_default_rate(default_rate)
+        for host, rate in (host_rates or {}).items():
+            budget.set_host_rate(host, rate)
+        self.queue_changed.emit()
+        self._dispatch()
+    
+    def host_rate_stats(self) -> list:
+        """各主机的速率预算和已分配速率"""
+        return self.queue.host_rate_stats()
+    
+    def set_project_weights(self, weights: dict):
+        """
+        修改项目权重（同优先级的排队任务按权重分配并发名额）
+        
+        参数:
+            weights: {project: 权重}，值为 None 表示恢复默认权重
+        """
+        for project, weight in weights.items():
+            self.queue.fair_share.set_weight(project, weight)
+        self.queue_changed.emit()
+        self._dispatch()
+    
+    def project_stats(self) -> list:
+        """各项目的运行、排队、等待时间和吞吐量统计（见 FairShare.stats）"""
+        return self.queue.fair_share.stats(self.queue.running_jobs(), self.queue.pending_jobs())
+    
+    def move_job(self, job_id: int, offset: int) -> bool:
+        """调整排队顺序（负数前移，正数后移）"""
+        if self.queue.move(job_id, offset):
+            self.queue_changed.emit()
+            return True
+        return False
+    
+    def set_priority(self, job_id: int, priority: int) -> bool:
+        """修改排队中任务的优先级"""
+        if self.queue.set_priority(job_id, priority):
+            self.queue_changed.emit()
+            return True
+        return False
+    
+    def cancel(self, job_id: int) -> bool:
+        """取消任务（排队中直接取消，运行中停止进程）"""
+        job = self.queue.get(job_id)
+        if not job:
+            return False
+        
+        if job.status == JobStatus.PENDING:
+            self.queue.cancel(job_id)
+            self.queue_changed.emit()
+            return True
+        
+        if job.status == JobStatus.RUNNING:
+            job.cancel_requested = True
+            if job.worker:
+                return self.workers.cancel(job_id)
+            engine = self._engines.get(job_id)
+            if engine and engine.isRunning():
+                engine.stop()
+            return True
+        
+        return False
+    
+    def pause_job(self, job_id: int) -> bool:
+        """暂停运行中任务的进程（不释放并发名额）"""
+        job = self.queue.get(job_id)
+        engine = self._engines.get(job_id)
+        if not job or job.status != JobStatus.RUNNING or job.paused or not engine:
+            return False
+        if not engine.pause():
+            return False
+        job.paused = True
+        self.queue_changed.emit()
+        return True
+    
+    def resume_job(self, job_id: int) -> bool:
+        """恢复被暂停的任务"""
+        job = self.queue.get(job_id)
+        engine = self._engines.get(job_id)
+        if not job or not job.paused:
+            return False
+        job.paused = False
+        if engine:
+            engine.resume()
+        self.queue_changed.emit()
+        return True
+    
+    def retry(self, job_id: int) -> bool:
+        """重新执行已结束的任务"""
+        if self.queue.retry(job_id):
+            self.queue_changed.emit()
+            self._dispatch()
+            return True
+        return False
+    
+    def clear_finished(self) -> int:
+        """移除已结束的任务"""
+        count = self.queue.remove_finished()
+        if count:
+            self.queue_changed.emit()
+        return count
+    
+    def append_log(self, job_id: int, text: str):
+        """向任务日志追加一行（协调器记录拆分、合并等信息）"""
+        self._on_engine_output(job_id, text if text.endswith('\n') else text + '\n')
+    
+    def notify_result(self, job_id: int):
+        """任务结果存储被外部修改后通知界面"""
+        job = self.queue.get(job_id)
+        if job:
+            self.job_result.emit(job_id, job.store.version)
+    
+    def active_count(self) -> int:
+        """运行中的任务数"""
+        return self.queue.running_count()
+    
+    def stop_all(self, wait: bool = False):
+        """取消所有排队任务并停止运行中的任务"""
+        for job in self.queue.pending_jobs():
+            self.queue.cancel(job.job_id)
+        for job in self.queue.running_jobs():
+            if job.worker:
+                job.cancel_requested = True
+                self.workers.cancel(job.job_id)
+        for job_id, engine in list(self._engines.items()):
+            job = self.queue.get(job_id)
+            if job:
+                job.cancel_requested = True
+            if engine.isRunning():
+                engine.stop()
+                if wait:
+                    engine.wait()
+        self.queue_changed.emit()
+    
+    # ==================== 调度 ====================
+    
+    def _dispatch(self):
+        """有空闲槽位时启动排队任务（并发已满时按需抢占低优先级任务）"""
+        while True:
+            job = self.queue.take_next()
+            if job is None:
+                break
+            if not self._start_job(job):
+                break
+        if self.preempt_enabled:
+            self._preempt()
+    
+    def _preempt(self):
+        """
+        并发已满且排在最前的任务优先级高于某个运行中任务时，停止该任务并重新排队
+        
+        被抢占的任务按检查点复用会话恢复（注入点和已取回的数据从会话读取），
+        选择优先级最低、其中最晚启动（已完成工作最少）的本机任务；
+        同一时间只抢占一个任务，等它停止后由 _dispatch 启动高优先级任务
+        """
+        running = self.queue.running_jobs()
+        if any(job.preempt_requested for job in running):
+            return
+        if len(running) < self.queue.capacity:
+            return
+        pending = [job for job in self.queue.pending_jobs() if not job.retry_at or job.retry_at <= time.time()]
+        if not pending:
+            return
+        urgent = pending[0]
+        victims = [job for job in running
+                   if job.priority < urgent.priority and not job.worker and not job.paused
+                   and not job.cancel_requested and job.job_id in self._engines]
+        if urgent.host and self.queue.host_slots(urgent.host) >= self.queue.per_host_limit:
+            # 目标主机名额已满时，只有停止同一主机的任务才能让它启动
+            victims = [job for job in victims if job.host == urgent.host]
+        if not victims:
+            return
+        victim = min(victims, key=lambda job: (job.priority, -(job.started_at or 0)))
+        victim.preempt_requested = True
+        self._on_engine_output(victim.job_id, f"[抢占] 优先级 {urgent.priority} 的任务 #{urgent.job_id} 等待执行，"
+                                              f"停止本任务（优先级 {victim.priority}），稍后从会话恢复\n")
+        self._preempting[victim.job_id] = urgent.job_id
+        self._engines[victim.job_id].stop()
+    
+    def _requeue_resumable(self, job: ScanJob, tracker: CheckpointTracker, status: str):
+        """
+        停止的任务按检查点重建恢复命令并放回排队（被抢占、临时故障自动重试）
+        
+        已提取的行由会话缓存续取（从头输出整张表，结果存储清空后重新解析）
+        """
+        checkpoint = tracker.checkpoint if tracker else JobCheckpoint.from_dict(job.resume_checkpoint)
+        if self.history and job.history_id:
+            try:
+                self.history.update_scan(job.history_id, status=status)
+                self.history.delete_checkpoint(job.history_id)
+            except Exception:
+                pass
+        job.options = build_resume_builder(job.options, checkpoint, skip_rows=False).snapshot()
+        job.resume_checkpoint = checkpoint.to_dict()
+        self.queue.requeue(job.job_id)
+    
+    def _requeue_preempted(self, job: ScanJob, tracker: CheckpointTracker):
+        """被抢占的任务停止后：按检查点重建恢复命令并放回排队"""
+        self.queue.fair_share.record_preempted(job)
+        job.preemptions += 1
+        self._requeue_resumable(job, tracker, 'preempted')
+        self._on_engine_output(job.job_id, f"[抢占] 任务已停止并重新排队（第 {job.preemptions} 次被抢占）\n")
+        self.job_result.emit(job.job_id, job.store.version)
+        self.job_preempted.emit(job.job_id, self._preempting.pop(job.job_id, 0))
+    
+    def _schedule_retry(self, job: ScanJob, tracker: CheckpointTracker):
+        """临时故障的任务：等待退避时间后从会话恢复重试"""
+        job.auto_retries += 1
+        delay = self.retry_policy.delay(job.auto_retries)
+        self._on_engine_output(job.job_id, f"[自动重试] {job.failure.describe()}，{delay:.0f} 秒后从会话恢复重试"
+                                           f"（第 {job.auto_retries}/{self.retry_policy.max_retries} 次）\n")
+        self._requeue_resumable(job, tracker, 'retrying')
+        job.retry_at = time.time() + delay
+        self.job_result.emit(job.job_id, job.store.version)
+        self.job_retrying.emit(job.job_id, delay)
+        QTimer.singleShot(int(delay * 1000) + 50, self._dispatch)
+    
+    def _start_job(self, job: ScanJob) -> bool:
+        """
+        启动单个任务
+        
+        本机并发已满时只能发送到远程执行节点；发送失败则任务留在队列中，返回 False（本轮不再启动其他任务）
+        """
+        retry_at, log_offset = job.retry_at, job.log_offset
+        job.status = JobStatus.RUNNING
+        job.started_at = time.time()
+        job.attempts += 1
+        job.retry_at = None
+        job.log_offset = len(job.log)
+        
+        remote = self.queue.local_running_count() > self.queue.max_concurrent
+        if remote and not self._start_remote(job):
+            job.status = JobStatus.PENDING
+            job.started_at = None
+            job.attempts -= 1
+            job.retry_at, job.log_offset = retry_at, log_offset
+            job.rate_limit = None
+            self.queue.fair_share.record_start_reverted(job)
+            return False
+        self._assign_output_dir(job)
+        
+        job.command = self._job_command(job)
+        
+        if self.history:
+            try:
+                job.history_id = self.history.add_scan(job.target, job.command, job.scan_mode)
+            except Exception:
+                job.history_id = None
+        
+        if job.history_id:
+            self._start_checkpoint(job)
+        
+        if job.fingerprint:
+            fingerprint = job.fingerprint
+            detection = (f"（首次检测耗时 {fingerprint['detection_seconds']:.0f} 秒）"
+                         if fingerprint.get('detection_seconds') else "")
+            job.log.append(f"[指纹缓存] 命中 {fingerprint['target']} 参数 '{fingerprint['param']}'，"
+                           f"已添加 {' '.join(fingerprint['applied'])}{detection}\n")
+        
+        if remote:
+            self.job_started.emit(job.job_id)
+            self.queue_changed.emit()
+            return True
+        
+        prepare = partial(self._auto_tune, job) if job.options.get('_auto_tune') else None
+        engine = SqlmapEngine(job.command, self.sqlmap_path, parent=self, store=job.store, prepare=prepare)
+        job_id = job.job_id
+        # 使用队列连接确保信号在主线程中处理
+        engine.output_received.connect(partial(self._on_engine_output, job_id), Qt.ConnectionType.QueuedConnection)
+        engine.progress_updated.connect(partial(self.job_progress.emit, job_id), Qt.ConnectionType.QueuedConnection)
+        engine.result_found.connect(partial(self.job_result.emit, job_id), Qt.ConnectionType.QueuedConnection)
+        engine.status_changed.connect(partial(self.job_status.emit, job_id), Qt.ConnectionType.QueuedConnection)
+        engine.scan_finished.connect(partial(self._on_engine_finished, job_id), Qt.ConnectionType.QueuedConnection)
+        engine.finished.connect(engine.deleteLater)
+        self._engines[job_id] = engine
+        engine.start()
+        
+        self.job_started.emit(job_id)
+        self.queue_changed.emit()
+        return True
+    
+    def _on_engine_output(self, job_id: int, text: str):
+        """缓存任务输出并转发"""
+        job = self.queue.get(job_id)
+        if job:
+            job.log.append(text)
+            if job_id in self._trackers:
+                self._update_checkpoint(job, text)
+            if job.options.get('_auto_tune'):
+                self.tuner.observe(job.host, text)
+            if job.detected_at is None and "identified the following injection point" in text:
+                job.detected_at = time.time()
+                self._register_session(job)
+                self._dispatch()  # 等待该目标检测完成的任务现在可以克隆会话启动
+            elif "resumed the following injection point" in text and job.session_key not in self._sessions:
+                self._register_session(job)
+                self._dispatch()
+        self.job_output.emit(job_id, text)
+    
+    def _job_command(self, job: ScanJob, tuning: TuningResult = None) -> str:
+        """按调优结果和分配的速率生成命令（选项快照保持不变，重试时重新调优和分配）"""
+        return self._job_builder(job, tuning).build()
+    
+    def _job_builder(self, job: ScanJob, tuning: TuningResult = None) -> CommandBuilder:
+        """按调优结果和分配的速率调整后的构建器"""
+        builder = CommandBuilder.from_snapshot(job.options)
+        threads = job.options.get('_threads', 1)
+        if tuning:
+            LatencyTuner.apply(builder, tuning)
+            threads = tuning.threads
+        if job.rate_limit:
+            threads, delay = RateBudget.throttle(job.rate_limit, threads, job.options.get('_delay', 0))
+            builder.set_threads(threads).set_delay(delay)
+        return builder
+    
+    # ==================== 远程执行节点 ====================
+    
+    def _start_remote(self, job: ScanJob) -> bool:
+        """
+        把任务发送到远程执行节点（没有空闲节点或文件无法发送时返回 False，任务继续排队等待本机名额）
+        
+        远程任务不支持暂停和自动调优（响应时间在本机测量，与节点的网络环境不同）
+        """
+        try:
+            payload = pack_job(self._job_builder(job).snapshot())
+        except OSError as e:
+            message = f"[远程执行] {e}，等待本机空闲后执行\n"
+            if not job.log or job.log[-1] != message:
+                job.log.append(message)
+            return False
+        worker = self.workers.dispatch(job.job_id, payload)
+        if not worker:
+            return False
+        job.worker = worker
+        job.log.append(f"[远程执行] 任务已发送到执行节点 {worker}\n")
+        if job.options.get('_auto_tune'):
+            job.log.append("[远程执行] 远程任务不进行自动调优，使用设置的参数\n")
+        self.job_status.emit(job.job_id, f"在 {worker} 上执行")
+        return True
+    
+    def _on_remote_result(self, job_id: int, delta: dict):
+        """合并执行节点回传的结果增量"""
+        job = self.queue.get(job_id)
+        if job and job.status == JobStatus.RUNNING:
+            self.job_result.emit(job_id, job.store.apply_delta(delta))
+    
+    def _on_remote_rejected(self, job_id: int, reason: str):
+        """执行节点拒绝执行（如任务文件无法写入）：任务失败"""
+        job = self.queue.get(job_id)
+        if job and job.status == JobStatus.RUNNING:
+            self._on_engine_output(job_id, f"[远程执行] 执行节点 {job.worker} 拒绝执行任务: {reason}\n")
+            self._on_engine_finished(job_id, -1)
+    
+    def _on_remote_jobs_lost(self, worker: str, job_ids: list):
+        """执行节点断开：运行中的任务重新排队（已请求取消的任务直接结束）"""
+        for job_id in job_ids:
+            job = self.queue.get(job_id)
+            if not job or job.status != JobStatus.RUNNING:
+                continue
+            if job.cancel_requested:
+                self._on_engine_finished(job_id, -1)
+                continue
+            self._trackers.pop(job_id, None)
+            if self.history and job.history_id:
+                try:
+                    self.history.mark_interrupted(job.history_id)
+                except Exception:
+                    pass
+            self.queue.requeue(job_id)
+            job.log.append(f"[远程执行] 执行节点 {worker} 已断开，任务重新排队\n")
+            self.job_output.emit(job_id, job.log[-1])
+            self.job_result.emit(job_id, job.store.version)
+        self.queue_changed.emit()
+        self._dispatch()
+    
+    def _on_workers_changed(self):
+        """执行节点上线、下线后更新全局并发名额"""
+        self.queue.remote_slots = self.workers.capacity()
+        self.queue_changed.emit()
+        self._dispatch()
+    
+    def worker_stats(self) -> list:
+        """已连接的执行节点状态"""
+        return self.workers.worker_stats()
+    
+    # ==================== 自动调优 ====================
+    
+    def _auto_tune(self, job: ScanJob, engine: SqlmapEngine):
+        """启动进程前测量目标响应时间并重建命令（在引擎线程中执行）"""
+        engine.output_received.emit("[自动调优] 正在测量目标的基线响应时间...\n")
+        result = self.tuner.tune(job.options, job.host, stop=lambda: engine._stop_requested)
+        if result is None:
+            engine.output_received.emit("[自动调优] 无法测量目标响应时间（请求包或批量模式、目标不可达），使用设置的参数\n")
+            return None
+        
+        job.tuning = result.to_dict()
+        job.command = self._job_command(job, result)
+        engine.output_received.emit(f"[自动调优] {result.describe()}\n")
+        self.job_tuned.emit(job.job_id)
+        return job.command
+    
+    def _on_job_tuned(self, job_id: int):
+        """记录调优后的命令和参数"""
+        job = self.queue.get(job_id)
+        if not job:
+            return
+        if self.history and job.history_id:
+            try:
+                self.history.update_scan(job.history_id, command=job.command,
+                                         tuning=json.dumps(job.tuning, ensure_ascii=False))
+            except Exception:
+                pass
+        self.queue_changed.emit()
+    
+    # ==================== 指纹缓存 ====================
+    
+    def _lookup_fingerprint(self, options: dict):
+        """查找目标的缓存指纹（未启用或无法确定目标时返回 None）"""
+        if not self.history or not options.get('_use_fingerprint'):
+            return None
+        target = normalize_target(options)
+        if not target:
+            return None
+        try:
+            return self.history.find_fingerprint(target, options.get('_param', ''))
+        except Exception:
+            return None
+    
+    def _update_fingerprint(self, job: ScanJob):
+        """
+        任务结束后更新指纹缓存
+        
+        - 首次检测到注入：保存指纹和检测耗时
+        - 使用缓存指纹的任务：记录命中和节省的检测时间（完整检测耗时减去本次检测耗时）
+        - 使用缓存指纹却未发现注入：指纹已失效，删除
+        """
+        if not self.history or not job.options.get('_use_fingerprint') or job.status == JobStatus.CANCELLED:
+            return
+        results = job.store.get_summary()
+        detection = job.detected_at - job.started_at if job.detected_at and job.started_at else None
+        try:
+            fingerprint = extract_fingerprint(job.options, results)
+            if fingerprint and job.fingerprint:
+                saved = max(0.0, (job.fingerprint.get('detection_seconds') or 0) - (detection or 0))
+                self.history.save_fingerprint(fingerprint)
+                self.history.record_fingerprint_hit(job.fingerprint['fp_key'], saved)
+                job.log.append(f"[指纹缓存] 本次检测耗时 {detection or 0:.0f} 秒，节省约 {saved:.0f} 秒\n")
+                self.fingerprint_hit.emit(job.job_id, saved)
+            elif fingerprint:
+                if detection is not None or not self.history.find_fingerprint(fingerprint['target'], fingerprint['param']):
+                    self.history.save_fingerprint(fingerprint, detection)
+            elif job.fingerprint and job.status == JobStatus.COMPLETED and not results.get('injection_found'):
+                self.history.delete_fingerprint(job.fingerprint['fp_key'])
+                job.log.append("[指纹缓存] 使用缓存的指纹未确认注入，已删除该指纹，下次将完整检测\n")
+        except Exception:
+            pass
+    
+    def _record_techniques(self, job: ScanJob):
+        """
+        把完整检测的结果回写注入技术统计（供历史学习的技术排序使用）
+        
+        只记录本次实际检测出注入的任务，以及正常结束且未发现注入的任务；
+        从会话恢复注入点或使用指纹缓存缩小了技术范围的任务不代表检测耗时，跳过
+        """
+        if not self.history or job.status == JobStatus.CANCELLED:
+            return
+        if job.fingerprint and any(item.startswith('--technique') for item in job.fingerprint.get('applied', [])):
+            return
+        results = job.store.get_summary()
+        if job.detected_at and job.started_at:
+            detection = job.detected_at - job.started_at
+        elif job.status == JobStatus.COMPLETED and not results.get('injection_found'):
+            detection = 0.0
+        else:
+            return
+        dbms, tried, found = detection_outcome(job.options, results)
+        try:
+            self.history.record_technique_outcome(dbms, tried, found, detection)
+        except Exception:
+            pass
+    
+    # ==================== 输出目录 ====================
+    
+    def _assign_output_dir(self, job: ScanJob):
+        """
+        未指定输出目录的任务分配独立的受管目录（写回任务选项）
+        
+        - 重试、抢占恢复沿用任务自己的目录和会话
+        - 派生任务（选项中是其他任务的目录）和同一目标已有检测结果的任务，
+          分配新目录并克隆源会话，多个任务不共用一个会话文件，也不重复检测
+        """
+        path = job.options.get('_output_dir')
+        owner = self._output_owners.get(path) if path else None
+        if path and (owner is None or owner == job.job_id or not self.output.enabled):
+            self.output.touch(path)
+            return
+        if not self.output.enabled:
+            return
+        
+        flush = job.options.get('_flush_session')
+        source = None
+        if path and not flush:
+            source = next((session for session in self._sessions.values() if session.output_dir == path),
+                          SessionSource(path, owner))
+        elif job.session_key and not flush:
+            source = self._sessions.get(job.session_key)
+        
+        try:
+            path = self.output.allocate(job.job_id)
+        except OSError as e:
+            job.log.append(f"[输出目录] 无法创建受管输出目录，使用 sqlmap 默认位置: {e}\n")
+            job.options.pop('_output_dir', None)
+            return
+        job.options['_output_dir'] = path
+        self._output_owners[path] = job.job_id
+        if source and source.job_id != job.job_id:
+            self._clone_session(job, source)
+    
+    def _clone_session(self, job: ScanJob, source: SessionSource):
+        """把源会话克隆到任务的输出目录（失败时任务重新检测）"""
+        live = any(other.options.get('_output_dir') == source.output_dir for other in self.queue.running_jobs()
+                   if other is not job)
+        try:
+            clone = clone_session(source.output_dir, job.options['_output_dir'], live)
+        except Exception as e:
+            job.log.append(f"[会话克隆] 克隆任务 #{source.job_id} 的会话失败，将重新检测: {e}\n")
+            return
+        if clone is None:
+            # 源会话已被删除（超出磁盘配额等），不再作为克隆来源
+            if self._sessions.get(job.session_key) is source:
+                del self._sessions[job.session_key]
+            return
+        job.session_source = source.job_id
+        job.session_saved = source.detection_seconds
+        job.session_clone = f"{clone.label}，{clone.size / 1024:.0f} KB，{clone.seconds * 1000:.0f} ms"
+        saved = f"，约节省 {source.detection_seconds:.0f} 秒检测" if source.detection_seconds else ""
+        job.log.append(f"[会话克隆] 复用任务 #{source.job_id} 的注入检测结果（{job.session_clone}）{saved}\n")
+    
+    def _register_session(self, job: ScanJob):
+        """任务检测出注入（或从克隆的会话恢复了注入点）：之后同一目标的任务克隆它的会话"""
+        path = job.options.get('_output_dir')
+        if not job.session_key or job.worker or self._output_owners.get(path) != job.job_id:
+            return
+        if job.detected_at and job.started_at:
+            detection = job.detected_at - job.started_at
+        else:
+            detection = job.session_saved
+        self._sessions[job.session_key] = SessionSource(path, job.job_id, detection)
+    
+    def _update_session(self, job: ScanJob):
+        """任务结束：发现注入的会话可供克隆，未发现注入的会话不再作为来源"""
+        if not job.session_key:
+            return
+        if job.store.get_summary().get('injection_found'):
+            if job.session_key not in self._sessions:
+                self._register_session(job)
+        elif job.status == JobStatus.COMPLETED:
+            source = self._sessions.get(job.session_key)
+            if source and source.job_id == job.job_id:
+                del self._sessions[job.session_key]
+    
+    def _detection_gate(self, job: ScanJob) -> bool:
+        """
+        同一目标正在进行注入检测时，没有会话的新任务等它检测完成再启动（随后克隆其会话）
+        
+        指定了输出目录或清空会话的任务不等待
+        """
+        if (not self.output.enabled or not job.session_key or job.options.get('_output_dir')
+                or job.options.get('_flush_session') or job.session_key in self._sessions):
+            return True
+        return not any(other.session_key == job.session_key and other.detected_at is None
+                       and not other.session_source and not other.worker
+                       for other in self.queue.running_jobs())
+    
+    def _output_dirs_in_use(self) -> list:
+        """
+        队列中任务引用的输出目录（包括已结束但仍在队列中的任务）
+        
+        已结束的任务仍可能在结果面板中查看关联的 SQLite 导出文件，这些文件所在的目录同样不能淘汰
+        """
+        paths = []
+        for job in self.queue.jobs():
+            paths.append(job.options.get('_output_dir'))
+            for key in job.store.table_keys():
+                paths.append(job.store.get_sqlite_path(key))
+        return paths
+    
+    def enforce_output_quota(self) -> list:
+        """按磁盘配额淘汰最久未使用的任务输出目录，返回被删除的目录"""
+        try:
+            evicted = self.output.enforce()
+        except Exception:
+            return []
+        if evicted:
+            self.output_evicted.emit(len(evicted), sum(info.size for info in evicted))
+        return evicted
+    
+    # ==================== 结果复用缓存 ====================
+    
+    def find_cached_result(self, builder: CommandBuilder):
+        """查找与构建器规格相同、仍在有效期内的缓存结果（未启用时返回 None）"""
+        if not self.history or self.result_ttl <= 0:
+            return None
+        try:
+            return self.history.find_cached_result(spec_hash(builder.snapshot()), self.result_ttl)
+        except Exception:
+            return None
+    
+    def _store_result(self, job: ScanJob):
+        """
+        保存完成任务的结果
+        
+        只缓存正常完成的任务；恢复的中断任务可能跳过了部分数据，不缓存
+        """
+        if (not self.history or self.result_ttl <= 0 or job.status != JobStatus.COMPLETED
+                or job.resume_checkpoint or not job.spec_hash):
+            return
+        try:
+            results = encode_results(job.store)
+            if results:
+                self.history.save_cached_result(job.spec_hash, job.target, job.command, results,
+                                                log_tail(job.log), job.history_id)
+            self.history.purge_cached_results(self.result_ttl)
+        except Exception:
+            pass
+    
+    # ==================== 检查点 ====================
+    
+    def _start_checkpoint(self, job: ScanJob):
+        """任务开始时保存初始检查点（含选项快照，用于重启后恢复）"""
+        tracker = CheckpointTracker(job.options, job.host, job.resume_checkpoint)
+        self._trackers[job.job_id] = tracker
+        try:
+            self.history.save_checkpoint(job.history_id, tracker.checkpoint.to_dict(),
+                                         options=job.options, scan_mode=job.scan_mode)
+            tracker.mark_saved()
+        except Exception:
+            self._trackers.pop(job.job_id, None)
+    
+    def _update_checkpoint(self, job: ScanJob, text: str):
+        """根据输出更新检查点；阶段变化或表完成时立即保存，行数进度按间隔保存"""
+        tracker = self._trackers[job.job_id]
+        current_table = tracker.checkpoint.current_table
+        changed = False
+        for line in text.splitlines():
+            changed = tracker.feed(line) or changed
+        
+        table = tracker.checkpoint.current_table
+        if table and table != current_table and '.' in table:
+            db, name = table.rsplit('.', 1)
+            columns = job.store.get_summary()['columns'].get((db, name), [])
+            tracker.set_column_count(len(columns))
+        
+        if changed or tracker.should_save():
+            try:
+                self.history.save_checkpoint(job.history_id, tracker.checkpoint.to_dict())
+                tracker.mark_saved()
+            except Exception:
+                pass
+    
+    def _on_engine_finished(self, job_id: int, return_code: int):
+        """任务结束：更新状态、记录历史并启动下一个任务"""
+        self._engines.pop(job_id, None)
+        tracker = self._trackers.pop(job_id, None)
+        job = self.queue.get(job_id)
+        if job and job.status == JobStatus.RUNNING and job.preempt_requested and not job.cancel_requested:
+            self._requeue_preempted(job, tracker)
+            self.queue_changed.emit()
+            self._dispatch()
+            return
+        if job and job.status == JobStatus.RUNNING and not job.cancel_requested:
+            job.failure = classify_failure(return_code, "".join(job.log[job.log_offset:]),
+                                           job.store.get_summary().get('injection_found', False))
+            if self.retry_policy.should_retry(job.failure, job.auto_retries):
+                self.queue.fair_share.record_retried(job)
+                self._schedule_retry(job, tracker)
+                self.queue_changed.emit()
+                self._dispatch()
+                return
+            if job.failure and return_code != 0:
+                evidence = f"\n    {job.failure.evidence}" if job.failure.evidence else ""
+                self._on_engine_output(job_id, f"[失败分析] {job.failure.describe()}{evidence}\n")
+        if job and job.status == JobStatus.RUNNING:
+            job.paused = False
+            job.finished_at = time.time()
+            job.return_code = return_code
+            if job.cancel_requested:
+                job.status = JobStatus.CANCELLED
+            elif return_code == 0:
+                job.status = JobStatus.COMPLETED
+            else:
+                job.status = JobStatus.FAILED
+            
+            if self.history and job.history_id:
+                try:
+                    results = job.store.get_summary()
+                    self.history.complete_scan(
+                        job.history_id,
+                        has_vuln=results.get('injection_found', False),
+                        vuln_count=1 if results.get('injection_found') else 0,
+                        dbms=results.get('dbms', ''),
+                        current_db=results.get('current_db', '')
+                    )
+                except Exception:
+                    pass
+            
+            self.queue.fair_share.record_finished(job)
+            self._update_fingerprint(job)
+            self._record_techniques(job)
+            self._store_result(job)
+            self._update_session(job)
+            self.output.touch(job.options.get('_output_dir', ''))
+        
+        self.job_finished.emit(job_id, return_code)
+        self.queue_changed.emit()
+        self._dispatch()
+        if job and job.is_finished:
+            self.enforce_output_quota()
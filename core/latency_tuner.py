@@ -0,0 +1,222 @@
+"""
+响应时间自动调优
+扫描前向目标发送少量正常请求测量基线响应时间分布，据此选择 --time-sec、--timeout、
+--retries 和 --threads；同一主机后续阶段的任务结合前一阶段 sqlmap 的输出重新调优
+"""
+
+import math
+import re
+import ssl
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+from dataclasses import dataclass, field, asdict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .command_builder import CommandBuilder
+
+
+# sqlmap 判定时间盲注的阈值为 平均响应时间 + 7 倍标准差（TIME_STDEV_COEFF）
+TIME_STDEV_COEFF = 7
+
+
+@dataclass
+class LatencyProfile:
+    """单个主机的响应时间记录"""
+    samples: List[float] = field(default_factory=list)  # 最近一次测量的响应时间（秒）
+    failures: int = 0                                    # 最近一次测量失败的请求数
+    sqlmap_time_sec: int = 0                             # sqlmap 自行调整后的延迟时间
+    timeouts: int = 0                                    # 之前阶段 sqlmap 报告的连接超时次数
+
+
+@dataclass
+class TuningResult:
+    """调优结果"""
+    time_sec: int
+    timeout: int
+    retries: int
+    threads: int
+    median_ms: float = 0.0
+    p90_ms: float = 0.0
+    stdev_ms: float = 0.0
+    samples: int = 0
+    failures: int = 0
+    timeouts: int = 0
+    
+    def to_dict(self) -> Dict:
+        return asdict(self)
+    
+    def describe(self) -> str:
+        """结果描述（写入任务日志）"""
+        if self.samples:
+            basis = (f"基线响应 中位数 {self.median_ms:.0f}ms / P90 {self.p90_ms:.0f}ms / "
+                     f"标准差 {self.stdev_ms:.0f}ms（{self.samples} 次请求，失败 {self.failures}）")
+        else:
+            basis = "未能测量基线响应时间，沿用之前阶段的记录"
+        return (f"{basis}，选择 --time-sec={self.time_sec} --timeout={self.timeout} "
+                f"--retries={self.retries} --threads={self.threads}")
+
+
+def _probe_request(options: Dict) -> Optional[urllib.request.Request]:
+    """根据选项快照构造一个正常请求（请求包和批量文件模式返回 None）"""
+    url = options.get('_target', '')
+    if not url.lower().startswith(('http://', 'https://')):
+        return None
+    
+    data = options.get('_data') or None
+    request = urllib.request.Request(url, data=data.encode('utf-8') if data else None)
+    user_agent = options.get('_user_agent') or "Mozilla/5.0"
+    request.add_header('User-Agent', user_agent)
+    if options.get('_cookie'):
+        request.add_header('Cookie', options['_cookie'])
+    for name, value in (options.get('_headers') or {}).items():
+        request.add_header(name, value)
+    return request
+
+
+def probe_latency(options: Dict, count: int = 6, timeout: float = 15.0,
+                  stop: Callable[[], bool] = None) -> Tuple[List[float], int]:
+    """
+    向目标发送正常请求测量响应时间
+    
+    参数:
+        options: 任务的选项快照（使用其中的目标、POST 数据、Cookie、请求头和代理）
+        count: 请求次数
+        timeout: 单次请求超时（秒）
+        stop: 返回 True 时提前结束测量
+    
+    返回:
+        (响应时间列表（秒）, 失败次数)；无法构造请求时返回 ([], 0)
+    
+    与 sqlmap 一样不校验 HTTPS 证书（测试目标常用自签名证书）；
+    ProxyHandler 只支持 HTTP(S) 代理，socks4:// / socks5:// 等代理无法使用，此时不测量，同样返回 ([], 0)
+    """
+    request = _probe_request(options)
+    if request is None:
+        return [], 0
+    
+    proxy = options.get('_proxy') or ""
+    if proxy and not proxy.lower().startswith(('http://', 'https://')):
+        return [], 0
+    handlers = [urllib.request.HTTPSHandler(context=ssl._create_unverified_context())]
+    if proxy:
+        handlers.append(urllib.request.ProxyHandler({'http': proxy, 'https': proxy}))
+    opener = urllib.request.build_opener(*handlers)
+    
+    samples = []
+    failures = 0
+    for _ in range(count):
+        if stop and stop():
+            break
+        started = time.monotonic()
+        try:
+            with opener.open(request, timeout=timeout) as response:
+                response.read()
+            samples.append(time.monotonic() - started)
+        except urllib.error.HTTPError:
+            # 错误状态码同样反映了服务端的响应时间
+            samples.append(time.monotonic() - started)
+        except Exception:
+            failures += 1
+    return samples, failures
+
+
+def choose_settings(profile: LatencyProfile, max_threads: int = 10) -> Optional[TuningResult]:
+    """
+    根据响应时间记录选择参数
+    
+    - --time-sec：延迟需明显超过 sqlmap 的判定阈值（7 倍标准差），至少 2 秒，且不低于 sqlmap 之前自行调整的值
+    - --timeout：覆盖较慢的正常响应（P90 的 3 倍）加上延迟时间
+    - --retries：测量或之前阶段出现失败时增加
+    - --threads：响应越稳定线程越多，抖动大或出现失败时减少，避免压垮目标
+    
+    返回:
+        调优结果；既没有测量数据也没有之前阶段的记录时返回 None
+    """
+    samples = sorted(profile.samples)
+    if len(samples) < 3 and not profile.sqlmap_time_sec:
+        return None
+    
+    result = TuningResult(time_sec=5, timeout=30, retries=3, threads=min(3, max_threads),
+                          samples=len(samples), failures=profile.failures, timeouts=profile.timeouts)
+    if len(samples) >= 3:
+        median = statistics.median(samples)
+        p90 = samples[min(len(samples) - 1, math.ceil(len(samples) * 0.9) - 1)]
+        stdev = statistics.pstdev(samples)
+        result.median_ms = median * 1000
+        result.p90_ms = p90 * 1000
+        result.stdev_ms = stdev * 1000
+        
+        result.time_sec = max(2, min(15, math.ceil(TIME_STDEV_COEFF * stdev + median / 2 + 0.5)))
+        result.timeout = max(10, min(120, math.ceil(p90 * 3 + result.time_sec + 5)))
+        
+        jitter = stdev / median if median > 0 else 1.0
+        if profile.failures or jitter >= 0.5:
+            threads = 1
+        elif jitter >= 0.25:
+            threads = 3
+        elif median >= 1.0:
+            threads = 8  # 响应慢但稳定，多线程收益最大
+        else:
+            threads = 5
+        result.threads = max(1, min(threads, max_threads))
+    
+    if profile.sqlmap_time_sec:
+        result.time_sec = max(result.time_sec, profile.sqlmap_time_sec)
+    
+    total = len(samples) + profile.failures
+    failure_rate = profile.failures / total if total else 0.0
+    if failure_rate or profile.timeouts:
+        result.retries = min(10, 3 + math.ceil(failure_rate * 10) + min(profile.timeouts, 3))
+        result.timeout = min(120, result.timeout + 10 * min(profile.timeouts, 3))
+        result.threads = min(result.threads, 2)
+    return result
+
+
+class LatencyTuner:
+    """
+    自动调优器（调度器持有，各任务的引擎线程调用 tune）
+    
+    按主机保存响应时间记录，sqlmap 输出中的延迟调整和连接超时记入该主机，供下一阶段的任务参考
+    """
+    
+    def __init__(self):
+        self._profiles: Dict[str, LatencyProfile] = {}
+        self._lock = threading.Lock()
+    
+    def profile(self, host: str) -> LatencyProfile:
+        with self._lock:
+            return self._profiles.setdefault(host, LatencyProfile())
+    
+    def tune(self, options: Dict, host: str, stop: Callable[[], bool] = None) -> Optional[TuningResult]:
+        """测量目标响应时间并选择参数（在引擎线程中执行，会发出网络请求）"""
+        samples, failures = probe_latency(options, stop=stop)
+        with self._lock:
+            profile = self._profiles.setdefault(host, LatencyProfile())
+            if samples or failures:
+                profile.samples = samples
+                profile.failures = failures
+            return choose_settings(profile)
+    
+    def observe(self, host: str, text: str):
+        """记录 sqlmap 输出中与响应时间有关的信息"""
+        lower = text.lower()
+        if "time delay" not in lower and "timed out" not in lower:
+            return
+        with self._lock:
+            profile = self._profiles.setdefault(host, LatencyProfile())
+            match = re.search(r"adjusting time delay to (\d+) second", lower)
+            if match:
+                profile.sqlmap_time_sec = int(match.group(1))
+            if "connection timed out" in lower:
+                profile.timeouts += 1
+    
+    @staticmethod
+    def apply(builder: CommandBuilder, result: TuningResult) -> CommandBuilder:
+        """将调优结果写入构建器"""
+        return (builder.set_time_sec(result.time_sec)
+                .set_timeout(result.timeout)
+                .set_retries(result.retries)
+                .set_threads(result.threads))
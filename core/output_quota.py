@@ -0,0 +1,201 @@
+"""
+任务输出目录与磁盘配额
+未指定 --output-dir 的任务在受管根目录下各自使用独立的输出目录（会话文件、提取的数据、日志），
+避免并发任务争用同一主机的会话文件；总占用超过配额时按最近使用时间淘汰最旧的任务目录
+"""
+
+import os
+import shutil
+import time
+from dataclasses import dataclass
+from typing import Callable, Iterable, List, Optional, Set
+
+
+JOB_DIR_PREFIX = "job-"
+
+
+def default_output_root() -> str:
+    """受管输出目录的默认位置（程序目录下的 output，与 history.db 同级）"""
+    script_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(script_dir, 'output')
+
+
+def directory_size(path: str) -> int:
+    """目录下所有文件的总字节数（无法访问的文件忽略）"""
+    total = 0
+    for dirpath, _dirnames, filenames in os.walk(path):
+        for name in filenames:
+            try:
+                total += os.lstat(os.path.join(dirpath, name)).st_size
+            except OSError:
+                continue
+    return total
+
+
+def format_size(size: float) -> str:
+    """字节数转换为易读的大小"""
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+@dataclass
+class OutputDirInfo:
+    """单个任务输出目录的占用"""
+    path: str
+    size: int
+    last_used: float   # 最近一次任务开始或结束使用该目录的时间
+    in_use: bool = False  # 仍被队列中的任务引用（不会被淘汰）
+    
+    @property
+    def name(self) -> str:
+        return os.path.basename(self.path)
+
+
+@dataclass
+class OutputUsage:
+    """受管输出目录的总体占用"""
+    root: str
+    quota_bytes: int
+    dirs: List[OutputDirInfo]
+    
+    @property
+    def total_bytes(self) -> int:
+        return sum(info.size for info in self.dirs)
+    
+    @property
+    def in_use_count(self) -> int:
+        return sum(1 for info in self.dirs if info.in_use)
+    
+    def describe(self) -> str:
+        quota = f" / {format_size(self.quota_bytes)}" if self.quota_bytes else "（不限）"
+        text = f"{format_size(self.total_bytes)}{quota}，{len(self.dirs)} 个任务目录"
+        if self.in_use_count:
+            text += f"（{self.in_use_count} 个使用中）"
+        return text
+
+
+class OutputQuota:
+    """
+    受管输出目录
+    
+    每个任务一个 job-<时间>-<任务 ID> 目录；任务开始和结束时更新目录的修改时间作为最近使用时间，
+    派生任务（分片提取、枚举流水线等）继承源任务的输出目录，复用其会话
+    """
+    
+    def __init__(self, root: str = "", quota_mb: int = 0, enabled: bool = True):
+        self.configure(root, quota_mb, enabled)
+        # 返回仍被任务引用的输出目录或其中的文件（由调度器设置，这些目录不会被淘汰）
+        self.in_use: Callable[[], Iterable[str]] = lambda: ()
+    
+    def configure(self, root: str = "", quota_mb: int = 0, enabled: bool = True):
+        """
+        参数:
+            root: 受管根目录（空字符串表示默认位置）
+            quota_mb: 总占用上限（MB），0 表示不限
+            enabled: 是否为任务分配独立的输出目录
+        """
+        self.root = os.path.abspath(os.path.expanduser(root)) if root else default_output_root()
+        self.quota_bytes = max(0, int(quota_mb)) * 1024 * 1024
+        self.enabled = enabled
+    
+    def allocate(self, job_id: int) -> str:
+        """为任务创建独立的输出目录"""
+        name = f"{JOB_DIR_PREFIX}{time.strftime('%Y%m%d-%H%M%S')}-{job_id}"
+        path = os.path.join(self.root, name)
+        os.makedirs(path, exist_ok=True)
+        return path
+    
+    def is_managed(self, path: str) -> bool:
+        """目录是否位于受管根目录下"""
+        if not path:
+            return False
+        parent = os.path.dirname(os.path.abspath(path).rstrip('/\\'))
+        return os.path.normcase(parent) == os.path.normcase(self.root)
+    
+    def touch(self, path: str):
+        """记录目录被使用（更新修改时间）"""
+        if not self.is_managed(path):
+            return
+        try:
+            os.makedirs(path, exist_ok=True)
+            os.utime(path, None)
+        except OSError:
+            pass
+    
+    def _job_dir(self, path: str) -> str:
+        """路径所在的任务目录（受管根目录下的第一级目录），不在受管根目录下时返回空字符串"""
+        path = os.path.normcase(os.path.abspath(path))
+        root = os.path.normcase(self.root)
+        try:
+            relative = os.path.relpath(path, root)
+        except ValueError:
+            return ""
+        if relative == os.curdir or relative.startswith(os.pardir):
+            return ""
+        return os.path.join(root, relative.split(os.sep, 1)[0])
+    
+    def _in_use_paths(self) -> Set[str]:
+        """使用中的任务目录（in_use 返回的可以是任务目录本身或其中的文件）"""
+        paths = {self._job_dir(path) for path in self.in_use() if path}
+        paths.discard("")
+        return paths
+    
+    def usage(self) -> OutputUsage:
+        """扫描受管根目录，按最近使用时间从旧到新列出任务目录"""
+        dirs = []
+        in_use = self._in_use_paths()
+        try:
+            entries = list(os.scandir(self.root))
+        except OSError:
+            entries = []
+        for entry in entries:
+            if not entry.is_dir(follow_symlinks=False) or not entry.name.startswith(JOB_DIR_PREFIX):
+                continue
+            try:
+                last_used = entry.stat(follow_symlinks=False).st_mtime
+            except OSError:
+                continue
+            dirs.append(OutputDirInfo(
+                path=entry.path,
+                size=directory_size(entry.path),
+                last_used=last_used,
+                in_use=os.path.normcase(os.path.abspath(entry.path)) in in_use,
+            ))
+        dirs.sort(key=lambda info: info.last_used)
+        return OutputUsage(self.root, self.quota_bytes, dirs)
+    
+    def enforce(self, usage: Optional[OutputUsage] = None) -> List[OutputDirInfo]:
+        """
+        总占用超过配额时，从最久未使用的目录开始删除，直到低于配额
+        
+        使用中的目录跳过；返回被删除的目录
+        """
+        if not self.quota_bytes:
+            return []
+        usage = usage or self.usage()
+        total = usage.total_bytes
+        evicted = []
+        for info in usage.dirs:
+            if total <= self.quota_bytes:
+                break
+            if info.in_use:
+                continue
+            shutil.rmtree(info.path, ignore_errors=True)
+            if not os.path.exists(info.path):
+                total -= info.size
+                evicted.append(info)
+        return evicted
+    
+    def clear_unused(self) -> List[OutputDirInfo]:
+        """删除所有未被使用的任务目录"""
+        removed = []
+        for info in self.usage().dirs:
+            if info.in_use:
+                continue
+            shutil.rmtree(info.path, ignore_errors=True)
+            if not os.path.exists(info.path):
+                removed.append(info)
+        return removed
@@ -0,0 +1,184 @@
+"""
+按参数拆分检测
+将多参数目标拆分为每个参数一个 -p 检测任务并行执行，
+确认的注入参数达到指定数量后停止其余任务
+"""
+
+import json
+from typing import List
+from urllib.parse import urlparse, parse_qsl
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from .command_builder import CommandBuilder
+
+
+def _query_names(query: str) -> List[str]:
+    """解析 a=1&b=2 格式的参数名"""
+    return [name for name, _value in parse_qsl(query, keep_blank_values=True) if name]
+
+
+def _body_names(body: str) -> List[str]:
+    """解析 POST 数据的参数名（支持表单和 JSON 对象）"""
+    body = body.strip()
+    if body.startswith('{'):
+        try:
+            data = json.loads(body)
+        except ValueError:
+            return []
+        return [str(key) for key in data] if isinstance(data, dict) else []
+    return _query_names(body)
+
+
+def _cookie_names(cookie: str) -> List[str]:
+    """解析 Cookie 的参数名"""
+    names = []
+    for part in cookie.split(';'):
+        name = part.split('=', 1)[0].strip()
+        if name:
+            names.append(name)
+    return names
+
+
+def _request_file_parts(path: str):
+    """从请求包文件中读取 (查询字符串, 请求体, Cookie)"""
+    try:
+        with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+            content = f.read()
+    except OSError:
+        return "", "", ""
+    
+    head, _sep, body = content.replace('\r\n', '\n').partition('\n\n')
+    lines = head.split('\n')
+    request_line = lines[0].split() if lines else []
+    query = urlparse(request_line[1]).query if len(request_line) > 1 else ""
+    cookie = ""
+    for line in lines[1:]:
+        if line.lower().startswith('cookie:'):
+            cookie = line.split(':', 1)[1].strip()
+    return query, body.strip(), cookie
+
+
+def extract_parameters(options: dict) -> List[str]:
+    """
+    从选项快照中提取可测试的参数名（去重，保持出现顺序）
+    
+    用户已通过 -p 指定参数时直接使用指定的参数；
+    否则依次解析 URL 查询参数、POST 数据和 Cookie（Cookie 仅在 --level >= 2 时测试，与 sqlmap 一致）
+    """
+    if options.get('_param'):
+        names = [name.strip() for name in options['_param'].split(',')]
+    else:
+        if options.get('_request_file'):
+            query, body, cookie = _request_file_parts(options['_request_file'])
+        else:
+            query = urlparse(options.get('_target', '')).query
+            body = options.get('_data', '')
+            cookie = options.get('_cookie', '')
+        
+        names = _query_names(query) + _body_names(body)
+        if options.get('_level', 1) >= 2:
+            names += _cookie_names(cookie)
+    
+    result = []
+    for name in names:
+        if name and name not in result:
+            result.append(name)
+    return result
+
+
+class ParameterFanout(QObject):
+    """
+    按参数拆分检测协调器
+    
+    每个参数一个 -p 检测任务，整组只占用一个单主机并发名额；
+    确认的注入参数达到 stop_after 个后取消组内其余任务
+    """
+    
+    message = pyqtSignal(str)     # 进度消息
+    finished = pyqtSignal(str)    # 全部结束 (group_id)
+    
+    def __init__(self, scheduler, builder: CommandBuilder, max_concurrent: int = 4,
+                 stop_after: int = 1, priority: int = 0, scan_mode: str = "", parent=None):
+        """
+        初始化按参数拆分检测
+        
+        参数:
+            scheduler: JobScheduler
+            builder: 已配置好的命令构建器
+            max_concurrent: 同时检测的参数数
+            stop_after: 确认多少个注入参数后停止其余任务（0 表示全部检测完）
+            priority: 任务优先级
+            scan_mode: 扫描模式名称
+        """
+        super().__init__(parent)
+        self.scheduler = scheduler
+        self.options = builder.snapshot()
+        self.max_concurrent = max(1, max_concurrent)
+        self.stop_after = max(0, stop_after)
+        self.priority = priority
+        self.scan_mode = scan_mode
+        
+        self.group_id = ""
+        self.param_jobs = {}        # {job_id: 参数名}
+        self.injectable = []        # 已确认的注入参数
+        self.stopped = False
+    
+    def start(self) -> str:
+        """提交每个参数的检测任务，返回任务组 ID"""
+        params = extract_parameters(self.options)
+        if not params:
+            raise ValueError("目标中没有可拆分的参数（URL 查询参数、POST 数据或 Cookie）")
+        
+        self.group_id = self.scheduler.create_group("param", self.max_concurrent, share_host_slot=True)
+        self.scheduler.job_result.connect(self._on_job_result)
+        self.scheduler.job_finished.connect(self._on_job_finished)
+        for param in params:
+            builder = CommandBuilder.from_snapshot(self.options).set_param(param)
+            job = self.scheduler.submit(builder, priority=self.priority,
+                                        scan_mode=self.scan_mode, group_id=self.group_id)
+            self.param_jobs[job.job_id] = param
+        self.message.emit(f"已按参数拆分为 {len(params)} 个检测任务: {', '.join(params)}")
+        return self.group_id
+    
+    def _on_job_result(self, job_id: int, version: int):
+        """参数任务结果更新：确认注入后立即计数（不等待任务结束）"""
+        if job_id in self.param_jobs:
+            self._check_injection(job_id)
+    
+    def _on_job_finished(self, job_id: int, return_code: int):
+        """参数任务结束：全部结束后汇总"""
+        if job_id not in self.param_jobs:
+            return
+        self._check_injection(job_id)
+        
+        jobs = [self.scheduler.get_job(jid) for jid in self.param_jobs]
+        if all(job is None or job.is_finished for job in jobs):
+            if self.injectable:
+                self.message.emit(f"参数检测完成，注入参数: {', '.join(self.injectable)}")
+            else:
+                self.message.emit("参数检测完成，未发现注入参数")
+            self.finished.emit(self.group_id)
+    
+    def _check_injection(self, job_id: int):
+        """统计注入参数，达到数量后停止其余任务"""
+        param = self.param_jobs[job_id]
+        job = self.scheduler.get_job(job_id)
+        if param in self.injectable or job is None or not job.store.get_summary().get('injection_found'):
+            return
+        
+        self.injectable.append(param)
+        self.message.emit(f"参数 '{param}' 存在注入 (任务 #{job_id})")
+        if self.stop_after and len(self.injectable) >= self.stop_after and not self.stopped:
+            self._stop_remaining(keep=job_id)
+    
+    def _stop_remaining(self, keep: int = None):
+        """取消组内尚未结束的任务（keep 为刚确认注入的任务，让其完成检测输出）"""
+        self.stopped = True
+        cancelled = 0
+        for job_id in self.param_jobs:
+            job = self.scheduler.get_job(job_id)
+            if job_id != keep and job and not job.is_finished and self.scheduler.cancel(job_id):
+                cancelled += 1
+        if cancelled:
+            self.message.emit(f"已确认 {len(self.injectable)} 个注入参数，停止其余 {cancelled} 个任务")
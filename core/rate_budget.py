@@ -0,0 +1,141 @@
+"""
+单主机请求速率预算
+同一主机的所有任务共享一个请求速率上限（req/s），任务启动时按主机剩余预算分配速率，
+并换算为该任务的 --threads / --delay
+"""
+
+import math
+from typing import Dict, List, Optional, Tuple
+
+
+class RateBudget:
+    """
+    单主机请求速率预算（令牌桶的补充速率）
+    
+    sqlmap 进程的请求无法在外部逐个拦截，因此预算在任务启动时按速率预留：
+    每个运行中任务占用一份速率，所有任务之和不超过主机预算；
+    任务结束后释放的预算分配给之后启动的任务
+    """
+    
+    # 单个任务可分配的最小速率，剩余预算低于此值时任务继续排队
+    MIN_JOB_RATE = 0.2
+    
+    def __init__(self, default_rate: float = 0.0, host_rates: Dict[str, float] = None):
+        """
+        初始化速率预算
+        
+        参数:
+            default_rate: 每个主机的默认速率上限（req/s），0 表示不限制
+            host_rates: 单独设置的主机速率上限 {host: req/s}
+        """
+        self.default_rate = max(0.0, default_rate)
+        self.host_rates: Dict[str, float] = {}
+        for host, rate in (host_rates or {}).items():
+            self.set_host_rate(host, rate)
+    
+    def set_default_rate(self, rate: float):
+        """设置默认速率上限（0 表示不限制）"""
+        self.default_rate = max(0.0, rate)
+    
+    def set_host_rate(self, host: str, rate: Optional[float]):
+        """设置主机速率上限（None 或负数表示使用默认值，0 表示不限制）"""
+        host = host.lower()
+        if rate is None or rate < 0:
+            self.host_rates.pop(host, None)
+        else:
+            self.host_rates[host] = rate
+    
+    def get_rate(self, host: str) -> float:
+        """获取主机速率上限（0 表示不限制）"""
+        return self.host_rates.get(host.lower(), self.default_rate)
+    
+    @staticmethod
+    def allocated(host: str, running_jobs: list) -> float:
+        """主机已分配给运行中任务的速率"""
+        return sum(job.rate_limit or 0.0 for job in running_jobs if job.host == host)
+    
+    def allocate(self, job, running_jobs: list, slots: int) -> Optional[float]:
+        """
+        计算任务启动时可分配的速率
+        
+        主机预算按该主机可同时运行的任务数平分，且不超过剩余预算；
+        先启动的任务不会占满预算，之后启动的任务仍能立即分到一份
+        
+        参数:
+            job: 待启动的任务
+            running_jobs: 运行中的任务
+            slots: 该任务所在主机（或共享名额的任务组）可同时运行的任务数
+        
+        返回:
+            None 表示不限速；0 表示剩余预算不足，需要继续排队；否则为分配的 req/s
+        """
+        rate = self.get_rate(job.host) if job.host else 0.0
+        if rate <= 0:
+            return None
+        
+        share = rate / max(1, slots)
+        remaining = rate - self.allocated(job.host, running_jobs)
+        allocation = min(share, remaining)
+        if allocation < min(self.MIN_JOB_RATE, share):
+            return 0.0
+        return round(allocation, 2)
+    
+    @staticmethod
+    def throttle(rate: float, threads: int, delay: float) -> Tuple[int, float]:
+        """
+        将速率换算为 --threads / --delay
+        
+        sqlmap 每个线程在每次请求前等待 --delay 秒，速率上限约为 threads / delay；
+        线程数不超过原设置和速率，延迟不小于原设置
+        
+        返回:
+            (threads, delay)
+        """
+        threads = max(1, min(threads or 1, math.floor(rate) or 1))
+        delay = max(delay or 0.0, math.ceil(threads / rate * 100) / 100)
+        return threads, delay
+    
+    def host_stats(self, running_jobs: list, pending_jobs: list) -> List[Dict]:
+        """
+        各主机的速率统计
+        
+        返回:
+            [{host, budget, allocated, running, pending}]，budget 为 0 表示不限制；
+            allocated 为运行中任务的速率之和（不限速任务不计入）
+        """
+        hosts = {}
+        for job in running_jobs + pending_jobs:
+            if job.host:
+                hosts.setdefault(job.host, {'running': 0, 'pending': 0})
+                hosts[job.host]['running' if job in running_jobs else 'pending'] += 1
+        for host in self.host_rates:
+            hosts.setdefault(host, {'running': 0, 'pending': 0})
+        
+        stats = []
+        for host in sorted(hosts):
+            stats.append({
+                'host': host,
+                'budget': self.get_rate(host),
+                'allocated': round(self.allocated(host, running_jobs), 2),
+                'running': hosts[host]['running'],
+                'pending': hosts[host]['pending'],
+            })
+        return stats
+
+
+def parse_host_rates(text: str) -> Dict[str, float]:
+    """解析配置中的主机速率 "host1=2;host2=0.5" """
+    rates = {}
+    for part in (text or "").split(';'):
+        host, _sep, value = part.partition('=')
+        try:
+            if host.strip():
+                rates[host.strip().lower()] = float(value)
+        except ValueError:
+            continue
+    return rates
+
+
+def format_host_rates(rates: Dict[str, float]) -> str:
+    """主机速率转换为配置字符串"""
+    return ";".join(f"{host}={rate:g}" for host, rate in sorted(rates.items()))
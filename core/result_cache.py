@@ -0,0 +1,67 @@
+"""
+扫描结果复用缓存
+按规范化的 CommandBuilder 选项计算扫描规格哈希，完成的扫描结果以该哈希保存到历史数据库，
+有效期内再次执行相同规格的扫描时可直接显示缓存结果
+"""
+
+import hashlib
+import json
+from typing import Dict, List
+
+from .result_store import ResultStore
+
+
+# 不影响扫描结果的选项（性能参数、界面选项和输出位置），不参与哈希
+IGNORED_OPTIONS = (
+    'sqlmap_path', '_threads', '_timeout', '_retries', '_delay', '_time_sec',
+    '_auto_tune', '_use_fingerprint', '_verbose', '_output_dir', '_save', '_project',
+)
+
+# 单条缓存的结果上限（序列化后字节数），超过时不缓存
+MAX_ENTRY_BYTES = 20 * 1024 * 1024
+
+# 缓存中保留的日志长度（字符数，保留末尾）
+LOG_TAIL_CHARS = 200 * 1024
+
+
+def _file_digest(path: str) -> str:
+    """文件内容摘要（请求包每次提交会写入新的临时文件，按内容而不是路径比较）"""
+    try:
+        with open(path, 'rb') as f:
+            content = f.read().replace(b'\r\n', b'\n')
+    except OSError:
+        return path
+    return "sha256:" + hashlib.sha256(content).hexdigest()
+
+
+def spec_hash(options: Dict) -> str:
+    """
+    计算扫描规格哈希
+    
+    参数:
+        options: CommandBuilder.snapshot() 选项快照
+    """
+    spec = {key: value for key, value in options.items() if key not in IGNORED_OPTIONS}
+    for key in ('_request_file', '_file'):
+        if spec.get(key):
+            spec[key] = _file_digest(spec[key])
+    payload = json.dumps(spec, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def encode_results(store: ResultStore) -> str:
+    """序列化结果（超过 MAX_ENTRY_BYTES 时返回空字符串）"""
+    text = json.dumps(store.export_state(), ensure_ascii=False)
+    return text if len(text.encode('utf-8')) <= MAX_ENTRY_BYTES else ""
+
+
+def decode_results(text: str) -> ResultStore:
+    """从缓存恢复结果存储"""
+    store = ResultStore()
+    store.load_state(json.loads(text))
+    return store
+
+
+def log_tail(log: List[str]) -> str:
+    """任务日志末尾部分"""
+    return "".join(log)[-LOG_TAIL_CHARS:]
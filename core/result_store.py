@@ -0,0 +1,472 @@
+"""
+结果存储
+扫描结果的唯一持有者：引擎线程在锁内写入并递增版本号，
+界面线程只通过版本号得知变化，再按需读取需要的切片
+同时支持直接查询 sqlmap 以 SQLITE 格式导出的数据库文件
+"""
+
+import os
+import sys
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional, List, Iterator, Dict, Any
+
+
+class ResultStore:
+    """扫描结果存储
+    
+    结构化结果（注入信息、数据库/表/列）与提取数据都保存在这里，
+    数据来源有两种：
+        - 文本表：从 sqlmap 控制台表格解析出的行（"a | b | c" 格式）
+        - SQLite 表：sqlmap 使用 --dump-format=SQLITE 直接写入的数据库文件，
+          按需使用 LIMIT/OFFSET 分页查询，不做任何文本解析
+    
+    线程约定：
+        - 写入方（引擎线程）通过 write() 在锁内修改结果，退出时版本号加一
+        - 读取方（界面线程）通过 get_summary()/fetch_rows() 等方法读取副本或切片，
+          信号只传递版本号，不再跨线程复制整个结果字典
+    """
+    
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._version = 0
+        self._results = self.empty_results()
+        self._sqlite_tables = {}   # {table_key: (db_path, sqlite_table)}
+    
+    @staticmethod
+    def empty_results() -> Dict[str, Any]:
+        """空的结果结构"""
+        return {
+            'injection_found': False,      # 是否发现注入
+            'injection_type': [],          # 注入类型
+            'injection_params': [],        # 注入参数名
+            'payloads': {},                # 注入载荷 {注入类型: payload}
+            'dbms': '',                    # 数据库类型
+            'current_db': '',              # 当前数据库
+            'current_user': '',            # 当前用户
+            'banner': '',                  # 数据库版本标识（--banner）
+            'is_dba': None,                # 当前用户是否为 DBA（--is-dba，未知为 None）
+            'databases': [],               # 数据库列表
+            'tables': {},                  # 表列表 {db: [tables]}
+            'columns': {},                 # 列列表 {(db, table): [columns]}
+            'data': {},                    # 数据内容 {table_key: [rows]}
+            'sqlite_dumps': {},            # SQLite 导出文件 {db.table: path}
+            'counts': {},                  # 表行数（--count） {db.table: 行数}
+        }
+    
+    @property
+    def version(self) -> int:
+        """当前版本号，每次写入后递增"""
+        with self._lock:
+            return self._version
+    
+    def clear(self):
+        """清空所有数据"""
+        with self._lock:
+            self._results = self.empty_results()
+            self._sqlite_tables = {}
+            self._version += 1
+    
+    # ==================== 数据写入（引擎线程） ====================
+    
+    @contextmanager
+    def write(self):
+        """
+        写入上下文：持有锁并返回可修改的结果字典，退出时版本号加一
+        
+        用法:
+            with store.write() as results:
+                results['dbms'] = 'MySQL'
+        """
+        with self._lock:
+            try:
+                yield self._results
+            finally:
+                self._version += 1
+    
+    def set_table_rows(self, table_key: str, rows: list) -> int:
+        """设置文本解析得到的表数据（接管列表所有权，不做复制），返回新版本号"""
+        with self._lock:
+            self._results['data'][table_key] = rows
+            self._version += 1
+            return self._version
+    
+    def set_text_tables(self, data_dict: dict):
+        """设置全部文本表数据"""
+        with self._lock:
+            self._results['data'] = dict(data_dict) if data_dict else {}
+            self._version += 1
+    
+    def attach_sqlite_dump(self, table_key: str, db_path: str, sqlite_table: str = None) -> bool:
+        """
+        关联 sqlmap 导出的 SQLite 数据库文件
+        
+        参数:
+            table_key: 表标识（通常为 db.table）
+            db_path: sqlmap 写入的 .sqlite3 文件路径
+            sqlite_table: 文件中的表名，默认取 table_key 中的表名部分
+        
+        返回:
+            是否关联成功
+        """
+        if not db_path or not os.path.isfile(db_path):
+            return False
+        
+        if not sqlite_table:
+            sqlite_table = table_key.rsplit('.', 1)[-1]
+        
+        try:
+            conn = self._connect(db_path)
+            try:
+                names = [row[0] for row in conn.execute(
+                    "SELECT name FROM sqlite_master WHERE type = 'table'"
+                )]
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            return False
+        
+        if sqlite_table not in names:
+            # 大小写不一致或只有一张表时做兼容
+            matched = [n for n in names if n.lower() == sqlite_table.lower()]
+            if matched:
+                sqlite_table = matched[0]
+            elif len(names) == 1:
+                sqlite_table = names[0]
+            else:
+                return False
+        
+        with self._lock:
+            self._sqlite_tables[table_key] = (db_path, sqlite_table)
+            self._results['sqlite_dumps'][table_key] = db_path
+            # SQLite 数据优先，移除同名的文本数据避免重复占用内存
+            self._results['data'].pop(table_key, None)
+            self._version += 1
+        return True
+    
+    # ==================== 查询（界面线程） ====================
+    
+    def get_summary(self) -> Dict[str, Any]:
+        """
+        获取结构化结果的副本（不含提取的数据行）
+        
+        返回的字典与 empty_results() 结构一致，'data' 字段替换为
+        {table_key: 行数}，避免复制大量数据
+        """
+        with self._lock:
+            results = self._results
+            summary = {
+                'injection_found': results['injection_found'],
+                'injection_type': list(results['injection_type']),
+                'injection_params': list(results['injection_params']),
+                'payloads': dict(results['payloads']),
+                'dbms': results['dbms'],
+                'current_db': results['current_db'],
+                'current_user': results['current_user'],
+                'banner': results['banner'],
+                'is_dba': results['is_dba'],
+                'databases': list(results['databases']),
+                'tables': {db: list(tables) for db, tables in results['tables'].items()},
+                'columns': {key: list(cols) for key, cols in results['columns'].items()},
+                'sqlite_dumps': dict(results['sqlite_dumps']),
+                'counts': dict(results['counts']),
+            }
+            keys = self.table_keys()
+        summary['data'] = {key: self.row_count(key) for key in keys}
+        return summary
+    
+    def has_data(self) -> bool:
+        """是否有任何数据"""
+        with self._lock:
+            return bool(self._results['data'] or self._sqlite_tables)
+    
+    def table_keys(self) -> List[str]:
+        """获取所有表标识"""
+        with self._lock:
+            keys = list(self._results['data'].keys())
+            for key in self._sqlite_tables:
+                if key not in self._results['data']:
+                    keys.append(key)
+            return keys
+    
+    def is_sqlite(self, table_key: str) -> bool:
+        """表数据是否来自 SQLite 文件"""
+        with self._lock:
+            return table_key in self._sqlite_tables
+    
+    def get_sqlite_path(self, table_key: str) -> Optional[str]:
+        """获取表关联的 SQLite 文件路径"""
+        entry = self._get_sqlite_entry(table_key)
+        return entry[0] if entry else None
+    
+    def sqlite_missing(self, table_key: str) -> bool:
+        """表关联的 SQLite 文件已不存在（如输出目录超出磁盘配额被清理），此时按空表读取"""
+        entry = self._get_sqlite_entry(table_key)
+        return bool(entry) and not os.path.isfile(entry[0])
+    
+    def find_table(self, full_table_name: str, db_name: str, table_name: str) -> Optional[str]:
+        """查找表标识 - 使用多种匹配方式"""
+        keys = self.table_keys()
+        if not keys:
+            return None
+        
+        # 1. 精确匹配
+        possible_keys = [
+            full_table_name,
+            table_name,
+            f"{db_name}.{table_name}" if db_name else table_name,
+            f"`{db_name}`.`{table_name}`" if db_name else f"`{table_name}`",
+        ]
+        for key in possible_keys:
+            if key in keys:
+                return key
+        
+        # 2. 遍历所有键，查找包含表名的
+        for key in keys:
+            # 提取键中的纯表名（去掉数据库前缀和引号）
+            clean_key = key.replace('`', '').replace("'", '').replace('"', '')
+            key_table = clean_key.split('.')[-1] if '.' in clean_key else clean_key
+            
+            if key_table == table_name:
+                return key
+            if key.endswith(table_name) or key.endswith(f".{table_name}"):
+                return key
+            if table_name in clean_key:
+                return key
+        
+        # 3. 模糊匹配（忽略大小写）
+        table_name_lower = table_name.lower()
+        for key in keys:
+            if table_name_lower in key.lower():
+                return key
+        
+        return None
+    
+    def get_headers(self, table_key: str) -> List[str]:
+        """获取表头（文本表无法识别表头、SQLite 文件无法读取时返回空列表）"""
+        sqlite_entry = self._get_sqlite_entry(table_key)
+        if sqlite_entry:
+            db_path, sqlite_table = sqlite_entry
+            try:
+                conn = self._connect(db_path)
+                try:
+                    cursor = conn.execute(f"SELECT * FROM {self._quote(sqlite_table)} LIMIT 0")
+                    return [desc[0] for desc in cursor.description]
+                finally:
+                    conn.close()
+            except sqlite3.Error:
+                return []
+        
+        return self._text_headers(self._get_text_rows(table_key))
+    
+    def row_count(self, table_key: str) -> int:
+        """获取数据行数（不含表头）"""
+        sqlite_entry = self._get_sqlite_entry(table_key)
+        if sqlite_entry:
+            db_path, sqlite_table = sqlite_entry
+            try:
+                conn = self._connect(db_path)
+                try:
+                    return conn.execute(f"SELECT COUNT(*) FROM {self._quote(sqlite_table)}").fetchone()[0]
+                finally:
+                    conn.close()
+            except sqlite3.Error:
+                return 0
+        
+        rows = self._get_text_rows(table_key)
+        return len(rows) - (1 if self._text_headers(rows) else 0)
+    
+    def fetch_rows(self, table_key: str, offset: int = 0, limit: int = None) -> List[list]:
+        """分页获取数据行"""
+        sqlite_entry = self._get_sqlite_entry(table_key)
+        if sqlite_entry:
+            db_path, sqlite_table = sqlite_entry
+            try:
+                conn = self._connect(db_path)
+                try:
+                    cursor = conn.execute(
+                        f"SELECT * FROM {self._quote(sqlite_table)} LIMIT ? OFFSET ?",
+                        (limit if limit is not None else -1, max(0, offset))
+                    )
+                    return [self._format_row(row) for row in cursor.fetchall()]
+                finally:
+                    conn.close()
+            except sqlite3.Error:
+                return []
+        
+        rows = self._get_text_rows(table_key)
+        start = (1 if self._text_headers(rows) else 0) + max(0, offset)
+        end = None if limit is None else start + limit
+        return [self._split_text_row(row) for row in rows[start:end]]
+    
+    def iter_rows(self, table_key: str, batch_size: int = 1000) -> Iterator[list]:
+        """逐行遍历全部数据（用于导出，SQLite 表使用游标流式读取）"""
+        sqlite_entry = self._get_sqlite_entry(table_key)
+        if sqlite_entry:
+            db_path, sqlite_table = sqlite_entry
+            try:
+                conn = self._connect(db_path)
+            except sqlite3.Error:
+                return
+            try:
+                cursor = conn.execute(f"SELECT * FROM {self._quote(sqlite_table)}")
+                while True:
+                    batch = cursor.fetchmany(batch_size)
+                    if not batch:
+                        break
+                    for row in batch:
+                        yield self._format_row(row)
+            except sqlite3.Error:
+                return
+            finally:
+                conn.close()
+            return
+        
+        # 引擎只会整体替换行列表而不会原地修改，持有引用后可在锁外遍历
+        rows = self._get_text_rows(table_key)
+        start = 1 if self._text_headers(rows) else 0
+        for row in rows[start:]:
+            yield self._split_text_row(row)
+    
+    def memory_usage(self) -> Dict[str, int]:
+        """
+        统计结果占用的资源
+        
+        返回:
+            {'memory_bytes': 文本数据占用内存的估算值,
+             'disk_bytes': 关联的 SQLite 文件大小,
+             'text_rows': 文本行数}
+        """
+        with self._lock:
+            tables = list(self._results['data'].values())
+            sqlite_paths = {entry[0] for entry in self._sqlite_tables.values()}
+        
+        memory_bytes = 0
+        text_rows = 0
+        for rows in tables:
+            memory_bytes += sys.getsizeof(rows)
+            for row in rows:
+                memory_bytes += sys.getsizeof(row)
+            text_rows += len(rows)
+        
+        disk_bytes = 0
+        for path in sqlite_paths:
+            try:
+                disk_bytes += os.path.getsize(path)
+            except OSError:
+                pass
+        
+        return {'memory_bytes': memory_bytes, 'disk_bytes': disk_bytes, 'text_rows': text_rows}
+    
+    # ==================== 序列化（结果复用缓存） ====================
+    
+    def export_state(self) -> Dict[str, Any]:
+        """
+        导出完整结果（可 JSON 序列化）
+        
+        columns 的元组键转换为 [db, table, columns] 列表；SQLite 表只记录文件路径和表名
+        """
+        with self._lock:
+            results = self._results
+            return {
+                'results': {
+                    'injection_found': results['injection_found'],
+                    'injection_type': list(results['injection_type']),
+                    'injection_params': list(results['injection_params']),
+                    'payloads': dict(results['payloads']),
+                    'dbms': results['dbms'],
+                    'current_db': results['current_db'],
+                    'current_user': results['current_user'],
+                    'banner': results['banner'],
+                    'is_dba': results['is_dba'],
+                    'databases': list(results['databases']),
+                    'tables': {db: list(tables) for db, tables in results['tables'].items()},
+                    'columns': [[db, table, [list(col) if isinstance(col, tuple) else col for col in cols]]
+                                for (db, table), cols in results['columns'].items()],
+                    'data': {key: list(rows) for key, rows in results['data'].items()},
+                    'counts': dict(results['counts']),
+                },
+                'sqlite_tables': {key: list(entry) for key, entry in self._sqlite_tables.items()},
+            }
+    
+    def load_state(self, state: Dict[str, Any]):
+        """载入 export_state() 导出的结果（替换当前结果，已不存在的 SQLite 文件跳过）"""
+        saved = state.get('results', {})
+        results = self.empty_results()
+        for key in results:
+            if key not in ('columns', 'sqlite_dumps') and key in saved:
+                results[key] = saved[key]
+        for db, table, cols in saved.get('columns', []):
+            results['columns'][(db, table)] = [tuple(col) if isinstance(col, list) else col for col in cols]
+        
+        with self._lock:
+            self._results = results
+            self._sqlite_tables = {}
+            self._version += 1
+        for key, (db_path, sqlite_table) in state.get('sqlite_tables', {}).items():
+            self.attach_sqlite_dump(key, db_path, sqlite_table)
+    
+    def apply_delta(self, delta: Dict[str, Any]) -> int:
+        """
+        合并远程执行节点发来的结果增量（见 worker_protocol.ResultDelta），返回新版本号
+        
+        results 中的字段整体替换；data 中每张表从 offset 处接上新的行
+        """
+        with self.write() as results:
+            for key, value in delta.get('results', {}).items():
+                if key == 'columns':
+                    results['columns'] = {(db, table): [tuple(col) if isinstance(col, list) else col for col in cols]
+                                          for db, table, cols in value}
+                elif key in results and key not in ('data', 'sqlite_dumps'):
+                    results[key] = value
+            for key, entry in delta.get('data', {}).items():
+                rows = results['data'].get(key) or []
+                results['data'][key] = rows[:entry.get('offset', 0)] + list(entry.get('rows', []))
+        return self.version
+    
+    # ==================== 内部方法 ====================
+    
+    def _get_sqlite_entry(self, table_key: str):
+        """获取 SQLite 关联信息"""
+        with self._lock:
+            return self._sqlite_tables.get(table_key)
+    
+    def _get_text_rows(self, table_key: str) -> list:
+        """获取文本表行列表的引用"""
+        with self._lock:
+            return self._results['data'].get(table_key) or []
+    
+    @staticmethod
+    def _connect(db_path: str) -> sqlite3.Connection:
+        """以只读方式打开 sqlmap 导出的数据库"""
+        uri = Path(os.path.abspath(db_path)).as_uri() + "?mode=ro"
+        return sqlite3.connect(uri, uri=True)
+    
+    @staticmethod
+    def _quote(identifier: str) -> str:
+        """转义 SQLite 标识符"""
+        return '"' + identifier.replace('"', '""') + '"'
+    
+    @staticmethod
+    def _format_row(row) -> list:
+        """将 SQLite 行转为字符串列表"""
+        return ["" if value is None else str(value) for value in row]
+    
+    @staticmethod
+    def _split_text_row(row) -> list:
+        """拆分文本行"""
+        if isinstance(row, str):
+            return [p.strip() for p in row.split(" | ")]
+        return [str(row)]
+    
+    @staticmethod
+    def _text_headers(rows: list) -> List[str]:
+        """识别文本表的表头（首行不含纯数字单元格时视为表头）"""
+        if not rows or not isinstance(rows[0], str) or " | " not in rows[0]:
+            return []
+        parts = [p.strip() for p in rows[0].split(" | ")]
+        if all(not p.isdigit() for p in parts):
+            return parts
+        return []
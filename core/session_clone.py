@@ -0,0 +1,115 @@
+"""
+会话克隆
+同一目标只完成一次注入检测，之后的任务各自获得一份该会话的副本（不能多个 sqlmap 进程共用一个会话文件），
+启动后直接从会话恢复注入点进入提取；文件系统支持时用写时复制（reflink）克隆，否则普通复制
+"""
+
+import os
+import shutil
+import sqlite3
+import sys
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from .fingerprint_cache import fingerprint_key, normalize_target
+
+
+SESSION_FILE = "session.sqlite"
+# 会话目录中随会话一起克隆的文件（日志、提取的数据等不复制）
+CLONE_FILES = (SESSION_FILE, "target.txt")
+
+FICLONE = 0x40049409  # Linux ioctl：在 btrfs、XFS 等文件系统上共享数据块
+
+
+def session_key(options: dict) -> str:
+    """会话对应的目标（规范化目标 + 测试参数），无法确定单一目标时返回空字符串"""
+    target = normalize_target(options)
+    return fingerprint_key(target, options.get('_param', '')) if target else ""
+
+
+@dataclass
+class SessionSource:
+    """已完成注入检测、可供克隆的会话"""
+    output_dir: str
+    job_id: int
+    detection_seconds: float = 0.0  # 完整检测耗时，即每个克隆任务节省的时间
+
+
+@dataclass
+class SessionClone:
+    """克隆结果"""
+    method: str      # reflink / copy / snapshot
+    files: int = 0
+    size: int = 0
+    seconds: float = 0.0
+    
+    @property
+    def label(self) -> str:
+        return {"reflink": "写时复制", "copy": "复制", "snapshot": "快照"}.get(self.method, self.method)
+
+
+def clone_file(src: str, dst: str) -> str:
+    """克隆单个文件，优先 reflink；返回使用的方式"""
+    if sys.platform.startswith("linux"):
+        try:
+            import fcntl
+            with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+                fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+            shutil.copystat(src, dst)
+            return "reflink"
+        except (OSError, ImportError):
+            pass
+    shutil.copy2(src, dst)
+    return "copy"
+
+
+def snapshot_sqlite(src: str, dst: str):
+    """用 SQLite 在线备份复制会话（源会话仍在被写入时得到一致的副本）"""
+    source = sqlite3.connect(f"file:{src}?mode=ro", uri=True, timeout=10)
+    try:
+        target = sqlite3.connect(dst)
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+    finally:
+        source.close()
+
+
+def clone_session(src_dir: str, dst_dir: str, live: bool = False) -> Optional[SessionClone]:
+    """
+    把输出目录中各主机的会话克隆到另一个输出目录
+    
+    参数:
+        src_dir: 源任务的输出目录（<输出目录>/<主机>/session.sqlite）
+        dst_dir: 新任务的输出目录
+        live: 源任务仍在运行（会话文件可能正在写入，改用在线备份）
+    返回:
+        SessionClone；源目录中没有会话时返回 None
+    """
+    started = time.time()
+    result = SessionClone("snapshot" if live else "reflink")
+    try:
+        hosts = [entry for entry in os.scandir(src_dir) if entry.is_dir(follow_symlinks=False)]
+    except OSError:
+        return None
+    for host in hosts:
+        if not os.path.isfile(os.path.join(host.path, SESSION_FILE)):
+            continue
+        os.makedirs(os.path.join(dst_dir, host.name), exist_ok=True)
+        for name in CLONE_FILES:
+            src = os.path.join(host.path, name)
+            if not os.path.isfile(src):
+                continue
+            dst = os.path.join(dst_dir, host.name, name)
+            if live and name == SESSION_FILE:
+                snapshot_sqlite(src, dst)
+            elif clone_file(src, dst) == "copy" and not live:
+                result.method = "copy"
+            result.files += 1
+            result.size += os.path.getsize(dst)
+    if not result.files:
+        return None
+    result.seconds = time.time() - started
+    return result
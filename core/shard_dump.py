@@ -0,0 +1,202 @@
+"""
+分片并行提取
+先用 --count 获取表行数，再按 --start/--stop 拆分为多个分片任务并行提取，
+全部完成后按行号顺序合并到一张表
+"""
+
+import math
+from typing import List, Optional, Tuple
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from .command_builder import CommandBuilder
+from .dump_planner import estimate_rows
+from .job_queue import JobStatus
+
+
+def split_ranges(total: int, shards: int) -> List[Tuple[int, int]]:
+    """
+    将 1..total 行拆分为连续区间（与 sqlmap --start/--stop 一致，从 1 开始且包含两端）
+    
+    示例: split_ranges(10, 3) -> [(1, 4), (5, 8), (9, 10)]
+    """
+    if total <= 0:
+        return []
+    shards = max(1, min(shards, total))
+    size = math.ceil(total / shards)
+    return [(start, min(start + size - 1, total)) for start in range(1, total + 1, size)]
+
+
+class ShardedDump(QObject):
+    """
+    单表分片并行提取协调器
+    
+    所有任务基于同一份选项快照（同一目标），计数任务完成注入检测并写入会话，
+    分片任务启动时由调度器各自克隆该会话，不再重复检测。
+    分片任务组整体只占用一个单主机并发名额。
+    """
+    
+    message = pyqtSignal(str)     # 进度消息
+    finished = pyqtSignal(str)    # 合并完成或终止 (group_id)；重试分片后会再次合并
+    
+    def __init__(self, scheduler, builder: CommandBuilder, db: str, table: str,
+                 shards: int = 4, max_retries: int = 1, priority: int = 0, parent=None):
+        """
+        初始化分片提取
+        
+        参数:
+            scheduler: JobScheduler
+            builder: 目标任务的命令构建器（提供目标、检测和性能设置）
+            db: 数据库名
+            table: 表名
+            shards: 分片数（同时也是该组的最大并发数）
+            max_retries: 失败分片自动重试次数
+            priority: 任务优先级
+        """
+        super().__init__(parent)
+        self.scheduler = scheduler
+        self.db = db
+        self.table = table
+        self.shards = max(1, shards)
+        self.max_retries = max(0, max_retries)
+        self.priority = priority
+        
+        # 所有任务复用同一会话（克隆）：不清空会话，执行动作统一重新设置
+        self._base_options = (CommandBuilder.from_snapshot(builder.snapshot())
+                              .clear_actions()
+                              .set_flush_session(False)
+                              .set_dump_format("")
+                              .snapshot())
+        
+        self.group_id = ""
+        self.count_job_id = None
+        self.total_rows = 0
+        self.shard_jobs = {}          # {job_id: (start, stop)}
+        self.shard_retries = {}       # {job_id: 分片重新执行的次数}（调度器的自动重试和抢占恢复不计入）
+        self.failed_ranges = []
+    
+    @property
+    def table_key(self) -> str:
+        return f"{self.db}.{self.table}"
+    
+    def start(self) -> str:
+        """提交计数任务，返回任务组 ID"""
+        self.group_id = self.scheduler.create_group("shard", self.shards, share_host_slot=True)
+        self.scheduler.job_finished.connect(self._on_job_finished)
+        
+        builder = self._new_builder().enum_count(True).enum_columns(False, db=self.db, table=self.table)
+        job = self.scheduler.submit(builder, priority=self.priority,
+                                    scan_mode="分片提取-计数", group_id=self.group_id)
+        self.count_job_id = job.job_id
+        self._log(f"分片提取 {self.table_key}: 正在统计行数 (任务 #{job.job_id})")
+        return self.group_id
+    
+    def rerun_failed(self) -> int:
+        """重新执行失败的分片，返回重新排队的数量"""
+        count = 0
+        for job_id in self.shard_jobs:
+            job = self.scheduler.get_job(job_id)
+            failed = job is not None and job.is_finished and (
+                job.status != JobStatus.COMPLETED or self._missing_rows(job_id))
+            if failed and self.scheduler.retry(job_id):
+                count += 1
+        return count
+    
+    # ==================== 内部方法 ====================
+    
+    def _new_builder(self) -> CommandBuilder:
+        return CommandBuilder.from_snapshot(self._base_options)
+    
+    def _log(self, text: str):
+        """记录到计数任务日志并发出消息"""
+        if self.count_job_id is not None:
+            self.scheduler.append_log(self.count_job_id, f"[分片] {text}")
+        self.message.emit(text)
+    
+    def _on_job_finished(self, job_id: int, return_code: int):
+        """任务结束"""
+        if job_id == self.count_job_id:
+            self._on_count_finished()
+        elif job_id in self.shard_jobs:
+            self._on_shard_finished(job_id)
+    
+    def _on_count_finished(self):
+        """计数完成：拆分分片"""
+        job = self.scheduler.get_job(self.count_job_id)
+        total = estimate_rows(self.table, self.db, job.store.get_summary().get('counts', {})) if job else None
+        if not total:
+            self._log(f"未能获取 {self.table_key} 的行数，分片提取已终止")
+            self.finished.emit(self.group_id)
+            return
+        
+        self.total_rows = total
+        ranges = split_ranges(total, self.shards)
+        for start, stop in ranges:
+            builder = self._new_builder().dump_data(True, db=self.db, table=self.table)
+            builder.set_limit(start, stop)
+            shard = self.scheduler.submit(builder, priority=self.priority,
+                                          scan_mode="分片提取", group_id=self.group_id)
+            self.shard_jobs[shard.job_id] = (start, stop)
+        self._log(f"{self.table_key} 共 {total} 行，拆分为 {len(ranges)} 个分片并行提取")
+    
+    def _on_shard_finished(self, job_id: int):
+        """分片结束：失败自动重试，全部结束后合并"""
+        job = self.scheduler.get_job(job_id)
+        start, stop = self.shard_jobs[job_id]
+        failed = job is None or job.status != JobStatus.COMPLETED or self._missing_rows(job_id)
+        retries = self.shard_retries.get(job_id, 0)
+        if failed and job is not None and job.status != JobStatus.CANCELLED and retries < self.max_retries:
+            self.shard_retries[job_id] = retries + 1
+            self._log(f"分片 {start}-{stop} (任务 #{job_id}) 未完整提取，重新执行")
+            self.scheduler.retry(job_id)
+            return
+        
+        if all(self._is_final(jid) for jid in self.shard_jobs):
+            self._merge()
+    
+    def _is_final(self, job_id: int) -> bool:
+        job = self.scheduler.get_job(job_id)
+        return job is None or job.is_finished
+    
+    def _shard_key(self, job) -> Optional[str]:
+        return job.store.find_table(self.table_key, self.db, self.table)
+    
+    def _missing_rows(self, job_id: int) -> bool:
+        """分片提取的行数少于区间大小"""
+        job = self.scheduler.get_job(job_id)
+        if job is None:
+            return True
+        start, stop = self.shard_jobs[job_id]
+        key = self._shard_key(job)
+        return key is None or job.store.row_count(key) < stop - start + 1
+    
+    def _merge(self):
+        """按区间顺序合并分片数据到计数任务的结果存储"""
+        headers = []
+        rows = []
+        self.failed_ranges = []
+        for job_id, (start, stop) in sorted(self.shard_jobs.items(), key=lambda item: item[1][0]):
+            job = self.scheduler.get_job(job_id)
+            key = self._shard_key(job) if job else None
+            if key is None or job.status != JobStatus.COMPLETED:
+                self.failed_ranges.append((start, stop))
+                continue
+            if not headers:
+                headers = job.store.get_headers(key)
+            rows.extend(" | ".join(row) for row in job.store.iter_rows(key))
+            if self._missing_rows(job_id):
+                self.failed_ranges.append((start, stop))
+        
+        count_job = self.scheduler.get_job(self.count_job_id)
+        if count_job and (rows or headers):
+            text_rows = ([" | ".join(headers)] if headers else []) + rows
+            count_job.store.set_table_rows(self.table_key, text_rows)
+            self.scheduler.notify_result(self.count_job_id)
+        
+        if self.failed_ranges:
+            ranges = ", ".join(f"{a}-{b}" for a, b in self.failed_ranges)
+            self._log(f"{self.table_key} 合并完成 {len(rows)}/{self.total_rows} 行，"
+                      f"失败分片: {ranges}（可在队列中重试对应任务）")
+        else:
+            self._log(f"{self.table_key} 合并完成，共 {len(rows)} 行")
+        self.finished.emit(self.group_id)
@@ -0,0 +1,398 @@
+"""
+共享任务队列
+多个界面实例（或无界面执行节点）共用一个 SQLite 数据库（WAL 模式）中的任务队列：
+任务发布后由任意有空闲名额的实例原子地领取（租约），执行期间定期续约，
+领取者崩溃后租约过期，任务自动回到可领取状态；完成后结果写回数据库，发布者可以查看
+
+任务以 worker_protocol.pack_job() 的格式保存（请求包等文件内容随任务保存），
+领取的实例把文件写入自己的临时目录，不依赖发布者的文件权限
+"""
+
+import getpass
+import json
+import os
+import shutil
+import socket
+import sqlite3
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+
+from .command_builder import CommandBuilder
+from .job_queue import JobStatus
+from .result_cache import encode_results, log_tail
+from .worker_protocol import pack_job, unpack_job
+
+
+# 共享任务状态
+SHARED_STATUS_LABELS = {
+    'pending': "⏳ 排队中",
+    'claimed': "🔄 执行中",
+    'completed': "✅ 完成",
+    'failed': "❌ 失败",
+    'cancelled': "⛔ 已取消",
+}
+
+# 默认租约时长（秒），续约间隔为其三分之一
+DEFAULT_LEASE_SECONDS = 60
+
+
+def instance_id() -> str:
+    """当前实例标识（用户@主机:进程号）"""
+    try:
+        user = getpass.getuser()
+    except Exception:
+        user = "unknown"
+    return f"{user}@{socket.gethostname()}:{os.getpid()}"
+
+
+class SharedJobQueue:
+    """
+    共享任务队列存储
+    
+    每个方法使用独立的连接；领取在 BEGIN IMMEDIATE 事务中完成，
+    多个进程同时领取时同一任务只会被一个进程拿到
+    """
+    
+    def __init__(self, db_path: str):
+        """
+        初始化共享队列
+        
+        参数:
+            db_path: 共享数据库文件路径（所有实例需要有读写权限）
+        """
+        self.db_path = db_path
+        self._init_database()
+    
+    def _init_database(self):
+        """初始化数据库（启用 WAL，读写互不阻塞）"""
+        conn = self._get_connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS shared_jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                target TEXT NOT NULL,
+                scan_mode TEXT,
+                payload TEXT NOT NULL,
+                priority INTEGER DEFAULT 0,
+                status TEXT NOT NULL DEFAULT 'pending',
+                submitted_by TEXT,
+                owner TEXT,
+                lease_until REAL,
+                attempts INTEGER DEFAULT 0,
+                return_code INTEGER,
+                results TEXT,
+                log TEXT,
+                created_at REAL,
+                claimed_at REAL,
+                finished_at REAL
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_shared_jobs_status ON shared_jobs (status, priority, id)')
+        conn.close()
+    
+    def _get_connection(self) -> sqlite3.Connection:
+        """获取数据库连接（自动提交模式，事务显式开始；被其他进程锁定时最多等待 10 秒）"""
+        conn = sqlite3.connect(self.db_path, timeout=10, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+    
+    # ==================== 发布与领取 ====================
+    
+    def publish(self, payload: Dict, target: str, scan_mode: str = "", priority: int = 0,
+                submitted_by: str = "") -> int:
+        """发布任务（payload 为 pack_job() 的结果），返回共享任务 ID"""
+        conn = self._get_connection()
+        cursor = conn.execute('''
+            INSERT INTO shared_jobs (target, scan_mode, payload, priority, status, submitted_by, created_at)
+            VALUES (?, ?, ?, ?, 'pending', ?, ?)
+        ''', (target, scan_mode, json.dumps(payload, ensure_ascii=False), priority, submitted_by, time.time()))
+        job_id = cursor.lastrowid
+        conn.close()
+        return job_id
+    
+    def claim(self, owner: str, lease_seconds: float, limit: int = 1) -> List[Dict[str, Any]]:
+        """
+        领取排队中或租约已过期的任务（按优先级从高到低、先发布先领取）
+        
+        返回领取到的任务（payload 已解析为字典）
+        """
+        if limit <= 0:
+            return []
+        now = time.time()
+        conn = self._get_connection()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            rows = conn.execute('''
+                SELECT * FROM shared_jobs
+                WHERE status = 'pending' OR (status = 'claimed' AND lease_until < ?)
+                ORDER BY priority DESC, id
+                LIMIT ?
+            ''', (now, limit)).fetchall()
+            for row in rows:
+                conn.execute('''
+                    UPDATE shared_jobs
+                    SET status = 'claimed', owner = ?, lease_until = ?, claimed_at = ?, attempts = attempts + 1
+                    WHERE id = ?
+                ''', (owner, now + lease_seconds, now, row['id']))
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        
+        jobs = []
+        for row in rows:
+            job = dict(row)
+            try:
+                job['payload'] = json.loads(job['payload'])
+            except ValueError:
+                self.finish(job['id'], owner, 'failed', -1, log="[共享队列] 任务内容无法解析\n")
+                continue
+            job['owner'] = owner
+            jobs.append(job)
+        return jobs
+    
+    def renew(self, owner: str, job_ids: List[int], lease_seconds: float) -> List[int]:
+        """续约，返回仍由 owner 持有的任务 ID（租约已被他人接管的任务不在其中）"""
+        if not job_ids:
+            return []
+        conn = self._get_connection()
+        placeholders = ",".join("?" * len(job_ids))
+        conn.execute(f'''
+            UPDATE shared_jobs SET lease_until = ?
+            WHERE owner = ? AND status = 'claimed' AND id IN ({placeholders})
+        ''', (time.time() + lease_seconds, owner, *job_ids))
+        held = [row['id'] for row in conn.execute(f'''
+            SELECT id FROM shared_jobs WHERE owner = ? AND status = 'claimed' AND id IN ({placeholders})
+        ''', (owner, *job_ids))]
+        conn.close()
+        return held
+    
+    def finish(self, job_id: int, owner: str, status: str, return_code: int = None,
+               results: str = "", log: str = "") -> bool:
+        """记录任务结束（只有当前持有者可以提交，返回是否成功）"""
+        conn = self._get_connection()
+        count = conn.execute('''
+            UPDATE shared_jobs
+            SET status = ?, return_code = ?, results = ?, log = ?, finished_at = ?, lease_until = NULL
+            WHERE id = ? AND owner = ? AND status = 'claimed'
+        ''', (status, return_code, results, log, time.time(), job_id, owner)).rowcount
+        conn.close()
+        return count > 0
+    
+    def release(self, job_id: int, owner: str) -> bool:
+        """放回队列（实例退出时归还未完成的任务）"""
+        conn = self._get_connection()
+        count = conn.execute('''
+            UPDATE shared_jobs SET status = 'pending', owner = NULL, lease_until = NULL
+            WHERE id = ? AND owner = ? AND status = 'claimed'
+        ''', (job_id, owner)).rowcount
+        conn.close()
+        return count > 0
+    
+    def cancel(self, job_id: int) -> bool:
+        """取消排队中的任务（执行中的任务由持有者取消）"""
+        conn = self._get_connection()
+        count = conn.execute('''
+            UPDATE shared_jobs SET status = 'cancelled', finished_at = ?
+            WHERE id = ? AND status = 'pending'
+        ''', (time.time(), job_id)).rowcount
+        conn.close()
+        return count > 0
+    
+    # ==================== 查询 ====================
+    
+    def list_jobs(self, limit: int = 200) -> List[Dict[str, Any]]:
+        """任务列表（不含任务内容和结果，按 ID 倒序）"""
+        conn = self._get_connection()
+        rows = conn.execute('''
+            SELECT id, target, scan_mode, priority, status, submitted_by, owner, lease_until, attempts,
+                   return_code, created_at, claimed_at, finished_at, results IS NOT NULL AND results != '' AS has_results
+            FROM shared_jobs ORDER BY id DESC LIMIT ?
+        ''', (limit,)).fetchall()
+        conn.close()
+        return [dict(row) for row in rows]
+    
+    def get_job(self, job_id: int) -> Optional[Dict[str, Any]]:
+        """获取任务（含结果和日志）"""
+        conn = self._get_connection()
+        row = conn.execute('SELECT * FROM shared_jobs WHERE id = ?', (job_id,)).fetchone()
+        conn.close()
+        return dict(row) if row else None
+    
+    def stats(self) -> Dict[str, int]:
+        """各状态的任务数 {status: 数量}"""
+        conn = self._get_connection()
+        rows = conn.execute('SELECT status, COUNT(*) FROM shared_jobs GROUP BY status').fetchall()
+        conn.close()
+        return {row[0]: row[1] for row in rows}
+    
+    def remove_finished(self) -> int:
+        """删除已结束的任务，返回删除数量"""
+        conn = self._get_connection()
+        count = conn.execute(
+            "DELETE FROM shared_jobs WHERE status IN ('completed', 'failed', 'cancelled')"
+        ).rowcount
+        conn.close()
+        return count
+
+
+class SharedQueueAgent(QObject):
+    """
+    共享队列领取器
+    
+    本地调度器有空闲名额且没有本地排队任务时，从共享队列领取任务提交给调度器；
+    定期为执行中的任务续约，任务结束后把状态和结果写回共享队列
+    """
+    
+    message = pyqtSignal(str)      # 领取、续约失败等消息
+    changed = pyqtSignal()         # 共享队列内容可能已变化
+    
+    def __init__(self, scheduler, queue: SharedJobQueue, lease_seconds: float = DEFAULT_LEASE_SECONDS,
+                 poll_seconds: float = 5, owner: str = "", parent=None):
+        """
+        初始化领取器
+        
+        参数:
+            scheduler: 本地 JobScheduler
+            queue: SharedJobQueue
+            lease_seconds: 租约时长
+            poll_seconds: 检查是否有可领取任务的间隔
+            owner: 实例标识（默认 instance_id()）
+        """
+        super().__init__(parent)
+        self.scheduler = scheduler
+        self.queue = queue
+        self.lease_seconds = max(10.0, lease_seconds)
+        self.owner = owner or instance_id()
+        self._claimed: Dict[int, int] = {}  # {本地任务 ID: 共享任务 ID}
+        self._job_dirs: Dict[int, str] = {}  # {本地任务 ID: 任务文件临时目录}
+        self._poll_timer = QTimer(self)
+        self._poll_timer.timeout.connect(self.poll)
+        self._poll_interval = max(1, int(poll_seconds * 1000))
+        self._renew_timer = QTimer(self)
+        self._renew_timer.timeout.connect(self._renew)
+    
+    @property
+    def active(self) -> bool:
+        return self._poll_timer.isActive()
+    
+    def start(self):
+        """开始领取任务"""
+        self.scheduler.job_finished.connect(self._on_job_finished)
+        self._poll_timer.start(self._poll_interval)
+        self._renew_timer.start(int(self.lease_seconds * 1000 / 3))
+        self.poll()
+    
+    def stop(self):
+        """停止领取，归还尚未结束的任务（本地对应任务被取消）"""
+        if not self.active:
+            return
+        self._poll_timer.stop()
+        self._renew_timer.stop()
+        self.scheduler.job_finished.disconnect(self._on_job_finished)
+        for local_id, shared_id in list(self._claimed.items()):
+            try:
+                self.queue.release(shared_id, self.owner)
+            except sqlite3.Error:
+                pass
+            self.scheduler.cancel(local_id)
+        self._claimed.clear()
+        for job_dir in self._job_dirs.values():
+            shutil.rmtree(job_dir, ignore_errors=True)
+        self._job_dirs.clear()
+        self.changed.emit()
+    
+    def publish(self, builder: CommandBuilder, priority: int = 0, scan_mode: str = "") -> int:
+        """
+        发布任务到共享队列并立即尝试领取
+        
+        异常:
+            OSError: 请求包等文件无法读取
+            sqlite3.Error: 共享数据库无法写入
+        """
+        shared_id = self.queue.publish(pack_job(builder.snapshot()), builder.get_target_label(), scan_mode,
+                                       priority, self.owner)
+        self.changed.emit()
+        QTimer.singleShot(0, self.poll)
+        return shared_id
+    
+    def shared_id(self, job_id: int) -> Optional[int]:
+        """本地任务对应的共享任务 ID"""
+        return self._claimed.get(job_id)
+    
+    # ==================== 内部方法 ====================
+    
+    def poll(self):
+        """本地有空闲名额时领取任务"""
+        queue = self.scheduler.queue
+        if not self.scheduler.sqlmap_path or queue.pending_jobs():
+            return
+        free = queue.capacity - queue.running_count()
+        if free <= 0:
+            return
+        try:
+            jobs = self.queue.claim(self.owner, self.lease_seconds, free)
+        except sqlite3.Error as e:
+            self.message.emit(f"领取任务失败: {e}")
+            return
+        for shared in jobs:
+            job_dir = tempfile.mkdtemp(prefix=f"sqlmap_gui_shared_{shared['id']}_")
+            try:
+                options = unpack_job(shared['payload'], job_dir, f"python \"{self.scheduler.sqlmap_path}\"")
+                builder = CommandBuilder.from_snapshot(options)
+                builder.build()
+            except (OSError, ValueError) as e:
+                shutil.rmtree(job_dir, ignore_errors=True)
+                self.queue.finish(shared['id'], self.owner, 'failed', -1, log=f"[共享队列] 任务无法执行: {e}\n")
+                continue
+            scan_mode = f"共享队列 #{shared['id']}" + (f" {shared['scan_mode']}" if shared['scan_mode'] else "")
+            job = self.scheduler.submit(builder, priority=shared['priority'], scan_mode=scan_mode)
+            self._claimed[job.job_id] = shared['id']
+            self._job_dirs[job.job_id] = job_dir
+            self.scheduler.append_log(job.job_id, f"[共享队列] 领取任务 #{shared['id']}（发布者 {shared['submitted_by']}，"
+                                                  f"第 {shared['attempts']} 次执行）")
+        if jobs:
+            self.message.emit(f"从共享队列领取 {len(jobs)} 个任务")
+            self.changed.emit()
+    
+    def _renew(self):
+        """为持有的任务续约；租约已被他人接管时停止本地任务"""
+        if not self._claimed:
+            return
+        try:
+            held = set(self.queue.renew(self.owner, list(self._claimed.values()), self.lease_seconds))
+        except sqlite3.Error as e:
+            self.message.emit(f"续约失败: {e}")
+            return
+        for local_id, shared_id in list(self._claimed.items()):
+            if shared_id not in held:
+                del self._claimed[local_id]
+                shutil.rmtree(self._job_dirs.pop(local_id, ""), ignore_errors=True)
+                self.scheduler.append_log(local_id, f"[共享队列] 任务 #{shared_id} 的租约已失效（已被其他实例接管），停止本地执行")
+                self.scheduler.cancel(local_id)
+    
+    def _on_job_finished(self, job_id: int, return_code: int):
+        """本地任务结束：写回状态和结果"""
+        shared_id = self._claimed.pop(job_id, None)
+        if shared_id is None:
+            return
+        shutil.rmtree(self._job_dirs.pop(job_id, ""), ignore_errors=True)
+        job = self.scheduler.get_job(job_id)
+        status = {
+            JobStatus.COMPLETED: 'completed',
+            JobStatus.CANCELLED: 'cancelled',
+        }.get(job.status if job else None, 'failed')
+        try:
+            self.queue.finish(shared_id, self.owner, status, return_code,
+                              encode_results(job.store) if job else "",
+                              log_tail(job.log) if job else "")
+        except sqlite3.Error as e:
+            self.message.emit(f"写回任务 #{shared_id} 结果失败: {e}")
+        self.changed.emit()
+        QTimer.singleShot(0, self.poll)
@@ -6,8 +6,11 @@ SQLMap 执行引擎
 import subprocess
 import os
 import re
+import signal
 from PyQt6.QtCore import QThread, pyqtSignal
 
+from .result_store import ResultStore
+
 
 class SqlmapEngine(QThread):
     """SQLMap 命令执行引擎"""
@@ -15,11 +18,12 @@ class SqlmapEngine(QThread):
     # 信号定义
     output_received = pyqtSignal(str)      # 接收到输出
     progress_updated = pyqtSignal(int)     # 进度更新
-    result_found = pyqtSignal(dict)        # 发现结果
+    result_found = pyqtSignal(int)         # 结果有更新（结果存储版本号）
     scan_finished = pyqtSignal(int)        # 扫描完成（返回码）
     status_changed = pyqtSignal(str)       # 状态变化
     
-    def __init__(self, command: str, sqlmap_path: str = None, parent=None):
+    def __init__(self, command: str, sqlmap_path: str = None, parent=None,
+                 store: ResultStore = None, prepare=None):
         """
         初始化执行引擎
         
@@ -27,25 +31,24 @@ class SqlmapEngine(QThread):
             command: 完整的 sqlmap 命令
             sqlmap_path: sqlmap.py 的路径
             parent: 父对象，确保线程不会被意外销毁
+            store: 结果存储，引擎解析输出后写入其中（默认新建）
+            prepare: 启动进程前在线程中调用的准备函数 prepare(engine)，返回新的命令或 None
         """
         super().__init__(parent)
         self.command = command
         self.sqlmap_path = sqlmap_path
+        self.prepare = prepare
         self.process = None
         self.running = False
+        self.paused = False
+        self._stop_requested = False  # 线程启动前就可能被停止（任务排队后立即取消）
+        
+        # 扫描结果由结果存储持有，引擎只在写入上下文中修改
+        self.store = store if store is not None else ResultStore()
+        self.results = None
         
-        # 扫描结果
-        self.results = {
-            'injection_found': False,      # 是否发现注入
-            'injection_type': [],          # 注入类型
-            'dbms': '',                    # 数据库类型
-            'current_db': '',              # 当前数据库
-            'current_user': '',            # 当前用户
-            'databases': [],               # 数据库列表
-            'tables': {},                  # 表列表 {db: [tables]}
-            'columns': {},                 # 列列表 {(db, table): [columns]}
-            'data': {},                    # 数据内容
-        }
+        # --dump-format=SQLITE 模式下数据直接写入 SQLite 文件，跳过表格文本解析
+        self.sqlite_dump_mode = bool(re.search(r'--dump-format=["\']?SQLITE', command, re.IGNORECASE))
         
         # 进度追踪
         self.progress = 0
@@ -56,8 +59,12 @@ class SqlmapEngine(QThread):
         """执行 sqlmap 命令"""
         return_code = -1
         try:
-            self.running = True
+            self.running = not self._stop_requested
             self.status_changed.emit("正在启动...")
+            if self.prepare and not self._stop_requested:
+                command = self.prepare(self)
+                if command:
+                    self.command = command
             self.output_received.emit(f"[命令] {self.command}\n")
             self.output_received.emit("-" * 60 + "\n")
             
@@ -79,6 +86,10 @@ class SqlmapEngine(QThread):
                 bufsize=1
             )
             
+            # 进程创建期间收到停止请求
+            if self._stop_requested:
+                self.stop()
+            
             self.status_changed.emit("扫描进行中...")
             
             # 读取输出
@@ -104,7 +115,7 @@ class SqlmapEngine(QThread):
             
             # 获取返回码
             return_code = self.process.returncode if self.process else -1
-            
+        
         except Exception as e:
             self.output_received.emit(f"[错误] 执行失败: {str(e)}\n")
             return_code = -1
@@ -114,7 +125,7 @@ class SqlmapEngine(QThread):
             try:
                 # 保存未保存的数据
                 self._save_data_buffer()
-                self.result_found.emit(self.results)
+                self.result_found.emit(self.store.version)
                 self.scan_finished.emit(return_code)
                 
                 if return_code == 0:
@@ -128,7 +139,11 @@ class SqlmapEngine(QThread):
     
     def stop(self):
         """停止执行"""
+        self._stop_requested = True
         self.running = False
+        # 被暂停的进程收不到终止信号，先恢复
+        if self.paused:
+            self.resume()
         if self.process and self.process.poll() is None:
             try:
                 # Windows 上需要使用 taskkill 递归终止进程树
@@ -142,8 +157,9 @@ class SqlmapEngine(QThread):
                     )
                     self.output_received.emit("[信息] 扫描进程已终止\n")
                 else:
-                    # Linux/Mac 使用标准终止信号
-                    self.process.terminate()
+                    # Linux/Mac 向进程树发送终止信号（shell=True 时 sqlmap 可能是 shell 的子进程）
+                    if not self._signal_tree(signal.SIGTERM):
+                        self.process.terminate()
                     self.process.wait(timeout=5)
             except subprocess.TimeoutExpired:
                 # 强制终止
@@ -157,6 +173,49 @@ class SqlmapEngine(QThread):
         
         self.status_changed.emit("已停止")
     
+    def pause(self) -> bool:
+        """
+        暂停 sqlmap 进程（SIGSTOP，仅 Linux/Mac）
+        
+        shell=True 时 sqlmap 可能是 shell 的子进程，子进程一起暂停
+        """
+        if os.name == 'nt' or self.paused or not self.process or self.process.poll() is not None:
+            return False
+        if self._signal_tree(signal.SIGSTOP):
+            self.paused = True
+            self.status_changed.emit("已暂停")
+        return self.paused
+    
+    def resume(self) -> bool:
+        """恢复被暂停的 sqlmap 进程"""
+        if not self.paused:
+            return False
+        self.paused = False
+        self._signal_tree(signal.SIGCONT)
+        self.status_changed.emit("扫描进行中...")
+        return True
+    
+    def _signal_tree(self, sig) -> bool:
+        """向进程及其子进程发送信号"""
+        pids = [self.process.pid]
+        index = 0
+        while index < len(pids):
+            pid = pids[index]
+            index += 1
+            try:
+                with open(f"/proc/{pid}/task/{pid}/children") as f:
+                    pids.extend(int(child) for child in f.read().split())
+            except (OSError, ValueError):
+                pass
+        sent = False
+        for pid in pids:
+            try:
+                os.kill(pid, sig)
+                sent = True
+            except OSError:
+                pass
+        return sent
+    
     def send_input(self, text: str):
         """发送输入到进程"""
         if self.process and self.process.poll() is None:
@@ -172,15 +231,29 @@ class SqlmapEngine(QThread):
         self._in_data_grid = False
         if hasattr(self, '_data_buffer') and self._data_buffer:
             table_name = getattr(self, '_current_dump_table', 'data')
-            row_count = len(self._data_buffer)
-            # 使用替换而不是累加，避免重复数据
-            self.results['data'][table_name] = self._data_buffer.copy()
-            # 输出调试信息
-            self.output_received.emit(f"[数据] 表 '{table_name}' 提取了 {row_count} 条记录\n")
+            rows = self._data_buffer
             self._data_buffer = []
+            # 使用替换而不是累加，避免重复数据；缓冲区直接交给结果存储，不再复制
+            version = self.store.set_table_rows(table_name, rows)
+            # 输出调试信息
+            self.output_received.emit(f"[数据] 表 '{table_name}' 提取了 {len(rows)} 条记录\n")
+            self.result_found.emit(version)
     
     def _parse_output(self, line: str):
-        """解析 sqlmap 输出"""
+        """解析 sqlmap 输出（在结果存储的写入上下文中进行）"""
+        with self.store.write() as results:
+            # 结果存储可能被清空重建，每次写入时重新绑定
+            self.results = results
+            had_injection = results['injection_found']
+            self._parse_line(line)
+            injection_found = not had_injection and results['injection_found']
+        
+        # 首次发现注入时立即通知界面，其余更新在表数据完成或扫描结束时通知
+        if injection_found:
+            self.result_found.emit(self.store.version)
+    
+    def _parse_line(self, line: str):
+        """解析单行 sqlmap 输出"""
         line = line.strip()
         if not line:
             return
@@ -195,17 +268,27 @@ class SqlmapEngine(QThread):
             self.results['injection_found'] = True
             self.output_received.emit("[发现] 检测到 SQL 注入漏洞！\n")
         
+        # 提取注入参数 "Parameter: id (GET)"
+        match = re.match(r"Parameter:\s*(?:#\d+\*\s*)?(\S+)\s*\(", line)
+        if match and match.group(1) not in self.results['injection_params']:
+            self.results['injection_params'].append(match.group(1))
+        
         # 提取注入类型
         if "Type:" in line:
             match = re.search(r"Type:\s*(.+)", line)
             if match:
                 injection_type = match.group(1).strip()
+                self._last_injection_type = injection_type
                 if injection_type not in self.results['injection_type']:
                     self.results['injection_type'].append(injection_type)
         
+        # 提取注入载荷（对应上一行的注入类型）
+        if line.startswith("Payload:") and getattr(self, '_last_injection_type', ''):
+            self.results['payloads'].setdefault(self._last_injection_type, line[len("Payload:"):].strip())
+        
         # 提取数据库类型
-        if "back-end DBMS" in line.lower():
-            match = re.search(r"back-end DBMS[:\s]+(.+)", line, re.IGNORECASE)
+        if "back-end dbms" in line.lower():
+            match = re.search(r"back-end DBMS(?::\s*|\s+is\s+)(.+)", line, re.IGNORECASE)
             if match:
                 self.results['dbms'] = match.group(1).strip().strip("'")
         
@@ -224,12 +307,22 @@ class SqlmapEngine(QThread):
                     if db not in self.results['databases']:
                         self.results['databases'].append(db)
         
-        # 提取当前用户
-        if "current user" in line.lower():
+        # 提取当前用户是否为 DBA "current user is DBA: True"
+        match = re.search(r"current user is DBA:\s*(True|False)", line, re.IGNORECASE)
+        if match:
+            self.results['is_dba'] = match.group(1).lower() == "true"
+        
+        # 提取当前用户（"checking if the current user is DBA" 不是用户名）
+        elif "current user" in line.lower() and "is dba" not in line.lower():
             match = re.search(r"current user[:\s]+['\"]?([^'\"]+)['\"]?", line, re.IGNORECASE)
             if match:
                 self.results['current_user'] = match.group(1).strip()
         
+        # 提取 banner "banner: '5.7.33-0ubuntu0.16.04.1'"
+        match = re.match(r"banner:\s*'(.+)'$", line)
+        if match:
+            self.results['banner'] = match.group(1).strip()
+        
         # 提取数据库列表 - 使用更严格的匹配
         # 检测 "fetching database names" 开始解析
         if "fetching database names" in line.lower():
@@ -268,7 +361,7 @@ class SqlmapEngine(QThread):
                 db = line[3:].strip().strip("'\"")
                 # 更严格的数据库名过滤（不过滤 information_schema 等系统库）
                 invalid_patterns = [
-                    'NULL', 'None', '', 'Database', 'available', 'fetching', 
+                    'NULL', 'None', 'Database', 'available', 'fetching', 
                     'the back-end', 'web server', 'web application', 'target',
                     'starting', 'testing', 'heuristic',
                     'enumerate', 'entries', 'table(s)', 'tables'
@@ -340,6 +433,20 @@ class SqlmapEngine(QThread):
                     if db_name not in self.results['tables']:
                         self.results['tables'][db_name] = []
         
+        # 表行数统计 (--count) - 格式: "| Table | Entries |" 表头后跟 "| users | 1000 |"
+        if re.match(r'^\|\s*Table\s*\|\s*Entries\s*\|', line, re.IGNORECASE):
+            self._parsing_counts = True
+            self._parsing_tables = False
+        elif getattr(self, '_parsing_counts', False):
+            if line.startswith("|"):
+                parts = [p.strip() for p in line.split("|") if p.strip()]
+                if len(parts) == 2 and parts[1].isdigit():
+                    db = getattr(self, '_current_parsing_db', None) or self.results.get('current_db', '')
+                    table_key = f"{db}.{parts[0]}" if db else parts[0]
+                    self.results['counts'][table_key] = int(parts[1])
+            elif not line.startswith("+"):
+                self._parsing_counts = False
+        
         # 检测表格边界 (表名以表格形式输出)
         if line.startswith("+") and "-" in line:
             # 这是表格的分隔线
@@ -442,7 +549,7 @@ class SqlmapEngine(QThread):
             db_match = re.search(r"Database:\s*(\S+)", line)
             if db_match:
                 self._current_dump_db = db_match.group(1).strip().strip("'\"")
-                
+        
         # 检测数据提取开始 - 格式: "dumping entries for table" 或 "[X entries]" 或 "Table:"
         if "dumping entries" in line.lower() or "fetching entries" in line.lower():
             # 先保存之前的缓冲区
@@ -527,8 +634,18 @@ class SqlmapEngine(QThread):
                 
                 self._current_dump_table = table_name
         
-        # 解析提取的数据行 (表格格式)
-        if hasattr(self, '_parsing_data') and self._parsing_data:
+        # SQLite 导出完成 - 格式: "table 'db.table' dumped to SQLITE database '/path/db.sqlite3'"
+        sqlite_match = re.search(r"table\s+'([^']+)'\s+dumped to SQLITE database\s+'([^']+)'", line, re.IGNORECASE)
+        if sqlite_match:
+            table_key = sqlite_match.group(1).strip()
+            db_path = sqlite_match.group(2).strip()
+            if not self.store.attach_sqlite_dump(table_key, db_path):
+                self.results['sqlite_dumps'][table_key] = db_path
+            self.output_received.emit(f"[数据] 表 '{table_key}' 已写入 SQLite 文件\n")
+            self.result_found.emit(self.store.version)
+        
+        # 解析提取的数据行 (表格格式)，SQLite 模式下数据从文件读取，无需缓存文本
+        if hasattr(self, '_parsing_data') and self._parsing_data and not self.sqlite_dump_mode:
             # 检测表格边界线
             if line.startswith("+-"):
                 if not hasattr(self, '_in_data_grid'):
@@ -0,0 +1,155 @@
+"""
+历史学习的注入技术排序
+从历史检测记录中按数据库类型统计各注入技术发现注入的情况和耗时，
+推荐期望“首次发现注入耗时”最短的 --technique 组合和顺序；每次完整检测的结果回写记录
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from .fingerprint_cache import dbms_name, techniques_from_types
+
+
+ALL_TECHNIQUES = "BEUSTQ"
+
+# 没有成功记录时单项技术的检测耗时估计（秒），大致反映各技术载荷数量和等待时间
+DEFAULT_TECHNIQUE_SECONDS = {"B": 40.0, "E": 15.0, "U": 60.0, "S": 30.0, "T": 120.0, "Q": 20.0}
+
+MIN_SAMPLES = 3         # 某数据库类型发现注入的记录少于该值时改用全部类型的记录
+TARGET_COVERAGE = 0.95  # 选取技术直到覆盖该比例的历史注入
+
+
+@dataclass
+class TechniqueStat:
+    """单项技术的统计"""
+    code: str
+    attempts: int = 0       # 测试过该技术的检测次数
+    successes: int = 0      # 该技术可用的次数
+    detection_seconds: float = 0.0  # 该技术可用时发现注入的总耗时
+    
+    @property
+    def mean_seconds(self) -> float:
+        """可用时发现注入的平均耗时，无成功记录时使用默认估计"""
+        if self.successes:
+            return max(1.0, self.detection_seconds / self.successes)
+        return DEFAULT_TECHNIQUE_SECONDS.get(self.code, 60.0)
+
+
+@dataclass
+class LearnedTechnique:
+    """推荐结果"""
+    technique: str                 # 按推荐顺序排列的技术代码
+    dbms: str = ""                 # 使用的记录来源（空字符串表示全部数据库类型）
+    samples: int = 0               # 记录中发现注入的检测次数
+    detections: int = 0            # 记录中的检测总次数
+    expected_seconds: float = 0.0  # 期望首次发现注入耗时
+    coverage: float = 0.0          # 推荐组合能发现的历史注入比例
+    stats: List[TechniqueStat] = field(default_factory=list)
+    
+    def describe(self) -> str:
+        source = self.dbms or "全部数据库类型"
+        return (f"{self.technique}（{source}，{self.samples}/{self.detections} 次发现注入，"
+                f"预计 {self.expected_seconds:.0f} 秒内发现，覆盖 {self.coverage:.0%}）")
+    
+    def details(self) -> str:
+        lines = [f"推荐 --technique={self.technique}", self.describe()]
+        for stat in self.stats:
+            mark = "✓" if stat.code in self.technique else "  "
+            lines.append(f"{mark} {stat.code}: 测试 {stat.attempts} 次，可用 {stat.successes} 次，"
+                         f"平均 {stat.mean_seconds:.0f} 秒")
+        return "\n".join(lines)
+
+
+def technique_stats(outcomes: List[Dict]) -> Dict[str, TechniqueStat]:
+    """按技术汇总检测记录"""
+    stats = {code: TechniqueStat(code) for code in ALL_TECHNIQUES}
+    for outcome in outcomes:
+        found = outcome.get('found') or ""
+        for code in outcome.get('tried') or "":
+            if code in stats:
+                stats[code].attempts += 1
+        for code in found:
+            if code in stats:
+                stats[code].successes += 1
+                stats[code].detection_seconds += outcome.get('detection_seconds') or 0.0
+    return stats
+
+
+def expected_detection_seconds(order: str, stats: Dict[str, TechniqueStat], found_sets: List[str]) -> float:
+    """
+    按 order 依次测试时，历史注入的平均首次发现耗时
+    
+    每条记录累加测试到第一个可用技术为止的各技术耗时，全部不可用的记录计入整组耗时
+    """
+    if not found_sets:
+        return 0.0
+    total = 0.0
+    for found in found_sets:
+        for code in order:
+            total += stats[code].mean_seconds
+            if code in found:
+                break
+    return total / len(found_sets)
+
+
+def learn_technique_order(outcomes: List[Dict], dbms: str = "", allowed: str = ALL_TECHNIQUES,
+                          coverage: float = TARGET_COVERAGE) -> Optional[LearnedTechnique]:
+    """
+    按历史检测记录推荐技术组合和顺序
+    
+    贪心地选取 “新覆盖的历史注入数 / 平均耗时” 最大的技术（最小总和集合覆盖的贪心近似，
+    使期望首次发现耗时最小），直到覆盖 coverage 比例的历史注入或不能再覆盖更多
+    
+    参数:
+        outcomes: HistoryManager.get_technique_outcomes() 的结果
+        dbms: 记录来源的数据库类型（仅用于显示）
+        allowed: 可选的技术范围
+    返回:
+        LearnedTechnique；发现注入的记录不足时返回 None
+    """
+    found_sets = [outcome['found'] for outcome in outcomes if outcome.get('found')]
+    if len(found_sets) < MIN_SAMPLES:
+        return None
+    stats = technique_stats(outcomes)
+    
+    order = ""
+    uncovered = list(found_sets)
+    candidates = [code for code in ALL_TECHNIQUES if code in allowed and stats[code].successes]
+    while candidates and uncovered and 1 - len(uncovered) / len(found_sets) < coverage:
+        best = max(candidates, key=lambda code: sum(code in found for found in uncovered) / stats[code].mean_seconds)
+        if not any(best in found for found in uncovered):
+            break
+        order += best
+        candidates.remove(best)
+        uncovered = [found for found in uncovered if best not in found]
+    if not order:
+        return None
+    
+    return LearnedTechnique(
+        technique=order, dbms=dbms, samples=len(found_sets), detections=len(outcomes),
+        expected_seconds=expected_detection_seconds(order, stats, found_sets),
+        coverage=1 - len(uncovered) / len(found_sets),
+        stats=[stats[code] for code in ALL_TECHNIQUES if code in allowed]
+    )
+
+
+def suggest_technique(history, dbms_hint: str = "", allowed: str = ALL_TECHNIQUES) -> Optional[LearnedTechnique]:
+    """按数据库类型提示推荐（该类型记录不足时使用全部类型的记录）"""
+    dbms = dbms_name(dbms_hint)
+    if dbms:
+        learned = learn_technique_order(history.get_technique_outcomes(dbms), dbms, allowed)
+        if learned:
+            return learned
+    return learn_technique_order(history.get_technique_outcomes(), "", allowed)
+
+
+def detection_outcome(options: Dict, results: Dict) -> Tuple[str, str, str]:
+    """
+    从任务选项和结果得到 (数据库类型, 测试的技术, 可用的技术)
+    
+    未发现注入时数据库类型取 --dbms 提示
+    """
+    tried = "".join(code for code in (options.get('_technique') or ALL_TECHNIQUES) if code in ALL_TECHNIQUES)
+    found = techniques_from_types(results.get('injection_type') or []) if results.get('injection_found') else ""
+    dbms = dbms_name(results.get('dbms', '')) or dbms_name(options.get('_dbms', ''))
+    return dbms, tried, found
@@ -0,0 +1,225 @@
+"""
+远程执行节点
+无界面运行在其他机器上，连接到界面的执行节点服务端（WorkerServer），
+用本机的 sqlmap 执行分配来的任务，实时回传输出和结果增量；断开后自动重连
+"""
+
+import os
+import shutil
+import socket
+import sys
+import tempfile
+import time
+from functools import partial
+from typing import Dict
+
+from PyQt6.QtCore import QObject, Qt, QTimer, pyqtSignal
+from PyQt6.QtNetwork import QAbstractSocket, QTcpSocket
+
+from .command_builder import CommandBuilder
+from .result_store import ResultStore
+from .sqlmap_engine import SqlmapEngine
+from .worker_protocol import (
+    HEARTBEAT_INTERVAL, HEARTBEAT_TIMEOUT, PROTOCOL_VERSION,
+    MessageReader, ProtocolError, ResultDelta, encode_message, unpack_job,
+)
+
+
+# 断开后重连间隔（秒）
+RECONNECT_INTERVAL = 5
+
+# 结果增量的发送间隔（毫秒）
+RESULT_FLUSH_MS = 1000
+
+
+class WorkerAgent(QObject):
+    """远程执行节点（运行在 QCoreApplication 的主线程，每个任务一个 SqlmapEngine 线程）"""
+    
+    message = pyqtSignal(str)   # 运行状态消息
+    refused = pyqtSignal(str)   # 界面端拒绝连接（令牌错误、协议版本不一致），不再重连
+    
+    def __init__(self, host: str, port: int, sqlmap_path: str, name: str = "",
+                 capacity: int = 2, token: str = "", work_dir: str = "", parent=None):
+        """
+        初始化执行节点
+        
+        参数:
+            host / port: 界面端执行节点服务的地址
+            sqlmap_path: 本机 sqlmap.py 的路径
+            name: 节点名称（默认为主机名）
+            capacity: 同时执行的任务数
+            token: 连接令牌（与界面端设置一致）
+            work_dir: 任务文件和 sqlmap 输出目录（默认在系统临时目录中创建）
+        """
+        super().__init__(parent)
+        self.host = host
+        self.port = port
+        self.sqlmap_path = sqlmap_path
+        self.name = name or socket.gethostname()
+        self.capacity = max(1, capacity)
+        self.token = token
+        self.work_dir = work_dir or tempfile.mkdtemp(prefix="sqlmap-worker-")
+        self._engines: Dict[int, SqlmapEngine] = {}
+        self._deltas: Dict[int, ResultDelta] = {}
+        self._dirty = set()   # 结果有更新、尚未发送增量的任务
+        self._reader = MessageReader()
+        self._last_seen = 0.0
+        self._stopping = False
+        self._reconnect_pending = False
+        
+        self._socket = QTcpSocket(self)
+        self._socket.connected.connect(self._on_connected)
+        self._socket.disconnected.connect(self._on_disconnected)
+        self._socket.readyRead.connect(self._on_ready_read)
+        self._socket.errorOccurred.connect(self._on_error)
+        
+        self._flush_timer = QTimer(self)
+        self._flush_timer.timeout.connect(self._flush_results)
+        self._flush_timer.start(RESULT_FLUSH_MS)
+        self._heartbeat = QTimer(self)
+        self._heartbeat.timeout.connect(self._check_heartbeat)
+    
+    # ==================== 连接 ====================
+    
+    def start(self):
+        """连接到界面端"""
+        self._stopping = False
+        self._reconnect_pending = False
+        self.message.emit(f"正在连接 {self.host}:{self.port} ...")
+        self._reader = MessageReader()
+        self._socket.connectToHost(self.host, self.port)
+    
+    def stop(self):
+        """停止所有任务并断开连接"""
+        self._stopping = True
+        self._heartbeat.stop()
+        self._stop_jobs()
+        self._socket.disconnectFromHost()
+    
+    def _send(self, msg_type: str, **fields):
+        if self._socket.state() == QAbstractSocket.SocketState.ConnectedState:
+            self._socket.write(encode_message(msg_type, **fields))
+    
+    def _on_connected(self):
+        self._last_seen = time.time()
+        self._heartbeat.start(HEARTBEAT_INTERVAL * 1000)
+        self._send("hello", name=self.name, capacity=self.capacity, token=self.token, version=PROTOCOL_VERSION)
+    
+    def _on_disconnected(self):
+        """断开后停止本机任务（界面端会把它们重新排队），然后重连"""
+        self._heartbeat.stop()
+        if self._engines:
+            self.message.emit(f"与界面端的连接已断开，停止 {len(self._engines)} 个运行中的任务")
+            self._stop_jobs()
+        self._schedule_reconnect()
+    
+    def _on_error(self, error):
+        if self._socket.state() == QAbstractSocket.SocketState.UnconnectedState:
+            self.message.emit(f"连接失败: {self._socket.errorString()}")
+            self._schedule_reconnect()
+    
+    def _schedule_reconnect(self):
+        """稍后重连（连接错误和断开可能先后触发，只安排一次）"""
+        if self._stopping or self._reconnect_pending:
+            return
+        self._reconnect_pending = True
+        self.message.emit(f"{RECONNECT_INTERVAL} 秒后重连")
+        QTimer.singleShot(RECONNECT_INTERVAL * 1000, self.start)
+    
+    def _check_heartbeat(self):
+        if time.time() - self._last_seen > HEARTBEAT_TIMEOUT:
+            self.message.emit("界面端心跳超时")
+            self._socket.abort()
+            if self._socket.state() == QAbstractSocket.SocketState.UnconnectedState:
+                self._on_disconnected()
+        else:
+            self._send("ping")
+    
+    def _on_ready_read(self):
+        try:
+            messages = self._reader.feed(bytes(self._socket.readAll()))
+        except ProtocolError as e:
+            self.message.emit(f"协议错误: {e}")
+            self._socket.abort()
+            return
+        self._last_seen = time.time()
+        for message in messages:
+            self._handle(message)
+    
+    def _handle(self, message: Dict):
+        """处理界面端消息"""
+        msg_type = message['type']
+        if msg_type == "welcome":
+            self.message.emit(f"已注册为执行节点 {message.get('name', self.name)}，并发 {self.capacity}")
+        elif msg_type == "error":
+            self._stopping = True
+            self.message.emit(f"界面端拒绝连接: {message.get('message', '')}")
+            self.refused.emit(message.get('message', ''))
+        elif msg_type == "ping":
+            self._send("pong")
+        elif msg_type == "run":
+            self._run(message)
+        elif msg_type == "cancel":
+            engine = self._engines.get(message.get('job_id'))
+            if engine:
+                engine.stop()
+    
+    # ==================== 任务执行 ====================
+    
+    def _run(self, message: Dict):
+        """执行分配来的任务"""
+        job_id = message.get('job_id')
+        if len(self._engines) >= self.capacity or job_id in self._engines:
+            self._send("rejected", job_id=job_id, message="节点没有空闲名额")
+            return
+        try:
+            job_dir = os.path.join(self.work_dir, f"job-{job_id}-{int(time.time())}")
+            options = unpack_job(message, job_dir, f"\"{sys.executable}\" \"{self.sqlmap_path}\"",
+                                 os.path.join(self.work_dir, "output"))
+            command = CommandBuilder.from_snapshot(options).build()
+        except (OSError, ValueError) as e:
+            self._send("rejected", job_id=job_id, message=str(e))
+            return
+        
+        store = ResultStore()
+        engine = SqlmapEngine(command, self.sqlmap_path, parent=self, store=store)
+        engine.output_received.connect(partial(self._send_output, job_id), Qt.ConnectionType.QueuedConnection)
+        engine.result_found.connect(partial(self._mark_dirty, job_id), Qt.ConnectionType.QueuedConnection)
+        engine.scan_finished.connect(partial(self._on_finished, job_id, job_dir), Qt.ConnectionType.QueuedConnection)
+        engine.finished.connect(engine.deleteLater)
+        self._engines[job_id] = engine
+        self._deltas[job_id] = ResultDelta(store)
+        engine.start()
+        self._send("started", job_id=job_id)
+        self.message.emit(f"任务 #{job_id} 开始: {CommandBuilder.from_snapshot(options).get_target_label()}")
+    
+    def _send_output(self, job_id: int, text: str):
+        self._send("output", job_id=job_id, text=text)
+    
+    def _mark_dirty(self, job_id: int, version: int):
+        self._dirty.add(job_id)
+    
+    def _flush_results(self):
+        """发送有更新的任务的结果增量"""
+        for job_id in list(self._dirty):
+            delta = self._deltas.get(job_id)
+            changes = delta.collect() if delta else None
+            if changes:
+                self._send("result", job_id=job_id, delta=changes)
+        self._dirty.clear()
+    
+    def _on_finished(self, job_id: int, job_dir: str, return_code: int):
+        """任务结束：发送最后的增量（含 SQLite 表数据）和返回码，清理任务文件"""
+        self._engines.pop(job_id, None)
+        self._dirty.discard(job_id)
+        delta = self._deltas.pop(job_id, None)
+        changes = delta.collect(final=True) if delta else None
+        if changes:
+            self._send("result", job_id=job_id, delta=changes)
+        self._send("finished", job_id=job_id, return_code=return_code)
+        shutil.rmtree(job_dir, ignore_errors=True)
+        self.message.emit(f"任务 #{job_id} 结束，返回码 {return_code}")
+    
+    def _stop_jobs(self):
+        for engine in list(self._engines.values()):
+            engine.stop()
@@ -0,0 +1,177 @@
+"""
+远程执行节点通信协议
+界面（调度器）与远程执行节点之间通过 TCP 交换按行分隔的 JSON 消息：
+    
+    节点 → 界面: hello {name, capacity, token, version}
+    界面 → 节点: welcome {} / error {message}
+    界面 → 节点: run {job_id, options, files} / cancel {job_id}
+    节点 → 界面: started {job_id} / output {job_id, text} / result {job_id, delta}
+                 finished {job_id, return_code} / rejected {job_id, message}
+    双向:        ping {} / pong {}
+
+任务以 CommandBuilder 选项快照下发，请求包等本地文件随任务一起发送，
+节点使用自己的 sqlmap 路径重建命令；结果以增量方式回传
+"""
+
+import base64
+import json
+import os
+from typing import Dict, List, Optional
+
+from .result_store import ResultStore
+
+
+PROTOCOL_VERSION = 1
+
+DEFAULT_PORT = 8765
+
+# 心跳间隔和超时（秒）：超时未收到任何消息视为连接已断开
+HEARTBEAT_INTERVAL = 10
+HEARTBEAT_TIMEOUT = 30
+
+# 随任务发送的本地文件选项
+FILE_OPTIONS = ('_request_file', '_file', '_proxy_file', '_file_write')
+
+# 单个随任务发送的文件上限（字节）
+MAX_FILE_BYTES = 20 * 1024 * 1024
+
+# 单条消息上限（字节），超过时视为协议错误
+MAX_MESSAGE_BYTES = 64 * 1024 * 1024
+
+
+class ProtocolError(Exception):
+    """协议错误（消息格式无效或超过长度上限）"""
+
+
+def encode_message(msg_type: str, **fields) -> bytes:
+    """编码一条消息"""
+    fields['type'] = msg_type
+    return json.dumps(fields, ensure_ascii=False).encode('utf-8') + b'\n'
+
+
+class MessageReader:
+    """按行拆分收到的数据（TCP 数据可能在任意位置被截断）"""
+    
+    def __init__(self):
+        self._buffer = b""
+    
+    def feed(self, data: bytes) -> List[Dict]:
+        """追加收到的数据，返回已完整接收的消息"""
+        self._buffer += data
+        messages = []
+        while b'\n' in self._buffer:
+            line, self._buffer = self._buffer.split(b'\n', 1)
+            if not line.strip():
+                continue
+            try:
+                message = json.loads(line.decode('utf-8'))
+            except (UnicodeDecodeError, ValueError):
+                raise ProtocolError("无效的消息")
+            if not isinstance(message, dict) or 'type' not in message:
+                raise ProtocolError("缺少消息类型")
+            messages.append(message)
+        if len(self._buffer) > MAX_MESSAGE_BYTES:
+            raise ProtocolError("消息超过长度上限")
+        return messages
+
+
+# ==================== 任务下发 ====================
+
+def pack_job(options: Dict) -> Dict:
+    """
+    打包任务：选项快照和其中引用的本地文件内容
+    
+    sqlmap 路径和输出目录由节点决定，不下发
+    
+    异常:
+        OSError: 文件无法读取或超过 MAX_FILE_BYTES
+    """
+    options = {key: value for key, value in options.items() if key not in ('sqlmap_path', '_output_dir')}
+    files = {}
+    for key in FILE_OPTIONS:
+        path = options.get(key)
+        if not path:
+            continue
+        if os.path.getsize(path) > MAX_FILE_BYTES:
+            raise OSError(f"文件过大，无法发送到执行节点: {path}")
+        with open(path, 'rb') as f:
+            files[key] = {
+                'name': os.path.basename(path),
+                'data': base64.b64encode(f.read()).decode('ascii'),
+            }
+    return {'options': options, 'files': files}
+
+
+def unpack_job(payload: Dict, directory: str, sqlmap_path: str, output_dir: str = "") -> Dict:
+    """
+    还原任务选项：文件写入 directory，路径替换为本地路径
+    
+    参数:
+        payload: pack_job() 的结果
+        directory: 任务的临时目录
+        sqlmap_path: 本节点的 sqlmap 命令前缀
+        output_dir: 本节点的 sqlmap 输出目录（空表示使用 sqlmap 默认位置）
+    """
+    options = dict(payload.get('options', {}))
+    os.makedirs(directory, exist_ok=True)
+    for key, entry in payload.get('files', {}).items():
+        if key not in FILE_OPTIONS:
+            continue
+        name = os.path.basename(entry.get('name', '')) or key.strip('_')
+        path = os.path.join(directory, name)
+        with open(path, 'wb') as f:
+            f.write(base64.b64decode(entry.get('data', '')))
+        options[key] = path
+    options['sqlmap_path'] = sqlmap_path
+    options['_output_dir'] = output_dir
+    return options
+
+
+# ==================== 结果增量 ====================
+
+class ResultDelta:
+    """
+    结果增量（节点端）
+    
+    记录已发送的内容，每次只发送变化的结构化结果字段和数据表新增的行；
+    数据表行被整体替换时从头发送。最后一次收集时把 SQLite 表转为文本行，
+    界面端无法访问节点上的文件
+    """
+    
+    def __init__(self, store: ResultStore):
+        self.store = store
+        self._sent_fields: Dict[str, str] = {}  # {字段: 已发送内容的 JSON}
+        self._sent_rows: Dict[str, tuple] = {}  # {table_key: (已发送行数, 首行)}
+    
+    def collect(self, final: bool = False) -> Optional[Dict]:
+        """收集自上次以来的变化（没有变化返回 None）"""
+        state = self.store.export_state()
+        results = state['results']
+        data = results.pop('data')
+        
+        fields = {}
+        for key, value in results.items():
+            encoded = json.dumps(value, ensure_ascii=False, sort_keys=True)
+            if self._sent_fields.get(key) != encoded:
+                self._sent_fields[key] = encoded
+                fields[key] = value
+        
+        if final:
+            for key in state['sqlite_tables']:
+                headers = self.store.get_headers(key)
+                rows = [" | ".join(row) for row in self.store.iter_rows(key)]
+                data[key] = ([" | ".join(headers)] if headers else []) + rows
+        
+        tables = {}
+        for key, rows in data.items():
+            sent, first = self._sent_rows.get(key, (0, None))
+            if sent and (len(rows) < sent or rows[0] != first):
+                sent = 0
+            if len(rows) == sent and key in self._sent_rows:
+                continue
+            tables[key] = {'offset': sent, 'rows': rows[sent:]}
+            self._sent_rows[key] = (len(rows), rows[0] if rows else None)
+        
+        if not fields and not tables:
+            return None
+        return {'results': fields, 'data': tables}
@@ -0,0 +1,264 @@
+"""
+远程执行节点服务端
+在界面进程中监听执行节点（worker.py）的连接，把任务分配给有空闲名额的节点，
+并将节点回传的输出、结果增量和结束状态转发给调度器；节点断开时报告其上丢失的任务
+"""
+
+import hmac
+import time
+from functools import partial
+from typing import Dict, List, Optional
+
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+from PyQt6.QtNetwork import QHostAddress, QTcpServer, QTcpSocket
+
+from .worker_protocol import (
+    HEARTBEAT_INTERVAL, HEARTBEAT_TIMEOUT, PROTOCOL_VERSION,
+    MessageReader, ProtocolError, encode_message,
+)
+
+
+class RemoteWorker:
+    """已连接的执行节点"""
+    
+    def __init__(self, socket: QTcpSocket):
+        self.socket = socket
+        self.reader = MessageReader()
+        self.address = f"{socket.peerAddress().toString()}:{socket.peerPort()}"
+        self.name = ""
+        self.capacity = 0
+        self.registered = False
+        self.jobs = set()             # 正在该节点上运行的任务 ID
+        self.completed = 0            # 已完成的任务数
+        self.connected_at = time.time()
+        self.last_seen = time.time()  # 最后一次收到消息的时间
+    
+    @property
+    def free_slots(self) -> int:
+        return max(0, self.capacity - len(self.jobs)) if self.registered else 0
+    
+    def send(self, msg_type: str, **fields):
+        self.socket.write(encode_message(msg_type, **fields))
+
+
+class WorkerServer(QObject):
+    """执行节点服务端（运行在主线程）"""
+    
+    # 信号定义
+    job_output = pyqtSignal(int, str)        # 任务输出 (job_id, 文本)
+    job_result = pyqtSignal(int, dict)       # 结果增量 (job_id, delta)
+    job_finished = pyqtSignal(int, int)      # 任务结束 (job_id, 返回码)
+    job_rejected = pyqtSignal(int, str)      # 节点拒绝执行 (job_id, 原因)
+    jobs_lost = pyqtSignal(str, list)        # 节点断开 (节点名, [运行中的 job_id])
+    workers_changed = pyqtSignal()           # 节点上线、下线或名额变化
+    message = pyqtSignal(str)                # 连接状态消息
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.token = ""
+        self.host = ""
+        self._server = QTcpServer(self)
+        self._server.newConnection.connect(self._on_new_connection)
+        self._workers: List[RemoteWorker] = []
+        self._job_workers: Dict[int, RemoteWorker] = {}  # {job_id: 执行该任务的节点}
+        self._heartbeat = QTimer(self)
+        self._heartbeat.timeout.connect(self._check_heartbeat)
+    
+    # ==================== 监听 ====================
+    
+    def start(self, port: int, token: str = "", host: str = "127.0.0.1") -> bool:
+        """
+        开始监听（已在监听时先停止）
+        
+        任务内容（包括 Cookie、请求头和请求文件）以明文发送给节点，
+        因此只在本机回环地址上监听时允许不设置令牌
+        """
+        self.stop()
+        address = QHostAddress(host)
+        if not token and not address.isLoopback():
+            self.message.emit(f"监听 {host} 需要设置连接令牌，未设置令牌时只能接受本机的执行节点")
+            return False
+        self.token = token
+        self.host = host
+        if not self._server.listen(address, port):
+            self.message.emit(f"无法监听端口 {port}: {self._server.errorString()}")
+            return False
+        self._heartbeat.start(HEARTBEAT_INTERVAL * 1000)
+        self.message.emit(f"正在监听 {host}:{self._server.serverPort()}，等待执行节点连接")
+        return True
+    
+    def stop(self):
+        """停止监听并断开所有节点（节点上的任务通过 jobs_lost 报告）"""
+        self._heartbeat.stop()
+        if self._server.isListening():
+            self._server.close()
+        for worker in list(self._workers):
+            self._drop(worker, "服务端已停止")
+    
+    @property
+    def is_listening(self) -> bool:
+        return self._server.isListening()
+    
+    @property
+    def port(self) -> int:
+        return self._server.serverPort() if self._server.isListening() else 0
+    
+    # ==================== 任务分配 ====================
+    
+    def capacity(self) -> int:
+        """已注册节点的总名额"""
+        return sum(worker.capacity for worker in self._workers if worker.registered)
+    
+    def free_slots(self) -> int:
+        """已注册节点的空闲名额"""
+        return sum(worker.free_slots for worker in self._workers)
+    
+    def dispatch(self, job_id: int, payload: Dict) -> Optional[str]:
+        """
+        把任务发送给空闲名额最多的节点
+        
+        参数:
+            job_id: 任务 ID
+            payload: worker_protocol.pack_job() 的结果
+        
+        返回:
+            节点名称，没有空闲节点时返回 None
+        """
+        candidates = [worker for worker in self._workers if worker.free_slots > 0]
+        if not candidates:
+            return None
+        worker = max(candidates, key=lambda w: (w.free_slots, -len(w.jobs)))
+        worker.jobs.add(job_id)
+        self._job_workers[job_id] = worker
+        worker.send("run", job_id=job_id, **payload)
+        return worker.name
+    
+    def cancel(self, job_id: int) -> bool:
+        """请求节点停止任务（节点随后回传 finished）"""
+        worker = self._job_workers.get(job_id)
+        if worker is None:
+            return False
+        worker.send("cancel", job_id=job_id)
+        return True
+    
+    def worker_of(self, job_id: int) -> str:
+        """执行任务的节点名称（不在节点上运行时返回空字符串）"""
+        worker = self._job_workers.get(job_id)
+        return worker.name if worker else ""
+    
+    def worker_stats(self) -> List[Dict]:
+        """已注册节点的状态"""
+        return [{
+            'name': worker.name,
+            'address': worker.address,
+            'capacity': worker.capacity,
+            'running': len(worker.jobs),
+            'completed': worker.completed,
+            'connected_at': worker.connected_at,
+        } for worker in self._workers if worker.registered]
+    
+    # ==================== 连接处理 ====================
+    
+    def _on_new_connection(self):
+        while self._server.hasPendingConnections():
+            socket = self._server.nextPendingConnection()
+            worker = RemoteWorker(socket)
+            self._workers.append(worker)
+            socket.readyRead.connect(partial(self._on_ready_read, worker))
+            socket.disconnected.connect(partial(self._drop, worker, "连接已断开"))
+    
+    def _on_ready_read(self, worker: RemoteWorker):
+        try:
+            messages = worker.reader.feed(bytes(worker.socket.readAll()))
+        except ProtocolError as e:
+            self._drop(worker, str(e))
+            return
+        worker.last_seen = time.time()
+        for message in messages:
+            if worker not in self._workers:
+                return
+            self._handle(worker, message)
+    
+    def _handle(self, worker: RemoteWorker, message: Dict):
+        """处理节点消息"""
+        msg_type = message['type']
+        if not worker.registered:
+            if msg_type == "hello":
+                self._register(worker, message)
+            else:
+                self._drop(worker, "未注册的节点")
+            return
+        
+        job_id = message.get('job_id')
+        if msg_type == "ping":
+            worker.send("pong")
+        elif msg_type == "output" and job_id in worker.jobs:
+            self.job_output.emit(job_id, message.get('text', ''))
+        elif msg_type == "result" and job_id in worker.jobs:
+            self.job_result.emit(job_id, message.get('delta') or {})
+        elif msg_type == "finished" and job_id in worker.jobs:
+            self._release(worker, job_id)
+            worker.completed += 1
+            self.job_finished.emit(job_id, int(message.get('return_code', -1)))
+            self.workers_changed.emit()
+        elif msg_type == "rejected" and job_id in worker.jobs:
+            self._release(worker, job_id)
+            self.job_rejected.emit(job_id, str(message.get('message', '')))
+    
+    def _register(self, worker: RemoteWorker, message: Dict):
+        """校验令牌和协议版本，注册节点"""
+        if self.token and not hmac.compare_digest(str(message.get('token', '')), self.token):
+            worker.send("error", message="令牌错误")
+            self._drop(worker, "令牌错误")
+            return
+        if message.get('version') != PROTOCOL_VERSION:
+            worker.send("error", message=f"协议版本不一致（服务端 {PROTOCOL_VERSION}）")
+            self._drop(worker, "协议版本不一致")
+            return
+        
+        name = str(message.get('name') or worker.address)
+        names = {w.name for w in self._workers if w.registered}
+        base, index = name, 2
+        while name in names:
+            name = f"{base}#{index}"
+            index += 1
+        worker.name = name
+        worker.capacity = max(1, int(message.get('capacity', 1)))
+        worker.registered = True
+        worker.send("welcome", name=name)
+        self.message.emit(f"{name} ({worker.address}) 已连接，并发 {worker.capacity}")
+        self.workers_changed.emit()
+    
+    def _release(self, worker: RemoteWorker, job_id: int):
+        worker.jobs.discard(job_id)
+        self._job_workers.pop(job_id, None)
+    
+    def _drop(self, worker: RemoteWorker, reason: str):
+        """移除节点，报告其上丢失的任务"""
+        if worker not in self._workers:
+            return
+        self._workers.remove(worker)
+        lost = sorted(worker.jobs)
+        for job_id in lost:
+            self._job_workers.pop(job_id, None)
+        worker.jobs.clear()
+        worker.socket.disconnected.disconnect()
+        worker.socket.flush()
+        worker.socket.abort()
+        worker.socket.deleteLater()
+        
+        if worker.registered:
+            detail = f"，{len(lost)} 个运行中的任务将重新排队" if lost else ""
+            self.message.emit(f"{worker.name} 已断开（{reason}）{detail}")
+            if lost:
+                self.jobs_lost.emit(worker.name, lost)
+            self.workers_changed.emit()
+    
+    def _check_heartbeat(self):
+        """向节点发送心跳，移除超时未响应的节点"""
+        now = time.time()
+        for worker in list(self._workers):
+            if now - worker.last_seen > HEARTBEAT_TIMEOUT:
+                self._drop(worker, "心跳超时")
+            elif worker.registered:
+                worker.send("ping")
@@ -0,0 +1,556 @@
+"""
+扫描工作流
+按有向无环图定义相互依赖的扫描任务：节点在依赖全部完成、且条件（基于已解析的结果）
+满足时执行，互不依赖的节点并发执行；依赖失败、被跳过或条件不满足的分支整体跳过。
+运行状态持久化到历史数据库，程序重启后可继续未完成的工作流
+
+工作流定义（JSON，放在程序目录的 workflows/ 下，每个文件一个工作流）:
+    {
+        "name": "标准流程",
+        "description": "检测 → 信息收集 → 提取用户表",
+        "max_concurrent": 3,
+        "nodes": [
+            {"id": "detect", "label": "注入检测"},
+            {"id": "dba", "needs": ["detect"], "when": ["injectable"], "actions": ["is_dba"]},
+            {"id": "tables", "needs": ["detect"], "when": ["injectable"], "actions": ["tables"]},
+            {"id": "dump", "needs": ["tables", "dba"], "when": ["is_dba"],
+             "dump": {"tables": "*user*,*admin*", "db": "!test*"}}
+        ]
+    }
+
+节点字段:
+    id / label: 节点标识和显示名称
+    needs: 依赖的节点
+    when: 条件列表（全部满足才执行），格式为 "[!]字段 [运算符 值]"，
+          运算符: == 相等、!= 不等、~ 包含、!~ 不包含（不区分大小写，列表字段任一元素满足即可）
+    actions: 执行动作（见 NODE_ACTIONS），可配合 db / table 指定枚举对象
+    dump: 按已枚举的表逐表提取，{"tables": 表筛选, "db": 库筛选, "columns": 列, "exclude_system": true}
+    level / risk / technique: 覆盖检测设置
+"""
+
+import copy
+import json
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from .command_builder import CommandBuilder
+from .enum_pipeline import SYSTEM_DATABASES, match_patterns, merge_results
+from .job_queue import JobStatus
+from .result_store import ResultStore
+
+
+WORKFLOW_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'workflows')
+
+# 节点动作 -> (CommandBuilder 方法, 显示名称)
+NODE_ACTIONS = {
+    'current_db': ('get_current_db', "当前数据库"),
+    'current_user': ('get_current_user', "当前用户"),
+    'banner': ('get_banner', "Banner"),
+    'hostname': ('get_hostname', "主机名"),
+    'is_dba': ('get_is_dba', "DBA 权限"),
+    'users': ('get_users', "用户列表"),
+    'privileges': ('get_privileges', "用户权限"),
+    'roles': ('get_roles', "用户角色"),
+    'passwords': ('enum_passwords', "密码哈希"),
+    'dbs': ('enum_dbs', "数据库列表"),
+    'tables': ('enum_tables', "表"),
+    'columns': ('enum_columns', "列"),
+    'schema': ('enum_schema', "架构"),
+    'count': ('enum_count', "表行数"),
+}
+
+# 可用于条件的字段（injectable 为 injection_found 的别名，tables 为 "库.表" 列表）
+CONDITION_FIELDS = (
+    'injectable', 'injection_type', 'injection_params', 'dbms', 'current_db',
+    'current_user', 'banner', 'is_dba', 'databases', 'tables',
+)
+
+# 节点状态
+NODE_PENDING = "pending"
+NODE_RUNNING = "running"
+NODE_COMPLETED = "completed"
+NODE_FAILED = "failed"
+NODE_SKIPPED = "skipped"
+
+NODE_STATUS_LABELS = {
+    NODE_PENDING: "等待",
+    NODE_RUNNING: "执行中",
+    NODE_COMPLETED: "完成",
+    NODE_FAILED: "失败",
+    NODE_SKIPPED: "跳过",
+}
+
+_CONDITION_RE = re.compile(r"^\s*(!)?\s*([a-z_]+)\s*(?:(==|!=|!~|~)\s*(.*?))?\s*$")
+
+
+class WorkflowError(ValueError):
+    """工作流定义无效"""
+
+
+@dataclass
+class WorkflowNode:
+    """工作流节点"""
+    id: str
+    label: str = ""
+    needs: List[str] = field(default_factory=list)
+    when: List[str] = field(default_factory=list)
+    actions: List[str] = field(default_factory=list)
+    db: str = ""
+    table: str = ""
+    dump: Optional[Dict[str, Any]] = None
+    overrides: Dict[str, Any] = field(default_factory=dict)  # level / risk / technique
+
+
+@dataclass
+class Workflow:
+    """工作流（节点按依赖排序）"""
+    name: str
+    nodes: List[WorkflowNode]
+    description: str = ""
+    max_concurrent: int = 2
+    definition: Dict[str, Any] = field(default_factory=dict)  # 原始定义（持久化用）
+    
+    def node(self, node_id: str) -> Optional[WorkflowNode]:
+        return next((node for node in self.nodes if node.id == node_id), None)
+
+
+# ==================== 定义解析 ====================
+
+def _check_condition(expr: str):
+    match = _CONDITION_RE.match(expr or "")
+    if not match or match.group(2) not in CONDITION_FIELDS:
+        raise WorkflowError(f"无效的条件: {expr}（可用字段: {', '.join(CONDITION_FIELDS)}）")
+    if match.group(1) and match.group(3):
+        raise WorkflowError(f"无效的条件: {expr}（! 只能用于不带运算符的条件）")
+
+
+def parse_workflow(data: Dict[str, Any]) -> Workflow:
+    """
+    解析并校验工作流定义
+    
+    异常:
+        WorkflowError: 缺少节点、节点 ID 重复、依赖不存在或成环、动作或条件无效
+    """
+    if not isinstance(data, dict) or not data.get('nodes'):
+        raise WorkflowError("工作流没有定义节点")
+    
+    nodes = {}
+    for item in data['nodes']:
+        node_id = str(item.get('id') or "").strip() if isinstance(item, dict) else ""
+        if not node_id:
+            raise WorkflowError("节点缺少 id")
+        if node_id in nodes:
+            raise WorkflowError(f"节点 ID 重复: {node_id}")
+        actions = list(item.get('actions') or [])
+        for action in actions:
+            if action not in NODE_ACTIONS:
+                raise WorkflowError(f"节点 {node_id} 的动作无效: {action}（可用: {', '.join(NODE_ACTIONS)}）")
+        when = list(item.get('when') or [])
+        for expr in when:
+            _check_condition(expr)
+        dump = item.get('dump')
+        if dump is not None and not isinstance(dump, dict):
+            raise WorkflowError(f"节点 {node_id} 的 dump 必须是对象")
+        nodes[node_id] = WorkflowNode(
+            id=node_id,
+            label=str(item.get('label') or node_id),
+            needs=[str(need) for need in item.get('needs') or []],
+            when=when,
+            actions=actions,
+            db=str(item.get('db') or ""),
+            table=str(item.get('table') or ""),
+            dump=dict(dump) if dump is not None else None,
+            overrides={key: item[key] for key in ('level', 'risk', 'technique') if item.get(key)},
+        )
+    
+    for node in nodes.values():
+        for need in node.needs:
+            if need not in nodes:
+                raise WorkflowError(f"节点 {node.id} 依赖的节点不存在: {need}")
+    
+    # 按依赖排序（Kahn 算法，同层保持定义顺序），有剩余节点说明存在环
+    ordered = []
+    remaining = list(nodes.values())
+    while remaining:
+        done = {node.id for node in ordered}
+        ready = [node for node in remaining if all(need in done for need in node.needs)]
+        if not ready:
+            raise WorkflowError(f"节点依赖成环: {', '.join(node.id for node in remaining)}")
+        ordered.extend(ready)
+        remaining = [node for node in remaining if node not in ready]
+    
+    return Workflow(
+        name=str(data.get('name') or "未命名工作流"),
+        description=str(data.get('description') or ""),
+        max_concurrent=max(1, int(data.get('max_concurrent') or 2)),
+        nodes=ordered,
+        definition=copy.deepcopy(data),
+    )
+
+
+BUILTIN_WORKFLOWS = [
+    {
+        "name": "检测 → 信息收集 → 提取敏感表",
+        "description": "确认注入后并发获取 Banner、当前用户和 DBA 权限并枚举表，再逐表提取用户/管理员相关表",
+        "max_concurrent": 3,
+        "nodes": [
+            {"id": "detect", "label": "注入检测"},
+            {"id": "banner", "label": "Banner", "needs": ["detect"], "when": ["injectable"],
+             "actions": ["banner"]},
+            {"id": "user", "label": "当前用户", "needs": ["detect"], "when": ["injectable"],
+             "actions": ["current_user", "current_db"]},
+            {"id": "dba", "label": "DBA 权限", "needs": ["detect"], "when": ["injectable"],
+             "actions": ["is_dba"]},
+            {"id": "tables", "label": "枚举表", "needs": ["detect"], "when": ["injectable"],
+             "actions": ["tables"]},
+            {"id": "dump", "label": "提取敏感表", "needs": ["tables"], "when": ["injectable"],
+             "dump": {"tables": "*user*,*admin*,*account*,*member*", "exclude_system": True}},
+        ],
+    },
+    {
+        "name": "检测 → DBA 时枚举用户和密码",
+        "description": "确认注入后检查 DBA 权限，只有当前用户是 DBA 时才枚举数据库用户、权限和密码哈希",
+        "max_concurrent": 2,
+        "nodes": [
+            {"id": "detect", "label": "注入检测"},
+            {"id": "dba", "label": "DBA 权限", "needs": ["detect"], "when": ["injectable"],
+             "actions": ["is_dba", "current_user"]},
+            {"id": "users", "label": "用户和权限", "needs": ["dba"], "when": ["is_dba"],
+             "actions": ["users", "privileges"]},
+            {"id": "passwords", "label": "密码哈希", "needs": ["dba"], "when": ["is_dba"],
+             "actions": ["passwords"]},
+        ],
+    },
+]
+
+
+def load_workflows(directory: str = WORKFLOW_DIR) -> Tuple[List[Workflow], List[str]]:
+    """
+    加载内置工作流和目录中的 *.json 工作流
+    
+    返回:
+        (工作流列表, 无效文件的错误信息列表)
+    """
+    workflows = [parse_workflow(data) for data in BUILTIN_WORKFLOWS]
+    errors = []
+    if os.path.isdir(directory):
+        for name in sorted(os.listdir(directory)):
+            if not name.lower().endswith('.json'):
+                continue
+            path = os.path.join(directory, name)
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    workflows.append(parse_workflow(json.load(f)))
+            except (OSError, ValueError) as e:
+                errors.append(f"{name}: {e}")
+    return workflows, errors
+
+
+# ==================== 条件 ====================
+
+def condition_values(summary: Dict[str, Any]) -> Dict[str, Any]:
+    """从结果摘要生成条件字段的值"""
+    return {
+        'injectable': bool(summary.get('injection_found')),
+        'injection_type': list(summary.get('injection_type', [])),
+        'injection_params': list(summary.get('injection_params', [])),
+        'dbms': summary.get('dbms', ''),
+        'current_db': summary.get('current_db', ''),
+        'current_user': summary.get('current_user', ''),
+        'banner': summary.get('banner', ''),
+        'is_dba': bool(summary.get('is_dba')),
+        'databases': list(summary.get('databases', [])),
+        'tables': [f"{db}.{table}" for db, tables in summary.get('tables', {}).items() for table in tables],
+    }
+
+
+def evaluate_condition(expr: str, summary: Dict[str, Any]) -> bool:
+    """按结果摘要计算条件（见模块说明）"""
+    _check_condition(expr)
+    negate, name, op, expected = _CONDITION_RE.match(expr).groups()
+    value = condition_values(summary)[name]
+    if not op:
+        return not value if negate else bool(value)
+    
+    items = value if isinstance(value, list) else [value]
+    items = [str(item).lower() for item in items]
+    expected = expected.strip().strip("'\"").lower()
+    if op == "==":
+        return expected in items
+    if op == "!=":
+        return expected not in items
+    if op == "~":
+        return any(expected in item for item in items)
+    return not any(expected in item for item in items)
+
+
+# ==================== 执行 ====================
+
+class WorkflowRunner(QObject):
+    """
+    工作流执行器（任务组协调器）
+    
+    第一个提交的任务完成注入检测，之后的任务不清空会话、复用检测结果；
+    各任务的结果汇总到第一个任务的结果中，条件按汇总后的结果计算。
+    每次节点状态变化时保存运行状态，整组只占用一个单主机并发名额
+    """
+    
+    message = pyqtSignal(str)     # 进度消息
+    finished = pyqtSignal(str)    # 全部结束 (group_id)
+    
+    def __init__(self, scheduler, builder: CommandBuilder, workflow: Workflow,
+                 priority: int = 0, parent=None):
+        """
+        初始化工作流执行器
+        
+        参数:
+            scheduler: JobScheduler（有 history 时持久化运行状态）
+            builder: 已配置好的命令构建器（提供目标、检测和性能设置，执行动作会被清除）
+            workflow: 工作流
+            priority: 任务优先级
+        """
+        super().__init__(parent)
+        self.scheduler = scheduler
+        self.workflow = workflow
+        self.priority = priority
+        self._root_options = CommandBuilder.from_snapshot(builder.snapshot()).clear_actions().snapshot()
+        # 第一个任务之后复用会话
+        self._base_options = (CommandBuilder.from_snapshot(self._root_options)
+                              .set_flush_session(False)
+                              .snapshot())
+        
+        self.group_id = ""
+        self.run_id = None
+        self.root_job_id = None
+        self.node_status: Dict[str, str] = {node.id: NODE_PENDING for node in workflow.nodes}
+        self.node_notes: Dict[str, str] = {}          # {node_id: 跳过或失败的原因}
+        self.node_jobs: Dict[int, str] = {}           # {job_id: node_id}
+        self._history_ids: Dict[int, int] = {}        # {job_id: 扫描记录ID}
+        self.results = ResultStore()                  # 汇总的结构（计算条件用，不含数据行）
+        self._restored = False                        # 是否从中断的运行恢复
+        self._suspended = False
+    
+    @classmethod
+    def resume(cls, scheduler, record: Dict[str, Any], sqlmap_path: str = None,
+               priority: int = 0, parent=None) -> 'WorkflowRunner':
+        """
+        从中断的运行记录恢复（已完成和已跳过的节点保留，执行中的节点重新执行）
+        
+        异常:
+            WorkflowError: 工作流定义无效
+        """
+        options = dict(record['options'])
+        if sqlmap_path:
+            options['sqlmap_path'] = sqlmap_path
+        runner = cls(scheduler, CommandBuilder.from_snapshot(options), parse_workflow(record['definition']),
+                     priority, parent)
+        # 注入检测已在原会话中完成，恢复后的所有任务都复用会话
+        runner._root_options = runner._base_options
+        runner.run_id = record['id']
+        state = record.get('state') or {}
+        for node_id, status in state.get('nodes', {}).items():
+            if node_id in runner.node_status and status in (NODE_COMPLETED, NODE_SKIPPED, NODE_FAILED):
+                runner.node_status[node_id] = status
+        runner.node_notes = {key: value for key, value in state.get('notes', {}).items()
+                             if runner.node_status.get(key) != NODE_PENDING}
+        runner.results.load_state({'results': state.get('results', {})})
+        runner._restored = True
+        return runner
+    
+    @property
+    def history_ids(self) -> List[int]:
+        """工作流各任务的扫描记录ID"""
+        return list(self._history_ids.values())
+    
+    def start(self) -> str:
+        """提交可以执行的节点，返回任务组 ID"""
+        self.group_id = self.scheduler.create_group("workflow", self.workflow.max_concurrent, share_host_slot=True)
+        self.scheduler.job_started.connect(self._on_job_started)
+        self.scheduler.job_finished.connect(self._on_job_finished)
+        verb = "继续" if self._restored else "启动"
+        self.message.emit(f"工作流「{self.workflow.name}」已{verb}")
+        self._advance()
+        return self.group_id
+    
+    @property
+    def is_active(self) -> bool:
+        """是否还有等待或执行中的节点"""
+        return any(status in (NODE_PENDING, NODE_RUNNING) for status in self.node_status.values())
+    
+    def suspend(self):
+        """停止跟踪任务并保留运行状态（程序退出前调用，之后的任务结束不再推进工作流）"""
+        if not self.is_active or not self.group_id or self._suspended:
+            return
+        self._suspended = True
+        self.scheduler.job_started.disconnect(self._on_job_started)
+        self.scheduler.job_finished.disconnect(self._on_job_finished)
+        self._save()
+    
+    # ==================== 内部方法 ====================
+    
+    def _log(self, text: str):
+        """记录到第一个任务的日志并发出消息"""
+        if self.root_job_id is not None:
+            self.scheduler.append_log(self.root_job_id, f"[工作流] {text}\n")
+        self.message.emit(text)
+    
+    def _advance(self):
+        """按依赖顺序跳过或提交节点，没有等待和执行中的节点时结束"""
+        summary = self.results.get_summary()
+        for node in self.workflow.nodes:
+            if self.node_status[node.id] != NODE_PENDING:
+                continue
+            needs = [self.node_status[need] for need in node.needs]
+            blocked = [need for need in node.needs if self.node_status[need] in (NODE_FAILED, NODE_SKIPPED)]
+            if blocked:
+                self._skip(node, f"依赖 {', '.join(blocked)} 未完成")
+                continue
+            if any(status != NODE_COMPLETED for status in needs):
+                continue
+            unmet = next((expr for expr in node.when if not evaluate_condition(expr, summary)), None)
+            if unmet:
+                self._skip(node, f"条件「{unmet}」不满足")
+                continue
+            self._start_node(node, summary)
+        
+        self._save()
+        if not self.is_active:
+            self._finish()
+    
+    def _skip(self, node: WorkflowNode, reason: str):
+        self.node_status[node.id] = NODE_SKIPPED
+        self.node_notes[node.id] = reason
+        self._log(f"跳过「{node.label}」：{reason}")
+    
+    def _new_builder(self, node: WorkflowNode) -> CommandBuilder:
+        options = self._base_options if self.root_job_id is not None else self._root_options
+        builder = CommandBuilder.from_snapshot(options)
+        if 'level' in node.overrides:
+            builder.set_level(int(node.overrides['level']))
+        if 'risk' in node.overrides:
+            builder.set_risk(int(node.overrides['risk']))
+        if 'technique' in node.overrides:
+            builder.set_technique(str(node.overrides['technique']))
+        return builder
+    
+    def _start_node(self, node: WorkflowNode, summary: Dict[str, Any]):
+        """提交节点的任务（dump 节点每张匹配的表一个任务）"""
+        builders = []
+        if node.dump is not None:
+            exclude_system = node.dump.get('exclude_system', True)
+            for db, tables in summary.get('tables', {}).items():
+                if exclude_system and db.lower() in SYSTEM_DATABASES:
+                    continue
+                if not match_patterns(db, node.dump.get('db', "")):
+                    continue
+                for table in tables:
+                    if match_patterns(table, node.dump.get('tables', "")):
+                        builders.append(self._new_builder(node).dump_data(
+                            True, db=db, table=table, columns=node.dump.get('columns', "")))
+            if not builders:
+                self._skip(node, "没有匹配筛选的表")
+                return
+        else:
+            builder = self._new_builder(node)
+            for action in node.actions:
+                method = getattr(builder, NODE_ACTIONS[action][0])
+                if action == 'tables':
+                    method(True, db=node.db)
+                elif action == 'columns':
+                    method(True, db=node.db, table=node.table)
+                else:
+                    method(True)
+            builders.append(builder)
+        
+        self.node_status[node.id] = NODE_RUNNING
+        for builder in builders:
+            job = self.scheduler.submit(builder, priority=self.priority,
+                                        scan_mode=f"工作流-{node.label}", group_id=self.group_id)
+            self.node_jobs[job.job_id] = node.id
+            if job.history_id:
+                # 有空闲名额时任务在 submit() 中就已开始
+                self._history_ids[job.job_id] = job.history_id
+            if self.root_job_id is None:
+                self.root_job_id = job.job_id
+                if self._restored:
+                    # 恢复时把已汇总的结构载入新的第一个任务，便于查看
+                    merge_results(job.store, self.results, include_data=False)
+        suffix = f"（{len(builders)} 个任务）" if len(builders) > 1 else ""
+        self._log(f"开始「{node.label}」{suffix}")
+    
+    def _on_job_started(self, job_id: int):
+        """记录任务的扫描记录ID（恢复时据此排除工作流的任务）"""
+        job = self.scheduler.get_job(job_id)
+        if job_id in self.node_jobs and job and job.history_id:
+            self._history_ids[job_id] = job.history_id
+            self._save()
+    
+    def _on_job_finished(self, job_id: int, return_code: int):
+        """节点任务结束：汇总结果，节点的任务全部结束后推进工作流"""
+        node_id = self.node_jobs.get(job_id)
+        if node_id is None:
+            return
+        job = self.scheduler.get_job(job_id)
+        node = self.workflow.node(node_id)
+        if job is None or job.status != JobStatus.COMPLETED:
+            self.node_notes[node_id] = f"任务 #{job_id} {job.status_label if job else '已移除'}"
+            self._log(f"「{node.label}」任务 #{job_id} {job.status_label if job else '已移除'}")
+        else:
+            merge_results(self.results, job.store, include_data=False)
+            if job_id != self.root_job_id:
+                root = self.scheduler.get_job(self.root_job_id)
+                if root is not None:
+                    merge_results(root.store, job.store)
+                    self.scheduler.notify_result(self.root_job_id)
+        
+        jobs = [self.scheduler.get_job(jid) for jid, nid in self.node_jobs.items() if nid == node_id]
+        if not all(j is None or j.is_finished for j in jobs):
+            return
+        # dump 节点有任一表提取成功即视为完成
+        if any(j is not None and j.status == JobStatus.COMPLETED for j in jobs):
+            self.node_status[node_id] = NODE_COMPLETED
+            self._log(f"「{node.label}」完成")
+        else:
+            self.node_status[node_id] = NODE_FAILED
+            self._log(f"「{node.label}」失败，依赖它的节点将被跳过")
+        self._advance()
+    
+    def _finish(self):
+        self.scheduler.job_started.disconnect(self._on_job_started)
+        self.scheduler.job_finished.disconnect(self._on_job_finished)
+        counts = {status: 0 for status in NODE_STATUS_LABELS}
+        for status in self.node_status.values():
+            counts[status] += 1
+        self._save(status='completed')
+        self._log(f"工作流「{self.workflow.name}」结束：{counts[NODE_COMPLETED]} 个节点完成，"
+                  f"{counts[NODE_SKIPPED]} 个跳过，{counts[NODE_FAILED]} 个失败")
+        self.finished.emit(self.group_id)
+    
+    def _state(self) -> Dict[str, Any]:
+        state = self.results.export_state()
+        return {
+            'nodes': dict(self.node_status),
+            'notes': dict(self.node_notes),
+            'history_ids': self.history_ids,
+            'results': state['results'],
+        }
+    
+    def _save(self, status: str = 'running'):
+        """保存运行状态（调度器没有历史记录时不保存）"""
+        history = self.scheduler.history
+        if not history:
+            return
+        try:
+            if self.run_id is None:
+                self.run_id = history.save_workflow_run(
+                    None, self._state(), name=self.workflow.name,
+                    target=CommandBuilder.from_snapshot(self._root_options).get_target_label(),
+                    definition=self.workflow.definition, options=self._root_options, status=status)
+            else:
+                history.save_workflow_run(self.run_id, self._state(), status=status)
+        except Exception:
+            pass
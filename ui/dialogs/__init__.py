@@ -7,6 +7,10 @@ from .about_dialog import AboutDialog
 from .history_dialog import HistoryDialog
 from .tamper_dialog import TamperSelectionDialog
 from .ai_settings_dialog import AISettingsDialog
+from .batch_summary_dialog import BatchSummaryDialog
+from .resume_dialog import ResumeJobsDialog
+from .shared_queue_dialog import SharedQueueDialog
 
-__all__ = ['SettingsDialog', 'AboutDialog', 'HistoryDialog', 'TamperSelectionDialog', 'AISettingsDialog']
+__all__ = ['SettingsDialog', 'AboutDialog', 'HistoryDialog', 'TamperSelectionDialog', 'AISettingsDialog',
+           'BatchSummaryDialog', 'ResumeJobsDialog', 'SharedQueueDialog']
 
@@ -0,0 +1,180 @@
+"""
+批量扫描汇总对话框
+以表格汇总批量拆分后每个目标的扫描结果
+"""
+
+import csv
+
+from PyQt6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QTableWidget,
+    QPushButton, QTableWidgetItem, QHeaderView, QAbstractItemView,
+    QFileDialog, QMessageBox
+)
+from PyQt6.QtCore import Qt, pyqtSignal, QTimer
+from PyQt6.QtGui import QColor
+
+from core.batch_fanout import summarize_jobs
+from core.job_queue import JobStatus
+
+
+class BatchSummaryDialog(QDialog):
+    """批量扫描汇总对话框（非模态，随任务进度自动刷新）"""
+    
+    # 信号：双击某个目标，在主界面查看该任务
+    job_selected = pyqtSignal(int)
+    
+    HEADERS = ["ID", "目标", "状态", "注入", "注入类型", "数据库类型", "当前库", "耗时"]
+    
+    def __init__(self, scheduler, group_id: str, parent=None):
+        super().__init__(parent)
+        self.scheduler = scheduler
+        self.group_id = group_id
+        self.setWindowTitle(f"📊 批量扫描汇总 - {group_id}")
+        self.setMinimumSize(900, 500)
+        self.setup_ui()
+        
+        # 任务状态变化时标记刷新；运行中任务的结果由定时器每秒刷新
+        self._refresh_pending = False
+        self.scheduler.queue_changed.connect(self._schedule_refresh)
+        self._refresh_timer = QTimer(self)
+        self._refresh_timer.timeout.connect(self._on_refresh_timer)
+        self._refresh_timer.start(1000)
+        
+        self.refresh()
+    
+    def setup_ui(self):
+        """设置 UI"""
+        layout = QVBoxLayout(self)
+        layout.setSpacing(10)
+        
+        self.summary_label = QLabel()
+        self.summary_label.setStyleSheet("font-weight: bold; font-size: 13px;")
+        layout.addWidget(self.summary_label)
+        
+        self.table = QTableWidget()
+        self.table.setColumnCount(len(self.HEADERS))
+        self.table.setHorizontalHeaderLabels(self.HEADERS)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.table.setSortingEnabled(True)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch)
+        self.table.itemDoubleClicked.connect(self._on_item_double_clicked)
+        layout.addWidget(self.table)
+        
+        btn_layout = QHBoxLayout()
+        
+        export_btn = QPushButton("📥 导出 CSV")
+        export_btn.clicked.connect(self._export_csv)
+        btn_layout.addWidget(export_btn)
+        
+        btn_layout.addStretch()
+        
+        close_btn = QPushButton("关闭")
+        close_btn.clicked.connect(self.close)
+        btn_layout.addWidget(close_btn)
+        
+        layout.addLayout(btn_layout)
+    
+    def refresh(self):
+        """刷新汇总表"""
+        jobs = self.scheduler.group_jobs(self.group_id)
+        
+        self.table.setSortingEnabled(False)
+        self.table.setRowCount(0)
+        for job in jobs:
+            row = self.table.rowCount()
+            self.table.insertRow(row)
+            for col, value in enumerate(self._row_values(job)):
+                item = QTableWidgetItem()
+                if col == 0:
+                    item.setData(Qt.ItemDataRole.DisplayRole, job.job_id)
+                    item.setData(Qt.ItemDataRole.UserRole, job.job_id)
+                else:
+                    item.setText(value)
+                if col == 3 and value == "⚠️ 是":
+                    item.setForeground(QColor('#f7768e'))
+                self.table.setItem(row, col, item)
+        self.table.setSortingEnabled(True)
+        
+        summary = summarize_jobs(jobs)
+        text = (f"共 {summary['total']} 个目标 · 完成 {summary['finished']} · "
+                f"运行 {summary['running']} · 排队 {summary['pending']} · "
+                f"失败 {summary['failed']} · 发现注入 {summary['vulnerable']}")
+        if summary['wall_time'] > 0:
+            text += (f"  |  总耗时 {self._format_seconds(summary['wall_time'])}，"
+                     f"串行累计 {self._format_seconds(summary['serial_time'])}")
+            if summary['serial_time'] > 0:
+                text += f"（加速 {summary['serial_time'] / summary['wall_time']:.1f}×）"
+        self.summary_label.setText(text)
+    
+    def _row_values(self, job) -> list:
+        """生成一行显示内容"""
+        results = job.store.get_summary()
+        injected = results.get('injection_found')
+        if job.status in (JobStatus.PENDING, JobStatus.RUNNING) and not injected:
+            injected_text = "-"
+        else:
+            injected_text = "⚠️ 是" if injected else "否"
+        return [
+            str(job.job_id),
+            job.target,
+            job.status_label,
+            injected_text,
+            ", ".join(results.get('injection_type', [])),
+            results.get('dbms', ''),
+            results.get('current_db', ''),
+            self._format_seconds(job.elapsed) if job.started_at else "-",
+        ]
+    
+    def _schedule_refresh(self):
+        """标记需要刷新"""
+        self._refresh_pending = True
+    
+    def _on_refresh_timer(self):
+        """定时刷新（有变化或有运行中的任务时）"""
+        jobs = self.scheduler.group_jobs(self.group_id)
+        if self._refresh_pending or any(job.status == JobStatus.RUNNING for job in jobs):
+            self._refresh_pending = False
+            self.refresh()
+    
+    def _on_item_double_clicked(self, item):
+        """双击查看任务"""
+        id_item = self.table.item(item.row(), 0)
+        if id_item:
+            self.job_selected.emit(id_item.data(Qt.ItemDataRole.UserRole))
+    
+    def _export_csv(self):
+        """导出汇总表"""
+        file_path, _ = QFileDialog.getSaveFileName(
+            self, "导出批量汇总", f"{self.group_id}_summary.csv",
+            "CSV 文件 (*.csv);;所有文件 (*.*)"
+        )
+        if not file_path:
+            return
+        try:
+            with open(file_path, 'w', newline='', encoding='utf-8-sig') as f:
+                writer = csv.writer(f)
+                writer.writerow(self.HEADERS)
+                for job in self.scheduler.group_jobs(self.group_id):
+                    writer.writerow(self._row_values(job))
+            QMessageBox.information(self, "成功", f"已导出到:\n{file_path}")
+        except Exception as e:
+            QMessageBox.warning(self, "错误", f"导出失败: {str(e)}")
+    
+    @staticmethod
+    def _format_seconds(seconds: float) -> str:
+        """格式化秒数"""
+        hours, remainder = divmod(int(seconds), 3600)
+        minutes, seconds = divmod(remainder, 60)
+        return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+    
+    def closeEvent(self, event):
+        """关闭时断开调度器信号"""
+        self._refresh_timer.stop()
+        try:
+            self.scheduler.queue_changed.disconnect(self._schedule_refresh)
+        except TypeError:
+            pass
+        super().closeEvent(event)
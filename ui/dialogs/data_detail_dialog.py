@@ -13,12 +13,28 @@ from PyQt6.QtGui import QFont
 
 
 class DataDetailDialog(QDialog):
-    """数据详情对话框"""
+    """数据详情对话框 - 通过结果存储分页查询表数据"""
     
-    def __init__(self, table_name: str, data: list, parent=None):
+    # 每页显示的行数
+    PAGE_SIZE = 500
+    
+    def __init__(self, table_name: str, store, table_key: str, parent=None):
+        """
+        初始化数据详情对话框
+        
+        参数:
+            table_name: 显示用的表名
+            store: 结果存储（ResultStore）
+            table_key: 表在结果存储中的标识
+            parent: 父窗口
+        """
         super().__init__(parent)
         self.table_name = table_name
-        self.data = data
+        self.store = store
+        self.table_key = table_key
+        self.total_rows = store.row_count(table_key)
+        self.headers = store.get_headers(table_key)
+        self.page = 0
         self.setup_ui()
     
     def setup_ui(self):
@@ -50,6 +66,10 @@ class DataDetailDialog(QDialog):
             QPushButton:hover {
                 background-color: #3d4a5a;
             }
+            QPushButton:disabled {
+                color: #666;
+                border-color: #3a3a5a;
+            }
         """)
         
         # 标题
@@ -58,20 +78,13 @@ class DataDetailDialog(QDialog):
         layout.addWidget(title)
         
         # 统计信息 - 更清晰的描述
-        count_label = QLabel(f"📊 共 {len(self.data)} 条数据记录")
+        source = "（SQLite 文件）" if self.store.is_sqlite(self.table_key) else ""
+        count_label = QLabel(f"📊 共 {self.total_rows} 条数据记录{source}")
         count_label.setStyleSheet("color: #4FC3F7; font-size: 13px; padding: 5px 0;")
         layout.addWidget(count_label)
         
-        # 解析数据并显示
-        if self.data and len(self.data) > 0:
-            # 尝试解析表格格式
-            first_row = self.data[0] if self.data else ""
-            if " | " in first_row:
-                # 表格格式数据
-                self._create_table_view(layout)
-            else:
-                # 纯文本格式
-                self._create_text_view(layout)
+        if self.total_rows > 0:
+            self._create_table_view(layout)
         else:
             # 无数据
             no_data = QLabel("暂无数据")
@@ -81,6 +94,19 @@ class DataDetailDialog(QDialog):
         
         # 按钮栏
         btn_layout = QHBoxLayout()
+        
+        # 分页控制
+        self.prev_btn = QPushButton("◀ 上一页")
+        self.prev_btn.clicked.connect(lambda: self._load_page(self.page - 1))
+        btn_layout.addWidget(self.prev_btn)
+        
+        self.page_label = QLabel("")
+        btn_layout.addWidget(self.page_label)
+        
+        self.next_btn = QPushButton("下一页 ▶")
+        self.next_btn.clicked.connect(lambda: self._load_page(self.page + 1))
+        btn_layout.addWidget(self.next_btn)
+        
         btn_layout.addStretch()
         
         copy_btn = QPushButton("📋 复制全部")
@@ -92,43 +118,20 @@ class DataDetailDialog(QDialog):
         btn_layout.addWidget(close_btn)
         
         layout.addLayout(btn_layout)
+        
+        self._load_page(0)
+    
+    def _page_count(self) -> int:
+        """总页数"""
+        return max(1, (self.total_rows + self.PAGE_SIZE - 1) // self.PAGE_SIZE)
     
     def _create_table_view(self, layout):
         """创建表格视图"""
-        # 解析列头和数据
-        headers = []
-        rows = []
-        
-        for i, row in enumerate(self.data):
-            parts = [p.strip() for p in row.split(" | ")]
-            if i == 0:
-                # 检查是否是表头
-                if all(not p.isdigit() for p in parts):
-                    headers = parts
-                    continue
-            rows.append(parts)
-        
-        # 如果没有检测到表头，使用默认列名
-        if not headers and rows:
-            headers = [f"列 {i+1}" for i in range(len(rows[0]))]
-        
-        # 创建表格
         table = QTableWidget()
-        table.setColumnCount(len(headers))
-        table.setRowCount(len(rows))
-        table.setHorizontalHeaderLabels(headers)
         
         # 隐藏行号（垂直表头）
         table.verticalHeader().setVisible(False)
         
-        # 填充数据
-        for i, row in enumerate(rows):
-            for j, cell in enumerate(row):
-                if j < len(headers):
-                    item = QTableWidgetItem(cell)
-                    item.setTextAlignment(Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter)
-                    table.setItem(i, j, item)
-        
         # 设置样式 - 统一深色背景
         table.horizontalHeader().setStretchLastSection(True)
         table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Interactive)
@@ -174,28 +177,49 @@ class DataDetailDialog(QDialog):
         layout.addWidget(table)
         self._table = table
     
-    def _create_text_view(self, layout):
-        """创建文本视图"""
-        text_edit = QTextEdit()
-        text_edit.setReadOnly(True)
-        text_edit.setFont(QFont("Consolas", 11))
-        text_edit.setPlainText("\n".join(self.data))
-        text_edit.setStyleSheet("""
-            QTextEdit {
-                background-color: #1e1e1e;
-                color: #d4d4d4;
-                border: 1px solid #333;
-                border-radius: 4px;
-            }
-        """)
-        layout.addWidget(text_edit)
-        self._text_edit = text_edit
+    def _load_page(self, page: int):
+        """加载指定页的数据（只查询当前页需要的行）"""
+        page = max(0, min(page, self._page_count() - 1))
+        self.page = page
+        
+        self.prev_btn.setEnabled(page > 0)
+        self.next_btn.setEnabled(page < self._page_count() - 1)
+        self.page_label.setText(f"第 {page + 1} / {self._page_count()} 页")
+        
+        if not hasattr(self, '_table'):
+            return
+        
+        rows = self.store.fetch_rows(self.table_key, page * self.PAGE_SIZE, self.PAGE_SIZE)
+        
+        # 如果没有检测到表头，使用默认列名
+        headers = self.headers
+        if not headers:
+            width = max((len(row) for row in rows), default=1)
+            headers = [f"列 {i+1}" for i in range(width)]
+        
+        table = self._table
+        table.clear()
+        table.setColumnCount(len(headers))
+        table.setRowCount(len(rows))
+        table.setHorizontalHeaderLabels(headers)
+        
+        # 填充数据
+        for i, row in enumerate(rows):
+            for j, cell in enumerate(row):
+                if j < len(headers):
+                    item = QTableWidgetItem(cell)
+                    item.setTextAlignment(Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter)
+                    table.setItem(i, j, item)
     
     def _copy_all(self):
         """复制全部数据"""
         from PyQt6.QtWidgets import QApplication
-        text = "\n".join(self.data)
-        QApplication.clipboard().setText(text)
+        lines = []
+        if self.headers:
+            lines.append(" | ".join(self.headers))
+        for row in self.store.iter_rows(self.table_key):
+            lines.append(" | ".join(row))
+        QApplication.clipboard().setText("\n".join(lines))
 
 
 class ColumnDataDialog(QDialog):
@@ -11,6 +11,7 @@ from PyQt6.QtWidgets import (
 from PyQt6.QtCore import Qt, pyqtSignal
 from PyQt6.QtGui import QColor
 
+import json
 import sys
 import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
@@ -165,6 +166,9 @@ class HistoryDialog(QDialog):
             elif status == 'running':
                 status_item.setForeground(QColor('#e0af68'))
                 status_item.setText('🔄 运行中')
+            elif status == 'interrupted':
+                status_item.setForeground(QColor('#e0af68'))
+                status_item.setText('⏸️ 已中断')
             else:
                 status_item.setForeground(QColor('#f7768e'))
                 status_item.setText('❌ 失败')
@@ -236,6 +240,23 @@ class HistoryDialog(QDialog):
         detail.append("-" * 60)
         detail.append(record.get('command', 'N/A'))
         
+        if record.get('tuning'):
+            try:
+                tuning = json.loads(record['tuning'])
+            except ValueError:
+                tuning = {}
+            if tuning:
+                detail.append("")
+                detail.append("-" * 60)
+                detail.append("🎛️ 自动调优")
+                detail.append("-" * 60)
+                if tuning.get('samples'):
+                    detail.append(f"基线响应: 中位数 {tuning.get('median_ms', 0):.0f}ms / "
+                                  f"P90 {tuning.get('p90_ms', 0):.0f}ms / 标准差 {tuning.get('stdev_ms', 0):.0f}ms "
+                                  f"（{tuning['samples']} 次请求，失败 {tuning.get('failures', 0)}）")
+                detail.append(f"选择参数: --time-sec={tuning.get('time_sec')} --timeout={tuning.get('timeout')} "
+                              f"--retries={tuning.get('retries')} --threads={tuning.get('threads')}")
+        
         if record.get('result_summary'):
             detail.append("")
             detail.append("-" * 60)
@@ -0,0 +1,106 @@
+"""
+恢复中断任务对话框
+启动时列出上次未正常结束的任务及其检查点，选择要恢复的任务
+"""
+
+from PyQt6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QTableWidget,
+    QPushButton, QTableWidgetItem, QHeaderView, QAbstractItemView,
+    QCheckBox
+)
+from PyQt6.QtCore import Qt
+
+from core.job_checkpoint import JobCheckpoint, PHASE_LABELS
+
+
+class ResumeJobsDialog(QDialog):
+    """恢复中断任务对话框"""
+    
+    HEADERS = ["目标", "扫描模式", "中断阶段", "进度", "最后更新"]
+    
+    def __init__(self, scans: list, parent=None):
+        """
+        参数:
+            scans: HistoryManager.get_interrupted_scans() 返回的记录
+        """
+        super().__init__(parent)
+        self.scans = scans
+        self.setWindowTitle("⏸️ 恢复中断的任务")
+        self.setMinimumSize(820, 360)
+        self.setup_ui()
+    
+    def setup_ui(self):
+        """设置 UI"""
+        layout = QVBoxLayout(self)
+        layout.setSpacing(10)
+        
+        label = QLabel(f"上次有 {len(self.scans)} 个任务未正常结束，勾选要恢复的任务：")
+        label.setStyleSheet("font-weight: bold;")
+        layout.addWidget(label)
+        
+        self.table = QTableWidget(len(self.scans), len(self.HEADERS))
+        self.table.setHorizontalHeaderLabels(self.HEADERS)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        
+        for row, scan in enumerate(self.scans):
+            checkpoint = JobCheckpoint.from_dict(scan.get('checkpoint'))
+            target_item = QTableWidgetItem(scan.get('target', ''))
+            target_item.setFlags(target_item.flags() | Qt.ItemFlag.ItemIsUserCheckable)
+            target_item.setCheckState(Qt.CheckState.Checked)
+            target_item.setToolTip(scan.get('command', ''))
+            self.table.setItem(row, 0, target_item)
+            self.table.setItem(row, 1, QTableWidgetItem(scan.get('scan_mode') or ''))
+            self.table.setItem(row, 2, QTableWidgetItem(PHASE_LABELS.get(checkpoint.phase, checkpoint.phase)))
+            self.table.setItem(row, 3, QTableWidgetItem(self._progress_text(checkpoint)))
+            updated = (scan.get('updated_at') or '').replace('T', ' ')[:19]
+            self.table.setItem(row, 4, QTableWidgetItem(updated))
+        layout.addWidget(self.table)
+        
+        self.skip_rows_check = QCheckBox("单表提取从中断的行继续（--start），跳过已取回的行")
+        self.skip_rows_check.setToolTip("不勾选时从头提取该表，已取回的值由 sqlmap 会话直接恢复")
+        self.skip_rows_check.setChecked(True)
+        layout.addWidget(self.skip_rows_check)
+        
+        hint = QLabel("恢复的任务会复用原会话，不会重新检测注入；未勾选的任务将标记为已中断，不再提示。")
+        hint.setStyleSheet("color: #888;")
+        hint.setWordWrap(True)
+        layout.addWidget(hint)
+        
+        btn_layout = QHBoxLayout()
+        btn_layout.addStretch()
+        
+        ignore_btn = QPushButton("全部忽略")
+        ignore_btn.setProperty("class", "secondary")
+        ignore_btn.clicked.connect(self.reject)
+        btn_layout.addWidget(ignore_btn)
+        
+        resume_btn = QPushButton("▶️ 恢复选中任务")
+        resume_btn.clicked.connect(self.accept)
+        btn_layout.addWidget(resume_btn)
+        
+        layout.addLayout(btn_layout)
+    
+    @staticmethod
+    def _progress_text(checkpoint: JobCheckpoint) -> str:
+        """检查点进度描述"""
+        parts = []
+        if checkpoint.completed_tables:
+            parts.append(f"已完成 {len(checkpoint.completed_tables)} 张表")
+        if checkpoint.current_table:
+            text = f"正在提取 {checkpoint.current_table}"
+            if checkpoint.last_row:
+                text += f"（已取回 {checkpoint.last_row} 行）"
+            parts.append(text)
+        return "，".join(parts) or "-"
+    
+    def get_selected_scans(self) -> list:
+        """获取勾选的任务记录"""
+        return [scan for row, scan in enumerate(self.scans)
+                if self.table.item(row, 0).checkState() == Qt.CheckState.Checked]
+    
+    def skip_dumped_rows(self) -> bool:
+        """是否使用 --start 跳过已取回的行"""
+        return self.skip_rows_check.isChecked()
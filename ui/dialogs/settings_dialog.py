@@ -4,14 +4,20 @@
 """
 
 import os
+import time
 from PyQt6.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit,
     QPushButton, QComboBox, QGroupBox, QFileDialog, QTabWidget,
-    QWidget, QFormLayout, QMessageBox
+    QWidget, QFormLayout, QMessageBox, QSpinBox, QCheckBox,
+    QTableWidget, QTableWidgetItem, QHeaderView, QAbstractItemView
 )
 from PyQt6.QtCore import pyqtSignal, Qt
 
 from ..theme import COLORS, get_theme_names, get_theme_colors
+from core.concurrency_governor import cpu_sampling_supported
+from core.output_quota import default_output_root, format_size
+from core.shared_queue import DEFAULT_LEASE_SECONDS
+from core.worker_protocol import DEFAULT_PORT
 
 
 class SettingsDialog(QDialog):
@@ -22,9 +28,11 @@ class SettingsDialog(QDialog):
     theme_changed = pyqtSignal(str)
     language_changed = pyqtSignal(str)
     
-    def __init__(self, config_manager, parent=None):
+    def __init__(self, config_manager, parent=None, history=None, output=None):
         super().__init__(parent)
         self.config = config_manager
+        self.history = history  # HistoryManager，用于显示和清空结果缓存（可选）
+        self.output = output  # OutputQuota，用于显示和清理任务输出目录的磁盘占用（可选）
         self.setWindowTitle("⚙️ 设置")
         self.setMinimumSize(520, 480)
         self.setup_ui()
@@ -48,6 +56,16 @@ class SettingsDialog(QDialog):
         self._setup_appearance_tab(appearance_tab)
         tabs.addTab(appearance_tab, "🎨 外观")
         
+        # 缓存设置标签页
+        cache_tab = QWidget()
+        self._setup_cache_tab(cache_tab)
+        tabs.addTab(cache_tab, "💾 缓存")
+        
+        # 远程执行节点标签页
+        workers_tab = QWidget()
+        self._setup_workers_tab(workers_tab)
+        tabs.addTab(workers_tab, "🖧 执行节点")
+        
         layout.addWidget(tabs)
         
         # 按钮区
@@ -134,6 +152,65 @@ class SettingsDialog(QDialog):
         
         layout.addWidget(scan_group)
         
+        # 自适应并发阈值
+        governor_group = QGroupBox("🧮 自适应并发")
+        governor_layout = QFormLayout(governor_group)
+        
+        self.governor_cpu = QSpinBox()
+        self.governor_cpu.setRange(10, 100)
+        self.governor_cpu.setSuffix(" %")
+        self.governor_cpu.setToolTip("CPU 负载超过此值时减少并发，低于其 60% 时增加并发")
+        if not cpu_sampling_supported():
+            self.governor_cpu.setEnabled(False)
+            self.governor_cpu.setToolTip("当前系统无法采样 CPU 负载，只按内存和界面延迟调节")
+        governor_layout.addRow("CPU 负载上限:", self.governor_cpu)
+        
+        self.governor_memory = QSpinBox()
+        self.governor_memory.setRange(10, 100)
+        self.governor_memory.setSuffix(" %")
+        self.governor_memory.setToolTip("内存占用超过此值时减少并发")
+        governor_layout.addRow("内存占用上限:", self.governor_memory)
+        
+        self.governor_pause = QSpinBox()
+        self.governor_pause.setRange(10, 100)
+        self.governor_pause.setSuffix(" %")
+        self.governor_pause.setToolTip("内存占用超过此值时暂停最近启动的任务，回落到上限以下后恢复（仅 Linux/Mac）")
+        governor_layout.addRow("内存暂停阈值:", self.governor_pause)
+        
+        self.governor_lag = QSpinBox()
+        self.governor_lag.setRange(50, 5000)
+        self.governor_lag.setSingleStep(50)
+        self.governor_lag.setSuffix(" ms")
+        self.governor_lag.setToolTip("界面事件循环延迟超过此值时减少并发")
+        governor_layout.addRow("界面延迟上限:", self.governor_lag)
+        
+        layout.addWidget(governor_group)
+        
+        # 失败重试
+        retry_group = QGroupBox("🔁 失败重试")
+        retry_layout = QFormLayout(retry_group)
+        
+        self.retry_max = QSpinBox()
+        self.retry_max.setRange(0, 10)
+        self.retry_max.setSpecialValueText("不重试")
+        self.retry_max.setToolTip("任务因临时故障（连接重置、超时、429、5xx）失败时自动重试的次数，\n"
+                                  "目标不可达、配置错误、未发现注入的任务不会重试")
+        retry_layout.addRow("最多重试:", self.retry_max)
+        
+        self.retry_base = QSpinBox()
+        self.retry_base.setRange(1, 3600)
+        self.retry_base.setSuffix(" 秒")
+        self.retry_base.setToolTip("第一次重试前的等待时间，之后每次翻倍，并加入随机抖动")
+        retry_layout.addRow("初始等待:", self.retry_base)
+        
+        self.retry_max_delay = QSpinBox()
+        self.retry_max_delay.setRange(1, 24 * 3600)
+        self.retry_max_delay.setSingleStep(60)
+        self.retry_max_delay.setSuffix(" 秒")
+        retry_layout.addRow("最长等待:", self.retry_max_delay)
+        
+        layout.addWidget(retry_group)
+        
         layout.addStretch()
     
     def _setup_appearance_tab(self, tab):
@@ -209,6 +286,230 @@ class SettingsDialog(QDialog):
         
         layout.addStretch()
     
+    def _setup_cache_tab(self, tab):
+        """设置缓存标签页"""
+        layout = QVBoxLayout(tab)
+        layout.setSpacing(15)
+        
+        # 结果复用缓存
+        result_group = QGroupBox("♻️ 结果复用缓存")
+        result_layout = QFormLayout(result_group)
+        
+        self.result_cache_ttl = QSpinBox()
+        self.result_cache_ttl.setRange(0, 7 * 24 * 60)
+        self.result_cache_ttl.setSingleStep(30)
+        self.result_cache_ttl.setSuffix(" 分钟")
+        self.result_cache_ttl.setSpecialValueText("不缓存")
+        self.result_cache_ttl.setToolTip("有效期内以完全相同的目标和选项再次开始扫描时，可直接显示上次的结果")
+        result_layout.addRow("有效期:", self.result_cache_ttl)
+        
+        self.result_cache_stats = QLabel()
+        result_layout.addRow("缓存统计:", self.result_cache_stats)
+        
+        clear_btn = QPushButton("🗑️ 清空结果缓存")
+        clear_btn.setEnabled(self.history is not None)
+        clear_btn.clicked.connect(self._clear_result_cache)
+        result_layout.addRow("", clear_btn)
+        
+        layout.addWidget(result_group)
+        
+        # 任务输出目录
+        output_group = QGroupBox("📁 任务输出目录")
+        output_layout = QFormLayout(output_group)
+        
+        self.output_isolate = QCheckBox("每个任务使用独立的输出目录")
+        self.output_isolate.setToolTip("未指定 --output-dir 的任务各自使用受管根目录下的目录，\n"
+                                       "并发任务不再争用同一主机的会话文件；派生的提取任务沿用源任务的目录和会话")
+        output_layout.addRow("", self.output_isolate)
+        
+        root_layout = QHBoxLayout()
+        self.output_root = QLineEdit()
+        self.output_root.setPlaceholderText(default_output_root())
+        root_layout.addWidget(self.output_root)
+        browse_btn = QPushButton("浏览...")
+        browse_btn.clicked.connect(self._browse_output_root)
+        root_layout.addWidget(browse_btn)
+        output_layout.addRow("根目录:", root_layout)
+        
+        self.output_quota = QSpinBox()
+        self.output_quota.setRange(0, 1024 * 1024)
+        self.output_quota.setSingleStep(512)
+        self.output_quota.setSuffix(" MB")
+        self.output_quota.setSpecialValueText("不限")
+        self.output_quota.setToolTip("任务目录总占用超过配额时，任务结束后自动删除最久未使用的目录（仍在任务队列中的任务的目录不会删除）")
+        output_layout.addRow("磁盘配额:", self.output_quota)
+        
+        self.output_stats = QLabel()
+        output_layout.addRow("磁盘占用:", self.output_stats)
+        
+        self.output_table = QTableWidget(0, 3)
+        self.output_table.setHorizontalHeaderLabels(["目录", "大小", "最近使用"])
+        self.output_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        self.output_table.verticalHeader().setVisible(False)
+        self.output_table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.output_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.output_table.setMaximumHeight(140)
+        self.output_table.setToolTip("按最近使用时间从旧到新排列，超出配额时从最上面开始删除")
+        output_layout.addRow(self.output_table)
+        
+        output_btn_layout = QHBoxLayout()
+        refresh_btn = QPushButton("🔄 刷新")
+        refresh_btn.setEnabled(self.output is not None)
+        refresh_btn.clicked.connect(self._update_output_stats)
+        output_btn_layout.addWidget(refresh_btn)
+        clean_btn = QPushButton("🗑️ 删除未使用的目录")
+        clean_btn.setEnabled(self.output is not None)
+        clean_btn.clicked.connect(self._clear_output_dirs)
+        output_btn_layout.addWidget(clean_btn)
+        output_btn_layout.addStretch()
+        output_layout.addRow("", output_btn_layout)
+        
+        layout.addWidget(output_group)
+        
+        layout.addStretch()
+    
+    def _setup_workers_tab(self, tab):
+        """设置执行节点标签页"""
+        layout = QVBoxLayout(tab)
+        layout.setSpacing(15)
+        
+        workers_group = QGroupBox("🖧 远程执行节点")
+        workers_layout = QFormLayout(workers_group)
+        
+        self.workers_enabled = QCheckBox("接受执行节点连接")
+        self.workers_enabled.setToolTip("本机并发已满时，把排队的任务分配给已连接的执行节点执行")
+        workers_layout.addRow("", self.workers_enabled)
+        
+        self.workers_port = QSpinBox()
+        self.workers_port.setRange(1024, 65535)
+        workers_layout.addRow("监听端口:", self.workers_port)
+        
+        self.workers_allow_lan = QCheckBox("接受其他机器的连接（监听所有网卡，必须设置令牌）")
+        self.workers_allow_lan.setToolTip("未勾选时只监听 127.0.0.1，只有本机上的执行节点可以连接；\n"
+                                          "任务内容（Cookie、请求头、请求文件）以明文发送给节点")
+        workers_layout.addRow("", self.workers_allow_lan)
+        
+        self.workers_token = QLineEdit()
+        self.workers_token.setPlaceholderText("只接受本机连接时可留空")
+        self.workers_token.setEchoMode(QLineEdit.EchoMode.PasswordEchoOnEdit)
+        workers_layout.addRow("连接令牌:", self.workers_token)
+        
+        hint = QLabel("在其他机器上运行:\npython worker.py --host <本机地址> --port <端口> --token <令牌> --capacity 2")
+        hint.setStyleSheet("color: #7aa2f7; font-size: 11px;")
+        hint.setTextInteractionFlags(Qt.TextInteractionFlag.TextSelectableByMouse)
+        workers_layout.addRow("", hint)
+        
+        layout.addWidget(workers_group)
+        
+        # 共享任务队列
+        shared_group = QGroupBox("🌐 共享任务队列")
+        shared_layout = QFormLayout(shared_group)
+        
+        self.shared_enabled = QCheckBox("使用共享任务队列")
+        self.shared_enabled.setToolTip("同一台主机上的多个实例（或 worker.py --shared-db）共用一个任务队列：\n"
+                                       "开始扫描时任务发布到共享队列，由有空闲名额的实例领取执行")
+        shared_layout.addRow("", self.shared_enabled)
+        
+        path_layout = QHBoxLayout()
+        self.shared_path = QLineEdit()
+        self.shared_path.setPlaceholderText("所有实例都有读写权限的 SQLite 数据库文件")
+        path_layout.addWidget(self.shared_path)
+        browse_btn = QPushButton("浏览...")
+        browse_btn.clicked.connect(self._browse_shared_db)
+        path_layout.addWidget(browse_btn)
+        shared_layout.addRow("数据库:", path_layout)
+        
+        self.shared_lease = QSpinBox()
+        self.shared_lease.setRange(15, 3600)
+        self.shared_lease.setSuffix(" 秒")
+        self.shared_lease.setToolTip("领取任务的实例每隔租约时长的 1/3 续约；\n实例崩溃后超过租约时长，任务回到队列由其他实例领取")
+        shared_layout.addRow("租约时长:", self.shared_lease)
+        
+        layout.addWidget(shared_group)
+        
+        layout.addStretch()
+    
+    def _update_cache_stats(self):
+        """刷新结果缓存统计"""
+        if self.history is None:
+            self.result_cache_stats.setText("不可用")
+            return
+        try:
+            stats = self.history.get_result_cache_stats()
+        except Exception:
+            self.result_cache_stats.setText("读取失败")
+            return
+        size = stats['size_bytes'] / 1024
+        size_text = f"{size / 1024:.1f} MB" if size >= 1024 else f"{size:.1f} KB"
+        hit_rate = stats['hits'] / stats['lookups'] * 100 if stats['lookups'] else 0.0
+        self.result_cache_stats.setText(
+            f"{stats['entries']} 条，占用 {size_text}，命中率 {hit_rate:.0f}%"
+            f"（命中 {stats['hits']} / 查询 {stats['lookups']}）"
+        )
+    
+    def _clear_result_cache(self):
+        """清空结果缓存"""
+        try:
+            count = self.history.clear_result_cache()
+        except Exception as e:
+            QMessageBox.warning(self, "清空失败", str(e))
+            return
+        self._update_cache_stats()
+        QMessageBox.information(self, "提示", f"已清空 {count} 条缓存结果。")
+    
+    def _update_output_stats(self):
+        """刷新任务输出目录的磁盘占用"""
+        self.output_table.setRowCount(0)
+        if self.output is None:
+            self.output_stats.setText("不可用")
+            return
+        try:
+            usage = self.output.usage()
+        except Exception:
+            self.output_stats.setText("读取失败")
+            return
+        self.output_stats.setText(usage.describe())
+        self.output_stats.setToolTip(usage.root)
+        for info in usage.dirs:
+            row = self.output_table.rowCount()
+            self.output_table.insertRow(row)
+            name_item = QTableWidgetItem(info.name + ("（使用中）" if info.in_use else ""))
+            name_item.setToolTip(info.path)
+            self.output_table.setItem(row, 0, name_item)
+            self.output_table.setItem(row, 1, QTableWidgetItem(format_size(info.size)))
+            self.output_table.setItem(row, 2, QTableWidgetItem(
+                time.strftime('%Y-%m-%d %H:%M', time.localtime(info.last_used))))
+    
+    def _clear_output_dirs(self):
+        """删除所有未被任务使用的输出目录"""
+        reply = QMessageBox.question(
+            self, "确认", "删除所有未使用的任务输出目录？\n其中的会话和提取的数据将无法用于恢复扫描。",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+        )
+        if reply != QMessageBox.StandardButton.Yes:
+            return
+        removed = self.output.clear_unused()
+        self._update_output_stats()
+        QMessageBox.information(
+            self, "提示", f"已删除 {len(removed)} 个目录，释放 {format_size(sum(info.size for info in removed))}。")
+    
+    def _browse_output_root(self):
+        """选择任务输出根目录"""
+        path = QFileDialog.getExistingDirectory(self, "选择任务输出根目录",
+                                                self.output_root.text() or default_output_root())
+        if path:
+            self.output_root.setText(path)
+    
+    def _browse_shared_db(self):
+        """选择共享任务队列数据库"""
+        file_path, _ = QFileDialog.getSaveFileName(
+            self, "选择共享任务队列数据库", self.shared_path.text(),
+            "SQLite 数据库 (*.db);;所有文件 (*.*)",
+            options=QFileDialog.Option.DontConfirmOverwrite
+        )
+        if file_path:
+            self.shared_path.setText(file_path)
+    
     def _browse_sqlmap(self):
         """浏览 SQLMap 路径"""
         file_path, _ = QFileDialog.getOpenFileName(
@@ -272,6 +573,38 @@ class SettingsDialog(QDialog):
         index = self.theme_combo.findData(theme)
         if index >= 0:
             self.theme_combo.setCurrentIndex(index)
+        
+        # 自适应并发阈值
+        self.governor_cpu.setValue(self.config.get_int("governor", "cpu_high", 85))
+        self.governor_memory.setValue(self.config.get_int("governor", "memory_high", 80))
+        self.governor_pause.setValue(self.config.get_int("governor", "memory_pause", 90))
+        self.governor_lag.setValue(self.config.get_int("governor", "lag_high_ms", 250))
+        
+        # 失败重试
+        self.retry_max.setValue(self.config.get_int("retry", "max_retries", 2))
+        self.retry_base.setValue(self.config.get_int("retry", "base_delay", 15))
+        self.retry_max_delay.setValue(self.config.get_int("retry", "max_delay", 600))
+        
+        # 结果复用缓存
+        self.result_cache_ttl.setValue(self.config.get_int("result_cache", "ttl_minutes", 60))
+        self._update_cache_stats()
+        
+        # 任务输出目录
+        self.output_isolate.setChecked(self.config.get_bool("output", "isolate", True))
+        self.output_root.setText(self.config.get("output", "root", ""))
+        self.output_quota.setValue(self.config.get_int("output", "quota_mb", 2048))
+        self._update_output_stats()
+        
+        # 远程执行节点
+        self.workers_enabled.setChecked(self.config.get_bool("workers", "enabled", False))
+        self.workers_port.setValue(self.config.get_int("workers", "port", DEFAULT_PORT))
+        self.workers_allow_lan.setChecked(self.config.get_bool("workers", "allow_lan", False))
+        self.workers_token.setText(self.config.get("workers", "token", ""))
+        
+        # 共享任务队列
+        self.shared_enabled.setChecked(self.config.get_bool("shared_queue", "enabled", False))
+        self.shared_path.setText(self.config.get("shared_queue", "path", ""))
+        self.shared_lease.setValue(self.config.get_int("shared_queue", "lease_seconds", DEFAULT_LEASE_SECONDS))
     
     def apply_settings(self):
         """应用设置"""
@@ -292,6 +625,36 @@ class SettingsDialog(QDialog):
         self.config.set("scan", "default_threads", str(self.default_threads.currentData()))
         self.config.set("scan", "default_timeout", str(self.default_timeout.currentData()))
         
+        # 保存自适应并发阈值
+        self.config.set("governor", "cpu_high", self.governor_cpu.value())
+        self.config.set("governor", "memory_high", self.governor_memory.value())
+        self.config.set("governor", "memory_pause", max(self.governor_pause.value(), self.governor_memory.value()))
+        self.config.set("governor", "lag_high_ms", self.governor_lag.value())
+        
+        # 保存失败重试策略
+        self.config.set("retry", "max_retries", self.retry_max.value())
+        self.config.set("retry", "base_delay", self.retry_base.value())
+        self.config.set("retry", "max_delay", max(self.retry_max_delay.value(), self.retry_base.value()))
+        
+        # 保存结果缓存有效期
+        self.config.set("result_cache", "ttl_minutes", self.result_cache_ttl.value())
+        
+        # 保存任务输出目录和磁盘配额
+        self.config.set("output", "isolate", self.output_isolate.isChecked())
+        self.config.set("output", "root", self.output_root.text().strip())
+        self.config.set("output", "quota_mb", self.output_quota.value())
+        
+        # 保存执行节点设置
+        self.config.set("workers", "enabled", self.workers_enabled.isChecked())
+        self.config.set("workers", "port", self.workers_port.value())
+        self.config.set("workers", "allow_lan", self.workers_allow_lan.isChecked())
+        self.config.set("workers", "token", self.workers_token.text().strip())
+        
+        # 保存共享任务队列设置
+        self.config.set("shared_queue", "enabled", self.shared_enabled.isChecked())
+        self.config.set("shared_queue", "path", self.shared_path.text().strip())
+        self.config.set("shared_queue", "lease_seconds", self.shared_lease.value())
+        
         # 保存字体大小
         self.config.set("ui", "font_size", str(self.font_size_combo.currentData()))
         
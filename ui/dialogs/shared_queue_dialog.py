@@ -0,0 +1,169 @@
+"""
+共享任务队列对话框
+列出共享数据库中所有实例发布的任务及其状态和执行者，可取消排队任务、查看已完成任务的结果
+"""
+
+import time
+from datetime import datetime
+
+from PyQt6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QTableWidget,
+    QPushButton, QTableWidgetItem, QHeaderView, QAbstractItemView,
+    QMessageBox
+)
+from PyQt6.QtCore import Qt, QTimer, pyqtSignal
+
+from core.shared_queue import SHARED_STATUS_LABELS
+
+
+class SharedQueueDialog(QDialog):
+    """共享任务队列对话框（非模态，定时刷新）"""
+    
+    # 查看结果 (共享任务记录，含 results 和 log)
+    view_requested = pyqtSignal(dict)
+    
+    HEADERS = ["ID", "目标", "扫描模式", "优先级", "状态", "发布者", "执行者", "次数", "发布时间"]
+    
+    def __init__(self, agent, parent=None):
+        """
+        参数:
+            agent: SharedQueueAgent
+        """
+        super().__init__(parent)
+        self.agent = agent
+        self.queue = agent.queue
+        self.setWindowTitle(f"🌐 共享任务队列 - {self.queue.db_path}")
+        self.setMinimumSize(980, 420)
+        self.setup_ui()
+        self.refresh()
+        
+        self._timer = QTimer(self)
+        self._timer.timeout.connect(self.refresh)
+        self._timer.start(3000)
+        agent.changed.connect(self.refresh)
+    
+    def setup_ui(self):
+        """设置 UI"""
+        layout = QVBoxLayout(self)
+        layout.setSpacing(10)
+        
+        self.summary_label = QLabel("")
+        self.summary_label.setStyleSheet("font-weight: bold;")
+        layout.addWidget(self.summary_label)
+        
+        self.table = QTableWidget(0, len(self.HEADERS))
+        self.table.setHorizontalHeaderLabels(self.HEADERS)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch)
+        self.table.itemSelectionChanged.connect(self._update_buttons)
+        self.table.itemDoubleClicked.connect(lambda _: self._view_selected())
+        layout.addWidget(self.table)
+        
+        btn_layout = QHBoxLayout()
+        
+        self.view_btn = QPushButton("👁 查看结果")
+        self.view_btn.clicked.connect(self._view_selected)
+        btn_layout.addWidget(self.view_btn)
+        
+        self.cancel_btn = QPushButton("⛔ 取消")
+        self.cancel_btn.setProperty("class", "danger")
+        self.cancel_btn.setToolTip("取消排队中的任务（执行中的任务需在执行它的实例中取消）")
+        self.cancel_btn.clicked.connect(self._cancel_selected)
+        btn_layout.addWidget(self.cancel_btn)
+        
+        btn_layout.addStretch()
+        
+        clear_btn = QPushButton("🧹 清除已结束")
+        clear_btn.setProperty("class", "secondary")
+        clear_btn.clicked.connect(self._clear_finished)
+        btn_layout.addWidget(clear_btn)
+        
+        close_btn = QPushButton("关闭")
+        close_btn.clicked.connect(self.close)
+        btn_layout.addWidget(close_btn)
+        
+        layout.addLayout(btn_layout)
+        self._update_buttons()
+    
+    def refresh(self):
+        """重新读取共享队列（保持当前选中的任务）"""
+        try:
+            jobs = self.queue.list_jobs()
+            stats = self.queue.stats()
+        except Exception as e:
+            self.summary_label.setText(f"读取共享队列失败: {e}")
+            return
+        
+        selected = self._selected_job()
+        selected_id = selected['id'] if selected else None
+        self._jobs = jobs
+        now = time.time()
+        
+        self.table.setRowCount(0)
+        for job in jobs:
+            row = self.table.rowCount()
+            self.table.insertRow(row)
+            id_item = QTableWidgetItem(str(job['id']))
+            id_item.setData(Qt.ItemDataRole.UserRole, job['id'])
+            self.table.setItem(row, 0, id_item)
+            self.table.setItem(row, 1, QTableWidgetItem(job['target']))
+            self.table.setItem(row, 2, QTableWidgetItem(job['scan_mode'] or ""))
+            self.table.setItem(row, 3, QTableWidgetItem(str(job['priority'])))
+            
+            status = SHARED_STATUS_LABELS.get(job['status'], job['status'])
+            if job['status'] == 'claimed' and job['lease_until'] and job['lease_until'] < now:
+                status = "⚠️ 租约过期"
+            status_item = QTableWidgetItem(status)
+            if job['return_code'] is not None:
+                status_item.setToolTip(f"返回码: {job['return_code']}")
+            self.table.setItem(row, 4, status_item)
+            
+            self.table.setItem(row, 5, QTableWidgetItem(job['submitted_by'] or ""))
+            owner = job['owner'] or ""
+            if owner == self.agent.owner:
+                owner += "（本实例）"
+            self.table.setItem(row, 6, QTableWidgetItem(owner))
+            self.table.setItem(row, 7, QTableWidgetItem(str(job['attempts'])))
+            created = datetime.fromtimestamp(job['created_at']).strftime("%m-%d %H:%M:%S") if job['created_at'] else ""
+            self.table.setItem(row, 8, QTableWidgetItem(created))
+            if job['id'] == selected_id:
+                self.table.selectRow(row)
+        
+        self.summary_label.setText(
+            "  ".join(f"{label} {stats.get(status, 0)}" for status, label in SHARED_STATUS_LABELS.items())
+        )
+        self._update_buttons()
+    
+    def _selected_job(self):
+        rows = self.table.selectionModel().selectedRows() if self.table.selectionModel() else []
+        if not rows:
+            return None
+        job_id = self.table.item(rows[0].row(), 0).data(Qt.ItemDataRole.UserRole)
+        return next((job for job in self._jobs if job['id'] == job_id), None)
+    
+    def _update_buttons(self):
+        job = self._selected_job()
+        self.view_btn.setEnabled(bool(job and job['has_results']))
+        self.cancel_btn.setEnabled(bool(job and job['status'] == 'pending'))
+    
+    def _view_selected(self):
+        job = self._selected_job()
+        if not job or not job['has_results']:
+            return
+        record = self.queue.get_job(job['id'])
+        if record:
+            self.view_requested.emit(record)
+    
+    def _cancel_selected(self):
+        job = self._selected_job()
+        if job and not self.queue.cancel(job['id']):
+            QMessageBox.information(self, "提示", "任务已被领取，只能在执行它的实例中取消。")
+        self.refresh()
+    
+    def _clear_finished(self):
+        count = self.queue.remove_finished()
+        self.refresh()
+        QMessageBox.information(self, "提示", f"已清除 {count} 个已结束的共享任务。")
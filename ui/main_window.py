@@ -10,7 +10,8 @@ from datetime import datetime
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QSplitter, QTabWidget, QStatusBar, QMenuBar, QMenu, QMessageBox,
-    QLabel, QPushButton, QProgressBar, QFrame, QScrollArea, QSizePolicy
+    QLabel, QPushButton, QProgressBar, QFrame, QScrollArea, QSizePolicy,
+    QInputDialog
 )
 from PyQt6.QtCore import Qt, QTimer
 from PyQt6.QtGui import QAction, QFont
@@ -19,19 +20,43 @@ from .theme import DARK_THEME, COLORS, generate_theme_stylesheet
 from .dialogs.settings_dialog import SettingsDialog
 from .dialogs.about_dialog import AboutDialog
 from .dialogs.history_dialog import HistoryDialog
+from .dialogs.batch_summary_dialog import BatchSummaryDialog
+from .dialogs.resume_dialog import ResumeJobsDialog
+from .dialogs.shared_queue_dialog import SharedQueueDialog
 from .panels.target_panel import TargetPanel
 from .panels.scan_panel import ScanPanel
 from .panels.advanced_panel import AdvancedPanel
 from .panels.result_panel import ResultPanel
 from .panels.log_panel import LogPanel
 from .panels.ai_panel import AIPanel
+from .panels.queue_panel import QueuePanel
 
 # 添加父目录到路径
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from core.sqlmap_engine import SqlmapEngine, SqlmapFinder
+from core.sqlmap_engine import SqlmapFinder
 from core.command_builder import CommandBuilder
 from core.config_manager import ConfigManager
 from core.history_manager import HistoryManager
+from core.result_store import ResultStore
+from core.job_scheduler import JobScheduler
+from core.job_queue import JobStatus
+from core.batch_fanout import fan_out_batch, iter_batch_targets
+from core.endpoint_cluster import cluster_targets
+from core.shard_dump import ShardedDump
+from core.dump_planner import DumpCostPlanner, find_columns, format_duration, plan_database_dump
+from core.incremental_dump import IncrementalDump, find_monotonic_key
+from core.param_fanout import ParameterFanout
+from core.enum_pipeline import EnumerationPipeline
+from core.workflow import WorkflowRunner
+from core.technique_optimizer import suggest_technique
+from core.job_checkpoint import JobCheckpoint, build_resume_builder
+from core.rate_budget import parse_host_rates, format_host_rates
+from core.fair_share import format_project_weights, parse_project_weights, project_label
+from core.failure_policy import RetryPolicy
+from core.concurrency_governor import ConcurrencyGovernor
+from core.worker_protocol import DEFAULT_PORT
+from core.shared_queue import DEFAULT_LEASE_SECONDS, SharedJobQueue, SharedQueueAgent
+from core.result_cache import decode_results
 
 
 class MainWindow(QMainWindow):
@@ -43,9 +68,35 @@ class MainWindow(QMainWindow):
         # 初始化组件
         self.config = ConfigManager()
         self.history = HistoryManager()
-        self.engine = None
-        self.current_scan_id = None
-        self.scan_start_time = None
+        # 任务调度器：每个扫描任务有独立的引擎、结果存储和日志
+        self.scheduler = JobScheduler(
+            history=self.history,
+            parent=self,
+            max_concurrent=self.config.get_int("queue", "max_concurrent", 2),
+            per_host_limit=self.config.get_int("queue", "per_host_limit", 1)
+        )
+        self.scheduler.set_rate_limits(
+            self.config.get_float("rate_limit", "default_rate", 0.0),
+            parse_host_rates(self.config.get("rate_limit", "hosts", ""))
+        )
+        self.scheduler.result_ttl = self.config.get_int("result_cache", "ttl_minutes", 60) * 60
+        self.scheduler.set_project_weights(parse_project_weights(self.config.get("queue", "project_weights", "")))
+        self.scheduler.preempt_enabled = self.config.get_bool("queue", "preempt", False)
+        self._configure_retry()
+        self._configure_output()
+        self.scheduler.output_evicted.connect(self._on_output_evicted)
+        # 自适应并发：按本机负载调整最大并发
+        self.governor = ConcurrencyGovernor(self.scheduler, parent=self)
+        self._configure_governor()
+        self._viewing_job_id = None  # 日志和结果标签页当前显示的任务
+        self._group_dialogs = {}  # {group_id: BatchSummaryDialog}
+        self._coordinators = {}  # {group_id: 分片提取等多任务协调器}
+        self.shared_agent = None  # 共享任务队列领取器（启用共享队列时）
+        self._shared_config = None  # 当前共享队列的 (路径, 租约时长)
+        self._shared_dialog = None
+        # 当前显示任务的结果存储，引擎写入，界面按版本号读取
+        self.result_store = ResultStore()
+        self._result_version = -1
         self.elapsed_timer = QTimer()
         self.elapsed_timer.timeout.connect(self._update_elapsed_time)
         
@@ -65,13 +116,20 @@ class MainWindow(QMainWindow):
         # 查找 sqlmap
         self._find_sqlmap()
         
+        # 连接调度器信号
+        self._connect_scheduler()
+        
         # 加载保存的配置
         self.load_config()
+        self._refresh_learned_technique(apply=False)
         
         # 启动命令预览定时器（每秒更新一次）
         self.preview_timer = QTimer(self)
         self.preview_timer.timeout.connect(self._update_command_preview)
         self.preview_timer.start(1000)  # 1秒更新一次
+        
+        # 窗口显示后检查上次中断的任务
+        QTimer.singleShot(0, self._offer_resume_interrupted)
     
     def _load_and_apply_theme(self):
         """加载并应用保存的主题"""
@@ -208,6 +266,7 @@ class MainWindow(QMainWindow):
         self.target_panel.target_changed.connect(self._update_command_preview)
         self.target_panel.url_input.textChanged.connect(self._update_command_preview)
         self.scan_panel.mode_changed.connect(lambda _: self._update_command_preview())
+        self.scan_panel.mode_changed.connect(self._on_scan_mode_changed)
         
         return panel
     
@@ -228,10 +287,47 @@ class MainWindow(QMainWindow):
         
         # 结果面板
         self.result_panel = ResultPanel()
+        self.result_panel.set_result_store(self.result_store)
         self.result_panel.db_selected.connect(self._on_db_selected)  # 假设需要处理数据库选择
         self.result_panel.dump_requested.connect(self._on_dump_requested)
+        self.result_panel.sharded_dump_requested.connect(self._on_sharded_dump_requested)
+        self.result_panel.estimate_requested.connect(self._on_estimate_requested)
+        self.result_panel.incremental_dump_requested.connect(self._on_incremental_dump_requested)
         tabs.addTab(self.result_panel, "📊 结果")
         
+        # 任务队列面板
+        self.queue_panel = QueuePanel()
+        self.queue_panel.set_limits(self.scheduler.queue.max_concurrent, self.scheduler.queue.per_host_limit)
+        self.queue_panel.job_selected.connect(self._view_job)
+        self.queue_panel.move_requested.connect(self.scheduler.move_job)
+        self.queue_panel.cancel_requested.connect(self._cancel_job)
+        self.queue_panel.retry_requested.connect(self.scheduler.retry)
+        self.queue_panel.clear_finished_requested.connect(self.scheduler.clear_finished)
+        self.queue_panel.limits_changed.connect(self._on_queue_limits_changed)
+        self.queue_panel.set_default_rate(self.scheduler.queue.rate_budget.default_rate)
+        self.queue_panel.default_rate_changed.connect(self._on_default_rate_changed)
+        self.queue_panel.host_rate_changed.connect(self._on_host_rate_changed)
+        self.queue_panel.set_project(self.config.get("queue", "project", ""), self.scheduler.preempt_enabled)
+        self.queue_panel.project_changed.connect(lambda project: self.config.set("queue", "project", project))
+        self.queue_panel.project_weight_changed.connect(self._on_project_weight_changed)
+        self.queue_panel.preempt_changed.connect(self._on_preempt_changed)
+        self.queue_panel.set_governor(
+            self.config.get_bool("governor", "enabled", False),
+            self.governor.min_jobs, self.governor.max_jobs
+        )
+        self.queue_panel.governor_changed.connect(self._on_governor_changed)
+        self.queue_panel.export_load_requested.connect(self._export_load_samples)
+        self.governor.sampled.connect(lambda sample: self.queue_panel.add_load_sample(sample, self.governor.lag_high_ms))
+        self.governor.decision.connect(lambda text: self.log_panel.append_line(text, "自适应并发"))
+        if self.config.get_bool("governor", "enabled", False):
+            self.governor.start()
+        self.queue_panel.group_summary_requested.connect(self._show_group_summary)
+        tabs.addTab(self.queue_panel, "📋 队列")
+        # 远程执行节点
+        self.scheduler.workers.message.connect(lambda text: self.log_panel.append_line(text, "执行节点"))
+        self._configure_workers()
+        self._configure_shared_queue()
+        
         # AI 分析面板
         self.ai_panel = AIPanel(self.config)
         self.ai_panel.set_log_getter(lambda: self.log_panel.get_log())
@@ -340,6 +436,10 @@ class MainWindow(QMainWindow):
         clear_history_action.triggered.connect(self.clear_history)
         tool_menu.addAction(clear_history_action)
         
+        shared_queue_action = QAction("🌐 共享任务队列", self)
+        shared_queue_action.triggered.connect(self.show_shared_queue)
+        tool_menu.addAction(shared_queue_action)
+        
         tool_menu.addSeparator()
         
         # AI 分析菜单项
@@ -383,6 +483,23 @@ class MainWindow(QMainWindow):
         # 分隔符
         status_bar.addWidget(QLabel("  |  "))
         
+        # 结果占用
+        self.memory_label = QLabel("结果: 0 B")
+        self.memory_label.setToolTip("提取数据占用的内存 / SQLite 导出文件大小")
+        status_bar.addWidget(self.memory_label)
+        
+        # 分隔符
+        status_bar.addWidget(QLabel("  |  "))
+        
+        # 指纹缓存节省的检测时间
+        self.fingerprint_label = QLabel("")
+        self.fingerprint_label.setToolTip("目标指纹缓存命中后跳过的注入检测时间（累计）")
+        status_bar.addWidget(self.fingerprint_label)
+        self._update_fingerprint_label()
+        
+        # 分隔符
+        status_bar.addWidget(QLabel("  |  "))
+        
         # sqlmap 路径
         self.sqlmap_label = QLabel("SQLMap: 未找到")
         status_bar.addWidget(self.sqlmap_label)
@@ -397,6 +514,7 @@ class MainWindow(QMainWindow):
     def _find_sqlmap(self):
         """查找 sqlmap"""
         path = SqlmapFinder.find_sqlmap()
+        self.scheduler.sqlmap_path = path
         if path:
             self.sqlmap_path = path
             self.sqlmap_label.setText(f"SQLMap: {os.path.basename(os.path.dirname(path))}")
@@ -408,8 +526,13 @@ class MainWindow(QMainWindow):
     
     def _build_command(self) -> str:
         """构建 sqlmap 命令"""
+        builder = self._create_builder()
+        return builder.build() if builder else ""
+    
+    def _create_builder(self):
+        """根据界面配置创建命令构建器（未配置目标时返回 None）"""
         if not self.sqlmap_path:
-            return ""
+            return None
         
         builder = CommandBuilder(f"python \"{self.sqlmap_path}\"")
         
@@ -434,14 +557,14 @@ class MainWindow(QMainWindow):
                         f.write(request_content)
                     builder.set_request_file(temp_file)
                 except Exception:
-                    return ""
+                    return None
             else:
-                return ""
+                return None
         else:
             # 普通 URL 模式或批量文件模式
             target = self.target_panel.get_target()
             if not target:
-                return ""
+                return None
             
             if self.target_panel.is_file_mode():
                 builder.set_file(target)
@@ -474,12 +597,12 @@ class MainWindow(QMainWindow):
         string_match = self.scan_panel.get_string_match()
         if string_match:
             builder.set_string_match(string_match)
-            
+        
         # 注入前缀/后缀
         prefix = self.advanced_panel.get_prefix()
         if prefix:
             builder.set_prefix(prefix)
-            
+        
         suffix = self.advanced_panel.get_suffix()
         if suffix:
             builder.set_suffix(suffix)
@@ -506,6 +629,7 @@ class MainWindow(QMainWindow):
         # 数据提取
         builder.dump_data(self.scan_panel.get_dump())
         builder.dump_all(self.scan_panel.get_dump_all())
+        builder.set_dump_format(self.scan_panel.get_dump_format())
         
         # 搜索功能
         search_enabled, search_type, search_keyword = self.scan_panel.get_search()
@@ -527,6 +651,9 @@ class MainWindow(QMainWindow):
         builder.set_timeout(self.advanced_panel.get_timeout())
         builder.set_retries(self.advanced_panel.get_retries())
         builder.set_delay(self.advanced_panel.get_delay())
+        builder.set_auto_tune(self.advanced_panel.is_auto_tune())
+        builder.set_use_fingerprint(self.advanced_panel.use_fingerprint())
+        builder.set_project(self.queue_panel.get_project())
         
         # 高级选项 - 通用
         builder.set_batch(self.advanced_panel.is_batch_mode())
@@ -636,7 +763,7 @@ class MainWindow(QMainWindow):
         if file_local and file_remote:
             builder.file_write(file_local, file_remote)
         
-        return builder.build()
+        return builder
     
     def _update_command_preview(self):
         """更新命令预览"""
@@ -719,10 +846,10 @@ class MainWindow(QMainWindow):
         dialog.exec()
     
     def _update_elapsed_time(self):
-        """更新耗时"""
-        if self.scan_start_time:
-            elapsed = datetime.now() - self.scan_start_time
-            hours, remainder = divmod(int(elapsed.total_seconds()), 3600)
+        """更新耗时（当前显示的任务）"""
+        job = self.scheduler.get_job(self._viewing_job_id) if self._viewing_job_id else None
+        if job and job.started_at:
+            hours, remainder = divmod(int(job.elapsed), 3600)
             minutes, seconds = divmod(remainder, 60)
             self.elapsed_label.setText(f"耗时: {hours:02d}:{minutes:02d}:{seconds:02d}")
             self.result_panel.update_stats(
@@ -732,7 +859,7 @@ class MainWindow(QMainWindow):
     # ==================== 扫描控制 ====================
     
     def start_scan(self):
-        """开始扫描"""
+        """开始扫描（加入任务队列，有空闲槽位时立即执行）"""
         # 检查 sqlmap
         if not self.sqlmap_path:
             QMessageBox.warning(self, "警告", "未找到 sqlmap，请检查配置。")
@@ -746,7 +873,6 @@ class MainWindow(QMainWindow):
             if not request_file and not request_content:
                 QMessageBox.warning(self, "警告", "请选择请求包文件或粘贴请求包内容。")
                 return
-            target = request_file if request_file else "请求包扫描"
         else:
             # URL 模式或批量文件模式
             target = self.target_panel.get_target()
@@ -756,69 +882,555 @@ class MainWindow(QMainWindow):
         
         # 构建命令
         try:
-            command = self._build_command()
+            builder = self._create_builder()
+            if builder is None:
+                raise ValueError("目标配置无效")
+            self._freeze_request_content(builder)
+            builder.build()
         except Exception as e:
             QMessageBox.warning(self, "错误", f"构建命令失败: {str(e)}")
             return
         
-        # 清空之前的结果
+        mode = self.scan_panel.get_current_mode()
+        
+        # 批量目标按端点聚类去重（开始前确认精简结果）
+        targets = None
+        if self.target_panel.is_cluster_mode():
+            proceed, targets = self._cluster_batch_targets(builder)
+            if not proceed:
+                return
+            if targets and not self.target_panel.is_fanout_mode():
+                self._write_batch_targets(builder, targets)
+        
+        # 批量文件拆分为每个目标一个任务
+        if self.target_panel.is_fanout_mode():
+            try:
+                group_id, jobs = fan_out_batch(
+                    self.scheduler, builder,
+                    max_concurrent=self.target_panel.get_fanout_concurrency(),
+                    priority=self.queue_panel.get_priority(),
+                    scan_mode=mode,
+                    targets=targets
+                )
+            except Exception as e:
+                QMessageBox.warning(self, "错误", f"拆分批量文件失败: {str(e)}")
+                return
+            self.status_label.setText(f"已拆分为 {len(jobs)} 个任务 ({group_id})")
+            self._show_group_summary(group_id)
+            return
+        
+        # 每个参数一个检测任务
+        if self.target_panel.is_param_split_mode():
+            coordinator = ParameterFanout(
+                self.scheduler, builder,
+                max_concurrent=self.target_panel.get_param_split_concurrency(),
+                stop_after=self.target_panel.get_param_stop_after(),
+                priority=self.queue_panel.get_priority(),
+                scan_mode=mode, parent=self
+            )
+            coordinator.message.connect(self.status_label.setText)
+            try:
+                group_id = coordinator.start()
+            except Exception as e:
+                QMessageBox.warning(self, "错误", f"按参数拆分失败: {str(e)}")
+                return
+            self._coordinators[group_id] = coordinator
+            self._show_group_summary(group_id)
+            return
+        
+        # 工作流：按依赖和条件自动执行各节点
+        workflow = self.scan_panel.get_workflow()
+        if workflow and not self.target_panel.is_file_mode():
+            self._start_workflow(WorkflowRunner(self.scheduler, builder, workflow,
+                                                priority=self.queue_panel.get_priority(), parent=self))
+            return
+        
+        # 自动枚举流水线：数据库 → 表 → 列 → 数据逐阶段自动执行
+        pipeline = self.scan_panel.get_pipeline_config()
+        if pipeline and not self.target_panel.is_file_mode():
+            coordinator = EnumerationPipeline(
+                self.scheduler, builder,
+                priority=self.queue_panel.get_priority(),
+                parent=self, **pipeline
+            )
+            coordinator.message.connect(self.status_label.setText)
+            group_id = coordinator.start()
+            self._coordinators[group_id] = coordinator
+            self._show_group_summary(group_id)
+            return
+        
+        # 共享任务队列：发布后由有空闲名额的实例（可能是本实例）领取执行
+        if self.shared_agent:
+            try:
+                shared_id = self.shared_agent.publish(builder, priority=self.queue_panel.get_priority(), scan_mode=mode)
+            except Exception as e:
+                QMessageBox.warning(self, "错误", f"发布到共享任务队列失败: {str(e)}")
+                return
+            self.status_label.setText(f"任务已发布到共享队列 #{shared_id}")
+            return
+        
+        # 相同规格的扫描在有效期内完成过：可直接显示缓存结果
+        cached = self.scheduler.find_cached_result(builder)
+        if cached and not self._confirm_fresh_scan(cached):
+            return
+        
+        # 加入队列（选项在此刻冻结，之后修改界面不影响该任务）
+        job = self.scheduler.submit(builder, priority=self.queue_panel.get_priority(), scan_mode=mode)
+        
+        if job.status == JobStatus.PENDING:
+            pending = len(self.scheduler.queue.pending_jobs())
+            self.status_label.setText(f"任务 #{job.job_id} 已加入队列（排队 {pending} 个）")
+    
+    def _cluster_batch_targets(self, builder: CommandBuilder):
+        """
+        按端点聚类批量目标并确认精简结果
+        
+        返回:
+            (是否继续, 代表目标列表)；选择扫描全部目标时代表目标为 None
+        """
+        try:
+            result = cluster_targets(iter_batch_targets(builder.snapshot().get('_file', '')),
+                                     keep=self.target_panel.get_cluster_keep())
+        except OSError as e:
+            QMessageBox.warning(self, "错误", f"读取批量文件失败: {str(e)}")
+            return False, None
+        if not result.total:
+            QMessageBox.warning(self, "警告", "批量文件中没有有效的目标。")
+            return False, None
+        
+        box = QMessageBox(self)
+        box.setWindowTitle("端点聚类")
+        box.setIcon(QMessageBox.Icon.Question)
+        box.setText(result.describe() + "。")
+        box.setInformativeText("只有参数值不同的 URL 归为同一端点，每个端点只扫描代表目标。")
+        box.setDetailedText("目标数最多的端点:\n" + "\n".join(
+            f"{cluster.count:>7}  {cluster.label}" for cluster in result.largest()
+        ))
+        cluster_btn = box.addButton(f"扫描 {len(result.targets)} 个代表目标", QMessageBox.ButtonRole.AcceptRole)
+        all_btn = box.addButton("扫描全部目标", QMessageBox.ButtonRole.DestructiveRole)
+        box.addButton("取消", QMessageBox.ButtonRole.RejectRole)
+        box.setDefaultButton(cluster_btn)
+        box.exec()
+        
+        if box.clickedButton() is cluster_btn:
+            self.log_panel.append_line(result.describe(), "端点聚类")
+            return True, result.targets
+        return box.clickedButton() is all_btn, None
+    
+    def _write_batch_targets(self, builder: CommandBuilder, targets: list):
+        """精简后的目标写入新的批量文件（不拆分任务时仍由单个 sqlmap 进程扫描）"""
+        import tempfile
+        fd, path = tempfile.mkstemp(prefix="sqlmap_gui_targets_", suffix=".txt")
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write("\n".join(targets) + "\n")
+        builder.set_file(path)
+    
+    def _confirm_fresh_scan(self, cached: dict) -> bool:
+        """
+        询问显示缓存结果还是重新扫描
+        
+        返回:
+            True 表示重新扫描；选择显示缓存结果或取消时返回 False
+        """
+        finished = datetime.fromisoformat(cached['created_at'])
+        minutes = int((datetime.now() - finished).total_seconds() // 60)
+        box = QMessageBox(self)
+        box.setWindowTitle("结果缓存")
+        box.setIcon(QMessageBox.Icon.Question)
+        box.setText(f"{minutes} 分钟前已完成相同目标和选项的扫描（{finished.strftime('%H:%M:%S')}）。")
+        box.setInformativeText("可直接显示缓存的结果，或忽略缓存重新扫描。")
+        cached_btn = box.addButton("⚡ 显示缓存结果", QMessageBox.ButtonRole.AcceptRole)
+        fresh_btn = box.addButton("🔄 重新扫描", QMessageBox.ButtonRole.DestructiveRole)
+        box.addButton("取消", QMessageBox.ButtonRole.RejectRole)
+        box.setDefaultButton(cached_btn)
+        box.exec()
+        
+        if box.clickedButton() is cached_btn:
+            self._show_cached_result(cached)
+        return box.clickedButton() is fresh_btn
+    
+    def _show_cached_result(self, cached: dict, title: str = "缓存结果"):
+        """在日志和结果标签页中显示缓存的结果（title 为结果来源的说明）"""
+        try:
+            store = decode_results(cached['results'])
+        except Exception as e:
+            QMessageBox.warning(self, "错误", f"读取缓存结果失败: {str(e)}")
+            return
+        
+        self._viewing_job_id = None
+        self.queue_panel.set_viewing_job(None)
+        
         self.log_panel.clear()
-        self.result_panel.clear_all()
+        self.log_panel.append(cached.get('log') or "")
+        self.log_panel.append_line(f"显示 {cached['created_at'][:19].replace('T', ' ')} 完成的扫描的{title}", "结果缓存")
         
-        # 更新 UI 状态
-        self._set_scanning_state(True)
+        self.result_store = store
+        self._result_version = -1
+        self.result_panel.clear_all()
+        self.result_panel.set_result_store(store)
+        self._on_result(store.version)
         
-        # 记录历史
-        mode = self.scan_panel.get_current_mode()
-        self.current_scan_id = self.history.add_scan(target, command, mode)
+        self.status_label.setText(f"已显示{title}（未重新扫描）")
+        self._update_scanning_state()
+    
+    def _freeze_request_content(self, builder: CommandBuilder):
+        """粘贴的请求包写入任务专属文件，避免排队期间被共享临时文件覆盖"""
+        if not self.target_panel.is_request_mode() or self.target_panel.get_request_file():
+            return
+        import tempfile
+        fd, path = tempfile.mkstemp(prefix="sqlmap_gui_request_", suffix=".txt")
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(self.target_panel.get_request_content())
+        builder.set_request_file(path)
+    
+    def _start_workflow(self, runner: WorkflowRunner):
+        """启动工作流执行器并显示任务组汇总"""
+        runner.message.connect(self.status_label.setText)
+        group_id = runner.start()
+        self._coordinators[group_id] = runner
+        self._show_group_summary(group_id)
+    
+    def _offer_resume_workflows(self) -> set:
+        """提示继续上次中断的工作流，返回这些工作流的扫描记录ID（不再按单个任务恢复）"""
+        try:
+            runs = self.history.get_interrupted_workflow_runs()
+        except Exception:
+            return set()
+        if not runs:
+            return set()
         
-        # 开始计时
-        self.scan_start_time = datetime.now()
-        self.elapsed_timer.start(1000)
+        names = "\n".join(f"• {run['name']} - {run['target']}" for run in runs)
+        reply = QMessageBox.question(
+            self, "继续工作流",
+            f"上次有 {len(runs)} 个工作流未完成：\n{names}\n\n是否继续执行？（已完成的节点不会重复执行）",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+        )
+        sqlmap_path = f"python \"{self.sqlmap_path}\"" if self.sqlmap_path else None
+        history_ids = set()
+        for run in runs:
+            history_ids.update(run['state'].get('history_ids', []))
+            if reply == QMessageBox.StandardButton.Yes:
+                try:
+                    self._start_workflow(WorkflowRunner.resume(self.scheduler, run, sqlmap_path,
+                                                               priority=self.queue_panel.get_priority(),
+                                                               parent=self))
+                    continue
+                except Exception as e:
+                    self.log_panel.append_line(f"继续工作流失败 ({run['name']}): {str(e)}", "错误")
+            self.history.mark_workflow_run(run['id'], 'interrupted')
+        return history_ids
+    
+    def _offer_resume_interrupted(self):
+        """提示恢复上次中断的任务（按检查点重建命令，复用原会话）"""
+        try:
+            scans = self.history.get_interrupted_scans()
+        except Exception:
+            return
+        # 先取出中断的任务：继续工作流时新提交的任务也是 running 状态
+        workflow_scans = self._offer_resume_workflows()
+        for scan in [scan for scan in scans if scan['id'] in workflow_scans]:
+            self.history.mark_interrupted(scan['id'])
+            scans.remove(scan)
+        if not scans:
+            return
         
-        # 启动引擎 - 传入 self 作为父对象确保线程生命周期与主窗口绑定
-        self.engine = SqlmapEngine(command, self.sqlmap_path, parent=self)
-        # 使用队列连接确保信号在主线程中处理
-        self.engine.output_received.connect(self._on_output, Qt.ConnectionType.QueuedConnection)
-        self.engine.progress_updated.connect(self._on_progress, Qt.ConnectionType.QueuedConnection)
-        self.engine.result_found.connect(self._on_result, Qt.ConnectionType.QueuedConnection)
-        self.engine.scan_finished.connect(self._on_finished, Qt.ConnectionType.QueuedConnection)
-        self.engine.status_changed.connect(self._on_status_changed, Qt.ConnectionType.QueuedConnection)
-        self.engine.start()
+        dialog = ResumeJobsDialog(scans, self)
+        selected = dialog.get_selected_scans() if dialog.exec() else []
+        sqlmap_path = f"python \"{self.sqlmap_path}\"" if self.sqlmap_path else None
         
-        self.log_panel.start_logging()
+        resumed = 0
+        for scan in scans:
+            if scan in selected:
+                checkpoint = JobCheckpoint.from_dict(scan['checkpoint'])
+                try:
+                    builder = build_resume_builder(scan['options'], checkpoint, sqlmap_path,
+                                                   skip_rows=dialog.skip_dumped_rows())
+                    self.scheduler.submit(builder, priority=self.queue_panel.get_priority(),
+                                          scan_mode=scan.get('scan_mode') or "恢复任务",
+                                          resume_checkpoint=checkpoint.to_dict())
+                    resumed += 1
+                except Exception as e:
+                    self.log_panel.append_line(f"恢复任务失败 ({scan.get('target', '')}): {str(e)}", "错误")
+            self.history.mark_interrupted(scan['id'])
+        
+        if resumed:
+            self.status_label.setText(f"已恢复 {resumed} 个中断的任务")
+    
+    def _show_group_summary(self, group_id: str):
+        """显示任务组汇总（非模态）"""
+        dialog = self._group_dialogs.get(group_id)
+        if dialog is None:
+            dialog = BatchSummaryDialog(self.scheduler, group_id, self)
+            dialog.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+            dialog.job_selected.connect(self._view_job)
+            dialog.destroyed.connect(lambda _=None, gid=group_id: self._group_dialogs.pop(gid, None))
+            self._group_dialogs[group_id] = dialog
+        dialog.show()
+        dialog.raise_()
+        dialog.activateWindow()
     
     def stop_scan(self):
-        """停止扫描"""
-        if self.engine and self.engine.isRunning():
-            self.engine.stop()
+        """停止当前显示的任务"""
+        if self._viewing_job_id is not None:
+            self._cancel_job(self._viewing_job_id)
+    
+    def _cancel_job(self, job_id: int):
+        """取消任务"""
+        job = self.scheduler.get_job(job_id)
+        was_running = job is not None and job.status == JobStatus.RUNNING
+        if self.scheduler.cancel(job_id) and was_running and job_id == self._viewing_job_id:
             self.log_panel.append_line("用户停止扫描", "WARNING")
     
-    def _set_scanning_state(self, scanning: bool):
-        """设置扫描状态"""
-        self.start_btn.setEnabled(not scanning)
-        self.stop_btn.setEnabled(scanning)
-        self.progress_bar.setVisible(scanning)
+    def _view_job(self, job_id: int):
+        """在日志和结果标签页中显示指定任务"""
+        job = self.scheduler.get_job(job_id)
+        if not job:
+            return
+        
+        self._viewing_job_id = job_id
+        self.queue_panel.set_viewing_job(job_id)
         
-        if scanning:
-            self.status_indicator.setText("● 扫描中")
+        # 日志
+        self.log_panel.clear()
+        self.log_panel.append("".join(job.log))
+        
+        # 结果
+        self.result_store = job.store
+        self._result_version = -1
+        self.result_panel.clear_all()
+        self.result_panel.set_result_store(job.store)
+        self._on_result(job.store.version)
+        
+        self._update_elapsed_time()
+        self._update_scanning_state()
+    
+    def _update_scanning_state(self):
+        """根据任务队列和当前显示的任务更新界面状态"""
+        active = self.scheduler.active_count()
+        job = self.scheduler.get_job(self._viewing_job_id) if self._viewing_job_id else None
+        viewing_running = job is not None and job.status == JobStatus.RUNNING
+        
+        # 扫描进行中仍可继续添加任务
+        self.start_btn.setText("➕ 加入队列" if active else "▶ 开始扫描")
+        self.stop_btn.setEnabled(viewing_running)
+        self.progress_bar.setVisible(viewing_running)
+        
+        if active:
+            self.status_indicator.setText(f"● 扫描中 ({active})")
             self.status_indicator.setStyleSheet(f"color: {COLORS['warning']};")
-            self.status_label.setText("扫描中...")
+            if not self.elapsed_timer.isActive():
+                self.elapsed_timer.start(1000)
         else:
             self.status_indicator.setText("● 就绪")
             self.status_indicator.setStyleSheet(f"color: {COLORS['success']};")
-            self.status_label.setText("就绪")
+            self.elapsed_timer.stop()
+    
+    def _connect_scheduler(self):
+        """连接任务调度器信号"""
+        self.scheduler.job_started.connect(self._on_job_started)
+        self.scheduler.job_output.connect(self._on_output)
+        self.scheduler.job_progress.connect(self._on_progress)
+        self.scheduler.job_result.connect(self._on_job_result)
+        self.scheduler.job_status.connect(self._on_status_changed)
+        self.scheduler.job_finished.connect(self._on_finished)
+        self.scheduler.queue_changed.connect(self._on_queue_changed)
+        self.scheduler.fingerprint_hit.connect(self._update_fingerprint_label)
+        self.scheduler.job_preempted.connect(self._on_job_preempted)
+        self.scheduler.job_retrying.connect(self._on_job_retrying)
+    
+    def _on_queue_changed(self):
+        """任务队列变化"""
+        self.queue_panel.update_jobs(self.scheduler.jobs())
+        self.queue_panel.update_host_rates(self.scheduler.host_rate_stats())
+        self.queue_panel.update_projects(self.scheduler.project_stats())
+        self.queue_panel.update_workers(self.scheduler.worker_stats())
+        self._update_scanning_state()
+    
+    def _on_queue_limits_changed(self, max_concurrent: int, per_host_limit: int):
+        """并发限制变化"""
+        self.scheduler.set_limits(max_concurrent, per_host_limit)
+        self.config.set("queue", "max_concurrent", max_concurrent)
+        self.config.set("queue", "per_host_limit", per_host_limit)
+    
+    def _configure_workers(self):
+        """按配置开始或停止接受远程执行节点连接（端口、令牌或监听地址变化时重新监听）"""
+        workers = self.scheduler.workers
+        if not self.config.get_bool("workers", "enabled", False):
+            if workers.is_listening:
+                workers.stop()
+                self.log_panel.append_line("已停止接受执行节点连接", "执行节点")
+            return
+        port = self.config.get_int("workers", "port", DEFAULT_PORT)
+        token = self.config.get("workers", "token", "")
+        host = "0.0.0.0" if self.config.get_bool("workers", "allow_lan", False) else "127.0.0.1"
+        if (not workers.is_listening or workers.port != port or workers.token != token
+                or workers.host != host):
+            workers.start(port, token, host)
     
-    def _on_output(self, text: str):
+    def _configure_shared_queue(self):
+        """按配置连接或断开共享任务队列（路径或租约时长变化时重新连接）"""
+        enabled = self.config.get_bool("shared_queue", "enabled", False)
+        path = self.config.get("shared_queue", "path", "").strip()
+        config = (path, self.config.get_int("shared_queue", "lease_seconds", DEFAULT_LEASE_SECONDS))
+        if self.shared_agent and (not enabled or config != self._shared_config):
+            self.shared_agent.stop()
+            self.shared_agent = None
+            if self._shared_dialog:
+                self._shared_dialog.close()
+                self._shared_dialog = None
+            self.log_panel.append_line("已断开共享任务队列，未完成的任务已归还", "共享队列")
+        if not enabled or not path or self.shared_agent:
+            return
+        try:
+            queue = SharedJobQueue(path)
+        except Exception as e:
+            self.log_panel.append_line(f"无法打开共享任务队列 {path}: {e}", "共享队列")
+            return
+        self.shared_agent = SharedQueueAgent(self.scheduler, queue, config[1], parent=self)
+        self.shared_agent.message.connect(lambda text: self.log_panel.append_line(text, "共享队列"))
+        self.shared_agent.start()
+        self._shared_config = config
+        self.log_panel.append_line(f"已连接共享任务队列 {path}（本实例: {self.shared_agent.owner}）", "共享队列")
+    
+    def show_shared_queue(self):
+        """显示共享任务队列"""
+        if not self.shared_agent:
+            QMessageBox.information(self, "提示", "未启用共享任务队列，请在 设置 → 执行节点 中启用并选择共享数据库。")
+            return
+        if self._shared_dialog is None:
+            self._shared_dialog = SharedQueueDialog(self.shared_agent, self)
+            self._shared_dialog.view_requested.connect(self._show_shared_result)
+        self._shared_dialog.show()
+        self._shared_dialog.raise_()
+    
+    def _show_shared_result(self, record: dict):
+        """显示共享任务的结果"""
+        finished = datetime.fromtimestamp(record['finished_at']).isoformat() if record.get('finished_at') else ""
+        self._show_cached_result({'results': record['results'], 'log': record.get('log'), 'created_at': finished},
+                                 f"共享任务 #{record['id']} 的结果")
+    
+    def _configure_governor(self):
+        """从配置读取自适应并发的范围和阈值"""
+        self.governor.configure(
+            self.config.get_int("governor", "min_jobs", 1),
+            self.config.get_int("governor", "max_jobs", max(8, self.scheduler.queue.max_concurrent)),
+            self.config.get_int("governor", "cpu_high", 85),
+            self.config.get_int("governor", "memory_high", 80),
+            self.config.get_int("governor", "memory_pause", 90),
+            self.config.get_int("governor", "lag_high_ms", 250)
+        )
+    
+    def _configure_retry(self):
+        """从配置读取临时故障的自动重试策略"""
+        self.scheduler.retry_policy = RetryPolicy(
+            self.config.get_int("retry", "max_retries", 2),
+            self.config.get_float("retry", "base_delay", 15.0),
+            self.config.get_float("retry", "max_delay", 600.0)
+        )
+    
+    def _configure_output(self):
+        """从配置读取任务输出目录的位置和磁盘配额"""
+        self.scheduler.output.configure(
+            self.config.get("output", "root", ""),
+            self.config.get_int("output", "quota_mb", 2048),
+            self.config.get_bool("output", "isolate", True)
+        )
+    
+    def _on_output_evicted(self, count: int, size: int):
+        """超出磁盘配额，删除了最久未使用的任务输出目录"""
+        self.log_panel.append_line(
+            f"输出目录超出磁盘配额，已删除 {count} 个最久未使用的任务目录（释放 {self._format_size(size)}）", "调度")
+    
+    def _on_governor_changed(self, enabled: bool, min_jobs: int, max_jobs: int):
+        """自适应并发开关或范围变化（关闭时恢复手动设置的最大并发）"""
+        self.config.set("governor", "enabled", enabled)
+        self.config.set("governor", "min_jobs", min_jobs)
+        self.config.set("governor", "max_jobs", max_jobs)
+        self._configure_governor()
+        if enabled and not self.governor.active:
+            self.governor.start()
+            self.log_panel.append_line(f"已启用自适应并发，范围 {min_jobs}-{max_jobs}", "自适应并发")
+        elif not enabled and self.governor.active:
+            self.governor.stop()
+            max_concurrent = self.config.get_int("queue", "max_concurrent", 2)
+            self.scheduler.set_limits(max_concurrent=max_concurrent)
+            self.queue_panel.set_limits(max_concurrent, self.scheduler.queue.per_host_limit)
+            self.log_panel.append_line("已关闭自适应并发", "自适应并发")
+    
+    def _export_load_samples(self, path: str):
+        """导出自适应并发的负载采样"""
+        try:
+            self.governor.export_csv(path)
+            QMessageBox.information(self, "导出成功", f"已导出 {len(self.governor.history)} 条采样到:\n{path}")
+        except OSError as e:
+            QMessageBox.critical(self, "导出失败", str(e))
+    
+    def _on_default_rate_changed(self, rate: float):
+        """默认单主机速率上限变化"""
+        self.scheduler.set_rate_limits(default_rate=rate)
+        self.config.set("rate_limit", "default_rate", rate)
+    
+    def _on_host_rate_changed(self, host: str, rate: float):
+        """单独设置主机速率上限（负数恢复默认）"""
+        self.scheduler.set_rate_limits(host_rates={host: rate if rate >= 0 else None})
+        self.config.set("rate_limit", "hosts", format_host_rates(self.scheduler.queue.rate_budget.host_rates))
+    
+    def _on_project_weight_changed(self, project: str, weight: float):
+        """设置项目权重（0 恢复默认）"""
+        self.scheduler.set_project_weights({project: weight if weight > 0 else None})
+        self.config.set("queue", "project_weights", format_project_weights(self.scheduler.queue.fair_share.weights))
+    
+    def _on_preempt_changed(self, enabled: bool):
+        """允许高优先级任务抢占（启用后立即检查是否需要抢占）"""
+        self.scheduler.preempt_enabled = enabled
+        self.config.set("queue", "preempt", enabled)
+        self.scheduler.set_limits()
+    
+    def _on_job_preempted(self, job_id: int, by_job_id: int):
+        """任务被抢占后重新排队"""
+        job = self.scheduler.get_job(job_id)
+        if job:
+            by = f"被任务 #{by_job_id} 抢占" if by_job_id else "被抢占"
+            self.log_panel.append_line(
+                f"任务 #{job_id}（{project_label(job.project)}）{by}，已重新排队", "调度")
+    
+    def _on_job_retrying(self, job_id: int, delay: float):
+        """任务遇到临时故障，等待自动重试"""
+        job = self.scheduler.get_job(job_id)
+        if job and job.failure:
+            self.log_panel.append_line(
+                f"任务 #{job_id} {job.failure.describe()}，{delay:.0f} 秒后自动重试", "调度")
+    
+    def _on_job_started(self, job_id: int):
+        """任务开始：当前没有正在显示的运行中任务时，切换到新任务"""
+        current = self.scheduler.get_job(self._viewing_job_id) if self._viewing_job_id else None
+        if current is None or current.status != JobStatus.RUNNING:
+            self._view_job(job_id)
+            self.log_panel.start_logging()
+            self.status_label.setText("扫描中...")
+    
+    def _on_output(self, job_id: int, text: str):
         """接收输出"""
-        self.log_panel.append(text)
+        if job_id == self._viewing_job_id:
+            self.log_panel.append(text)
     
-    def _on_progress(self, progress: int):
+    def _on_progress(self, job_id: int, progress: int):
         """更新进度"""
-        self.progress_bar.setValue(progress)
+        if job_id == self._viewing_job_id:
+            self.progress_bar.setValue(progress)
+    
+    def _on_job_result(self, job_id: int, version: int):
+        """任务结果更新"""
+        if job_id == self._viewing_job_id:
+            self._on_result(version)
     
-    def _on_result(self, results: dict):
-        """接收结果"""
+    def _on_result(self, version: int):
+        """结果有更新（只携带版本号，按需从结果存储读取）"""
+        if version <= self._result_version:
+            return
+        self._result_version = self.result_store.version
+        results = self.result_store.get_summary()
+        
         # 更新注入信息
         if results.get('injection_found'):
             info = []
@@ -830,6 +1442,10 @@ class MainWindow(QMainWindow):
                 info.append(f"当前数据库: {results['current_db']}")
             if results.get('current_user'):
                 info.append(f"当前用户: {results['current_user']}")
+            if results.get('is_dba') is not None:
+                info.append(f"DBA 权限: {'是' if results['is_dba'] else '否'}")
+            if results.get('banner'):
+                info.append(f"Banner: {results['banner']}")
             if results.get('injection_type'):
                 info.append(f"注入类型: {', '.join(results['injection_type'])}")
             
@@ -855,15 +1471,12 @@ class MainWindow(QMainWindow):
             if all_columns:
                 self.result_panel.set_columns_with_data(all_columns, columns_dict)
         
-        # 更新提取的数据内容
-        data_dict = results.get('data', {})
-        if data_dict:
-            # 存储数据供双击查看使用
-            self.result_panel.set_extracted_data(data_dict)
-            
+        # 更新提取的数据内容（data 中只有各表行数，数据行按需从结果存储读取）
+        data_counts = results.get('data', {})
+        if data_counts:
             # 同时将有数据的表添加到表列表中（如果还没有的话）
             current_db = results.get('current_db', '')
-            for table_name in data_dict.keys():
+            for table_name in data_counts.keys():
                 # 如果表名包含数据库前缀（如 patient.mg_doctor），提取数据库名和表名
                 if '.' in table_name:
                     parts = table_name.split('.', 1)
@@ -875,14 +1488,9 @@ class MainWindow(QMainWindow):
                 # 添加到表列表（避免重复），传入正确的数据库名
                 self.result_panel.add_table_if_not_exists(pure_table_name, db_name)
             
-            data_text = []
-            for table_name, rows in data_dict.items():
-                data_text.append(f"========== 表: {table_name} ==========")
-                for row in rows:
-                    data_text.append(row)
-                data_text.append("")
-            if data_text:
-                self.result_panel.set_data("\n".join(data_text))
+            self.result_panel.refresh_data_preview()
+        
+        self._update_memory_label()
         
         # 更新统计
         vuln_count = 1 if results.get('injection_found') else 0
@@ -895,38 +1503,72 @@ class MainWindow(QMainWindow):
             table_count=table_count
         )
     
-    def _on_finished(self, return_code: int):
-        """扫描完成"""
+    def _update_fingerprint_label(self, job_id: int = None, saved: float = 0.0):
+        """刷新指纹缓存节省时间（任务命中时在日志中提示本次节省的时间）"""
         try:
-            self._set_scanning_state(False)
-            self.elapsed_timer.stop()
-            self.log_panel.stop_logging()
-            
-            # 更新历史记录
-            if self.current_scan_id and self.engine:
-                try:
-                    results = self.engine.results
-                    self.history.complete_scan(
-                        self.current_scan_id,
-                        has_vuln=results.get('injection_found', False),
-                        vuln_count=1 if results.get('injection_found') else 0,
-                        dbms=results.get('dbms', ''),
-                        current_db=results.get('current_db', '')
-                    )
-                except Exception:
-                    pass
+            stats = self.history.get_fingerprint_stats()
+        except Exception:
+            return
+        minutes, seconds = divmod(int(stats['saved_seconds']), 60)
+        self.fingerprint_label.setText(f"指纹缓存: 命中 {stats['hits']} 次，节省 {minutes} 分 {seconds} 秒")
+        if job_id is not None:
+            self.log_panel.append_line(f"任务 #{job_id} 使用目标指纹缓存，节省约 {saved:.0f} 秒检测时间", "指纹缓存")
+    
+    def _update_memory_label(self):
+        """更新结果占用统计"""
+        usage = self.result_store.memory_usage()
+        text = f"结果: {self._format_size(usage['memory_bytes'])}"
+        if usage['disk_bytes']:
+            text += f" + 文件 {self._format_size(usage['disk_bytes'])}"
+        self.memory_label.setText(text)
+    
+    @staticmethod
+    def _format_size(size: int) -> str:
+        """格式化字节数"""
+        for unit in ("B", "KB", "MB"):
+            if size < 1024:
+                return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+            size /= 1024
+        return f"{size:.1f} GB"
+    
+    def _on_finished(self, job_id: int, return_code: int):
+        """任务结束（历史记录由调度器更新）"""
+        try:
+            if job_id == self._viewing_job_id:
+                self._update_elapsed_time()
+                
+                # 显示完成消息
+                if return_code == 0:
+                    self.log_panel.append_line("扫描完成", "SUCCESS")
+                else:
+                    job = self.scheduler.get_job(job_id)
+                    reason = f"，{job.failure.describe()}" if job and job.failure else ""
+                    self.log_panel.append_line(f"扫描结束 (返回码: {return_code}{reason})", "WARNING")
+                self.log_panel.stop_logging()
             
-            # 显示完成消息
-            if return_code == 0:
-                self.log_panel.append_line("扫描完成", "SUCCESS")
-            else:
-                self.log_panel.append_line(f"扫描结束 (返回码: {return_code})", "WARNING")
+            self._update_scanning_state()
+            # 检测结果已回写技术统计，更新历史学习的推荐（不改动已勾选的技术）
+            self._refresh_learned_technique(apply=False)
         except Exception:
             pass
     
-    def _on_status_changed(self, status: str):
+    def _on_scan_mode_changed(self, mode_id: str):
+        """切换到历史学习模式时按当前数据库类型提示重新计算推荐"""
+        if mode_id == "learned":
+            self._refresh_learned_technique()
+    
+    def _refresh_learned_technique(self, apply: bool = True):
+        """从注入技术统计计算推荐的技术组合（数据库类型提示取高级设置中的 --dbms）"""
+        try:
+            learned = suggest_technique(self.history, self.advanced_panel.get_dbms())
+        except Exception:
+            learned = None
+        self.scan_panel.set_learned_technique(learned, apply)
+    
+    def _on_status_changed(self, job_id: int, status: str):
         """状态变化"""
-        self.status_label.setText(status)
+        if job_id == self._viewing_job_id:
+            self.status_label.setText(status)
     
     # ==================== 菜单操作 ====================
     
@@ -969,7 +1611,7 @@ class MainWindow(QMainWindow):
     
     def show_settings(self):
         """显示设置"""
-        dialog = SettingsDialog(self.config, self)
+        dialog = SettingsDialog(self.config, self, history=self.history, output=self.scheduler.output)
         dialog.theme_changed.connect(self._on_theme_changed)
         dialog.settings_changed.connect(self._on_settings_changed)
         dialog.exec()
@@ -983,41 +1625,202 @@ class MainWindow(QMainWindow):
         """设置变化"""
         # 重新查找 sqlmap
         self._find_sqlmap()
+        self._configure_governor()
+        self.scheduler.result_ttl = self.config.get_int("result_cache", "ttl_minutes", 60) * 60
+        self._configure_retry()
+        self._configure_output()
+        self.scheduler.enforce_output_quota()
+        self._configure_workers()
+        self._configure_shared_queue()
     
     def _on_db_selected(self, db_name: str):
         """数据库选择变化"""
         pass
-
+    
     
     def _on_dump_requested(self, db_name: str):
-        """处理提取数据请求"""
-        # 1. 确认
-        reply = QMessageBox.question(
-            self, "确认提取", 
-            f"确定要提取数据库 '{db_name}' 的所有数据吗？\n\n这将会启动一个新的扫描任务。",
-            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
-            QMessageBox.StandardButton.No
+        """整库提取：每张表一个任务并行提取，预估行数少的表先提取"""
+        tables = self.result_panel.get_tables(db_name)
+        if not tables:
+            QMessageBox.information(
+                self, "提示",
+                f"数据库 '{db_name}' 暂无表列表，请先右键选择 '获取表列表'。"
+            )
+            return
+        
+        builder, job = self._derived_job_builder()
+        if builder is None:
+            QMessageBox.warning(self, "提示", "请先配置目标，或在队列中查看一个已检测到注入的任务")
+            return
+        
+        estimates = [self.result_panel.get_dump_estimate(db_name, table) for table in tables]
+        known = [estimate for estimate in estimates if estimate]
+        eta = ""
+        if known:
+            eta = f"\n已估算的 {len(known)} 张表串行提取约需 {format_duration(sum(e.seconds for e in known))}。"
+        workers, ok = QInputDialog.getInt(
+            self, "确认提取",
+            f"将提取数据库 '{db_name}' 的 {len(tables)} 张表，每张表一个任务。{eta}\n\n并行提取的表数：",
+            self.config.get_int("queue", "dump_workers", 4), 1, 32
         )
-        if reply != QMessageBox.StandardButton.Yes:
+        if not ok:
             return
-            
-        # 2. 配置扫描参数
-        # 切换到高级面板设置目标数据库
-        self.advanced_panel.set_target_db(db_name)
-        
-        # 切换到扫描面板设置 dump
-        self.scan_panel.set_dump(True)  # 或者 set_dump_all(True) 取決于需求，这里上下文是提取全部数据
-        # 上下文里的菜单是 "提取全部数据"，所以可能意图是 dump-all 或者是 dump 当前DB的所有表
-        # dump + -D dbname 通常会 dump 该库下所有表
-        
-        # 3. 提示用户
-        QMessageBox.information(
-            self, "准备就绪", 
-            f"已配置提取数据库 '{db_name}' 的参数。\n\n请点击 '开始扫描' 按钮启动任务。"
+        self.config.set("queue", "dump_workers", workers)
+        self.config.save()
+        
+        # 已知行数用于排序：--count 结果优先，其次是已提取的数据行数
+        counts = {}
+        if job is not None:
+            summary = job.store.get_summary()
+            counts = {**summary.get('data', {}), **summary.get('counts', {})}
+        
+        try:
+            group_id, jobs = plan_database_dump(
+                self.scheduler, builder, db_name, tables,
+                max_concurrent=workers, counts=counts,
+                priority=self.queue_panel.get_priority(),
+                scan_mode="整库提取"
+            )
+        except Exception as e:
+            QMessageBox.warning(self, "错误", f"创建提取任务失败: {str(e)}")
+            return
+        self.status_label.setText(f"已为 {db_name} 创建 {len(jobs)} 个表提取任务 ({group_id})")
+        self._show_group_summary(group_id)
+    
+    def _derived_job_builder(self):
+        """
+        获取派生任务（整库提取、分片提取等）的基础构建器
+        
+        优先使用当前查看任务的选项（复用其会话），否则使用界面当前配置
+        返回 (builder, job)，job 为 None 表示来自界面配置
+        """
+        job = self.scheduler.get_job(self._viewing_job_id) if self._viewing_job_id else None
+        if job is not None:
+            return CommandBuilder.from_snapshot(job.options), job
+        try:
+            builder = self._create_builder()
+            if builder is not None:
+                self._freeze_request_content(builder)
+            return builder, None
+        except Exception:
+            return None, None
+    
+    def _on_incremental_dump_requested(self, db_name: str):
+        """增量提取：与历史快照比较行数，只提取变化的表，追加型表只提取新增行"""
+        tables = self.result_panel.get_tables(db_name)
+        if not tables:
+            QMessageBox.information(
+                self, "提示",
+                f"数据库 '{db_name}' 暂无表列表，请先右键选择 '获取表列表'。"
+            )
+            return
+        
+        builder, job = self._derived_job_builder()
+        if builder is None:
+            QMessageBox.warning(self, "提示", "请先配置目标，或在队列中查看一个已检测到注入的任务")
+            return
+        
+        summary = job.store.get_summary() if job is not None else {}
+        columns = summary.get('columns', {})
+        # 有 id 等单调键的表默认作为追加型表的候选
+        candidates = []
+        for table in tables:
+            key = find_monotonic_key(table, find_columns(columns, db_name, table))
+            if key:
+                candidates.append(f"{table}={key}")
+        text, ok = QInputDialog.getText(
+            self, "增量提取",
+            f"将统计 {db_name} 的 {len(tables)} 张表的行数并与上次提取比较，只提取变化的表。\n\n"
+            "追加型表（只插入、不更新删除）只提取新增的行，格式: 表名=单调键列，逗号分隔；\n"
+            "键列须为已获取的列名，省略时按列信息自动识别；留空表示没有追加型表：",
+            text=", ".join(candidates)
+        )
+        if not ok:
+            return
+        append_only = {}
+        for part in text.split(','):
+            table, _sep, key = part.partition('=')
+            if table.strip() in tables:
+                append_only[table.strip()] = key.strip()
+        
+        coordinator = IncrementalDump(
+            self.scheduler, self.history, builder, db_name, tables,
+            dbms=summary.get('dbms') or self.advanced_panel.get_dbms(),
+            columns=columns, append_only=append_only,
+            max_concurrent=self.config.get_int("queue", "dump_workers", 4),
+            priority=self.queue_panel.get_priority(), parent=self
+        )
+        coordinator.message.connect(self.status_label.setText)
+        coordinator.message.connect(lambda text: self.log_panel.append_line(text, "增量提取"))
+        group_id = coordinator.start()
+        self._coordinators[group_id] = coordinator
+        self._show_group_summary(group_id)
+    
+    def _on_sharded_dump_requested(self, db_name: str, table_name: str):
+        """分片并行提取单张表（复用当前查看任务或界面配置的目标和检测设置）"""
+        builder, _job = self._derived_job_builder()
+        if builder is None:
+            QMessageBox.warning(self, "提示", "请先配置目标，或在队列中查看一个已检测到注入的任务")
+            return
+        
+        # 已估算时按估算耗时建议分片数
+        estimate = self.result_panel.get_dump_estimate(db_name, table_name)
+        hint = f"\n预估: {estimate.describe()}，建议 {estimate.shards} 片" if estimate else ""
+        shards, ok = QInputDialog.getInt(
+            self, "分片并行提取",
+            f"将 {db_name}.{table_name} 按行号拆分为几个分片并行提取？\n"
+            f"（先执行 --count 统计行数，各分片复用同一会话）{hint}",
+            max(2, estimate.shards) if estimate else 4, 2, 64
         )
+        if not ok:
+            return
         
-        # 可选：自动点击开始
-        # self.start_scan()
+        coordinator = ShardedDump(
+            self.scheduler, builder, db_name, table_name,
+            shards=shards, priority=self.queue_panel.get_priority(), parent=self
+        )
+        coordinator.message.connect(self.status_label.setText)
+        group_id = coordinator.start()
+        self._coordinators[group_id] = coordinator
+        self._show_group_summary(group_id)
+    
+    def _on_estimate_requested(self, db_name: str):
+        """估算数据库各表的提取耗时（缺少行数时先执行 --count）"""
+        tables = self.result_panel.get_tables(db_name)
+        if not tables:
+            QMessageBox.information(
+                self, "提示",
+                f"数据库 '{db_name}' 暂无表列表，请先右键选择 '获取表列表'。"
+            )
+            return
+        
+        builder, job = self._derived_job_builder()
+        if builder is None:
+            QMessageBox.warning(self, "提示", "请先配置目标，或在队列中查看一个已检测到注入的任务")
+            return
+        
+        planner = DumpCostPlanner(
+            self.scheduler, builder, db_name, tables,
+            summary=job.store.get_summary() if job is not None else None,
+            priority=self.queue_panel.get_priority(), parent=self
+        )
+        source_id = job.job_id if job is not None else None
+        planner.message.connect(self.status_label.setText)
+        planner.planned.connect(lambda db, estimates: self._on_dump_planned(db, estimates, source_id, planner.count_job_id))
+        planner.planned.connect(lambda *_: planner.deleteLater())
+        planner.start()
+    
+    def _on_dump_planned(self, db_name: str, estimates: dict, source_id=None, count_job_id=None):
+        """显示提取耗时估算（计数任务占用了结果视图时切回原任务）"""
+        if source_id is not None and count_job_id is not None and self._viewing_job_id == count_job_id:
+            if self.scheduler.get_job(source_id) is not None:
+                self._view_job(source_id)
+        self.result_panel.set_dump_estimates(db_name, estimates)
+        if estimates:
+            slowest = max(estimates.items(), key=lambda item: item[1].seconds)
+            self.log_panel.append_line(
+                f"{db_name}: 估算 {len(estimates)} 张表，最慢的 {slowest[0]} 约需 "
+                f"{format_duration(slowest[1].seconds)}（{slowest[1].requests:,} 个请求）", "提取估算")
     
     def _show_ai_analyze(self):
         """显示 AI 分析（切换到 AI 分析标签页）"""
@@ -1115,7 +1918,7 @@ class MainWindow(QMainWindow):
             
             # 更新状态
             self.status_label.setText(f"已应用 {applied_count} 个 AI 推荐参数")
-            
+        
         except Exception as e:
             QMessageBox.warning(self, "应用失败", f"应用部分参数时出错: {str(e)}")
     
@@ -1124,10 +1927,15 @@ class MainWindow(QMainWindow):
     
     def closeEvent(self, event):
         """关闭事件"""
-        # 停止扫描
-        if self.engine and self.engine.isRunning():
-            self.engine.stop()
-            self.engine.wait()
+        # 归还共享队列中未完成的任务，停止所有扫描任务
+        if self.shared_agent:
+            self.shared_agent.stop()
+        # 未完成的工作流保留运行状态，下次启动时可继续
+        for coordinator in self._coordinators.values():
+            if isinstance(coordinator, WorkflowRunner):
+                coordinator.suspend()
+        self.scheduler.stop_all(wait=True)
+        self.scheduler.workers.stop()
         
         # 保存窗口位置和大小
         self._save_geometry()
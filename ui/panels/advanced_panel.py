@@ -153,6 +153,14 @@ class AdvancedPanel(QWidget):
         self.delay_spin.setSuffix(" 秒")
         perf_grid.addWidget(self.delay_spin, 1, 3)
         
+        # 自动调优
+        self.auto_tune_check = QCheckBox("自动调优（按目标响应时间选择线程、超时、重试和 --time-sec）")
+        self.auto_tune_check.setToolTip("每个任务启动前向目标发送几次正常请求，测量响应时间的抖动，\n"
+                                        "据此选择参数；同一目标后续阶段的任务会参考之前 sqlmap 的输出重新调优。\n"
+                                        "请求包和批量文件模式无法测量，使用上面设置的参数")
+        self.auto_tune_check.stateChanged.connect(self._on_auto_tune_check_changed)
+        perf_grid.addWidget(self.auto_tune_check, 2, 0, 1, 4)
+        
         perf_card.add_layout(perf_grid)
         layout.addWidget(perf_card)
         
@@ -200,6 +208,12 @@ class AdvancedPanel(QWidget):
         self.no_cast_check.setToolTip("禁用数据类型转换")
         general_grid.addWidget(self.no_cast_check, 2, 2)
         
+        self.fingerprint_check = QCheckBox("使用目标指纹缓存")
+        self.fingerprint_check.setChecked(True)
+        self.fingerprint_check.setToolTip("已确认注入的目标再次扫描时，自动带上之前检测到的参数、数据库类型、\n"
+                                          "注入技术和前缀/后缀，跳过完整检测；指纹失效时自动删除")
+        general_grid.addWidget(self.fingerprint_check, 3, 0)
+        
         general_card.add_layout(general_grid)
         layout.addWidget(general_card)
         
@@ -598,6 +612,12 @@ class AdvancedPanel(QWidget):
         """文件读取复选框变化"""
         self.file_read_input.setEnabled(state == Qt.CheckState.Checked.value)
     
+    def _on_auto_tune_check_changed(self, state):
+        """自动调优复选框变化：调优的参数不再手动设置"""
+        manual = state != Qt.CheckState.Checked.value
+        for spin in (self.threads_spin, self.timeout_spin, self.retries_spin):
+            spin.setEnabled(manual)
+    
     def _on_file_write_check_changed(self, state):
         """文件写入复选框变化"""
         self.file_write_input.setEnabled(state == Qt.CheckState.Checked.value)
@@ -616,6 +636,12 @@ class AdvancedPanel(QWidget):
     def get_delay(self) -> int:
         return self.delay_spin.value()
     
+    def is_auto_tune(self) -> bool:
+        return self.auto_tune_check.isChecked()
+    
+    def use_fingerprint(self) -> bool:
+        return self.fingerprint_check.isChecked()
+    
     def is_batch_mode(self) -> bool:
         return self.batch_check.isChecked()
     
@@ -0,0 +1,622 @@
+"""
+任务队列面板
+显示排队、运行中和已结束的扫描任务，支持调整顺序、取消和重试
+"""
+
+import time
+
+from PyQt6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
+    QTableWidget, QTableWidgetItem, QHeaderView, QAbstractItemView,
+    QSpinBox, QDoubleSpinBox, QMenu, QInputDialog, QCheckBox, QFileDialog,
+    QMessageBox, QComboBox
+)
+from PyQt6.QtCore import pyqtSignal, Qt, QTimer
+from PyQt6.QtGui import QColor
+
+from core.fair_share import project_label
+from core.job_queue import JobStatus
+from ..widgets.load_chart import LoadChart
+
+
+# 状态颜色
+STATUS_COLORS = {
+    JobStatus.PENDING: '#7aa2f7',
+    JobStatus.RUNNING: '#e0af68',
+    JobStatus.COMPLETED: '#9ece6a',
+    JobStatus.FAILED: '#f7768e',
+    JobStatus.CANCELLED: '#565f89',
+}
+
+
+class QueuePanel(QWidget):
+    """任务队列面板"""
+    
+    # 信号（参数为任务 ID）
+    job_selected = pyqtSignal(int)           # 查看任务日志和结果
+    move_requested = pyqtSignal(int, int)    # 调整顺序 (job_id, offset)
+    cancel_requested = pyqtSignal(int)
+    retry_requested = pyqtSignal(int)
+    clear_finished_requested = pyqtSignal()
+    group_summary_requested = pyqtSignal(str)  # 查看任务组汇总 (group_id)
+    limits_changed = pyqtSignal(int, int)    # (全局并发数, 单主机并发数)
+    default_rate_changed = pyqtSignal(float)  # 默认单主机速率上限 (req/s，0 表示不限制)
+    host_rate_changed = pyqtSignal(str, float)  # 单独设置主机速率上限 (host, req/s，负数表示恢复默认)
+    governor_changed = pyqtSignal(bool, int, int)  # 自适应并发 (启用, 最少任务数, 最多任务数)
+    export_load_requested = pyqtSignal(str)  # 导出负载采样 (文件路径)
+    project_changed = pyqtSignal(str)        # 新任务所属项目
+    project_weight_changed = pyqtSignal(str, float)  # 设置项目权重 (project, 权重，0 表示恢复默认)
+    preempt_changed = pyqtSignal(bool)       # 允许高优先级任务抢占
+    
+    # 列定义
+    COL_ID, COL_GROUP, COL_TARGET, COL_PRIORITY, COL_STATUS, COL_RATE, COL_ELAPSED, COL_SAVED = range(8)
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._jobs = []
+        self._viewing_job_id = None
+        self.setup_ui()
+        
+        # 每秒刷新运行中任务的耗时
+        self._elapsed_timer = QTimer(self)
+        self._elapsed_timer.timeout.connect(self._refresh_elapsed)
+        self._elapsed_timer.start(1000)
+    
+    def setup_ui(self):
+        """设置 UI"""
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(10, 10, 10, 10)
+        layout.setSpacing(10)
+        
+        # ==================== 并发设置 ====================
+        limits_layout = QHBoxLayout()
+        limits_layout.setSpacing(8)
+        
+        limits_layout.addWidget(QLabel("最大并发:"))
+        self.max_concurrent_spin = QSpinBox()
+        self.max_concurrent_spin.setRange(1, 32)
+        self.max_concurrent_spin.setValue(2)
+        self.max_concurrent_spin.setToolTip("同时运行的扫描任务数上限")
+        self.max_concurrent_spin.valueChanged.connect(self._on_limits_changed)
+        limits_layout.addWidget(self.max_concurrent_spin)
+        
+        limits_layout.addWidget(QLabel("单主机并发:"))
+        self.per_host_spin = QSpinBox()
+        self.per_host_spin.setRange(1, 32)
+        self.per_host_spin.setValue(1)
+        self.per_host_spin.setToolTip("同一目标主机同时运行的任务数上限")
+        self.per_host_spin.valueChanged.connect(self._on_limits_changed)
+        limits_layout.addWidget(self.per_host_spin)
+        
+        limits_layout.addWidget(QLabel("单主机速率:"))
+        self.rate_spin = QDoubleSpinBox()
+        self.rate_spin.setRange(0, 1000)
+        self.rate_spin.setDecimals(1)
+        self.rate_spin.setSingleStep(0.5)
+        self.rate_spin.setSuffix(" req/s")
+        self.rate_spin.setSpecialValueText("不限")
+        self.rate_spin.setToolTip("同一目标主机所有任务合计的请求速率上限，\n"
+                                  "任务启动时按剩余预算分配，换算为该任务的 --threads / --delay")
+        self.rate_spin.valueChanged.connect(self.default_rate_changed.emit)
+        limits_layout.addWidget(self.rate_spin)
+        
+        limits_layout.addWidget(QLabel("新任务优先级:"))
+        self.priority_spin = QSpinBox()
+        self.priority_spin.setRange(-10, 10)
+        self.priority_spin.setValue(0)
+        self.priority_spin.setToolTip("数值越大越先执行")
+        limits_layout.addWidget(self.priority_spin)
+        
+        limits_layout.addStretch()
+        
+        self.workers_label = QLabel("")
+        self.workers_label.setObjectName("statsLabel")
+        self.workers_label.setVisible(False)
+        limits_layout.addWidget(self.workers_label)
+        
+        self.summary_label = QLabel("运行 0 / 排队 0")
+        self.summary_label.setObjectName("statsLabel")
+        limits_layout.addWidget(self.summary_label)
+        
+        layout.addLayout(limits_layout)
+        
+        # ==================== 自适应并发 ====================
+        governor_layout = QHBoxLayout()
+        governor_layout.setSpacing(8)
+        
+        self.governor_check = QCheckBox("自适应并发")
+        self.governor_check.setToolTip("按本机 CPU 负载、内存占用和界面延迟自动调整最大并发，\n"
+                                       "内存超过暂停阈值时暂停最近启动的任务（阈值在设置中修改）")
+        self.governor_check.toggled.connect(self._on_governor_changed)
+        governor_layout.addWidget(self.governor_check)
+        
+        governor_layout.addWidget(QLabel("范围:"))
+        self.governor_min_spin = QSpinBox()
+        self.governor_min_spin.setRange(1, 64)
+        self.governor_min_spin.setValue(1)
+        self.governor_min_spin.valueChanged.connect(self._on_governor_changed)
+        governor_layout.addWidget(self.governor_min_spin)
+        governor_layout.addWidget(QLabel("-"))
+        self.governor_max_spin = QSpinBox()
+        self.governor_max_spin.setRange(1, 64)
+        self.governor_max_spin.setValue(8)
+        self.governor_max_spin.valueChanged.connect(self._on_governor_changed)
+        governor_layout.addWidget(self.governor_max_spin)
+        
+        governor_layout.addStretch()
+        
+        self.load_label = QLabel("")
+        self.load_label.setObjectName("statsLabel")
+        governor_layout.addWidget(self.load_label)
+        
+        export_btn = QPushButton("💾 导出负载数据")
+        export_btn.setProperty("class", "secondary")
+        export_btn.setToolTip("导出采样记录 (CSV)，用于评估扫描主机的配置")
+        export_btn.clicked.connect(self._export_load)
+        governor_layout.addWidget(export_btn)
+        
+        layout.addLayout(governor_layout)
+        
+        self.load_chart = LoadChart()
+        self.load_chart.setVisible(False)
+        layout.addWidget(self.load_chart)
+        
+        # ==================== 项目 ====================
+        project_layout = QHBoxLayout()
+        project_layout.setSpacing(8)
+        
+        project_layout.addWidget(QLabel("新任务项目:"))
+        self.project_combo = QComboBox()
+        self.project_combo.setEditable(True)
+        self.project_combo.setMinimumWidth(140)
+        self.project_combo.lineEdit().setPlaceholderText("默认")
+        self.project_combo.setToolTip("新任务所属的项目（派生的提取等任务继承该项目），\n"
+                                      "同优先级的排队任务按项目权重分配并发名额")
+        self.project_combo.currentTextChanged.connect(lambda text: self.project_changed.emit(text.strip()))
+        project_layout.addWidget(self.project_combo)
+        
+        self.preempt_check = QCheckBox("允许抢占")
+        self.preempt_check.setToolTip("并发已满时，高优先级任务停止优先级最低的运行中任务；\n"
+                                      "被停止的任务重新排队，之后复用会话继续执行")
+        self.preempt_check.toggled.connect(self.preempt_changed.emit)
+        project_layout.addWidget(self.preempt_check)
+        
+        project_layout.addStretch()
+        layout.addLayout(project_layout)
+        
+        # ==================== 任务列表 ====================
+        self.job_table = QTableWidget()
+        self.job_table.setColumnCount(8)
+        self.job_table.setHorizontalHeaderLabels(["ID", "任务组", "目标", "优先级", "状态", "限速", "耗时", "节省"])
+        self.job_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.job_table.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.job_table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.job_table.verticalHeader().setVisible(False)
+        self.job_table.setColumnWidth(self.COL_ID, 50)
+        self.job_table.setColumnWidth(self.COL_GROUP, 70)
+        self.job_table.setColumnWidth(self.COL_PRIORITY, 60)
+        self.job_table.setColumnWidth(self.COL_STATUS, 90)
+        self.job_table.setColumnWidth(self.COL_RATE, 80)
+        self.job_table.setColumnWidth(self.COL_ELAPSED, 80)
+        self.job_table.setColumnWidth(self.COL_SAVED, 70)
+        self.job_table.horizontalHeader().setSectionResizeMode(self.COL_TARGET, QHeaderView.ResizeMode.Stretch)
+        self.job_table.itemSelectionChanged.connect(self._update_buttons)
+        self.job_table.itemDoubleClicked.connect(lambda _: self._view_selected())
+        self.job_table.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
+        self.job_table.customContextMenuRequested.connect(self._show_context_menu)
+        layout.addWidget(self.job_table)
+        
+        # ==================== 主机速率 ====================
+        self.host_table = QTableWidget()
+        self.host_table.setColumnCount(4)
+        self.host_table.setHorizontalHeaderLabels(["主机", "速率上限", "已分配速率", "运行 / 排队"])
+        self.host_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.host_table.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.host_table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.host_table.verticalHeader().setVisible(False)
+        self.host_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        self.host_table.setMaximumHeight(130)
+        self.host_table.setToolTip("双击设置该主机单独的速率上限")
+        self.host_table.itemDoubleClicked.connect(self._edit_host_rate)
+        layout.addWidget(self.host_table)
+        
+        # ==================== 项目统计 ====================
+        self.project_table = QTableWidget()
+        self.project_table.setColumnCount(7)
+        self.project_table.setHorizontalHeaderLabels(
+            ["项目", "权重", "运行 / 排队", "完成 / 失败", "平均等待", "吞吐量", "被抢占"])
+        self.project_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.project_table.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.project_table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.project_table.verticalHeader().setVisible(False)
+        self.project_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        self.project_table.setMaximumHeight(130)
+        self.project_table.setToolTip("双击设置项目权重")
+        self.project_table.itemDoubleClicked.connect(self._edit_project_weight)
+        self.project_table.setVisible(False)
+        layout.addWidget(self.project_table)
+        
+        # ==================== 操作按钮 ====================
+        btn_layout = QHBoxLayout()
+        btn_layout.setSpacing(8)
+        
+        self.view_btn = QPushButton("👁 查看")
+        self.view_btn.setToolTip("在日志和结果标签页中查看该任务（也可双击）")
+        self.view_btn.clicked.connect(self._view_selected)
+        btn_layout.addWidget(self.view_btn)
+        
+        self.up_btn = QPushButton("⬆ 上移")
+        self.up_btn.clicked.connect(lambda: self._move_selected(-1))
+        btn_layout.addWidget(self.up_btn)
+        
+        self.down_btn = QPushButton("⬇ 下移")
+        self.down_btn.clicked.connect(lambda: self._move_selected(1))
+        btn_layout.addWidget(self.down_btn)
+        
+        self.cancel_btn = QPushButton("⛔ 取消")
+        self.cancel_btn.setProperty("class", "danger")
+        self.cancel_btn.clicked.connect(self._cancel_selected)
+        btn_layout.addWidget(self.cancel_btn)
+        
+        self.retry_btn = QPushButton("🔄 重试")
+        self.retry_btn.clicked.connect(self._retry_selected)
+        btn_layout.addWidget(self.retry_btn)
+        
+        self.group_btn = QPushButton("📊 任务组汇总")
+        self.group_btn.setToolTip("汇总选中任务所在任务组的结果")
+        self.group_btn.clicked.connect(self._show_group_summary)
+        btn_layout.addWidget(self.group_btn)
+        
+        btn_layout.addStretch()
+        
+        clear_btn = QPushButton("🧹 清除已结束")
+        clear_btn.setProperty("class", "secondary")
+        clear_btn.clicked.connect(self.clear_finished_requested.emit)
+        btn_layout.addWidget(clear_btn)
+        
+        layout.addLayout(btn_layout)
+        
+        self._update_buttons()
+    
+    # ==================== 公共方法 ====================
+    
+    def update_jobs(self, jobs: list):
+        """刷新任务列表（保持当前选中的任务）"""
+        selected_id = self.get_selected_job_id()
+        self._jobs = list(jobs)
+        
+        self.job_table.setRowCount(0)
+        for job in self._jobs:
+            row = self.job_table.rowCount()
+            self.job_table.insertRow(row)
+            
+            id_text = f"▶ {job.job_id}" if job.job_id == self._viewing_job_id else str(job.job_id)
+            id_item = QTableWidgetItem(id_text)
+            id_item.setData(Qt.ItemDataRole.UserRole, job.job_id)
+            self.job_table.setItem(row, self.COL_ID, id_item)
+            
+            group_item = QTableWidgetItem(f"[{job.project}] {job.group_id}" if job.project else job.group_id)
+            group_item.setToolTip(f"项目: {project_label(job.project)}")
+            self.job_table.setItem(row, self.COL_GROUP, group_item)
+            
+            target_item = QTableWidgetItem(job.target)
+            target_item.setToolTip(job.command)
+            self.job_table.setItem(row, self.COL_TARGET, target_item)
+            
+            self.job_table.setItem(row, self.COL_PRIORITY, QTableWidgetItem(str(job.priority)))
+            
+            status_item = QTableWidgetItem(job.status_label + (f" @{job.worker}" if job.worker else ""))
+            status_item.setForeground(QColor(STATUS_COLORS.get(job.status, '#c0caf5')))
+            if job.return_code is not None and job.status == JobStatus.FAILED:
+                reason = f"\n{job.failure.describe()}" if job.failure else ""
+                status_item.setToolTip(f"返回码: {job.return_code}{reason}")
+            elif job.status == JobStatus.PENDING and job.retry_at:
+                status_item.setToolTip(f"{job.failure.describe() if job.failure else '临时故障'}\n"
+                                       f"{time.strftime('%H:%M:%S', time.localtime(job.retry_at))} 自动重试"
+                                       f"（第 {job.auto_retries} 次）")
+            elif job.worker:
+                status_item.setToolTip(f"在执行节点 {job.worker} 上执行")
+            elif job.preemptions:
+                status_item.setToolTip(f"被高优先级任务抢占 {job.preemptions} 次")
+            self.job_table.setItem(row, self.COL_STATUS, status_item)
+            
+            rate_item = QTableWidgetItem(f"≤ {job.rate_limit:g}/s" if job.rate_limit else "-")
+            if job.rate_limit:
+                rate_item.setToolTip("启动时分配的请求速率，已换算为 --threads / --delay")
+            self.job_table.setItem(row, self.COL_RATE, rate_item)
+            
+            self.job_table.setItem(row, self.COL_ELAPSED, QTableWidgetItem(self._format_elapsed(job)))
+            
+            saved_item = QTableWidgetItem(f"⚡ {job.session_saved:.0f} 秒" if job.session_source else "-")
+            if job.session_source:
+                saved_item.setToolTip(f"克隆任务 #{job.session_source} 的会话，跳过注入检测（{job.session_clone}）")
+            self.job_table.setItem(row, self.COL_SAVED, saved_item)
+            
+            if job.job_id == selected_id:
+                self.job_table.selectRow(row)
+        
+        running = sum(1 for job in self._jobs if job.status == JobStatus.RUNNING)
+        pending = sum(1 for job in self._jobs if job.status == JobStatus.PENDING)
+        saved = sum(job.session_saved for job in self._jobs if job.session_source and job.started_at)
+        self.summary_label.setText(f"运行 {running} / 排队 {pending}" +
+                                   (f"，克隆会话节省 {saved / 60:.1f} 分钟" if saved else ""))
+        self._update_buttons()
+    
+    def update_workers(self, stats: list):
+        """刷新执行节点概况（JobScheduler.worker_stats() 的结果，没有节点时隐藏）"""
+        self.workers_label.setVisible(bool(stats))
+        if not stats:
+            return
+        running = sum(info['running'] for info in stats)
+        capacity = sum(info['capacity'] for info in stats)
+        self.workers_label.setText(f"🖧 执行节点 {len(stats)} 个，远程 {running} / {capacity}")
+        self.workers_label.setToolTip("\n".join(
+            f"{info['name']} ({info['address']})：运行 {info['running']} / {info['capacity']}，已完成 {info['completed']}"
+            for info in stats
+        ))
+    
+    def update_host_rates(self, stats: list):
+        """刷新主机速率表（JobScheduler.host_rate_stats() 的结果）"""
+        self.host_table.setRowCount(0)
+        for info in stats:
+            row = self.host_table.rowCount()
+            self.host_table.insertRow(row)
+            self.host_table.setItem(row, 0, QTableWidgetItem(info['host']))
+            budget = info['budget']
+            self.host_table.setItem(row, 1, QTableWidgetItem(f"{budget:g} req/s" if budget else "不限"))
+            allocated_item = QTableWidgetItem(f"{info['allocated']:g} req/s" if budget else "-")
+            if budget and info['allocated'] >= budget:
+                allocated_item.setForeground(QColor(STATUS_COLORS[JobStatus.RUNNING]))
+            self.host_table.setItem(row, 2, allocated_item)
+            self.host_table.setItem(row, 3, QTableWidgetItem(f"{info['running']} / {info['pending']}"))
+    
+    def update_projects(self, stats: list):
+        """刷新项目统计表（JobScheduler.project_stats() 的结果，只有默认项目时隐藏）"""
+        self.project_table.setVisible(any(info['project'] for info in stats))
+        self.project_table.setRowCount(0)
+        for info in stats:
+            row = self.project_table.rowCount()
+            self.project_table.insertRow(row)
+            name_item = QTableWidgetItem(project_label(info['project']))
+            name_item.setData(Qt.ItemDataRole.UserRole, info['project'])
+            self.project_table.setItem(row, 0, name_item)
+            self.project_table.setItem(row, 1, QTableWidgetItem(f"{info['weight']:g}"))
+            self.project_table.setItem(row, 2, QTableWidgetItem(f"{info['running']} / {info['pending']}"))
+            self.project_table.setItem(row, 3, QTableWidgetItem(f"{info['completed']} / {info['failed']}"))
+            wait_item = QTableWidgetItem(f"{info['avg_wait']:.0f} 秒")
+            wait_item.setToolTip(f"最长等待 {info['max_wait']:.0f} 秒，已启动 {info['started']} 个任务")
+            self.project_table.setItem(row, 4, wait_item)
+            throughput_item = QTableWidgetItem(f"{info['throughput']:.1f} 个/小时")
+            throughput_item.setToolTip(f"累计运行 {info['run_seconds'] / 60:.1f} 分钟")
+            self.project_table.setItem(row, 5, throughput_item)
+            self.project_table.setItem(row, 6, QTableWidgetItem(str(info['preempted'])))
+        # 已出现过的项目加入下拉列表，方便再次选择
+        for info in stats:
+            if info['project'] and self.project_combo.findText(info['project']) < 0:
+                self.project_combo.addItem(info['project'])
+    
+    def get_project(self) -> str:
+        """获取新任务所属项目（空字符串表示默认项目）"""
+        return self.project_combo.currentText().strip()
+    
+    def set_project(self, project: str, preempt: bool):
+        """设置新任务项目和是否允许抢占（不触发信号）"""
+        self.project_combo.blockSignals(True)
+        self.preempt_check.blockSignals(True)
+        self.project_combo.setEditText(project)
+        self.preempt_check.setChecked(preempt)
+        self.project_combo.blockSignals(False)
+        self.preempt_check.blockSignals(False)
+    
+    def set_default_rate(self, rate: float):
+        """设置默认单主机速率上限（不触发信号）"""
+        self.rate_spin.blockSignals(True)
+        self.rate_spin.setValue(rate)
+        self.rate_spin.blockSignals(False)
+    
+    def set_governor(self, enabled: bool, min_jobs: int, max_jobs: int):
+        """设置自适应并发状态（不触发信号）"""
+        for widget in (self.governor_check, self.governor_min_spin, self.governor_max_spin):
+            widget.blockSignals(True)
+        self.governor_check.setChecked(enabled)
+        self.governor_min_spin.setValue(min_jobs)
+        self.governor_max_spin.setValue(max_jobs)
+        for widget in (self.governor_check, self.governor_min_spin, self.governor_max_spin):
+            widget.blockSignals(False)
+        self._update_governor_state()
+    
+    def add_load_sample(self, sample, lag_high_ms: float):
+        """显示一次负载采样（ConcurrencyGovernor.sampled）"""
+        self.load_chart.add_sample(sample, lag_high_ms, self.governor_max_spin.value())
+        parts = []
+        if sample.cpu is not None:
+            parts.append(f"CPU {sample.cpu:.0f}%")
+        if sample.memory is not None:
+            parts.append(f"内存 {sample.memory:.0f}%")
+        parts.append(f"延迟 {sample.lag_ms:.0f}ms")
+        if sample.paused:
+            parts.append(f"暂停 {sample.paused}")
+        self.load_label.setText(" | ".join(parts))
+        # 调节器修改的并发上限同步到输入框
+        self.max_concurrent_spin.blockSignals(True)
+        self.max_concurrent_spin.setValue(sample.limit)
+        self.max_concurrent_spin.blockSignals(False)
+    
+    def set_viewing_job(self, job_id):
+        """标记当前在日志和结果标签页中查看的任务"""
+        self._viewing_job_id = job_id
+        self.update_jobs(self._jobs)
+    
+    def get_selected_job_id(self):
+        """获取选中的任务 ID"""
+        row = self.job_table.currentRow()
+        if row < 0 or not self.job_table.selectedItems():
+            return None
+        item = self.job_table.item(row, self.COL_ID)
+        return item.data(Qt.ItemDataRole.UserRole) if item else None
+    
+    def get_priority(self) -> int:
+        """获取新任务优先级"""
+        return self.priority_spin.value()
+    
+    def get_limits(self) -> tuple:
+        """获取并发限制 (全局并发数, 单主机并发数)"""
+        return self.max_concurrent_spin.value(), self.per_host_spin.value()
+    
+    def set_limits(self, max_concurrent: int, per_host_limit: int):
+        """设置并发限制（不触发 limits_changed）"""
+        self.max_concurrent_spin.blockSignals(True)
+        self.per_host_spin.blockSignals(True)
+        self.max_concurrent_spin.setValue(max_concurrent)
+        self.per_host_spin.setValue(per_host_limit)
+        self.max_concurrent_spin.blockSignals(False)
+        self.per_host_spin.blockSignals(False)
+    
+    # ==================== 内部方法 ====================
+    
+    def _selected_job(self):
+        """获取选中的任务对象"""
+        job_id = self.get_selected_job_id()
+        for job in self._jobs:
+            if job.job_id == job_id:
+                return job
+        return None
+    
+    def _update_buttons(self):
+        """根据选中任务的状态更新按钮"""
+        job = self._selected_job()
+        status = job.status if job else None
+        self.view_btn.setEnabled(job is not None)
+        self.up_btn.setEnabled(status == JobStatus.PENDING)
+        self.down_btn.setEnabled(status == JobStatus.PENDING)
+        self.cancel_btn.setEnabled(status in (JobStatus.PENDING, JobStatus.RUNNING))
+        self.retry_btn.setEnabled(job is not None and job.is_finished)
+        self.group_btn.setEnabled(job is not None and bool(job.group_id))
+    
+    def _view_selected(self):
+        """查看选中的任务"""
+        job_id = self.get_selected_job_id()
+        if job_id is not None:
+            self.job_selected.emit(job_id)
+    
+    def _move_selected(self, offset: int):
+        """移动选中的任务"""
+        job_id = self.get_selected_job_id()
+        if job_id is not None:
+            self.move_requested.emit(job_id, offset)
+    
+    def _cancel_selected(self):
+        """取消选中的任务"""
+        job_id = self.get_selected_job_id()
+        if job_id is not None:
+            self.cancel_requested.emit(job_id)
+    
+    def _retry_selected(self):
+        """重试选中的任务"""
+        job_id = self.get_selected_job_id()
+        if job_id is not None:
+            self.retry_requested.emit(job_id)
+    
+    def _show_group_summary(self):
+        """查看选中任务所在任务组的汇总"""
+        job = self._selected_job()
+        if job and job.group_id:
+            self.group_summary_requested.emit(job.group_id)
+    
+    def _on_limits_changed(self):
+        """并发限制变化"""
+        self.limits_changed.emit(*self.get_limits())
+    
+    def _edit_host_rate(self, item):
+        """设置主机单独的速率上限"""
+        host = self.host_table.item(item.row(), 0).text()
+        rate, ok = QInputDialog.getDouble(
+            self, "主机速率上限",
+            f"{host} 的请求速率上限 (req/s)\n0 表示不限制，-1 表示使用默认值:",
+            self.rate_spin.value(), -1, 1000, 1
+        )
+        if ok:
+            self.host_rate_changed.emit(host, rate)
+    
+    def _edit_project_weight(self, item):
+        """设置项目权重"""
+        name_item = self.project_table.item(item.row(), 0)
+        project = name_item.data(Qt.ItemDataRole.UserRole)
+        weight, ok = QInputDialog.getDouble(
+            self, "项目权重",
+            f"{name_item.text()} 的权重（同优先级时按权重比例分配并发名额）\n0 表示恢复默认权重 1:",
+            float(self.project_table.item(item.row(), 1).text()), 0, 100, 1
+        )
+        if ok:
+            self.project_weight_changed.emit(project, weight)
+    
+    def _on_governor_changed(self):
+        """自适应并发设置变化"""
+        if self.governor_min_spin.value() > self.governor_max_spin.value():
+            self.governor_max_spin.blockSignals(True)
+            self.governor_max_spin.setValue(self.governor_min_spin.value())
+            self.governor_max_spin.blockSignals(False)
+        self._update_governor_state()
+        self.governor_changed.emit(self.governor_check.isChecked(),
+                                   self.governor_min_spin.value(), self.governor_max_spin.value())
+    
+    def _update_governor_state(self):
+        """启用自适应并发时最大并发由调节器控制"""
+        enabled = self.governor_check.isChecked()
+        self.max_concurrent_spin.setEnabled(not enabled)
+        self.load_chart.setVisible(enabled)
+        if not enabled:
+            self.load_label.setText("")
+    
+    def _export_load(self):
+        """导出负载采样"""
+        if not self.governor_check.isChecked():
+            QMessageBox.information(self, "提示", "请先启用自适应并发，采样期间的数据才会被记录")
+            return
+        path, _ = QFileDialog.getSaveFileName(self, "导出负载数据", "load_samples.csv", "CSV 文件 (*.csv)")
+        if path:
+            self.export_load_requested.emit(path)
+    
+    def _show_context_menu(self, pos):
+        """右键菜单"""
+        item = self.job_table.itemAt(pos)
+        if not item:
+            return
+        self.job_table.selectRow(item.row())
+        job = self._selected_job()
+        if not job:
+            return
+        
+        menu = QMenu(self)
+        menu.addAction("👁 查看", self._view_selected)
+        if job.status == JobStatus.PENDING:
+            menu.addAction("⬆ 上移", lambda: self._move_selected(-1))
+            menu.addAction("⬇ 下移", lambda: self._move_selected(1))
+        if job.status in (JobStatus.PENDING, JobStatus.RUNNING):
+            menu.addAction("⛔ 取消", self._cancel_selected)
+        if job.is_finished:
+            menu.addAction("🔄 重试", self._retry_selected)
+        if job.group_id:
+            menu.addAction("📊 任务组汇总", self._show_group_summary)
+        menu.exec(self.job_table.viewport().mapToGlobal(pos))
+    
+    def _refresh_elapsed(self):
+        """刷新运行中任务的耗时列"""
+        for row in range(self.job_table.rowCount()):
+            if row >= len(self._jobs):
+                break
+            job = self._jobs[row]
+            if job.status == JobStatus.RUNNING:
+                item = self.job_table.item(row, self.COL_ELAPSED)
+                if item:
+                    item.setText(self._format_elapsed(job))
+    
+    @staticmethod
+    def _format_elapsed(job) -> str:
+        """格式化任务耗时"""
+        if not job.started_at:
+            return "-"
+        seconds = int(job.elapsed)
+        hours, remainder = divmod(seconds, 3600)
+        minutes, seconds = divmod(remainder, 60)
+        return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
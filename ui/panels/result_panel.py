@@ -15,21 +15,30 @@ from ..theme import COLORS
 from ..widgets.card_widget import CardWidget, StatCard
 from ..dialogs.data_detail_dialog import DataDetailDialog, ColumnDataDialog
 
+from core.result_store import ResultStore
+
 
 class ResultPanel(QWidget):
     """结果展示面板"""
     
     # 信号
     db_selected = pyqtSignal(str)
-
+    
     table_selected = pyqtSignal(str, str)
     dump_requested = pyqtSignal(str)  # 请求提取数据信号 (db_name)
+    sharded_dump_requested = pyqtSignal(str, str)  # 请求分片并行提取 (db_name, table_name)
+    estimate_requested = pyqtSignal(str)  # 请求估算提取耗时 (db_name)
+    incremental_dump_requested = pyqtSignal(str)  # 请求增量提取（只提取变化的表） (db_name)
+    
+    # 数据内容标签页中每张表预览的行数
+    DATA_PREVIEW_ROWS = 50
     
     def __init__(self, parent=None):
         super().__init__(parent)
-        # 存储提取的数据
-        self._extracted_data = {}  # {table_name: [rows]}
+        # 结果存储（由主窗口持有并通过 set_result_store 共享，面板只读取）
+        self.result_store = ResultStore()
         self._columns_data = {}    # {(db, table): [(col_name, col_type)]}
+        self._dump_estimates = {}  # {db（小写）: {table: DumpEstimate}}
         self.setup_ui()
     
     def setup_ui(self):
@@ -132,8 +141,15 @@ class ResultPanel(QWidget):
         
         self.table_tree = QTreeWidget()
         self.table_tree.setHeaderHidden(True)
+        # 第二列显示提取耗时估算
+        self.table_tree.setColumnCount(2)
+        self.table_tree.header().setStretchLastSection(False)
+        self.table_tree.header().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        self.table_tree.header().setSectionResizeMode(1, QHeaderView.ResizeMode.ResizeToContents)
         self.table_tree.itemClicked.connect(self._on_table_clicked)
         self.table_tree.itemDoubleClicked.connect(self._on_table_double_clicked)
+        self.table_tree.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
+        self.table_tree.customContextMenuRequested.connect(self._show_table_context_menu)
         table_layout.addWidget(self.table_tree)
         
         splitter.addWidget(table_widget)
@@ -210,6 +226,32 @@ class ResultPanel(QWidget):
             self.table_tree.addTopLevelItem(hint_item)
             return
         
+        tables = self.get_tables(db_name)
+        
+        if tables:
+            estimates = self._dump_estimates.get(db_name.lower(), {})
+            for table in tables:
+                item = QTreeWidgetItem([table])
+                estimate = estimates.get(table)
+                if estimate:
+                    item.setText(1, estimate.describe())
+                    item.setToolTip(0, estimate.details())
+                    item.setToolTip(1, estimate.details())
+                    item.setForeground(1, QColor(COLORS['text_secondary']))
+                self.table_tree.addTopLevelItem(item)
+            # 添加字段提示
+            hint_item = QTreeWidgetItem(["(点击左侧表名查看字段)", ""])
+            self.column_tree.addTopLevelItem(hint_item)
+        else:
+            # 没有表，显示提示
+            hint_item = QTreeWidgetItem(["(该数据库暂无表数据)"])
+            self.table_tree.addTopLevelItem(hint_item)
+    
+    def get_tables(self, db_name: str) -> list:
+        """获取数据库的表列表（与表树显示的匹配方式一致）"""
+        if not getattr(self, '_tables_data', None):
+            return []
+        
         # 查找该数据库的表 - 先尝试精确匹配
         tables = self._tables_data.get(db_name, [])
         
@@ -224,17 +266,7 @@ class ResultPanel(QWidget):
         if not tables and len(self._tables_data) == 1:
             tables = list(self._tables_data.values())[0]
         
-        if tables:
-            for table in tables:
-                item = QTreeWidgetItem([table])
-                self.table_tree.addTopLevelItem(item)
-            # 添加字段提示
-            hint_item = QTreeWidgetItem(["(点击左侧表名查看字段)", ""])
-            self.column_tree.addTopLevelItem(hint_item)
-        else:
-            # 没有表，显示提示
-            hint_item = QTreeWidgetItem(["(该数据库暂无表数据)"])
-            self.table_tree.addTopLevelItem(hint_item)
+        return list(tables)
     
     def _on_table_clicked(self, item, column):
         """表点击 - 更新字段列表显示该表的字段"""
@@ -306,14 +338,14 @@ class ResultPanel(QWidget):
             db_name = ""
         
         # 调试：打印可用的数据键
-        available_keys = list(self._extracted_data.keys()) if self._extracted_data else []
+        available_keys = self.result_store.table_keys()
         
         # 查找表数据 - 使用多种匹配方式
-        table_data = self._find_table_data(full_table_name, db_name, table_name)
+        table_key = self.result_store.find_table(full_table_name, db_name, table_name)
         
-        if table_data:
+        if table_key:
             # 显示数据详情对话框
-            dialog = DataDetailDialog(full_table_name, table_data, self)
+            dialog = DataDetailDialog(full_table_name, self.result_store, table_key, self)
             dialog.exec()
         else:
             # 检查是否有列信息
@@ -344,54 +376,6 @@ class ResultPanel(QWidget):
                 
                 QMessageBox.information(self, "提示", debug_info)
     
-    def _find_table_data(self, full_table_name: str, db_name: str, table_name: str):
-        """查找表数据 - 使用多种匹配方式"""
-        if not self._extracted_data:
-            return None
-        
-        # 1. 精确匹配
-        possible_keys = [
-            full_table_name,
-            table_name,
-            f"{db_name}.{table_name}" if db_name else table_name,
-            f"`{db_name}`.`{table_name}`" if db_name else f"`{table_name}`",
-        ]
-        
-        for key in possible_keys:
-            if key in self._extracted_data:
-                return self._extracted_data[key]
-        
-        # 2. 遍历所有键，查找包含表名的
-        for key, data in self._extracted_data.items():
-            # 提取键中的纯表名（去掉数据库前缀和引号）
-            clean_key = key.replace('`', '').replace("'", '').replace('"', '')
-            
-            # 如果键包含点号，提取表名部分
-            if '.' in clean_key:
-                key_table = clean_key.split('.')[-1]
-            else:
-                key_table = clean_key
-            
-            # 匹配表名
-            if key_table == table_name:
-                return data
-            
-            # 检查键是否以表名结尾
-            if key.endswith(table_name) or key.endswith(f".{table_name}"):
-                return data
-            
-            # 检查键中是否包含表名
-            if table_name in clean_key:
-                return data
-        
-        # 3. 如果都没找到，尝试模糊匹配（忽略大小写）
-        table_name_lower = table_name.lower()
-        for key, data in self._extracted_data.items():
-            if table_name_lower in key.lower():
-                return data
-        
-        return None
-    
     def _on_column_double_clicked(self, item, column):
         """字段双击 - 显示该字段所属表的数据"""
         col_name = item.text(0)
@@ -410,13 +394,14 @@ class ResultPanel(QWidget):
                 db_name = ""
             
             # 使用统一的查找方法
-            table_data = self._find_table_data(full_table_name, db_name, table_name)
+            table_key = self.result_store.find_table(full_table_name, db_name, table_name)
             
-            if table_data:
+            if table_key:
                 # 显示数据详情对话框
                 dialog = DataDetailDialog(
                     f"{full_table_name} (字段: {col_name})", 
-                    table_data, 
+                    self.result_store,
+                    table_key,
                     self
                 )
                 dialog.exec()
@@ -445,8 +430,48 @@ class ResultPanel(QWidget):
         dump_action.triggered.connect(lambda: self._request_dump(item.text(0)))
         menu.addAction(dump_action)
         
+        incremental_action = QAction("🔁 增量提取（只提取变化的表）", self)
+        incremental_action.triggered.connect(lambda: self.incremental_dump_requested.emit(item.text(0).strip()))
+        menu.addAction(incremental_action)
+        
+        estimate_action = QAction("⏱ 估算提取耗时", self)
+        estimate_action.triggered.connect(lambda: self.estimate_requested.emit(item.text(0).strip()))
+        menu.addAction(estimate_action)
+        
         menu.exec(self.db_tree.mapToGlobal(pos))
     
+    def _show_table_context_menu(self, pos):
+        """显示数据表右键菜单"""
+        item = self.table_tree.itemAt(pos)
+        if not item:
+            return
+        
+        full_table_name = item.text(0).strip()
+        # 跳过提示项
+        if not full_table_name or full_table_name.startswith(("(", "💡")):
+            return
+        
+        if "." in full_table_name:
+            db_name, table_name = full_table_name.rsplit(".", 1)
+        else:
+            table_name = full_table_name
+            db_item = self.db_tree.currentItem()
+            db_name = db_item.text(0).strip() if db_item else ""
+        
+        menu = QMenu(self)
+        
+        shard_action = QAction("🔀 分片并行提取...", self)
+        shard_action.setEnabled(bool(db_name))
+        shard_action.triggered.connect(lambda: self.sharded_dump_requested.emit(db_name, table_name))
+        menu.addAction(shard_action)
+        
+        estimate_action = QAction("⏱ 估算提取耗时", self)
+        estimate_action.setEnabled(bool(db_name))
+        estimate_action.triggered.connect(lambda: self.estimate_requested.emit(db_name))
+        menu.addAction(estimate_action)
+        
+        menu.exec(self.table_tree.mapToGlobal(pos))
+    
     def _request_tables(self, db_name):
         """请求获取表列表"""
         self.db_selected.emit(db_name)
@@ -457,23 +482,23 @@ class ResultPanel(QWidget):
     
     def _export_csv(self):
         """导出 CSV"""
-        if not self._extracted_data:
+        if not self.result_store.has_data():
             QMessageBox.warning(self, "警告", "当前没有已提取的数据可导出。")
             return
-            
+        
         from PyQt6.QtWidgets import QFileDialog
         
         # 选择保存目录
         dir_path = QFileDialog.getExistingDirectory(self, "选择保存 CSV 的目录")
         if not dir_path:
             return
-            
+        
         try:
             import csv
             import os
             
             count = 0
-            for table_name, rows in self._extracted_data.items():
+            for table_name in self.result_store.table_keys():
                 # 清理表名作为文件名
                 safe_name = "".join([c for c in table_name if c.isalpha() or c.isdigit() or c in (' ', '-', '_', '.')]).strip()
                 if not safe_name:
@@ -484,26 +509,25 @@ class ResultPanel(QWidget):
                 with open(file_path, 'w', newline='', encoding='utf-8-sig') as f:
                     writer = csv.writer(f)
                     
-                    # 尝试解析每一行
-                    for row in rows:
-                        if isinstance(row, str) and " | " in row:
-                            parts = [p.strip() for p in row.split(" | ")]
-                            writer.writerow(parts)
-                        else:
-                            writer.writerow([row])
+                    headers = self.result_store.get_headers(table_name)
+                    if headers:
+                        writer.writerow(headers)
+                    # 逐行写入，SQLite 表直接从文件游标读取
+                    for row in self.result_store.iter_rows(table_name):
+                        writer.writerow(row)
                 count += 1
-                
-            QMessageBox.information(self, "成功", f"成功导出 {count} 个表的 CSV 文件。")
             
+            QMessageBox.information(self, "成功", f"成功导出 {count} 个表的 CSV 文件。")
+        
         except Exception as e:
             QMessageBox.critical(self, "错误", f"导出失败: {str(e)}")
     
     def _export_json(self):
         """导出 JSON"""
-        if not self._extracted_data:
+        if not self.result_store.has_data():
             QMessageBox.warning(self, "警告", "当前没有已提取的数据可导出。")
             return
-            
+        
         from PyQt6.QtWidgets import QFileDialog
         import json
         
@@ -513,46 +537,36 @@ class ResultPanel(QWidget):
         )
         if not file_path:
             return
-            
+        
         try:
-            # 构造更结构化的数据
-            export_data = {}
-            for table_name, rows in self._extracted_data.items():
-                # 尝试解析
-                parsed_rows = []
-                headers = []
-                
-                for i, row in enumerate(rows):
-                    if isinstance(row, str) and " | " in row:
-                        parts = [p.strip() for p in row.split(" | ")]
-                        
-                        # 尝试识别第一行为表头
-                        if i == 0 and all(not p.isdigit() for p in parts):
-                            headers = parts
-                            continue
-                            
+            # 逐表逐行写入，避免在内存中构造完整的导出结构
+            with open(file_path, 'w', encoding='utf-8') as f:
+                f.write("{\n")
+                for t_index, table_name in enumerate(self.result_store.table_keys()):
+                    headers = self.result_store.get_headers(table_name)
+                    if t_index > 0:
+                        f.write(",\n")
+                    f.write(f"  {json.dumps(table_name, ensure_ascii=False)}: [")
+                    
+                    for r_index, parts in enumerate(self.result_store.iter_rows(table_name)):
                         if headers:
                             # 如果有表头，转为字典
-                            row_dict = {}
+                            row_data = {}
                             for j, val in enumerate(parts):
                                 if j < len(headers):
-                                    row_dict[headers[j]] = val
+                                    row_data[headers[j]] = val
                                 else:
-                                    row_dict[f"col_{j}"] = val
-                            parsed_rows.append(row_dict)
+                                    row_data[f"col_{j}"] = val
                         else:
                             # 没表头，转为列表
-                            parsed_rows.append(parts)
-                    else:
-                        parsed_rows.append(row)
-                
-                export_data[table_name] = parsed_rows
+                            row_data = parts
+                        f.write("," if r_index > 0 else "")
+                        f.write("\n    " + json.dumps(row_data, ensure_ascii=False))
+                    f.write("\n  ]")
+                f.write("\n}\n")
             
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(export_data, f, ensure_ascii=False, indent=2)
-                
             QMessageBox.information(self, "成功", "数据已成功导出为 JSON。")
-            
+        
         except Exception as e:
             QMessageBox.critical(self, "错误", f"导出失败: {str(e)}")
     
@@ -606,7 +620,7 @@ class ResultPanel(QWidget):
             pass  # 保留旧数据
         else:
             self._tables_data = cleaned_tables_data
-            
+        
         # 确保 databases 列表也经过处理
         cleaned_databases = [db.strip() for db in databases]
         
@@ -706,9 +720,42 @@ class ResultPanel(QWidget):
         """设置数据内容"""
         self.data_text.setPlainText(data)
     
-    def set_extracted_data(self, data_dict: dict):
-        """存储提取的数据"""
-        self._extracted_data = data_dict
+    def set_dump_estimates(self, db_name: str, estimates: dict):
+        """设置数据库各表的提取耗时估算（{table: DumpEstimate}），显示在表列表中"""
+        self._dump_estimates[db_name.lower()] = dict(estimates)
+        db_item = self.db_tree.currentItem()
+        if db_item and db_item.text(0).strip().lower() == db_name.lower():
+            self._update_tables_for_db(db_item.text(0).strip())
+    
+    def get_dump_estimate(self, db_name: str, table_name: str):
+        """获取表的提取耗时估算（未估算返回 None）"""
+        return self._dump_estimates.get(db_name.lower(), {}).get(table_name)
+    
+    def set_result_store(self, store: ResultStore):
+        """设置结果存储（查看、预览和导出都直接从存储读取）"""
+        self.result_store = store
+    
+    def refresh_data_preview(self):
+        """刷新数据内容预览（每张表只读取前 DATA_PREVIEW_ROWS 行）"""
+        store = self.result_store
+        data_text = []
+        for table_name in store.table_keys():
+            row_count = store.row_count(table_name)
+            data_text.append(f"========== 表: {table_name} ({row_count} 行) ==========")
+            if store.sqlite_missing(table_name):
+                data_text.append(f"(SQLite 文件已被删除，数据不可用: {store.get_sqlite_path(table_name)})")
+            elif store.is_sqlite(table_name):
+                data_text.append(f"(SQLite: {store.get_sqlite_path(table_name)})")
+            
+            headers = store.get_headers(table_name)
+            if headers:
+                data_text.append(" | ".join(headers))
+            for row in store.fetch_rows(table_name, 0, self.DATA_PREVIEW_ROWS):
+                data_text.append(" | ".join(row))
+            if row_count > self.DATA_PREVIEW_ROWS:
+                data_text.append(f"... 仅预览前 {self.DATA_PREVIEW_ROWS} 行，双击表名查看全部")
+            data_text.append("")
+        self.set_data("\n".join(data_text))
     
     def clear_all(self):
         """清空所有内容"""
@@ -717,8 +764,8 @@ class ResultPanel(QWidget):
         self.table_tree.clear()
         self.column_tree.clear()
         self.data_text.clear()
-        self._extracted_data = {}
         self._columns_data = {}
+        self._dump_estimates = {}
         self.update_stats()
     
     def _get_icon(self, icon_type: str):
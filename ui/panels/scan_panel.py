@@ -6,14 +6,18 @@
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QRadioButton,
     QPushButton, QComboBox, QButtonGroup, QCheckBox, QGridLayout,
-    QSpinBox, QFrame, QLineEdit
+    QSpinBox, QFrame, QLineEdit, QMessageBox
 )
 from PyQt6.QtCore import pyqtSignal, Qt
 
+from core.workflow import WORKFLOW_DIR, load_workflows
 from ..theme import COLORS
 from ..widgets.card_widget import CardWidget
 
 
+LEARNED_MODE_DESC = "Level 2, Risk 2 - 按历史扫描中各技术的成功率和耗时选择技术及顺序"
+
+
 class ScanPanel(QWidget):
     """扫描设置面板"""
     
@@ -22,6 +26,8 @@ class ScanPanel(QWidget):
     
     def __init__(self, parent=None):
         super().__init__(parent)
+        self._mode_desc_labels = {}  # {mode_id: 描述标签}
+        self._learned = None  # 历史学习推荐的技术（LearnedTechnique）
         self.setup_ui()
     
     def setup_ui(self):
@@ -44,6 +50,8 @@ class ScanPanel(QWidget):
             ("standard", "🔍 标准扫描", "Level 2, Risk 2 - 平衡速度和深度，推荐日常使用", False),
             ("deep", "🔬 深度扫描", "Level 5, Risk 3 - 全面深入扫描，适合关键目标", False),
             ("aggressive", "⚔️ 激进模式", "全部技术 + 绕过 WAF，最全面但可能触发防护", False),
+            ("learned", "🧠 历史学习", LEARNED_MODE_DESC, False),
+            ("workflow", "🧩 工作流", "按预定义的步骤自动执行：检测 → 按结果并发收集信息 → 提取", False),
             ("custom", "⚙️ 自定义", "手动配置所有参数", False),
         ]
         
@@ -51,6 +59,20 @@ class ScanPanel(QWidget):
             mode_widget = self._create_mode_option(mode_id, title, desc, checked)
             mode_layout.addWidget(mode_widget)
         
+        # 工作流选择（选中工作流模式时可用）
+        workflow_layout = QHBoxLayout()
+        workflow_layout.addWidget(QLabel("工作流:"))
+        self.workflow_combo = QComboBox()
+        self.workflow_combo.currentIndexChanged.connect(self._on_workflow_changed)
+        workflow_layout.addWidget(self.workflow_combo, 1)
+        self.workflow_reload_btn = QPushButton("🔄")
+        self.workflow_reload_btn.setFixedWidth(32)
+        self.workflow_reload_btn.setToolTip(f"重新加载工作流（自定义工作流放在 {WORKFLOW_DIR} 目录，每个 JSON 文件一个）")
+        self.workflow_reload_btn.clicked.connect(self.reload_workflows)
+        workflow_layout.addWidget(self.workflow_reload_btn)
+        mode_layout.addLayout(workflow_layout)
+        self.reload_workflows()
+        
         mode_card.add_layout(mode_layout)
         layout.addWidget(mode_card)
         
@@ -245,9 +267,63 @@ class ScanPanel(QWidget):
         limit_layout.addStretch()
         dump_grid.addLayout(limit_layout, 2, 0, 1, 3)
         
+        # SQLite 导出格式：数据直接写入文件，界面按需分页读取
+        self.sqlite_dump_check = QCheckBox("SQLite 格式导出 (--dump-format=SQLITE)")
+        self.sqlite_dump_check.setToolTip("提取的数据直接写入 SQLite 文件，结果查看和导出直接查询文件，适合大表")
+        dump_grid.addWidget(self.sqlite_dump_check, 3, 0, 1, 3)
+        
         dump_card.add_layout(dump_grid)
         layout.addWidget(dump_card)
         
+        # ==================== 自动枚举流水线卡片 ====================
+        pipeline_card = CardWidget("🔗 自动枚举流水线")
+        
+        pipeline_grid = QGridLayout()
+        pipeline_grid.setSpacing(8)
+        
+        self.pipeline_check = QCheckBox("启用（数据库 → 表 → 列 → 数据，自动执行下一阶段）")
+        self.pipeline_check.setToolTip("每个阶段结束后按筛选条件自动提交下一阶段的任务，所有任务复用同一会话，只检测一次注入")
+        self.pipeline_check.stateChanged.connect(self._on_pipeline_check_changed)
+        pipeline_grid.addWidget(self.pipeline_check, 0, 0, 1, 4)
+        
+        pipeline_grid.addWidget(QLabel("执行到:"), 1, 0)
+        self.pipeline_phase_combo = QComboBox()
+        self.pipeline_phase_combo.addItem("枚举表", "tables")
+        self.pipeline_phase_combo.addItem("枚举列", "columns")
+        self.pipeline_phase_combo.addItem("提取数据", "dump")
+        self.pipeline_phase_combo.setCurrentIndex(2)
+        pipeline_grid.addWidget(self.pipeline_phase_combo, 1, 1)
+        
+        self.pipeline_sysdb_check = QCheckBox("跳过系统库")
+        self.pipeline_sysdb_check.setChecked(True)
+        pipeline_grid.addWidget(self.pipeline_sysdb_check, 1, 2)
+        
+        self.pipeline_spin = QSpinBox()
+        self.pipeline_spin.setRange(1, 16)
+        self.pipeline_spin.setValue(2)
+        self.pipeline_spin.setPrefix("并发: ")
+        self.pipeline_spin.setToolTip("流水线同时执行的任务数（同时受队列全局并发限制）")
+        pipeline_grid.addWidget(self.pipeline_spin, 1, 3)
+        
+        filter_hint = "逗号分隔的通配符，! 开头表示排除，留空表示全部"
+        self.pipeline_filters = {}
+        for row, (key, label, placeholder) in enumerate([
+            ("db", "数据库:", "如 shop*,!test*"),
+            ("table", "表:", "如 *user*,admin*,order*"),
+            ("column", "列:", "如 *name*,*pass*,email（设置后只提取匹配的列）"),
+        ], start=2):
+            pipeline_grid.addWidget(QLabel(label), row, 0)
+            edit = QLineEdit()
+            edit.setPlaceholderText(placeholder)
+            edit.setToolTip(filter_hint)
+            pipeline_grid.addWidget(edit, row, 1, 1, 3)
+            self.pipeline_filters[key] = edit
+        
+        pipeline_card.add_layout(pipeline_grid)
+        layout.addWidget(pipeline_card)
+        self._on_pipeline_check_changed(self.pipeline_check.checkState().value)
+        self._update_workflow_state()
+        
         # 添加弹性空间
         layout.addStretch()
     
@@ -279,6 +355,7 @@ class ScanPanel(QWidget):
         desc_label.setObjectName("modeDesc")
         desc_label.setStyleSheet("font-size: 10px;")
         text_layout.addWidget(desc_label)
+        self._mode_desc_labels[mode_id] = desc_label
         
         layout.addLayout(text_layout)
         layout.addStretch()
@@ -287,10 +364,52 @@ class ScanPanel(QWidget):
     
     def _on_mode_changed(self, mode_id: str, checked: bool):
         """模式变化"""
+        self._update_workflow_state()
         if checked:
             self.mode_changed.emit(mode_id)
             self._apply_mode_preset(mode_id)
     
+    def _update_workflow_state(self):
+        """工作流选择只在工作流模式下可用（工作流模式下信息枚举选项由工作流决定）"""
+        enabled = hasattr(self, 'workflow_combo') and self.get_current_mode() == "workflow"
+        if hasattr(self, 'workflow_combo'):
+            self.workflow_combo.setEnabled(enabled)
+            self.workflow_reload_btn.setEnabled(enabled)
+        if hasattr(self, 'pipeline_check'):
+            self.pipeline_check.setEnabled(not enabled)
+    
+    def _on_workflow_changed(self, index: int):
+        """显示工作流说明和步骤"""
+        workflow = self.workflow_combo.itemData(index)
+        if workflow is None:
+            self.workflow_combo.setToolTip("")
+            return
+        steps = []
+        for node in workflow.nodes:
+            line = f"• {node.label}"
+            if node.needs:
+                line += f"（在 {', '.join(node.needs)} 之后）"
+            if node.when:
+                line += f" 条件: {' 且 '.join(node.when)}"
+            steps.append(line)
+        self.workflow_combo.setToolTip("\n".join(filter(None, [workflow.description, *steps])))
+    
+    def reload_workflows(self):
+        """重新加载内置和自定义工作流（保持当前选择）"""
+        current = self.workflow_combo.currentText()
+        workflows, errors = load_workflows()
+        self.workflow_combo.blockSignals(True)
+        self.workflow_combo.clear()
+        for workflow in workflows:
+            self.workflow_combo.addItem(workflow.name, workflow)
+        index = self.workflow_combo.findText(current)
+        self.workflow_combo.setCurrentIndex(max(index, 0))
+        self.workflow_combo.blockSignals(False)
+        self._on_workflow_changed(self.workflow_combo.currentIndex())
+        self._update_workflow_state()
+        if errors:
+            QMessageBox.warning(self, "工作流", "以下工作流文件无效，已跳过：\n" + "\n".join(errors))
+    
     def _on_string_check_changed(self, state):
         """字符串匹配变化"""
         self.string_input.setEnabled(state == Qt.CheckState.Checked.value)
@@ -307,6 +426,13 @@ class ScanPanel(QWidget):
         self.limit_start_spin.setEnabled(enabled)
         self.limit_stop_spin.setEnabled(enabled)
     
+    def _on_pipeline_check_changed(self, state):
+        """自动枚举流水线开关变化"""
+        enabled = state == Qt.CheckState.Checked.value
+        for widget in [self.pipeline_phase_combo, self.pipeline_sysdb_check, self.pipeline_spin,
+                       *self.pipeline_filters.values()]:
+            widget.setEnabled(enabled)
+    
     def _apply_mode_preset(self, mode_id: str):
         """应用模式预设"""
         presets = {
@@ -343,6 +469,10 @@ class ScanPanel(QWidget):
                 "dump": False
             },
         }
+        # 历史学习：信息枚举同标准扫描，技术使用推荐结果（样本不足时同标准扫描）
+        presets["learned"] = dict(presets["standard"])
+        if self._learned:
+            presets["learned"]["techs"] = list(self._learned.technique)
         
         if mode_id in presets:
             preset = presets[mode_id]
@@ -363,6 +493,25 @@ class ScanPanel(QWidget):
             self.columns_check.setChecked(preset["columns"])
             self.dump_check.setChecked(preset["dump"])
     
+    def set_learned_technique(self, learned, apply: bool = True):
+        """
+        更新历史学习推荐的技术（LearnedTechnique，样本不足时为 None）
+        
+        apply 为 True 且当前为历史学习模式时立即勾选推荐的技术
+        """
+        self._learned = learned
+        label = self._mode_desc_labels.get("learned")
+        if label:
+            if learned:
+                label.setText(f"推荐 {learned.describe()}")
+                label.setToolTip(learned.details())
+            else:
+                label.setText(f"{LEARNED_MODE_DESC}（历史样本不足，暂用标准扫描的技术）")
+                label.setToolTip("")
+        if apply and learned and self.get_current_mode() == "learned":
+            for code, check in self.tech_checks.items():
+                check.setChecked(code in learned.technique)
+    
     # ==================== 公共方法 ====================
     
     def get_level(self) -> int:
@@ -380,6 +529,10 @@ class ScanPanel(QWidget):
     def get_technique(self) -> str:
         """获取注入技术"""
         techs = [code for code, check in self.tech_checks.items() if check.isChecked()]
+        if self._learned and self.get_current_mode() == "learned":
+            # 按推荐顺序排列，手动追加的技术排在后面
+            order = self._learned.technique
+            techs.sort(key=lambda code: order.index(code) if code in order else len(order))
         return "".join(techs)
     
     def get_string_match(self) -> str:
@@ -439,6 +592,10 @@ class ScanPanel(QWidget):
     def get_dump_all(self) -> bool:
         return self.dump_all_check.isChecked()
     
+    def get_dump_format(self) -> str:
+        """获取导出格式（空字符串表示默认文本输出）"""
+        return "SQLITE" if self.sqlite_dump_check.isChecked() else ""
+    
     def get_search(self) -> tuple:
         """获取搜索配置 (是否搜索, 类型, 关键词)
         类型: 0=列名(-C), 1=表名(-T), 2=数据库名(-D)
@@ -455,6 +612,30 @@ class ScanPanel(QWidget):
             return True, self.limit_start_spin.value(), self.limit_stop_spin.value()
         return False, 0, 0
     
+    def get_pipeline_config(self):
+        """
+        获取自动枚举流水线配置（未启用时返回 None）
+        
+        返回:
+            {final_phase, db_pattern, table_pattern, column_pattern, exclude_system, max_concurrent}
+        """
+        if not self.pipeline_check.isChecked():
+            return None
+        return {
+            'final_phase': self.pipeline_phase_combo.currentData(),
+            'db_pattern': self.pipeline_filters['db'].text().strip(),
+            'table_pattern': self.pipeline_filters['table'].text().strip(),
+            'column_pattern': self.pipeline_filters['column'].text().strip(),
+            'exclude_system': self.pipeline_sysdb_check.isChecked(),
+            'max_concurrent': self.pipeline_spin.value(),
+        }
+    
+    def get_workflow(self):
+        """获取选中的工作流（非工作流模式时返回 None）"""
+        if self.get_current_mode() != "workflow":
+            return None
+        return self.workflow_combo.currentData()
+    
     def get_current_mode(self) -> str:
         """获取当前模式"""
         for btn in self.mode_group.buttons():
@@ -465,6 +646,7 @@ class ScanPanel(QWidget):
     def save_config(self, config) -> None:
         """保存配置"""
         config.set('Scan', 'mode', self.get_current_mode())
+        config.set('Scan', 'workflow', self.workflow_combo.currentText())
         config.set('Scan', 'level', str(self.level_combo.currentIndex()))
         config.set('Scan', 'risk', str(self.risk_combo.currentIndex()))
         config.set('Scan', 'verbose', str(self.verbose_combo.currentIndex()))
@@ -481,10 +663,22 @@ class ScanPanel(QWidget):
         config.set('Scan', 'tables', str(self.tables_check.isChecked()))
         config.set('Scan', 'columns', str(self.columns_check.isChecked()))
         config.set('Scan', 'dump', str(self.dump_check.isChecked()))
+        config.set('Scan', 'sqlite_dump', str(self.sqlite_dump_check.isChecked()))
+        
+        # 自动枚举流水线
+        config.set('Pipeline', 'enabled', str(self.pipeline_check.isChecked()))
+        config.set('Pipeline', 'final_phase', self.pipeline_phase_combo.currentData())
+        config.set('Pipeline', 'exclude_system', str(self.pipeline_sysdb_check.isChecked()))
+        config.set('Pipeline', 'max_concurrent', str(self.pipeline_spin.value()))
+        for key, edit in self.pipeline_filters.items():
+            config.set('Pipeline', f'{key}_pattern', edit.text().strip())
     
     def load_config(self, config) -> None:
         """加载配置"""
         # 加载模式
+        workflow_index = self.workflow_combo.findText(config.get('Scan', 'workflow', ''))
+        if workflow_index >= 0:
+            self.workflow_combo.setCurrentIndex(workflow_index)
         mode = config.get('Scan', 'mode', 'quick')
         for btn in self.mode_group.buttons():
             if btn.property("mode_id") == mode:
@@ -520,6 +714,17 @@ class ScanPanel(QWidget):
         self.tables_check.setChecked(config.get_bool('Scan', 'tables', False))
         self.columns_check.setChecked(config.get_bool('Scan', 'columns', False))
         self.dump_check.setChecked(config.get_bool('Scan', 'dump', False))
+        self.sqlite_dump_check.setChecked(config.get_bool('Scan', 'sqlite_dump', False))
+        
+        # 加载自动枚举流水线
+        self.pipeline_check.setChecked(config.get_bool('Pipeline', 'enabled', False))
+        phase_index = self.pipeline_phase_combo.findData(config.get('Pipeline', 'final_phase', 'dump'))
+        if phase_index >= 0:
+            self.pipeline_phase_combo.setCurrentIndex(phase_index)
+        self.pipeline_sysdb_check.setChecked(config.get_bool('Pipeline', 'exclude_system', True))
+        self.pipeline_spin.setValue(config.get_int('Pipeline', 'max_concurrent', 2))
+        for key, edit in self.pipeline_filters.items():
+            edit.setText(config.get('Pipeline', f'{key}_pattern', ''))
     
     def set_dump(self, checked: bool):
         """设置是否提取数据"""
@@ -6,7 +6,7 @@
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, 
     QPushButton, QComboBox, QTextEdit, QFileDialog, QCheckBox,
-    QGridLayout
+    QGridLayout, QSpinBox
 )
 from PyQt6.QtCore import pyqtSignal, Qt
 
@@ -85,6 +85,46 @@ class TargetPanel(QWidget):
         
         url_card.add_layout(file_layout)
         
+        # 批量文件拆分为并行任务
+        fanout_layout = QHBoxLayout()
+        
+        self.fanout_check = QCheckBox("拆分为并行任务（每行一个目标）")
+        self.fanout_check.setToolTip("每个目标单独排队执行，结果汇总到批量汇总表")
+        self.fanout_check.setEnabled(False)
+        self.fanout_check.stateChanged.connect(self._on_fanout_check_changed)
+        fanout_layout.addWidget(self.fanout_check)
+        
+        fanout_layout.addWidget(QLabel("并发:"))
+        self.fanout_spin = QSpinBox()
+        self.fanout_spin.setRange(1, 32)
+        self.fanout_spin.setValue(4)
+        self.fanout_spin.setToolTip("该批任务同时运行的最大数量（同时受队列全局并发限制）")
+        self.fanout_spin.setEnabled(False)
+        fanout_layout.addWidget(self.fanout_spin)
+        fanout_layout.addStretch()
+        
+        url_card.add_layout(fanout_layout)
+        
+        # 批量目标按端点聚类去重
+        cluster_layout = QHBoxLayout()
+        
+        self.cluster_check = QCheckBox("按端点聚类去重（协议+主机+路径+参数名）")
+        self.cluster_check.setToolTip("只有参数值不同的 URL 归为一类，每类只扫描少量代表目标；开始前显示精简结果")
+        self.cluster_check.setEnabled(False)
+        self.cluster_check.stateChanged.connect(self._on_cluster_check_changed)
+        cluster_layout.addWidget(self.cluster_check)
+        
+        cluster_layout.addWidget(QLabel("每类保留:"))
+        self.cluster_spin = QSpinBox()
+        self.cluster_spin.setRange(1, 20)
+        self.cluster_spin.setValue(1)
+        self.cluster_spin.setToolTip("每个端点保留的代表目标数（取最先出现的目标）")
+        self.cluster_spin.setEnabled(False)
+        cluster_layout.addWidget(self.cluster_spin)
+        cluster_layout.addStretch()
+        
+        url_card.add_layout(cluster_layout)
+        
         # 从请求包扫描（头注入检测）
         request_layout = QHBoxLayout()
         
@@ -189,6 +229,38 @@ class TargetPanel(QWidget):
         request_grid.addWidget(self.ua_combo, 3, 1, 1, 3)
         
         request_card.add_layout(request_grid)
+        
+        # 按参数拆分并行检测
+        param_split_layout = QHBoxLayout()
+        
+        self.param_split_check = QCheckBox("按参数拆分并行检测")
+        self.param_split_check.setToolTip(
+            "解析 URL、POST 数据和 Cookie 中的参数，每个参数单独一个 -p 检测任务并行执行\n"
+            "（已勾选指定参数时按指定的参数拆分；Cookie 参数仅在 --level >= 2 时检测）"
+        )
+        self.param_split_check.stateChanged.connect(self._on_param_split_check_changed)
+        param_split_layout.addWidget(self.param_split_check)
+        
+        param_split_layout.addWidget(QLabel("并发:"))
+        self.param_split_spin = QSpinBox()
+        self.param_split_spin.setRange(1, 32)
+        self.param_split_spin.setValue(4)
+        self.param_split_spin.setToolTip("同时检测的参数数（同时受队列全局并发限制）")
+        self.param_split_spin.setEnabled(False)
+        param_split_layout.addWidget(self.param_split_spin)
+        
+        param_split_layout.addWidget(QLabel("发现注入后停止:"))
+        self.param_stop_spin = QSpinBox()
+        self.param_stop_spin.setRange(0, 99)
+        self.param_stop_spin.setValue(1)
+        self.param_stop_spin.setSpecialValueText("不停止")
+        self.param_stop_spin.setSuffix(" 个")
+        self.param_stop_spin.setToolTip("确认指定数量的注入参数后取消其余参数的检测任务（0 表示全部检测完）")
+        self.param_stop_spin.setEnabled(False)
+        param_split_layout.addWidget(self.param_stop_spin)
+        param_split_layout.addStretch()
+        
+        request_card.add_layout(param_split_layout)
         layout.addWidget(request_card)
         
         # 添加弹性空间
@@ -220,11 +292,29 @@ class TargetPanel(QWidget):
         enabled = state == Qt.CheckState.Checked.value
         self.file_input.setEnabled(enabled)
         self.browse_btn.setEnabled(enabled)
+        self.fanout_check.setEnabled(enabled)
+        self.fanout_spin.setEnabled(enabled and self.fanout_check.isChecked())
+        self.cluster_check.setEnabled(enabled)
+        self.cluster_spin.setEnabled(enabled and self.cluster_check.isChecked())
         self.url_input.setEnabled(not enabled and not self.request_check.isChecked())
         # 互斥：关闭请求包模式
         if enabled:
             self.request_check.setChecked(False)
     
+    def _on_fanout_check_changed(self, state):
+        """批量拆分复选框变化"""
+        self.fanout_spin.setEnabled(state == Qt.CheckState.Checked.value and self.file_check.isChecked())
+    
+    def _on_cluster_check_changed(self, state):
+        """端点聚类复选框变化"""
+        self.cluster_spin.setEnabled(state == Qt.CheckState.Checked.value and self.file_check.isChecked())
+    
+    def _on_param_split_check_changed(self, state):
+        """按参数拆分复选框变化"""
+        enabled = state == Qt.CheckState.Checked.value
+        self.param_split_spin.setEnabled(enabled)
+        self.param_stop_spin.setEnabled(enabled)
+    
     def _on_request_check_changed(self, state):
         """请求包模式切换"""
         enabled = state == Qt.CheckState.Checked.value
@@ -304,6 +394,34 @@ class TargetPanel(QWidget):
         """是否为文件模式"""
         return self.file_check.isChecked()
     
+    def is_fanout_mode(self) -> bool:
+        """批量文件是否拆分为并行任务"""
+        return self.file_check.isChecked() and self.fanout_check.isChecked()
+    
+    def get_fanout_concurrency(self) -> int:
+        """获取批量拆分的并发数"""
+        return self.fanout_spin.value()
+    
+    def is_cluster_mode(self) -> bool:
+        """批量文件是否按端点聚类去重"""
+        return self.file_check.isChecked() and self.cluster_check.isChecked()
+    
+    def get_cluster_keep(self) -> int:
+        """获取每个端点保留的代表目标数"""
+        return self.cluster_spin.value()
+    
+    def is_param_split_mode(self) -> bool:
+        """是否按参数拆分并行检测（批量文件模式下不可用）"""
+        return self.param_split_check.isChecked() and not self.file_check.isChecked()
+    
+    def get_param_split_concurrency(self) -> int:
+        """获取按参数拆分的并发数"""
+        return self.param_split_spin.value()
+    
+    def get_param_stop_after(self) -> int:
+        """获取确认多少个注入参数后停止（0 表示不停止）"""
+        return self.param_stop_spin.value()
+    
     def is_request_mode(self) -> bool:
         """是否为请求包模式"""
         return self.request_check.isChecked()
@@ -0,0 +1,113 @@
+"""
+负载曲线组件
+绘制自适应并发调节的采样：CPU 负载、内存占用、事件循环延迟和并发上限
+"""
+
+from collections import deque
+
+from PyQt6.QtWidgets import QWidget
+from PyQt6.QtCore import Qt, QPointF
+from PyQt6.QtGui import QPainter, QColor, QPen, QPolygonF
+
+from ..theme import COLORS
+
+
+class LoadChart(QWidget):
+    """负载曲线组件"""
+    
+    # 显示的采样点数
+    MAX_POINTS = 180
+    
+    # (字段, 图例, 颜色)；百分比曲线按 0-100 绘制
+    SERIES = [
+        ('cpu', "CPU", 'accent_blue'),
+        ('memory', "内存", 'accent_purple'),
+        ('lag', "延迟", 'accent_orange'),
+    ]
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._samples = deque(maxlen=self.MAX_POINTS)
+        self._max_jobs = 1
+        self.setMinimumHeight(110)
+    
+    def add_sample(self, sample, lag_high_ms: float, max_jobs: int):
+        """
+        添加一个 GovernorSample
+        
+        参数:
+            lag_high_ms: 延迟高水位，延迟曲线以其 2 倍为满刻度
+            max_jobs: 并发上限的调节范围上限，作为并发曲线的满刻度
+        """
+        lag = min(100.0, sample.lag_ms / max(1.0, lag_high_ms * 2) * 100)
+        self._samples.append({
+            'cpu': sample.cpu,
+            'memory': sample.memory,
+            'lag': lag,
+            'limit': sample.limit,
+            'running': sample.running,
+            'action': bool(sample.action),
+        })
+        self._max_jobs = max(1, max_jobs)
+        self.update()
+    
+    def clear(self):
+        self._samples.clear()
+        self.update()
+    
+    def paintEvent(self, event):
+        """绘制组件"""
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        
+        left, top = 6, 18
+        width = self.width() - left * 2
+        height = self.height() - top - 6
+        painter.fillRect(left, top, width, height, QColor(COLORS['bg_tertiary']))
+        painter.setPen(QPen(QColor(COLORS['border']), 1))
+        painter.drawRect(left, top, width, height)
+        
+        # 图例
+        x = left
+        painter.setPen(QColor(COLORS['text_secondary']))
+        for _key, label, color in self.SERIES + [('limit', "并发上限", 'accent_green')]:
+            painter.fillRect(x, 5, 10, 8, QColor(COLORS[color]))
+            painter.drawText(x + 14, 13, label)
+            x += 24 + painter.fontMetrics().horizontalAdvance(label)
+        
+        if len(self._samples) < 2:
+            painter.drawText(left + 8, top + height // 2, "启用自适应并发后显示本机负载曲线")
+            return
+        
+        step = width / (self.MAX_POINTS - 1)
+        offset = self.MAX_POINTS - len(self._samples)
+        
+        def point(index, ratio):
+            return QPointF(left + (offset + index) * step, top + height - ratio * height)
+        
+        # 调节动作竖线
+        painter.setPen(QPen(QColor(COLORS['text_muted']), 1, Qt.PenStyle.DotLine))
+        for index, sample in enumerate(self._samples):
+            if sample['action']:
+                x = left + (offset + index) * step
+                painter.drawLine(QPointF(x, top), QPointF(x, top + height))
+        
+        for key, _label, color in self.SERIES:
+            line = QPolygonF()
+            for index, sample in enumerate(self._samples):
+                if sample[key] is not None:
+                    line.append(point(index, sample[key] / 100))
+            painter.setPen(QPen(QColor(COLORS[color]), 1.5))
+            painter.drawPolyline(line)
+        
+        # 并发上限阶梯线
+        steps = QPolygonF()
+        previous = None
+        for index, sample in enumerate(self._samples):
+            current = point(index, min(1.0, sample['limit'] / self._max_jobs))
+            if previous is not None:
+                steps.append(QPointF(current.x(), previous.y()))
+            steps.append(current)
+            previous = current
+        painter.setPen(QPen(QColor(COLORS['accent_green']), 2))
+        painter.drawPolyline(steps)
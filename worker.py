@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SQLMap GUI v2 - 远程执行节点
+无界面运行，连接到界面端的执行节点服务，执行分配来的扫描任务；
+或者从共享任务队列数据库领取任务执行
+
+用法:
+    python worker.py --host 192.168.1.10 --port 8765 --capacity 2 --token <令牌>
+    python worker.py --shared-db /srv/sqlmap/queue.db --capacity 4
+"""
+
+import argparse
+import os
+import signal
+import sys
+
+# 确保导入路径正确
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, current_dir)
+
+from PyQt6.QtCore import QCoreApplication, QTimer
+
+from core.job_scheduler import JobScheduler
+from core.shared_queue import DEFAULT_LEASE_SECONDS, SharedJobQueue, SharedQueueAgent
+from core.sqlmap_engine import SqlmapFinder
+from core.worker_agent import WorkerAgent
+from core.worker_protocol import DEFAULT_PORT
+
+
+def _create_shared_agent(args, sqlmap_path: str) -> SharedQueueAgent:
+    """共享任务队列模式：本地调度器执行从共享队列领取的任务"""
+    scheduler = JobScheduler(sqlmap_path, max_concurrent=max(1, args.capacity), per_host_limit=max(1, args.capacity))
+    queue = SharedJobQueue(args.shared_db)
+    agent = SharedQueueAgent(scheduler, queue, args.lease, owner=f"{args.name}:{os.getpid()}" if args.name else "")
+    scheduler.setParent(agent)
+    
+    def report(job_id: int, return_code: int):
+        job = scheduler.get_job(job_id)
+        print(f"[执行节点] 任务 {job.scan_mode if job else job_id} 结束，返回码 {return_code}", flush=True)
+        # 等共享队列写回结果后再移除已结束的任务
+        QTimer.singleShot(0, scheduler.clear_finished)
+    
+    scheduler.job_finished.connect(report)
+    return agent
+
+
+def main():
+    """程序入口"""
+    parser = argparse.ArgumentParser(description="SQLMap GUI v2 远程执行节点")
+    parser.add_argument("--host", default="127.0.0.1", help="界面端地址（默认 127.0.0.1）")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"界面端端口（默认 {DEFAULT_PORT}）")
+    parser.add_argument("--name", default="", help="节点名称（默认为主机名）")
+    parser.add_argument("--capacity", type=int, default=2, help="同时执行的任务数（默认 2）")
+    parser.add_argument("--token", default=os.environ.get("SQLMAP_WORKER_TOKEN", ""),
+                        help="连接令牌，与界面端设置一致（也可通过环境变量 SQLMAP_WORKER_TOKEN 设置）")
+    parser.add_argument("--sqlmap", default="", help="本机 sqlmap.py 的路径（默认自动查找）")
+    parser.add_argument("--work-dir", default="", help="任务文件和 sqlmap 输出目录（默认使用临时目录）")
+    parser.add_argument("--shared-db", default="", help="共享任务队列数据库路径（指定时从该队列领取任务，不连接界面端）")
+    parser.add_argument("--lease", type=int, default=DEFAULT_LEASE_SECONDS,
+                        help=f"共享任务队列的租约时长，秒（默认 {DEFAULT_LEASE_SECONDS}）")
+    args = parser.parse_args()
+    
+    sqlmap_path = args.sqlmap or SqlmapFinder.find_sqlmap()
+    if not sqlmap_path or not os.path.isfile(sqlmap_path):
+        print("[错误] 未找到 sqlmap.py，请使用 --sqlmap 指定路径")
+        sys.exit(1)
+    
+    app = QCoreApplication(sys.argv)
+    app.setApplicationName("SQLMap GUI v2 Worker")
+    
+    if args.shared_db:
+        agent = _create_shared_agent(args, sqlmap_path)
+    else:
+        agent = WorkerAgent(args.host, args.port, sqlmap_path, name=args.name, capacity=args.capacity,
+                            token=args.token, work_dir=args.work_dir)
+        agent.refused.connect(lambda _reason: app.exit(1))
+    agent.message.connect(lambda text: print(f"[执行节点] {text}", flush=True))
+    
+    # Ctrl+C 时停止任务后退出（定时器让 Python 有机会处理信号）
+    def shutdown(*_args):
+        agent.stop()
+        QTimer.singleShot(500, app.quit)
+    
+    signal.signal(signal.SIGINT, shutdown)
+    signal.signal(signal.SIGTERM, shutdown)
+    timer = QTimer()
+    timer.timeout.connect(lambda: None)
+    timer.start(200)
+    
+    agent.start()
+    sys.exit(app.exec())
+
+
+if __name__ == "__main__":
+    main()